@@ -0,0 +1,93 @@
+import sys
+import os
+import time
+import argparse
+import statistics
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.adapters.duckdb_adapter import DuckDBAdapter
+
+TENANT = "tenant_123"
+# Exploratory questions over the whole year
+QUERIES = {
+    "sales by category": (
+        "SELECT p.category, SUM(s.net_sales) AS net_sales FROM fct_sales s "
+        "JOIN dim_product p ON p.product_id = s.product_id GROUP BY 1 ORDER BY 2 DESC LIMIT 100"
+    ),
+    "orders by region": (
+        "SELECT d.region, COUNT(*) AS orders, AVG(s.net_sales) AS avg_ticket FROM fct_sales s "
+        "JOIN dim_store d ON d.store_id = s.store_id GROUP BY 1 ORDER BY 1 LIMIT 100"
+    ),
+    "monthly units": (
+        "SELECT DATE_TRUNC('month', order_date) AS month, SUM(quantity) AS units FROM fct_sales "
+        "GROUP BY 1 ORDER BY 1 LIMIT 100"
+    ),
+}
+
+
+def build(scale: int) -> DuckDBAdapter:
+    """The fixture data repeated `scale` times (with shifted amounts, so copies are not identical)."""
+    db = DuckDBAdapter()
+    db.load_parquet("dim_product", "data/dim_product.parquet")
+    db.load_parquet("dim_store", "data/dim_store.parquet")
+    db.conn.execute(f"""
+        CREATE TABLE fct_sales AS
+        SELECT f.* REPLACE (
+            f.order_id || '-' || CAST(k AS VARCHAR) AS order_id,
+            f.net_sales * (0.5 + random()) AS net_sales,
+            f.quantity + CAST(k % 3 AS BIGINT) AS quantity
+        )
+        FROM read_parquet('data/fct_sales.parquet') f, range({scale}) t(k)
+    """)
+    return db
+
+
+def timed(run, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = run()
+        times.append((time.perf_counter() - start) * 1000)
+    return out, statistics.median(times)
+
+
+def worst_error(exact, approx, key: str, value: str) -> float:
+    """Largest relative error of `value` over the groups of the exact result."""
+    merged = exact.merge(approx, on=key, how="left", suffixes=("", "_approx"))
+    errors = (merged[f"{value}_approx"] - merged[value]).abs() / merged[value].abs()
+    return float(errors.fillna(1.0).max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Approximate (sampled) execution: latency vs accuracy.")
+    parser.add_argument("--scale", type=int, default=200, help="Copies of the 18k-row fixture in fct_sales")
+    parser.add_argument("--samples", default="1,5,10,25", help="Sample percents to compare")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = build(args.scale)
+    rows = db.conn.execute("SELECT COUNT(*) FROM fct_sales").fetchone()[0]
+    print(f"fct_sales: {rows:,} rows (median of {args.repeat} runs)")
+    print(f"{'query':<18} {'mode':>8} {'ms':>8} {'speedup':>8} {'max err':>8} {'bound':>8}")
+
+    for name, sql in QUERIES.items():
+        exact, exact_ms = timed(lambda: db.execute_query(sql, tenant_id=TENANT), args.repeat)
+        # First column is the group, second the estimated measure
+        key, value = exact.columns[0], exact.columns[1]
+        print(f"{name:<18} {'exact':>8} {exact_ms:8.2f} {'':>8} {'':>8} {'':>8}")
+        for percent in (float(p) for p in args.samples.split(",")):
+            (approx, info), ms = timed(
+                lambda: db.execute_approximate(sql, tenant_id=TENANT, sample_percent=percent), args.repeat
+            )
+            error = worst_error(exact, approx, key, value)
+            bound = info["relative_error"].get(value) if info else None
+            print(
+                f"{'':<18} {percent:7g}% {ms:8.2f} {exact_ms / ms:7.1f}x {error:8.2%} "
+                f"{(f'{bound:.2%}' if bound is not None else '-'):>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import sys
+import os
+import json
+import time
+import argparse
+import statistics
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.bootstrap import build_database
+from src.core.catalog import IntentCatalog
+from src.core.context import SecurityContext
+from src.core.pipeline import CopilotPipeline
+from src.core.planner import Planner
+from src.core.router import Router
+from src.core.sql_generator import SQLGenerator
+from src.core.types import Plan
+from src.core.utils import PromptLoader
+from src.core.validator import Validator
+
+FIRST = "Show monthly net sales for H1 2024"
+FOLLOWUPS = ["now break that down by region", "same but for Q3", "and weekly", "now by category"]
+
+PLAN = {
+    "intent_id": "net_sales",
+    "tables": ["fct_sales"],
+    "measures": [{"name": "net_sales", "table": "fct_sales", "column": "net_sales", "unit": "USD", "aggregation": "SUM"}],
+    "dimensions": [{"name": "month", "table": "fct_sales", "column": "order_date", "type": "time"}],
+    "filters": [{"field": "order_date", "operator": "BETWEEN", "value": ["2024-01-01", "2024-06-30"], "source": "user_query"}],
+    "time_window": {"grain": "month", "start": "2024-01-01", "end": "2024-06-30"},
+    "limits": {"rows": 1000},
+}
+SQL = (
+    "SELECT DATE_TRUNC('month', order_date) AS month, SUM(net_sales) AS net_sales FROM fct_sales "
+    "WHERE tenant_id = 'tenant_123' AND order_date BETWEEN '2024-01-01' AND '2024-06-30' GROUP BY 1 ORDER BY 1 LIMIT 1000"
+)
+
+
+class BenchSettings:
+    DUCKDB_READ_ONLY = False
+    DATA_DIR = "data"
+
+
+class SimulatedLLM:
+    """Canned router / planner / SQL responses after a fixed per-call latency."""
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.calls = 0
+
+    def generate_content(self, prompt, system_instruction=None, temperature=0.0, response_schema=None):
+        self.calls += 1
+        time.sleep(self.latency_s)
+        if response_schema and "route" in response_schema.get("properties", {}):
+            return json.dumps({"route": "sql", "reason": "analytics question"})
+        if response_schema:
+            return json.dumps(PLAN)
+        return SQL
+
+    def generate_content_stream(self, prompt, system_instruction=None, temperature=0.0, response_schema=None):
+        yield self.generate_content(prompt, system_instruction, temperature, response_schema)
+
+
+def run_session(pipeline: CopilotPipeline, ctx: SecurityContext, use_followups: bool):
+    previous, timings = None, []
+    for question in [FIRST] + FOLLOWUPS:
+        start = time.perf_counter()
+        events = {e["event"]: e for e in pipeline.ask(question, ctx, previous_plan=previous if use_followups else None)}
+        timings.append((time.perf_counter() - start) * 1000)
+        assert events["answer"]["data"]["status"] == "complete", events["answer"]
+        previous = Plan(**events["plan"]["data"])
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-turn latency: full re-planning vs follow-up plan deltas.")
+    parser.add_argument("--llm-latency-ms", type=float, default=400.0)
+    parser.add_argument("--sessions", type=int, default=3)
+    args = parser.parse_args()
+
+    db = build_database(BenchSettings)
+    llm = SimulatedLLM(args.llm_latency_ms / 1000)
+    loader = PromptLoader("prompts")
+    pipeline = CopilotPipeline(
+        Router(llm, loader), Planner(llm, loader), SQLGenerator(llm), Validator(db=db), db, catalog=IntentCatalog()
+    )
+    ctx = SecurityContext(tenant_id="tenant_123", user_id="bench", role="admin")
+
+    print(f"{len(FOLLOWUPS)} follow-ups per session, simulated LLM latency {args.llm_latency_ms:.0f} ms/call")
+    for name, use_followups in (("full re-planning", False), ("plan deltas", True)):
+        llm.calls = 0
+        turns = [t for _ in range(args.sessions) for t in run_session(pipeline, ctx, use_followups)[1:]]
+        calls = llm.calls / args.sessions
+        print(f"  {name:<18} follow-up turn {statistics.mean(turns):8.1f} ms avg   {calls:4.1f} LLM calls/session")
+
+
+if __name__ == "__main__":
+    main()
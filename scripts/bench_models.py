@@ -0,0 +1,96 @@
+import sys
+import os
+import json
+import time
+import argparse
+from typing import Any, Callable, Dict, Optional
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pydantic import BaseModel
+from src.core.types import Plan, RouterOutput, Trace, dump_json, json_schema, orjson
+
+# What the planner streams back for a typical question
+PLAN_JSON = json.dumps({
+    "intent_id": "net_sales",
+    "tables": ["fct_sales", "dim_store"],
+    "measures": [{"name": "net_sales", "table": "fct_sales", "column": "net_sales", "unit": "USD", "aggregation": "SUM"}],
+    "dimensions": [
+        {"name": "region", "table": "dim_store", "column": "region", "type": "geography"},
+        {"name": "week", "table": "fct_sales", "column": "order_date", "type": "time"},
+    ],
+    "filters": [
+        {"field": "order_date", "operator": "BETWEEN", "value": ["2024-07-01", "2024-09-30"], "source": "user_query"},
+        {"field": "returns", "operator": "=", "value": "0", "source": "user_query"},
+    ],
+    "time_window": {"grain": "week", "start": "2024-07-01", "end": "2024-09-30"},
+    "limits": {"rows": 1000, "categories": 5},
+    "viz_hint": {"type": "line", "x_axis": "week", "y_axis": "net_sales", "series": "region"},
+    "needs_disambiguation": False,
+    "reasoning": "Weekly net sales by region for Q3, returns excluded, top 5.",
+})
+
+
+class ValidatedTrace(BaseModel):
+    """The trace as a validated model, for comparison with the slotted Trace."""
+    user_query: str
+    route: str
+    plan: Optional[Plan] = None
+    sql: Optional[str] = None
+    latency_ms: float
+    time_to_first_decision_ms: Optional[float] = None
+    cost_estimate_usd: float
+    followup: bool = False
+    profile: Optional[Dict[str, Any]] = None
+    repair: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def per_call_us(run: Callable[[], Any], repeat: int) -> float:
+    run()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request overhead of the core models (schemas, parsing, dumps).")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    plan = Plan.model_validate_json(PLAN_JSON)
+    trace_args = dict(
+        user_query="Show weekly revenue growth for Q3 by region", route="sql", plan=plan, sql="SELECT 1",
+        latency_ms=812.5, cost_estimate_usd=0.0004,
+    )
+    # (stage, before, after); every request does each stage about once (schemas: router + planner)
+    stages = [
+        ("response schemas",
+         lambda: (RouterOutput.model_json_schema(), Plan.model_json_schema()),
+         lambda: (json_schema(RouterOutput), json_schema(Plan))),
+        ("plan from JSON",
+         lambda: Plan(**json.loads(PLAN_JSON)),
+         lambda: Plan.model_validate_json(PLAN_JSON)),
+        ("plan event dump",
+         lambda: json.dumps({"event": "plan", "data": plan.model_dump()}, default=str),
+         lambda: dump_json({"event": "plan", "data": plan.model_dump()})),
+        ("trace event",
+         lambda: json.dumps(ValidatedTrace(**trace_args).model_dump(), default=str),
+         lambda: dump_json(Trace(**trace_args).model_dump())),
+    ]
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}; {args.repeat} calls each")
+    print(f"{'stage':<18} {'before us':>10} {'after us':>10} {'speedup':>8}")
+    total_before = total_after = 0.0
+    for name, before, after in stages:
+        b, a = per_call_us(before, args.repeat), per_call_us(after, args.repeat)
+        total_before += b
+        total_after += a
+        print(f"{name:<18} {b:10.1f} {a:10.1f} {b / a:7.1f}x")
+    print(f"{'per request':<18} {total_before:10.1f} {total_after:10.1f} {total_before / total_after:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+# Add project root to path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+ENTRY_MODULES = ["src.core.pipeline", "src.bootstrap", "src.api.server"]
+HEAVY_MODULES = ["google.generativeai", "duckdb", "sqlglot", "pandas"]
+
+# Runs in a fresh interpreter: time until build_pipeline returns, then until data is loaded
+COLD_START_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from src.bootstrap import build_pipeline
+pipeline = build_pipeline(api_key="bench", warm_in_background={background})
+ready_ms = (time.perf_counter() - start) * 1000
+pipeline.wait_for_data()
+print(json.dumps({{
+    "pipeline_ready_ms": ready_ms,
+    "data_ready_ms": (time.perf_counter() - start) * 1000,
+    "heavy_loaded_at_ready": {heavy},
+}}))
+"""
+
+
+def import_profile(module: str) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """
+    Imports `module` in a fresh interpreter under `-X importtime`.
+    Returns:
+        (total_ms, [(package, self_ms)] heaviest first, heavy modules loaded)
+    """
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    packages: Dict[str, float] = {}
+    total_ms = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        # Attribute each module's own time to its top-level package
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1000
+        if name == module:
+            total_ms = int(cumulative) / 1000
+
+    heaviest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return total_ms, heaviest, loaded
+
+
+def cold_start(background: bool) -> Dict[str, float]:
+    heavy = f"[m for m in {HEAVY_MODULES!r} if m in sys.modules]"
+    code = COLD_START_SNIPPET.format(background=background, heavy=heavy)
+    # GeminiAdapter needs a key to construct but makes no calls here
+    env = {**os.environ, "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "bench")}
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, env=env, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and cold start of the entry points.")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail if importing any entry module takes longer than this.")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    over_budget = []
+    print("Import time (python -X importtime, fresh interpreter)")
+    for module in ENTRY_MODULES:
+        total_ms, heaviest, loaded = import_profile(module)
+        print(f"  {module:<20} {total_ms:8.1f} ms   heavy loaded: {', '.join(loaded) or '-'}")
+        for name, ms in heaviest[:args.top]:
+            print(f"      {name:<40} {ms:8.1f} ms")
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            over_budget.append(module)
+
+    print("\nCold start (build_pipeline -> first query possible)")
+    for background in (False, True):
+        result = cold_start(background)
+        mode = "background warm-up" if background else "eager load"
+        print(
+            f"  {mode:<20} pipeline ready {result['pipeline_ready_ms']:8.1f} ms"
+            f"   data ready {result['data_ready_ms']:8.1f} ms"
+        )
+
+    if over_budget:
+        print(f"\n❌ Over the {args.budget_ms:.0f} ms import budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
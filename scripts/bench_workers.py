@@ -0,0 +1,100 @@
+import sys
+import os
+import time
+import pickle
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+from src.core.fingerprint import fingerprint_sql
+from src.core.result_shaping import shape_result
+from src.core.validator import Validator
+from src.core.workers import CPUWorkerPool, to_ipc, from_ipc
+
+SQL = """
+SELECT p.category, s.store_id, DATE_TRUNC('month', s.order_date) AS month,
+       SUM(s.net_sales) AS net_sales, SUM(s.quantity) AS units
+FROM fct_sales s
+JOIN dim_product p ON p.product_id = s.product_id
+WHERE s.tenant_id = 'tenant_123' AND s.order_date >= '2024-01-01'
+GROUP BY 1, 2, 3 ORDER BY 4 DESC LIMIT 1000
+"""
+
+
+def make_result(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "category": rng.choice(["Electronics", "Clothing", "Home", "Toys", "Sports"], rows),
+        "store_id": rng.integers(0, 500, rows),
+        "month": pd.date_range("2024-01-01", periods=rows, freq="min"),
+        "net_sales": rng.random(rows) * 1000,
+        "units": rng.integers(1, 20, rows),
+    })
+
+
+def bench_serialization(rows_list):
+    print("Serialization round trip (DataFrame -> bytes -> DataFrame)")
+    for rows in rows_list:
+        df = make_result(rows)
+        for name, dump, load in (
+            ("pickle", lambda d: pickle.dumps(d, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads),
+            ("arrow ipc", to_ipc, from_ipc),
+        ):
+            start = time.perf_counter()
+            payload = dump(df)
+            load(payload)
+            ms = (time.perf_counter() - start) * 1000
+            print(f"  {rows:>8} rows  {name:<10} {ms:8.2f} ms  {len(payload) / 1e6:7.2f} MB")
+
+
+def request_in_thread(validator: Validator, df: pd.DataFrame):
+    validator.validate(SQL, tenant_id="tenant_123")
+    fingerprint_sql(SQL)
+    shape_result(df)
+
+
+def request_in_pool(pool: CPUWorkerPool, df: pd.DataFrame):
+    pool.validate(SQL, tenant_id="tenant_123")
+    pool.fingerprint(SQL)
+    pool.shape_result(df)
+
+
+def bench_throughput(requests: int, workers: int, rows: int):
+    df = make_result(rows)
+    print(f"\nThroughput: {requests} requests (validate + fingerprint + shape {rows} rows), {workers} concurrent")
+
+    validator = Validator()
+    with ThreadPoolExecutor(workers) as threads:
+        start = time.perf_counter()
+        list(threads.map(lambda _: request_in_thread(validator, df), range(requests)))
+        elapsed = time.perf_counter() - start
+    print(f"  threads (GIL)      {requests / elapsed:8.1f} req/s")
+
+    pool = CPUWorkerPool(workers)
+    try:
+        with ThreadPoolExecutor(workers) as threads:
+            start = time.perf_counter()
+            list(threads.map(lambda _: request_in_pool(pool, df), range(requests)))
+            elapsed = time.perf_counter() - start
+        print(f"  process pool       {requests / elapsed:8.1f} req/s")
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CPU worker pool against in-thread execution.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    bench_serialization([1_000, 100_000, 1_000_000])
+    bench_throughput(args.requests, args.workers, args.rows)
+
+
+if __name__ == "__main__":
+    main()
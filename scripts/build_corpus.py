@@ -0,0 +1,28 @@
+import sys
+import os
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.eval.corpus import expand_corpus, write_shards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Expand the catalog into a sharded, labelled eval / load-test corpus.")
+    parser.add_argument("--out", default="eval/corpus")
+    parser.add_argument("--catalog-dir", default="catalog")
+    parser.add_argument("--shard-size", type=int, default=1000)
+    parser.add_argument("--sample", type=float, default=1.0, help="Fraction of generated cases to keep")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    manifest = write_shards(
+        expand_corpus(args.catalog_dir, sample=args.sample, seed=args.seed), args.out, shard_size=args.shard_size
+    )
+    routes = ", ".join(f"{route}={n}" for route, n in sorted(manifest["routes"].items()))
+    print(f"Wrote {manifest['cases']} cases in {len(manifest['shards'])} shards to {args.out} ({routes})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.adapters.duckdb_adapter import DuckDBAdapter
+from src.bootstrap import BASE_TABLES
+
+def build(db_path: str = "retail_copilot.duckdb", data_dir: str = "data"):
+    """
+    Materializes the base tables and rollups into a DuckDB file that API
+    workers can open read-only (DUCKDB_READ_ONLY=true).
+    """
+    db = DuckDBAdapter(db_path)
+    for table in BASE_TABLES:
+        db.load_parquet(table, os.path.join(data_dir, f"{table}.parquet"))
+        print(f"Loaded {table}")
+    db.build_rollups()
+    db.conn.execute("CHECKPOINT")
+    db.conn.close()
+    print(f"Built {db_path}")
+
+if __name__ == "__main__":
+    build(*sys.argv[1:])
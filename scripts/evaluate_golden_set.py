@@ -1,7 +1,8 @@
 import sys
 import os
 import json
-import glob
+import argparse
+import itertools
 from pathlib import Path
 from typing import Dict, Any, List
 
@@ -14,16 +15,14 @@ from src.core.utils import PromptLoader
 from src.adapters.gemini import GeminiAdapter
 from src.core.config import settings
 from src.core.context import get_mock_context
+from src.eval.corpus import iter_cases
 
-def load_golden_set(path: str) -> List[Dict[str, Any]]:
-    files = glob.glob(os.path.join(path, "*.json"))
-    cases = []
-    for f in files:
-        with open(f, "r") as fd:
-            cases.append(json.load(fd))
-    return cases
-
-def evaluate():
+def evaluate(path: str = os.path.join("eval", "golden_set"), limit: int = None):
+    """
+    Args:
+        path: Golden-set directory, or a generated corpus (scripts/build_corpus.py);
+            cases are streamed, never loaded all at once.
+    """
     print(f"🚀 Starting Evaluation on {settings.ENV} environment...")
     
     # Initialize Components
@@ -36,15 +35,15 @@ def evaluate():
     router = Router(llm, loader)
     planner = Planner(llm, loader)
     
-    # Load Data
-    golden_set_path = os.path.join("eval", "golden_set")
-    cases = load_golden_set(golden_set_path)
-    print(f"📂 Loaded {len(cases)} test cases from {golden_set_path}")
+    cases = itertools.islice(iter_cases(path), limit)
+    print(f"📂 Streaming test cases from {path}")
     
     results = {"passed": 0, "failed": 0, "details": []}
+    total = 0
     
     for case in cases:
-        case_id = case.get("id", "unknown")
+        total += 1
+        case_id = case.get("test_id", case.get("id", "unknown"))
         query = case["input"]["user_query"]
         user_ctx = case["input"]["user_ctx"]
         expected_route = case["expected_output"]["route"]
@@ -86,14 +85,18 @@ def evaluate():
     print("\n" + "="*30)
     print("📊 Evaluation Summary")
     print("="*30)
-    print(f"Total Cases: {len(cases)}")
+    print(f"Total Cases: {total}")
     print(f"Passed:      {results['passed']}")
     print(f"Failed:      {results['failed']}")
-    accuracy = (results['passed'] / len(cases)) * 100 if cases else 0
+    accuracy = (results['passed'] / total) * 100 if total else 0
     print(f"Accuracy:    {accuracy:.1f}%")
     
     if results["failed"] > 0:
         sys.exit(1)
 
 if __name__ == "__main__":
-    evaluate()
+    parser = argparse.ArgumentParser(description="Evaluate router/planner on the golden set or a generated corpus.")
+    parser.add_argument("--path", default=os.path.join("eval", "golden_set"))
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+    evaluate(args.path, args.limit)
@@ -0,0 +1,106 @@
+import sys
+import os
+import time
+import argparse
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.context import SecurityContext
+from src.eval.corpus import iter_cases
+from src.eval.replay import replay_schedule, summarize_schedule
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def run_case(client, case):
+    ctx = case["input"]["user_ctx"]
+    user_ctx = SecurityContext(tenant_id=ctx["tenant"], user_id="replay", role=ctx["role"], region=ctx.get("region"))
+    start = time.perf_counter()
+    outcome = {"route": None, "plan_cache_hit": False, "result_cached": False}
+    for event in client.ask(case["input"]["user_query"], user_ctx):
+        if event["event"] == "route":
+            outcome["route"] = event["data"]["route"]
+        elif event["event"] == "plan":
+            outcome["plan_cache_hit"] = event.get("plan_cache_hit", False)
+        elif event["event"] == "result":
+            outcome["result_cached"] = event["data"].get("cached", False)
+    outcome["latency_ms"] = (time.perf_counter() - start) * 1000
+    outcome["route_ok"] = outcome["route"] == case["expected_output"]["route"]
+    return outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the corpus against the API with production-like arrivals.")
+    parser.add_argument("--corpus", default="eval/corpus")
+    parser.add_argument("--api-url", default=os.environ.get("COPILOT_API_URL"))
+    parser.add_argument("--qps", type=float, default=2.0, help="Mean arrival rate")
+    parser.add_argument("--duration", type=float, default=300.0, help="Replay length in seconds")
+    parser.add_argument("--day-seconds", type=float, default=None, help="Compress a day of diurnal traffic into this many seconds")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Question popularity skew")
+    parser.add_argument("--pool", type=int, default=2000, help="Distinct questions sampled from the corpus")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dry-run", action="store_true", help="Only print the arrival schedule statistics")
+    args = parser.parse_args()
+
+    def schedule():
+        return replay_schedule(
+            iter_cases(args.corpus), args.duration, args.qps,
+            pool_size=args.pool, zipf_s=args.zipf, day_s=args.day_seconds, seed=args.seed
+        )
+
+    summary = summarize_schedule(schedule())
+    print(
+        f"Schedule: {summary['requests']} requests, {summary['distinct']} distinct questions "
+        f"(repeat ratio {summary['repeat_ratio']:.1%}), {summary['qps_min']:.2f}-{summary['qps_max']:.2f} req/s per minute"
+    )
+    if args.dry_run:
+        return
+    if not args.api_url:
+        print("Set --api-url (or COPILOT_API_URL) to replay against a running API, or pass --dry-run.")
+        sys.exit(1)
+
+    from src.ui.api_client import ApiClient
+    client = ApiClient(args.api_url)
+    outcomes, errors = [], []
+    lock = threading.Lock()
+
+    def _run(case):
+        try:
+            outcome = run_case(client, case)
+            with lock:
+                outcomes.append(outcome)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        for offset, case in schedule():
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(_run, case)
+
+    latencies = [o["latency_ms"] for o in outcomes]
+    n = len(outcomes) or 1
+    print(f"Completed {len(outcomes)} requests ({len(errors)} errors) in {time.perf_counter() - start:.0f}s")
+    if latencies:
+        print(
+            f"  latency ms  p50 {percentile(latencies, 0.5):.0f}  p95 {percentile(latencies, 0.95):.0f}  "
+            f"p99 {percentile(latencies, 0.99):.0f}  mean {statistics.mean(latencies):.0f}"
+        )
+    print(f"  route accuracy   {sum(o['route_ok'] for o in outcomes) / n:.1%}")
+    print(f"  plan cache hits  {sum(o['plan_cache_hit'] for o in outcomes) / n:.1%}")
+    print(f"  result cache hits {sum(o['result_cached'] for o in outcomes) / n:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,10 @@
 SELECT 
   DATE_TRUNC({{time_grain}}, s.order_date) AS dt,
   {% if dimension_column %}
-  {{dimension_table}}.{{dimension_column}} AS {{dimension_name}},
+  d.{{dimension_column}} AS {{dimension_name}},
   {% endif %}
-  SUM(s.gross_sales - s.returns - s.discounts) AS net_sales,
-  COUNT(DISTINCT s.transaction_id) AS transaction_count
+  SUM(s.net_sales) AS net_sales,
+  COUNT(DISTINCT s.order_id) AS transaction_count
 FROM {{dataset}}.fct_sales s
 {% if dimension_table %}
 JOIN {{dataset}}.{{dimension_table}} d ON d.{{join_key}} = s.{{join_key}}
@@ -24,4 +24,3 @@ WHERE s.tenant_id = '{{tenant_id}}'
 GROUP BY 1{% if dimension_column %}, 2{% endif %}
 ORDER BY 1{% if dimension_column %}, 2{% endif %}
 LIMIT {{row_limit}};
-
@@ -1,22 +1,395 @@
 import duckdb
-import pandas as pd
+import glob
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Sequence, Literal, TYPE_CHECKING
 from src.interfaces.db import DatabaseClient
+from src.adapters.duckdb_cost import DuckDBCostEstimator
+from src.core.types import IngestReport, CostEstimate, TableSchema
+from src.core.profiler import current_profile, profile_span
+from src.core.templates import sql_literal
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from src.adapters.duckdb_rollups import RollupManager
+
+TENANT_COLUMN = "tenant_id"
+TENANT_ID_PATTERN = re.compile(r"[A-Za-z0-9_\-]{1,64}")
+# Tenant-scoped cursors kept per thread (least recently used are closed)
+MAX_TENANT_CURSORS = 64
+# Prepared statements kept per cursor (least recently used are deallocated)
+MAX_PREPARED_STATEMENTS = 128
+
 
 class DuckDBAdapter(DatabaseClient):
-    def __init__(self, db_path: str = ":memory:"):
-        self.conn = duckdb.connect(db_path)
+    # Queries run with a tenant_id only ever see that tenant's rows (see _tenant_cursor)
+    enforces_tenant_scope = True
+
+    def __init__(self, db_path: str = ":memory:", read_only: bool = False):
+        """
+        Args:
+            read_only: Open an existing database file read-only, so several
+                worker processes can share it.
+        """
+        self.conn = duckdb.connect(db_path, read_only=read_only)
+        self.read_only = read_only
+        self.rollups: Optional["RollupManager"] = None
+        self._local = threading.local()
+        # Bumped on every data change; downstream caches include it in their keys
+        self.data_version = 0
+        # Bumped whenever tables are (re)created; tenant scopes are rebuilt on change
+        self._catalog_version = 0
+        # Parquet file each table still holds unchanged (its footers answer schema stats)
+        self._parquet_sources: Dict[str, str] = {}
+        # (data_version, schema) of the last describe_schema()
+        self._schema: Optional[Tuple[int, Dict[str, TableSchema]]] = None
+        # (tenant_id, data_version) -> schema with that tenant's stats for its tables
+        self._tenant_schemas: "OrderedDict[Tuple[str, int], Dict[str, TableSchema]]" = OrderedDict()
+        self._schema_lock = threading.Lock()
+
+    def _cursor(self):
+        """
+        DuckDB connections are not safe to share across threads; each request
+        thread gets its own cursor onto the same database.
+        """
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self.conn.cursor()
+        return cursor
+
+    def _tenant_cursor(self, tenant_id: str):
+        """
+        Cursor on which every table with a tenant_id column (fct_sales and its
+        rollups) is shadowed by a TEMP view filtered to this tenant. DuckDB
+        resolves the temp catalog first, so unqualified names in generated SQL
+        only reach the tenant's rows and no predicate has to be checked or
+        injected per query. Temp views are private to the cursor, which also
+        works on read-only databases.
+
+        Created once per (thread, tenant) and reused.
+        """
+        if not TENANT_ID_PATTERN.fullmatch(tenant_id or ""):
+            raise ValueError(f"Security Violation: Invalid tenant_id '{tenant_id}'")
+
+        scopes = getattr(self._local, "tenant_cursors", None)
+        if scopes is None:
+            scopes = self._local.tenant_cursors = OrderedDict()
+
+        entry = scopes.get(tenant_id)
+        if entry is None or entry[1] != self._catalog_version:
+            cursor = entry[0] if entry else self.conn.cursor()
+            catalog = cursor.execute("SELECT current_database()").fetchone()[0]
+            tables = cursor.execute(
+                "SELECT table_name FROM information_schema.columns "
+                "WHERE table_catalog = ? AND table_schema = 'main' AND column_name = ?",
+                [catalog, TENANT_COLUMN]
+            ).fetchall()
+            for (table,) in tables:
+                # tenant_id is pattern-checked above, so the literal cannot break out
+                cursor.execute(
+                    f'CREATE OR REPLACE TEMP VIEW "{table}" AS '
+                    f'SELECT * FROM "{catalog}".main."{table}" WHERE {TENANT_COLUMN} = \'{tenant_id}\''
+                )
+            entry = scopes[tenant_id] = (cursor, self._catalog_version)
+
+        scopes.move_to_end(tenant_id)
+        while len(scopes) > MAX_TENANT_CURSORS:
+            _, (evicted, _) = scopes.popitem(last=False)
+            self._prepared_statements().pop(evicted, None)
+            evicted.close()
+        return entry[0]
+
+    def _prepared_statements(self, cursor=None):
+        """Per-thread map of cursor -> {sql: statement name}, or that cursor's map."""
+        registry = getattr(self._local, "prepared", None)
+        if registry is None:
+            registry = self._local.prepared = {}
+        if cursor is None:
+            return registry
+        return registry.setdefault(cursor, OrderedDict())
 
-    def execute_query(self, sql: str) -> pd.DataFrame:
-        return self.conn.execute(sql).df()
+    def execute_prepared(self, sql: str, params: Dict[str, Any], tenant_id: Optional[str] = None) -> "pd.DataFrame":
+        """
+        Runs `$name`-parameterized SQL (e.g. a rendered template). The statement
+        is prepared once per cursor and cached; each call only binds values, so
+        DuckDB does not re-parse or re-plan the query text.
+
+        DuckDB 1.0 cannot bind parameters to EXECUTE itself, so typed values are
+        passed as literals in its argument list (see sql_literal).
+
+        Args:
+            params: Values for every placeholder, already coerced to their types.
+            tenant_id: Run on the tenant's scoped relations.
+        """
+        cursor = self._tenant_cursor(tenant_id) if tenant_id else self._cursor()
+        statements = self._prepared_statements(cursor)
+
+        name = statements.get(sql)
+        if name is None:
+            name = "stmt_" + hashlib.sha1(sql.encode()).hexdigest()[:16]
+            cursor.execute(f"PREPARE {name} AS {sql}")
+            statements[sql] = name
+            while len(statements) > MAX_PREPARED_STATEMENTS:
+                _, evicted = statements.popitem(last=False)
+                cursor.execute(f"DEALLOCATE {evicted}")
+        statements.move_to_end(sql)
+
+        args = ", ".join(f"{key} := {sql_literal(value)}" for key, value in params.items())
+        return self._run(cursor, f"EXECUTE {name}({args})", sql)
+
+    def execute_query(self, sql: str, tenant_id: Optional[str] = None) -> "pd.DataFrame":
+        """
+        Args:
+            tenant_id: Run against the tenant's scoped relations instead of the base tables.
+        """
+        cursor = self._tenant_cursor(tenant_id) if tenant_id else self._cursor()
+        return self._run(cursor, sql)
+
+    def execute_approximate(
+        self,
+        sql: str,
+        tenant_id: Optional[str] = None,
+        sample_percent: Optional[float] = None
+    ) -> Tuple["pd.DataFrame", Optional[Dict[str, Any]]]:
+        """
+        Runs an aggregate query on a repeatable sample of fct_sales, with
+        approximate aggregates (see core.approximate.approximate_sql).
+
+        Returns:
+            (df, info) where info has the sample and the 95% relative error of
+            each estimated column; info is None when the query is not eligible
+            and ran exactly.
+        """
+        from src.core.approximate import DEFAULT_SAMPLE_PERCENT, approximate_info, approximate_sql
+
+        query = approximate_sql(sql, sample_percent or DEFAULT_SAMPLE_PERCENT)
+        if query is None:
+            return self.execute_query(sql, tenant_id=tenant_id), None
+        cursor = self._tenant_cursor(tenant_id) if tenant_id else self._cursor()
+        df, relative_error = query.error_bounds(self._run(cursor, query.sql, sql))
+        return df, approximate_info(query, relative_error)
+
+    def _run(self, cursor, statement: str, sql: Optional[str] = None) -> "pd.DataFrame":
+        """
+        Executes and fetches as a DataFrame. Inside a request profile
+        (src/core/profiler.py) execution and DataFrame conversion are timed
+        separately, and DuckDB's operator profile (what EXPLAIN ANALYZE shows)
+        is attached from the same run, so the query is not executed twice.
+        """
+        profile = current_profile()
+        if profile is None:
+            return cursor.execute(statement).df()
+        if not profile.explain:
+            with profile_span("duckdb.execute"):
+                result = cursor.execute(statement)
+            with profile_span("duckdb.fetch_df"):
+                return result.df()
+
+        fd, path = tempfile.mkstemp(suffix=".json", prefix="duckdb-profile-")
+        os.close(fd)
+        started = time.perf_counter()
+        try:
+            cursor.execute("SET enable_profiling = 'json'")
+            cursor.execute(f"SET profiling_output = '{path}'")
+            with profile_span("duckdb.execute"):
+                result = cursor.execute(statement)
+            with profile_span("duckdb.fetch_df"):
+                df = result.df()
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            if text.strip():
+                profile.add_query(sql or statement, json.loads(text), started)
+            return df
+        finally:
+            cursor.execute("RESET enable_profiling")
+            os.unlink(path)
 
     def validate_sql(self, sql: str) -> bool:
+        return self.sql_error(sql) is None
+
+    def sql_error(self, sql: str) -> Optional[str]:
+        """
+        DuckDB's parser/binder error for the query (e.g. an unknown column,
+        with its candidates), or None when it binds. Nothing is executed.
+        """
         try:
             # DuckDB EXPLAIN is a good way to check syntax without running
-            self.conn.execute(f"EXPLAIN {sql}")
-            return True
-        except Exception:
-            return False
+            self._cursor().execute(f"EXPLAIN {sql}")
+            return None
+        except duckdb.Error as e:
+            return str(e)
+
+    def estimate_cost(self, sql: str, tenant_id: Optional[str] = None) -> CostEstimate:
+        cursor = self._tenant_cursor(tenant_id) if tenant_id else self._cursor()
+        return DuckDBCostEstimator(cursor).estimate(sql)
             
     def load_parquet(self, table_name: str, file_path: str):
         """Helper to load parquet files into the in-memory DB"""
         self.conn.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM read_parquet('{file_path}')")
+        if glob.has_magic(file_path):
+            self._parquet_sources.pop(table_name, None)
+        else:
+            self._parquet_sources[table_name] = file_path
+        self.data_version += 1
+        self._catalog_version += 1
+
+    def ingest_parquet(
+        self,
+        table_name: str,
+        file_path: str,
+        mode: Literal["append", "merge"] = "merge",
+        partition_columns: Sequence[str] = ("order_date", "tenant_id")
+    ) -> IngestReport:
+        """
+        Incrementally ingests parquet data into an existing table.
+
+        New rows are first loaded into a staging table. They are then applied in a
+        single transaction, so concurrent readers see either the old or the new
+        data and are never blocked by a full reload. In "merge" mode, every
+        (day, tenant) partition present in the new data replaces the existing one;
+        "append" only inserts. Rollups are refreshed in the same transaction.
+
+        Args:
+            file_path: A parquet file or glob of partition files.
+            partition_columns: Columns identifying a partition; date/timestamp
+                columns are compared at day granularity.
+        """
+        start = time.perf_counter()
+        staging = f"_staging_{table_name}"
+        bytes_ingested = sum(os.path.getsize(f) for f in glob.glob(file_path))
+
+        self.conn.execute(
+            f"CREATE OR REPLACE TEMP TABLE {staging} AS SELECT * FROM read_parquet('{file_path}')"
+        )
+        try:
+            rows_ingested = self.conn.execute(f"SELECT COUNT(*) FROM {staging}").fetchone()[0]
+            types = dict(self.conn.execute(
+                "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = ?",
+                [staging]
+            ).fetchall())
+
+            def key(column: str, alias: str) -> str:
+                if types.get(column, "").startswith(("DATE", "TIMESTAMP")):
+                    return f"CAST({alias}.{column} AS DATE)"
+                return f"{alias}.{column}"
+
+            partitions = self.conn.execute(
+                f"SELECT COUNT(*) FROM (SELECT DISTINCT {', '.join(key(c, 'n') for c in partition_columns)} FROM {staging} n)"
+            ).fetchone()[0]
+
+            self.conn.execute("BEGIN TRANSACTION")
+            try:
+                rows_replaced = 0
+                if mode == "merge":
+                    match = " AND ".join(f"{key(c, 'n')} = {key(c, 'o')}" for c in partition_columns)
+                    rows_replaced = self.conn.execute(
+                        f"DELETE FROM {table_name} o WHERE EXISTS (SELECT 1 FROM {staging} n WHERE {match})"
+                    ).fetchone()[0]
+                self.conn.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM {staging}")
+
+                if self.rollups is not None and table_name == "fct_sales" and rows_ingested:
+                    since = self.conn.execute(f"SELECT MIN(CAST(order_date AS DATE)) FROM {staging}").fetchone()[0]
+                    tenants = self.conn.execute(f"SELECT DISTINCT tenant_id FROM {staging}").fetchall()
+                    tenant_id = tenants[0][0] if len(tenants) == 1 else None
+                    self.rollups.refresh(since, tenant_id=tenant_id, manage_transaction=False)
+
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        finally:
+            self.conn.execute(f"DROP TABLE IF EXISTS {staging}")
+
+        if self.rollups is not None:
+            self.rollups.refresh_rewriter()
+        self._parquet_sources.pop(table_name, None)
+        self.data_version += 1
+
+        return IngestReport(
+            table=table_name,
+            mode=mode,
+            rows_ingested=rows_ingested,
+            rows_replaced=rows_replaced,
+            partitions=partitions,
+            bytes_ingested=bytes_ingested,
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+            data_version=self.data_version
+        )
+
+    def describe_schema(self, tenant_id: Optional[str] = None) -> Dict[str, TableSchema]:
+        """
+        Schema and column stats of the base tables (rollups left out), for
+        prompts. Built on first use and again only after the data changes.
+
+        Args:
+            tenant_id: Compute the row counts and ranges of tables with a
+                tenant_id column on the tenant's scoped relations, so a
+                tenant's prompt says nothing about other tenants' rows.
+        """
+        schema = self._describe_base()
+        if tenant_id is None:
+            return schema
+        key = (tenant_id, self.data_version)
+        with self._schema_lock:
+            scoped = self._tenant_schemas.get(key)
+            if scoped is None:
+                from src.adapters.duckdb_schema import DuckDBSchemaCatalog
+
+                tables = [t for t, s in schema.items() if any(c.name == TENANT_COLUMN for c in s.columns)]
+                # No parquet sources: file footers count every tenant's rows
+                described = DuckDBSchemaCatalog(self._tenant_cursor(tenant_id), TENANT_COLUMN).describe(
+                    tables=tables, data_version=key[1]
+                )
+                scoped = self._tenant_schemas[key] = {t: described.get(t, s) for t, s in schema.items()}
+            self._tenant_schemas.move_to_end(key)
+            while len(self._tenant_schemas) > MAX_TENANT_CURSORS:
+                self._tenant_schemas.popitem(last=False)
+            return scoped
+
+    def _describe_base(self) -> Dict[str, TableSchema]:
+        cached = self._schema
+        if cached is not None and cached[0] == self.data_version:
+            return cached[1]
+        with self._schema_lock:
+            version = self.data_version
+            if self._schema is None or self._schema[0] != version:
+                from src.adapters.duckdb_schema import DuckDBSchemaCatalog
+
+                rollups = [spec.name for spec in self.rollups.rollups] if self.rollups is not None else []
+                schema = DuckDBSchemaCatalog(self._cursor(), TENANT_COLUMN).describe(
+                    exclude=rollups, sources=self._parquet_sources, data_version=version
+                )
+                self._schema = (version, schema)
+            return self._schema[1]
+
+    def build_rollups(self):
+        """Builds the fct_sales rollups. Call after the base tables are loaded."""
+        # The rewriter pulls in sqlglot; only load it when rollups are used
+        from src.adapters.duckdb_rollups import RollupManager
+        self.rollups = RollupManager(self.conn)
+        self.rollups.build()
+        self._catalog_version += 1
+
+    def attach_rollups(self):
+        """Uses rollups already present in the database file (e.g. read-only workers)."""
+        from src.adapters.duckdb_rollups import RollupManager
+        self.rollups = RollupManager(self.conn)
+        self.rollups.refresh_rewriter()
+        self._catalog_version += 1
+
+    def route_to_rollup(self, sql: str) -> Tuple[str, Optional[str]]:
+        """
+        Rewrites the query to read from the smallest matching rollup when the
+        result is provably identical.
+        Returns:
+            (sql_to_execute, rollup_name or None)
+        """
+        if self.rollups is None:
+            return sql, None
+        return self.rollups.rewrite(sql)
@@ -0,0 +1,123 @@
+from datetime import date
+from typing import List, Optional, Tuple
+from src.core.rollup_rewriter import RollupRewriter, RollupSpec, ROLLUPS, FACT_TABLE, PRODUCT_TABLE, STORE_TABLE
+
+class RollupManager:
+    """
+    Builds and incrementally refreshes pre-aggregated fct_sales rollups in DuckDB,
+    and rewrites eligible queries to read from them.
+    """
+    def __init__(self, conn, rollups: Optional[List[RollupSpec]] = None):
+        self.conn = conn
+        self.rollups = rollups or ROLLUPS
+        self.rewriter: Optional[RollupRewriter] = None
+
+    def _date_type(self) -> str:
+        """fct_sales.order_date's type (DATE_TRUNC returns DATE; buckets keep the fact's type)."""
+        row = self.conn.execute(
+            "SELECT data_type FROM information_schema.columns WHERE table_name = ? AND column_name = 'order_date'",
+            [FACT_TABLE]
+        ).fetchone()
+        return row[0] if row else "TIMESTAMP"
+
+    def _select_sql(self, spec: RollupSpec, where: str = "") -> str:
+        measures = ",\n  ".join(f"SUM(s.{m}) AS {m}" for m in spec.measures)
+        # Same type as fct_sales.order_date: a DATE column would truncate literals like
+        # '2024-02-01 12:00:00' to the day and change which buckets a predicate selects
+        return f"""
+SELECT
+  CAST(DATE_TRUNC('{spec.grain}', s.order_date) AS {self._date_type()}) AS order_date,
+  s.tenant_id,
+  s.store_id,
+  p.category,
+  {measures},
+  COUNT(*) AS {spec.count_column}
+FROM {FACT_TABLE} s
+LEFT JOIN {PRODUCT_TABLE} p ON p.product_id = s.product_id
+{where}
+GROUP BY 1, 2, 3, 4
+"""
+
+    def build(self):
+        """(Re)builds every rollup from scratch."""
+        for spec in self.rollups:
+            self.conn.execute(f"CREATE OR REPLACE TABLE {spec.name} AS {self._select_sql(spec)}")
+        self._refresh_rewriter()
+
+    def refresh(self, since: date, tenant_id: Optional[str] = None, manage_transaction: bool = True):
+        """
+        Recomputes rollup buckets from `since` onwards (optionally for one tenant),
+        replacing them in a single transaction.
+
+        Args:
+            manage_transaction: Set to False when the caller already holds a
+                transaction (e.g. an ingest) that the refresh must join.
+        """
+        params = [since.isoformat()] + ([tenant_id] if tenant_id else [])
+        tenant_clause = " AND tenant_id = ?" if tenant_id else ""
+
+        if manage_transaction:
+            self.conn.execute("BEGIN TRANSACTION")
+        try:
+            for spec in self.rollups:
+                cutoff = f"DATE_TRUNC('{spec.grain}', CAST(? AS TIMESTAMP))"
+                self.conn.execute(
+                    f"DELETE FROM {spec.name} WHERE order_date >= {cutoff}{tenant_clause}", params
+                )
+                where = f"WHERE s.order_date >= {cutoff}{tenant_clause.replace('tenant_id', 's.tenant_id')}"
+                self.conn.execute(f"INSERT INTO {spec.name} {self._select_sql(spec, where)}", params)
+            if manage_transaction:
+                self.conn.execute("COMMIT")
+        except Exception:
+            if manage_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+        if manage_transaction:
+            self._refresh_rewriter()
+
+    def rewrite(self, sql: str) -> Tuple[str, Optional[str]]:
+        """
+        Returns:
+            (sql_to_execute, rollup_name). The SQL is returned unchanged with a
+            None rollup when no rollup can answer the query exactly.
+        """
+        if self.rewriter is None:
+            return sql, None
+        result = self.rewriter.rewrite(sql)
+        if result is None:
+            return sql, None
+        return result[0], result[1].name
+
+    def refresh_rewriter(self):
+        """Re-derives rewrite eligibility after the base tables change."""
+        self._refresh_rewriter()
+
+    def _refresh_rewriter(self):
+        schema = {}
+        for table in (FACT_TABLE, PRODUCT_TABLE, STORE_TABLE):
+            rows = self.conn.execute(
+                "SELECT column_name FROM information_schema.columns WHERE table_name = ?", [table]
+            ).fetchall()
+            schema[table] = {r[0] for r in rows}
+
+        # Facts with intra-day timestamps limit which date predicates can use the daily rollup
+        day_aligned = self.conn.execute(
+            f"SELECT COUNT(*) = 0 FROM {FACT_TABLE} WHERE order_date <> DATE_TRUNC('day', order_date)"
+        ).fetchone()[0]
+
+        # dim_product can be folded into the rollup only if every fact matches exactly one product
+        product_dim_complete = self.conn.execute(
+            f"""
+            SELECT
+              (SELECT COUNT(*) FROM {FACT_TABLE} s JOIN {PRODUCT_TABLE} p ON p.product_id = s.product_id)
+                = (SELECT COUNT(*) FROM {FACT_TABLE})
+              AND (SELECT COUNT(DISTINCT product_id) = COUNT(*) FROM {PRODUCT_TABLE})
+            """
+        ).fetchone()[0]
+
+        self.rewriter = RollupRewriter(
+            schema,
+            rollups=self.rollups,
+            day_aligned=bool(day_aligned),
+            product_dim_complete=bool(product_dim_complete)
+        )
@@ -0,0 +1,134 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.core.types import ColumnSchema, TableSchema
+
+# Text columns with at most this many distinct values have them listed
+MAX_LISTED_VALUES = 12
+RANGE_TYPES = ("DATE", "TIMESTAMP", "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "FLOAT", "DOUBLE", "DECIMAL")
+TEXT_TYPES = ("VARCHAR",)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class DuckDBSchemaCatalog:
+    """
+    Reads table schemas and column stats for prompts: types from
+    information_schema, and per column the distinct count, the min/max of
+    date and numeric columns and, for small text columns of shared (non
+    tenant) tables, their values. Keys (*_id) never have values listed.
+
+    Row counts and ranges of tables loaded straight from parquet come from
+    the file footers (parquet_metadata), so only text columns are scanned.
+    """
+    def __init__(self, cursor, tenant_column: str = "tenant_id"):
+        self.cursor = cursor
+        self.tenant_column = tenant_column
+
+    def columns(self, exclude: Iterable[str] = ()) -> Dict[str, List[Tuple[str, str]]]:
+        """{table: [(column, type), ...]} of the main schema, in column order."""
+        skip = set(exclude)
+        rows = self.cursor.execute(
+            "SELECT table_name, column_name, data_type FROM information_schema.columns "
+            "WHERE table_catalog = current_database() AND table_schema = 'main' "
+            "ORDER BY table_name, ordinal_position"
+        ).fetchall()
+        tables: Dict[str, List[Tuple[str, str]]] = {}
+        for table, column, data_type in rows:
+            if table not in skip and not table.startswith("_"):
+                tables.setdefault(table, []).append((column, data_type))
+        return tables
+
+    def describe(
+        self,
+        exclude: Iterable[str] = (),
+        sources: Optional[Dict[str, str]] = None,
+        data_version: int = 0,
+        tables: Optional[Iterable[str]] = None
+    ) -> Dict[str, TableSchema]:
+        """
+        Args:
+            exclude: Tables to leave out (e.g. rollups).
+            sources: Parquet file each table holds unchanged, if any.
+            tables: Only describe these tables (None = all).
+        """
+        sources = sources or {}
+        wanted = set(tables) if tables is not None else None
+        return {
+            table: self._describe_table(table, columns, sources.get(table), data_version)
+            for table, columns in self.columns(exclude).items()
+            if wanted is None or table in wanted
+        }
+
+    def _describe_table(
+        self, table: str, columns: List[Tuple[str, str]], source: Optional[str], data_version: int
+    ) -> TableSchema:
+        ranged = [c for c, t in columns if t.startswith(RANGE_TYPES)]
+        text = [c for c, t in columns if t.startswith(TEXT_TYPES)]
+        ranges: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+        row_count = None
+        if source:
+            row_count, ranges = self._parquet_stats(source, dict(columns))
+        if row_count is None:
+            source = None
+            ranges = {}
+
+        # One scan for whatever the footers did not answer
+        selects = [] if row_count is not None else ["COUNT(*)"]
+        scanned_ranges = [c for c in ranged if c not in ranges]
+        for c in scanned_ranges:
+            selects += [f"CAST(MIN({_quote(c)}) AS VARCHAR)", f"CAST(MAX({_quote(c)}) AS VARCHAR)"]
+        selects += [f"APPROX_COUNT_DISTINCT({_quote(c)})" for c in text]
+        row = list(self.cursor.execute(f"SELECT {', '.join(selects)} FROM {_quote(table)}").fetchone()) if selects else []
+        if row_count is None:
+            row_count = row.pop(0)
+        for c in scanned_ranges:
+            ranges[c] = (row.pop(0), row.pop(0))
+        distinct = {c: row.pop(0) for c in text}
+
+        shared = self.tenant_column not in dict(columns)
+        result = []
+        for name, data_type in columns:
+            low, high = ranges.get(name, (None, None))
+            values: List[str] = []
+            if name == self.tenant_column:
+                # Would tell a tenant how many others share the table
+                distinct.pop(name, None)
+            elif shared and name in distinct and distinct[name] <= MAX_LISTED_VALUES and not name.endswith("_id"):
+                values = [
+                    v for (v,) in self.cursor.execute(
+                        f"SELECT DISTINCT {_quote(name)} FROM {_quote(table)} "
+                        f"WHERE {_quote(name)} IS NOT NULL ORDER BY 1 LIMIT {MAX_LISTED_VALUES + 1}"
+                    ).fetchall()
+                ]
+                distinct[name] = len(values)
+            result.append(ColumnSchema(
+                name=name, type=data_type, distinct_count=distinct.get(name), min=low, max=high, values=values
+            ))
+        return TableSchema(name=table, row_count=row_count, columns=result, source=source, data_version=data_version)
+
+    def _parquet_stats(
+        self, path: str, types: Dict[str, str]
+    ) -> Tuple[Optional[int], Dict[str, Tuple[Optional[str], Optional[str]]]]:
+        """Row count and column ranges from the footers; (None, {}) when the file is gone."""
+        try:
+            row_count = self.cursor.execute(
+                "SELECT SUM(num_rows) FROM parquet_file_metadata(?)", [path]
+            ).fetchone()[0]
+            rows = self.cursor.execute(
+                "SELECT path_in_schema, LIST(stats_min_value), LIST(stats_max_value) "
+                "FROM parquet_metadata(?) GROUP BY 1", [path]
+            ).fetchall()
+        except Exception:
+            return None, {}
+
+        ranges: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        for column, lows, highs in rows:
+            data_type = types.get(column, "")
+            if not data_type.startswith(RANGE_TYPES) or None in lows or None in highs:
+                # No stats in some row group: scan that column instead
+                continue
+            key = str if data_type.startswith(("DATE", "TIMESTAMP")) else float
+            ranges[column] = (min(lows, key=key), max(highs, key=key))
+        return (int(row_count) if row_count is not None else None), ranges
@@ -1,6 +1,5 @@
 import os
-import google.generativeai as genai
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, Tuple
 from src.interfaces.llm import LLMClient
 
 class GeminiAdapter(LLMClient):
@@ -10,20 +9,29 @@ class GeminiAdapter(LLMClient):
             raise ValueError("GOOGLE_API_KEY not found in environment variables.")
         
         # Use config default if not specified
-        from src.core.config import settings
-        model_name = model_name or settings.LLM_MODEL
-        
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel(model_name)
+        if model_name is None:
+            from src.core.config import settings
+            model_name = settings.LLM_MODEL
+        self.model_name = model_name
+        self._model = None
 
-    def generate_content(
-        self, 
-        prompt: str, 
-        system_instruction: Optional[str] = None,
-        temperature: float = 0.0,
-        response_schema: Optional[Dict[str, Any]] = None
-    ) -> str:
-        
+    @property
+    def model(self):
+        # google.generativeai takes ~1s to import; defer it to the first request
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def _prepare(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        temperature: float,
+        response_schema: Optional[Dict[str, Any]]
+    ) -> Tuple[str, Any]:
+        import google.generativeai as genai
         generation_config = genai.types.GenerationConfig(
             temperature=temperature,
             response_mime_type="application/json" if response_schema else "text/plain"
@@ -35,6 +43,19 @@ class GeminiAdapter(LLMClient):
         final_prompt = prompt
         if system_instruction:
             final_prompt = f"System Instruction: {system_instruction}\n\n{prompt}"
+
+        return final_prompt, generation_config
+
+    def generate_content(
+        self, 
+        prompt: str, 
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.0,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        final_prompt, generation_config = self._prepare(
+            prompt, system_instruction, temperature, response_schema
+        )
         
         response = self.model.generate_content(
             final_prompt,
@@ -42,3 +63,25 @@ class GeminiAdapter(LLMClient):
         )
         
         return response.text
+
+    def generate_content_stream(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.0,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> Iterator[str]:
+        final_prompt, generation_config = self._prepare(
+            prompt, system_instruction, temperature, response_schema
+        )
+
+        response = self.model.generate_content(
+            final_prompt,
+            generation_config=generation_config,
+            stream=True
+        )
+
+        # Closing this generator early (e.g. router commit) stops consuming the stream
+        for chunk in response:
+            if chunk.parts:
+                yield chunk.text
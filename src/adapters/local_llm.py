@@ -0,0 +1,79 @@
+import json
+import re
+from typing import Optional, Dict, Any
+from src.interfaces.llm import LLMClient
+
+# Model name that selects this client in the LLM_*_MODELS settings
+LOCAL_MODEL = "local"
+
+UNSAFE_TERMS = (
+    "delete", "drop", "insert", "update", "truncate", "alter", "grant", "password", "ssn", "social security",
+    "credit card", "email address", "phone number", "home address", "salary",
+)
+HANDOFF_TERMS = ("lay off", "layoff", "fire", "hire", "lawsuit", "legal", "strategy", "should we", "acquire")
+QA_TERMS = ("what is", "what does", "define", "definition", "meaning of", "explain", "how is", "how do you calculate")
+SQL_TERMS = (
+    "sales", "revenue", "units", "orders", "returns", "trend", "top", "by", "region", "category", "store",
+    "product", "month", "week", "quarter", "year", "average", "total", "count", "aov", "ticket", "compare",
+)
+
+_USER_QUERY = re.compile(r'^- user_query: "(.*)"\s*$', re.MULTILINE)
+
+
+def _words(terms) -> "re.Pattern":
+    """Matches any of the terms as whole words ("drop" but not "dropship")."""
+    return re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")\b")
+
+
+_UNSAFE, _HANDOFF, _QA, _SQL = (_words(t) for t in (UNSAFE_TERMS, HANDOFF_TERMS, QA_TERMS, SQL_TERMS))
+
+
+class LocalLLM(LLMClient):
+    """
+    Offline stand-in model: keyword routing with a confidence, no network and
+    no key. It only answers the router; planner and SQL requests get an
+    answer the tier checks reject (a plan that needs disambiguation, no SQL),
+    so a tier list escalates past it. Its unsafe / handoff routes are keyword
+    guesses ("why did sales drop"), which router_check always escalates. Lets the tiered clients and the whole
+    pipeline run in tests and without Gemini access.
+    """
+    def generate_content(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.0,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        properties = (response_schema or {}).get("properties", {})
+        if "route" in properties:
+            return json.dumps(self.route(self._user_query(prompt)))
+        if "intent_id" in properties:
+            return json.dumps({
+                "intent_id": "", "tables": [], "measures": [], "dimensions": [], "filters": [],
+                "limits": {"rows": 0}, "needs_disambiguation": True,
+                "clarification_question": "Which metric and time period do you mean?",
+                "reasoning": "The local model does not plan",
+            })
+        return "-- The local model does not write SQL"
+
+    @staticmethod
+    def _user_query(prompt: str) -> str:
+        m = _USER_QUERY.search(prompt)
+        return m.group(1) if m else prompt
+
+    @staticmethod
+    def route(user_query: str) -> Dict[str, Any]:
+        q = user_query.lower()
+        if _UNSAFE.search(q):
+            return {"route": "unsafe", "reason": "Restricted data or write operation", "confidence": 0.9}
+        if _HANDOFF.search(q):
+            return {"route": "handoff", "reason": "Outside analytics scope", "confidence": 0.8}
+        hits = len(set(_SQL.findall(q)))
+        if _QA.search(q) and hits < 2:
+            return {"route": "qa", "reason": "Definition question", "confidence": 0.75}
+        if hits:
+            return {"route": "sql", "reason": "metric question", "confidence": round(min(0.95, 0.45 + 0.15 * hits), 2)}
+        return {
+            "route": "clarify", "reason": "No known metric", "confidence": 0.3,
+            "clarify_question": "Which metric would you like to see?",
+        }
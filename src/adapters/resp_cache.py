@@ -0,0 +1,202 @@
+import socket
+import socketserver
+import ssl
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from src.interfaces.cache import CacheBackend
+
+
+def encode_command(*args) -> bytes:
+    """A RESP array of bulk strings."""
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+def read_reply(f):
+    """Reads one RESP reply from a buffered binary file."""
+    line = f.readline()
+    if not line:
+        raise ConnectionError("Connection closed by the cache server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise RuntimeError(f"Cache server error: {body.decode()}")
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        size = int(body)
+        if size < 0:
+            return None
+        data = f.read(size + 2)
+        return data[:-2]
+    if kind == b"*":
+        size = int(body)
+        return None if size < 0 else [read_reply(f) for _ in range(size)]
+    raise ConnectionError(f"Unexpected reply from the cache server: {line!r}")
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared cache backend on any Redis-protocol server (Redis, Valkey,
+    KeyDB, ...), for replicas on several nodes. Speaks RESP directly over one
+    connection (no client library), optionally over TLS and with AUTH;
+    retries once when an open connection drops (not when connecting fails).
+    """
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        timeout_s: float = 0.5,
+        password: Optional[str] = None,
+        username: Optional[str] = None,
+        tls: bool = False
+    ):
+        """
+        Args:
+            password: Sent with AUTH on connect (with username for ACL users).
+            tls: Connect with TLS, verifying the server certificate (rediss://).
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout_s = timeout_s
+        self.password = password
+        self.username = username
+        self.tls = tls
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout_s)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.tls:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+        self._sock, self._file = sock, sock.makefile("rb")
+        try:
+            if self.password:
+                auth = ("AUTH", self.username, self.password) if self.username else ("AUTH", self.password)
+                self._sock.sendall(encode_command(*auth))
+                read_reply(self._file)
+            if self.db:
+                self._sock.sendall(encode_command("SELECT", self.db))
+                read_reply(self._file)
+        except Exception:
+            # Never keep a connection that is not authenticated / on the right db
+            self._disconnect()
+            raise
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+        self._sock = self._file = None
+
+    def command(self, *args):
+        with self._lock:
+            for attempt in (1, 2):
+                reused = self._sock is not None
+                try:
+                    if not reused:
+                        self._connect()
+                    self._sock.sendall(encode_command(*args))
+                    return read_reply(self._file)
+                except (OSError, ConnectionError):
+                    self._disconnect()
+                    # A dropped idle connection is worth one retry; a failed connect is not
+                    if attempt == 2 or not reused:
+                        raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.command("GET", key)
+
+    def set(self, key: str, value: bytes, ttl_s: Optional[int] = None):
+        if ttl_s:
+            self.command("SET", key, value, "EX", int(ttl_s))
+        else:
+            self.command("SET", key, value)
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+class LocalRedisServer:
+    """
+    In-process stand-in for a Redis server (GET, SET [EX], DEL, PING,
+    DBSIZE, FLUSHDB, SELECT, AUTH) for tests and local runs of several
+    replicas. Listens on 127.0.0.1; port 0 picks a free port. With a
+    password, connections must AUTH first.
+    """
+    def __init__(self, port: int = 0, password: Optional[str] = None):
+        store: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        lock = threading.Lock()
+        secret = password.encode() if password else None
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                authenticated = secret is None
+                while True:
+                    try:
+                        args = read_reply(self.rfile)
+                    except (ConnectionError, ValueError):
+                        return
+                    name = args[0].upper() if args else b""
+                    if name == b"AUTH":
+                        authenticated = secret is not None and args[-1] == secret
+                        reply = b"+OK\r\n" if authenticated else b"-WRONGPASS invalid password\r\n"
+                        self.wfile.write(reply)
+                        continue
+                    if not authenticated:
+                        self.wfile.write(b"-NOAUTH Authentication required.\r\n")
+                        continue
+                    try:
+                        reply = LocalRedisServer._run(store, lock, args)
+                    except (IndexError, ValueError):
+                        reply = b"-ERR wrong number of arguments\r\n"
+                    self.wfile.write(reply)
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _run(store, lock, args: List[bytes]) -> bytes:
+        name = args[0].upper() if args else b""
+        with lock:
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"GET":
+                value, expires_at = store.get(args[1], (None, None))
+                if value is None or (expires_at is not None and expires_at <= time.time()):
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(value), value)
+            if name == b"SET":
+                ttl = int(args[4]) if len(args) >= 5 and args[3].upper() == b"EX" else None
+                store[args[1]] = (args[2], time.time() + ttl if ttl else None)
+                return b"+OK\r\n"
+            if name == b"DEL":
+                return b":%d\r\n" % sum(store.pop(k, None) is not None for k in args[1:])
+            if name == b"DBSIZE":
+                return b":%d\r\n" % len(store)
+            if name in (b"FLUSHDB", b"SELECT"):
+                if name == b"FLUSHDB":
+                    store.clear()
+                return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name
+
+    def start(self) -> "LocalRedisServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-redis", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,49 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from src.interfaces.cache import CacheBackend
+
+# Expired rows are deleted every this many writes
+PURGE_EVERY = 1000
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Shared cache backend for a single node: one SQLite file (WAL mode) that
+    every worker process on the machine reads and writes.
+    """
+    def __init__(self, path: str):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM shared_cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key: str, value: bytes, ttl_s: Optional[int] = None):
+        expires_at = time.time() + ttl_s if ttl_s else None
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO shared_cache VALUES (?, ?, ?)", (key, value, expires_at))
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM shared_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
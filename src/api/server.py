@@ -0,0 +1,271 @@
+import json
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from src.core.context import SecurityContext
+from src.core.pipeline import CopilotPipeline
+from src.core.result_shaping import TABLE_PAGE_SIZE, paginate
+from src.core.scheduler import BudgetExceeded, Overloaded
+from src.core.templates import MAX_ROW_LIMIT
+from src.core.types import Plan, RouterOutput, dump_json
+
+# Roles that may ask for a profile of their own request
+PROFILE_ROLES = {"admin"}
+
+
+class QueryRequest(BaseModel):
+    query: str
+    stream: bool = False
+    # Plan of the previous turn, so follow-ups can refine it instead of re-planning
+    previous_plan: Optional[Plan] = None
+    # Profile this request (honored for PROFILE_ROLES); see GET /profiles/{request_id}
+    profile: bool = False
+    # Accept a sampled answer with error bounds for large aggregates
+    approximate: bool = False
+
+
+class SQLRequest(BaseModel):
+    plan: Plan
+
+
+class ExecuteRequest(BaseModel):
+    sql: str
+    approximate: bool = False
+    page: int = Field(0, ge=0)
+    page_size: int = Field(TABLE_PAGE_SIZE, ge=1, le=MAX_ROW_LIMIT)
+
+
+class TemplateRequest(BaseModel):
+    # Shape of the query (time_grain, dimension_*, join_key, flags)
+    structure: Dict[str, Any] = {}
+    # Bound per call (start_date, end_date, row_limit, category_filter)
+    params: Dict[str, Any] = {}
+    page: int = Field(0, ge=0)
+    page_size: int = Field(TABLE_PAGE_SIZE, ge=1, le=MAX_ROW_LIMIT)
+
+
+def get_security_context(
+    x_tenant_id: Optional[str] = Header(None),
+    x_user_id: Optional[str] = Header(None),
+    x_role: Optional[str] = Header(None),
+    x_region: Optional[str] = Header("US"),
+) -> SecurityContext:
+    """
+    Builds the request-scoped security context.
+    In production these headers are set by the auth proxy from verified JWT claims.
+    """
+    if not (x_tenant_id and x_user_id and x_role):
+        raise HTTPException(status_code=401, detail="Missing X-Tenant-Id, X-User-Id or X-Role header")
+    return SecurityContext(tenant_id=x_tenant_id, user_id=x_user_id, role=x_role, region=x_region)
+
+
+def to_jsonable(event: Dict[str, Any], page: int = 0, page_size: int = TABLE_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Converts DataFrames in pipeline events into column/row JSON.
+    Only one page of rows is sent; row_count is the full result size.
+    """
+    data = event.get("data")
+    if isinstance(data, dict) and "df" in data:
+        df = data["df"]
+        data = {k: v for k, v in data.items() if k != "df"}
+        data["columns"] = [str(c) for c in df.columns]
+        data["rows"] = json.loads(paginate(df, page, page_size).to_json(orient="values", date_format="iso"))
+        data["row_count"] = len(df)
+        data["page"] = page
+        data["total_pages"] = max(1, -(-len(df) // page_size))
+        event = {**event, "data": data}
+    return event
+
+
+def create_app(pipeline_factory: Optional[Callable[[], CopilotPipeline]] = None) -> FastAPI:
+    """
+    Builds the ASGI app. The pipeline is wired once per worker process at startup.
+
+    Run with several workers sharing a read-only DuckDB file:
+        python scripts/build_duckdb.py
+        DUCKDB_READ_ONLY=true uvicorn src.api.server:app --workers 4
+    """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if pipeline_factory is not None:
+            app.state.pipeline = pipeline_factory()
+        else:
+            from src.bootstrap import build_pipeline
+            app.state.pipeline = build_pipeline()
+        yield
+        if app.state.pipeline.warmup is not None:
+            app.state.pipeline.warmup.stop()
+
+    app = FastAPI(title="Retail Copilot API", lifespan=lifespan)
+
+    def get_pipeline(request: Request) -> CopilotPipeline:
+        return request.app.state.pipeline
+
+    @app.exception_handler(Overloaded)
+    def overloaded(request: Request, exc: Overloaded):
+        # Shed requests fail fast; clients retry after the queue drains
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(max(1, round(exc.retry_after_s)))},
+        )
+
+    @app.exception_handler(BudgetExceeded)
+    def budget_exceeded(request: Request, exc: BudgetExceeded):
+        return JSONResponse(status_code=429, content={"detail": str(exc)})
+
+    @app.exception_handler(ValueError)
+    def rejected(request: Request, exc: ValueError):
+        # Policy / security violations and bad input from any endpoint are the caller's error
+        return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+    @app.get("/healthz")
+    def healthz(pipeline: CopilotPipeline = Depends(get_pipeline)) -> Dict[str, Any]:
+        # data_ready turns true once the background data warm-up has finished;
+        # cache_ready once the answer warm-up has run on the current data
+        warmup = pipeline.warmup.readiness() if pipeline.warmup is not None else None
+        return {
+            "status": "ok",
+            "data_ready": pipeline.data_ready,
+            "cache_ready": warmup["ready"] if warmup else None,
+            "warmup": warmup,
+        }
+
+    @app.post("/route", response_model=RouterOutput)
+    def route(
+        body: QueryRequest,
+        ctx: SecurityContext = Depends(get_security_context),
+        pipeline: CopilotPipeline = Depends(get_pipeline),
+    ):
+        return pipeline.route(body.query, ctx)
+
+    @app.post("/plan", response_model=Plan)
+    def plan(
+        body: QueryRequest,
+        ctx: SecurityContext = Depends(get_security_context),
+        pipeline: CopilotPipeline = Depends(get_pipeline),
+    ):
+        return pipeline.plan(body.query, ctx)
+
+    @app.post("/sql")
+    def sql(
+        body: SQLRequest,
+        ctx: SecurityContext = Depends(get_security_context),
+        pipeline: CopilotPipeline = Depends(get_pipeline),
+    ):
+        return {"sql": pipeline.generate_sql(body.plan, user_ctx=ctx)}
+
+    @app.post("/execute")
+    def execute(
+        body: ExecuteRequest,
+        ctx: SecurityContext = Depends(get_security_context),
+        pipeline: CopilotPipeline = Depends(get_pipeline),
+    ):
+        result = pipeline.execute(body.sql, ctx, approximate=body.approximate)
+        return to_jsonable({"data": {
+            "sql": result["sql"],
+            "rollup": result["rollup"],
+            "fingerprint": result["fingerprint"],
+            "result_key": result["result_key"],
+            "cached": result["cached"],
+            "cost": result["cost"].model_dump() if result["cost"] else None,
+            "approximate": result["approximate"],
+            "df": result["df"],
+        }}, body.page, body.page_size)["data"]
+
+    @app.post("/templates/{intent_id}")
+    def execute_template(
+        intent_id: str,
+        body: TemplateRequest,
+        ctx: SecurityContext = Depends(get_security_context),
+        pipeline: CopilotPipeline = Depends(get_pipeline),
+    ):
+        """Dashboard path: runs the intent's SQL template as a prepared statement."""
+        result = pipeline.execute_template(intent_id, body.structure, body.params, ctx)
+        return to_jsonable({"data": {
+            "sql": result["sql"],
+            "cost": result["cost"].model_dump() if result["cost"] else None,
+            "approximate": result["approximate"],
+            "df": result["df"],
+        }}, body.page, body.page_size)["data"]
+
+    @app.post("/ask")
+    def ask(
+        body: QueryRequest,
+        ctx: SecurityContext = Depends(get_security_context),
+        pipeline: CopilotPipeline = Depends(get_pipeline),
+    ):
+        profile = body.profile and ctx.role in PROFILE_ROLES
+        events = (
+            to_jsonable(e) for e in pipeline.ask(
+                body.query, ctx, previous_plan=body.previous_plan, profile=profile, approximate=body.approximate
+            )
+        )
+        if body.stream:
+            def ndjson() -> Iterator[str]:
+                for event in events:
+                    yield dump_json(event) + "\n"
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        return {e["event"]: {k: v for k, v in e.items() if k != "event"} for e in events}
+
+    @app.get("/llm/stats")
+    def llm_stats(
+        ctx: SecurityContext = Depends(get_security_context),
+        pipeline: CopilotPipeline = Depends(get_pipeline),
+    ) -> Dict[str, Any]:
+        """Per-stage model tiers: calls, escalations, latency and estimated cost since start-up."""
+        if ctx.role not in PROFILE_ROLES:
+            raise HTTPException(status_code=403, detail="Admins only")
+        stages = {"router": pipeline.router, "planner": pipeline.planner, "sql": pipeline.sql_generator}
+        llms = {stage: getattr(component, "llm", None) for stage, component in stages.items()}
+        return {stage: llm.stats() for stage, llm in llms.items() if hasattr(llm, "stats")}
+
+    @app.get("/cache/stats")
+    def cache_stats(
+        ctx: SecurityContext = Depends(get_security_context),
+        pipeline: CopilotPipeline = Depends(get_pipeline),
+    ) -> Dict[str, Any]:
+        """Hit rates of the shared cache tier (per tier) and of this worker's plan / result caches."""
+        if ctx.role not in PROFILE_ROLES:
+            raise HTTPException(status_code=403, detail="Admins only")
+        plan_cache = getattr(pipeline.planner, "plan_cache", None)
+        result_cache = pipeline.result_cache
+        return {
+            "shared": pipeline.shared_cache.stats() if pipeline.shared_cache is not None else None,
+            "plan_cache": {"hits": plan_cache.hits, "misses": plan_cache.misses} if plan_cache is not None else None,
+            "result_cache": (
+                {"entries": len(result_cache), "bytes": result_cache.nbytes} if result_cache is not None else None
+            ),
+        }
+
+    @app.get("/scheduler/stats")
+    def scheduler_stats(
+        ctx: SecurityContext = Depends(get_security_context),
+        pipeline: CopilotPipeline = Depends(get_pipeline),
+    ) -> Dict[str, Any]:
+        """Queue depth, wait times and shed requests per resource, and each tenant's spend today."""
+        if ctx.role not in PROFILE_ROLES:
+            raise HTTPException(status_code=403, detail="Admins only")
+        return pipeline.scheduler.stats() if pipeline.scheduler is not None else {}
+
+    @app.get("/profiles/{request_id}")
+    def get_profile(
+        request_id: str,
+        ctx: SecurityContext = Depends(get_security_context),
+        pipeline: CopilotPipeline = Depends(get_pipeline),
+    ):
+        """Chrome trace JSON of a profiled request of the caller's tenant (open in Perfetto / speedscope)."""
+        trace = pipeline.profiler.load(request_id) if pipeline.profiler else None
+        if trace is None or trace["otherData"].get("tenant_id") != ctx.tenant_id:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return trace
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,208 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, TYPE_CHECKING
+from src.core.catalog import IntentCatalog, load_glossary
+from src.core.context import current_user
+from src.core.context_builder import ContextBuilder
+from src.core.llm_tiers import ModelTier, TieredLLM, router_check
+from src.core.pipeline import CopilotPipeline
+from src.core.plan_cache import PlanCache, QueryCanonicalizer
+from src.core.planner import Planner
+from src.core.policy_engine import PolicyEngine
+from src.core.profiler import ProfileSampler
+from src.core.result_cache import ResultCache
+from src.core.router import Router
+from src.core.scheduler import AdmissionController, BudgetLedger
+from src.core.shared_cache import SharedCache, open_backend
+from src.core.sql_generator import SQLGenerator
+from src.core.sql_repair import SQLRepairer
+from src.core.utils import PromptLoader
+from src.core.validator import Validator
+from src.core.warmup import TraceLog, WarmupScheduler
+
+if TYPE_CHECKING:
+    from src.adapters.duckdb_adapter import DuckDBAdapter
+
+BASE_TABLES = ("fct_sales", "dim_product", "dim_store")
+
+# Single background thread for data warm-up, shared by every pipeline built in this process
+_warmup_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="data-warmup")
+
+
+def open_database(settings) -> "DuckDBAdapter":
+    """Opens the database without loading anything (cheap)."""
+    from src.adapters.duckdb_adapter import DuckDBAdapter
+
+    if settings.DUCKDB_READ_ONLY:
+        return DuckDBAdapter(settings.DUCKDB_PATH, read_only=True)
+    return DuckDBAdapter()
+
+
+def warm_database(db: "DuckDBAdapter", settings) -> "DuckDBAdapter":
+    """
+    Loads the parquet fixtures and rollups (or attaches the prebuilt ones on a
+    read-only file). This is the slow part of startup.
+    """
+    if db.read_only:
+        db.attach_rollups()
+    else:
+        for table in BASE_TABLES:
+            db.load_parquet(table, f"{settings.DATA_DIR}/{table}.parquet")
+        db.build_rollups()
+    # Column stats for the SQL prompt, so the first question does not wait for them
+    db.describe_schema()
+    # First result set otherwise pays for the pandas import
+    import pandas  # noqa: F401
+    return db
+
+
+def build_database(settings) -> "DuckDBAdapter":
+    """
+    Opens the shared read-only database file when configured, otherwise loads
+    the parquet fixtures into an in-memory database.
+    """
+    return warm_database(open_database(settings), settings)
+
+
+def build_shared_cache(settings) -> Optional[SharedCache]:
+    """The replicas' shared cache tier, when SHARED_CACHE_URL is set."""
+    if not settings.SHARED_CACHE_URL:
+        return None
+    return SharedCache(
+        open_backend(settings.SHARED_CACHE_URL),
+        ttl_s=settings.SHARED_CACHE_TTL_S,
+        max_item_bytes=settings.SHARED_CACHE_MAX_ITEM_MB * 2**20,
+        cooldown_s=settings.SHARED_CACHE_COOLDOWN_S,
+    )
+
+
+def build_llms(
+    settings,
+    api_key: Optional[str] = None,
+    shared_cache: Optional[SharedCache] = None,
+    ledger: Optional[BudgetLedger] = None
+) -> Dict[str, TieredLLM]:
+    """
+    A tiered client per stage ("router", "planner", "sql") from the
+    LLM_*_MODELS settings; stages naming the same model share its client.
+    """
+    from src.adapters.local_llm import LOCAL_MODEL, LocalLLM
+
+    clients = {}
+
+    def client(name: str):
+        if name not in clients:
+            if name == LOCAL_MODEL:
+                clients[name] = LocalLLM()
+            else:
+                from src.adapters.gemini import GeminiAdapter
+                clients[name] = GeminiAdapter(api_key=api_key or settings.GOOGLE_API_KEY, model_name=name)
+        return clients[name]
+
+    llms = {}
+    for stage, models in (
+        ("router", settings.LLM_ROUTER_MODELS),
+        ("planner", settings.LLM_PLANNER_MODELS),
+        ("sql", settings.LLM_SQL_MODELS),
+    ):
+        names = [m.strip() for m in models.split(",") if m.strip()] or [settings.LLM_MODEL]
+        check = router_check(settings.LLM_MIN_CONFIDENCE) if stage == "router" else None
+        llms[stage] = TieredLLM(
+            stage, [ModelTier(name, client(name)) for name in names], check=check, cache=shared_cache, ledger=ledger
+        )
+    return llms
+
+
+def build_pipeline(api_key: Optional[str] = None, warm_in_background: bool = True) -> CopilotPipeline:
+    """
+    Wires the production pipeline (Gemini + DuckDB) from settings.
+
+    With warm_in_background, data loading runs on a background thread and the
+    pipeline is returned immediately; the first question's LLM calls overlap
+    with it and only SQL execution waits for the data.
+    """
+    from src.core.config import settings
+
+    policy_paths = (settings.SQL_POLICIES_PATH, settings.ACCESS_POLICIES_PATH)
+    policy = PolicyEngine(*policy_paths, reload_s=settings.POLICY_RELOAD_S)
+    scheduler = None
+    if settings.SCHED_ENABLED:
+        scheduler = AdmissionController(
+            policy,
+            llm_capacity=settings.SCHED_LLM_CONCURRENCY,
+            db_capacity=settings.SCHED_DB_CONCURRENCY,
+            max_queue=settings.SCHED_MAX_QUEUE,
+            max_wait_s=settings.SCHED_MAX_WAIT_S,
+        )
+    shared_cache = build_shared_cache(settings)
+    llms = build_llms(
+        settings, api_key, shared_cache=shared_cache, ledger=scheduler.ledger if scheduler is not None else None
+    )
+    loader = PromptLoader(settings.PROMPTS_DIR)
+    catalog = IntentCatalog(settings.CATALOG_DIR)
+    glossary = load_glossary(f"{settings.CATALOG_DIR}/glossary.md")
+    plan_cache = PlanCache(
+        settings.PLAN_CACHE_PATH,
+        catalog_version=catalog.version,
+        canonicalizer=QueryCanonicalizer(glossary),
+        shared=shared_cache
+    )
+    workers = None
+    if settings.CPU_WORKERS:
+        from src.core.workers import CPUWorkerPool
+        workers = CPUWorkerPool(settings.CPU_WORKERS, policy_paths=policy_paths)
+
+    db = open_database(settings)
+    if warm_in_background:
+        # The router needs the Gemini clients first, so build them before loading data
+        _warmup_pool.submit(lambda: [getattr(t.client, "model", None) for llm in llms.values() for t in llm.tiers])
+        db_ready: Optional[Future] = _warmup_pool.submit(warm_database, db, settings)
+    else:
+        warm_database(db, settings)
+        db_ready = None
+
+    def live_schema():
+        # The static schema stands in until warm-up has loaded the tables
+        if db_ready is None or db_ready.done():
+            # Row counts and ranges of the caller's tenant only
+            user = current_user()
+            return db.describe_schema(tenant_id=user.tenant_id if user else None)
+        return None
+
+    context = ContextBuilder(
+        catalog, glossary, schema_source=live_schema, token_budget=settings.CONTEXT_TOKEN_BUDGET
+    )
+
+    generator = SQLGenerator(llms["sql"], context_builder=context)
+    trace_log = TraceLog(settings.TRACE_LOG_PATH, max_bytes=settings.TRACE_LOG_MAX_MB * 2**20)
+    pipeline = CopilotPipeline(
+        router=Router(llms["router"], loader, policy_engine=policy, context_builder=context),
+        planner=Planner(llms["planner"], loader, plan_cache=plan_cache, context_builder=context),
+        sql_generator=generator,
+        validator=Validator(db=db, policy_engine=policy),
+        db=db,
+        catalog=catalog,
+        db_ready=db_ready,
+        workers=workers,
+        result_cache=ResultCache(settings.RESULT_CACHE_MB * 2**20),
+        profiler=ProfileSampler.from_settings(settings),
+        repairer=SQLRepairer(
+            generator, db, max_attempts=settings.SQL_REPAIR_ATTEMPTS, cache_size=settings.SQL_REPAIR_CACHE_SIZE
+        ),
+        approx_min_rows=settings.APPROX_MIN_ROWS,
+        approx_sample_percent=settings.APPROX_SAMPLE_PERCENT,
+        trace_log=trace_log,
+        shared_cache=shared_cache,
+        scheduler=scheduler
+    )
+    if settings.WARMUP_ENABLED:
+        pipeline.warmup = WarmupScheduler(
+            pipeline,
+            tenants=[t.strip() for t in settings.WARMUP_TENANTS.split(",") if t.strip()],
+            trace_log=trace_log,
+            top_n=settings.WARMUP_TOP_N,
+            time_budget_s=settings.WARMUP_TIME_BUDGET_S,
+            cpu_budget_s=settings.WARMUP_CPU_BUDGET_S,
+        )
+        # First run waits for the data warm-up, then re-runs after every refresh
+        pipeline.warmup.start()
+    return pipeline
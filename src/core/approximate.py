@@ -0,0 +1,156 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from sqlglot import parse_one, exp
+from src.core.rollup_rewriter import FACT_TABLE
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_SAMPLE_PERCENT = 10.0
+DEFAULT_SEED = 42
+# Two-sided 95% normal interval
+Z_95 = 1.96
+# Typical relative standard error of DuckDB's HyperLogLog (approx_count_distinct)
+HLL_RELATIVE_ERROR = 0.0163
+SE_PREFIX = "__se_"
+
+# Unbiased on a uniform sample as they are
+SAMPLE_SAFE = (exp.Avg, exp.Stddev, exp.StddevSamp, exp.StddevPop, exp.Variance, exp.VariancePop, exp.ApproxQuantile)
+# Totals: scaled up by 1 / sampling fraction
+SCALED = (exp.Sum, exp.Count)
+
+
+class ApproximateQuery:
+    """
+    A query rewritten to read a Bernoulli sample of the fact table, with the
+    hidden standard-error columns needed to bound its estimates.
+    """
+    def __init__(self, sql: str, fraction: float, bounds: Dict[str, str], functions: List[str]):
+        """
+        Args:
+            fraction: Share of fact rows read (1.0 when only aggregates were swapped).
+            bounds: Output column -> its standard-error column.
+            functions: Exact aggregates replaced by approximate ones.
+        """
+        self.sql = sql
+        self.fraction = fraction
+        self.bounds = bounds
+        self.functions = functions
+
+    def error_bounds(self, df: "pd.DataFrame") -> Tuple["pd.DataFrame", Dict[str, float]]:
+        """
+        Drops the standard-error columns and returns the largest 95% relative
+        error of each bounded column over the result rows.
+        """
+        relative: Dict[str, float] = {}
+        for column, se_column in self.bounds.items():
+            worst = 0.0
+            for value, se in zip(df[column], df[se_column]):
+                if se is None or value is None or math.isnan(se) or math.isnan(value):
+                    continue
+                worst = max(worst, Z_95 * se / abs(value) if value else (math.inf if se else 0.0))
+            relative[column] = round(worst, 4)
+        return df.drop(columns=list(self.bounds.values())), relative
+
+
+def _quantile(node: exp.PercentileCont) -> exp.Expression:
+    return exp.ApproxQuantile(this=node.this.copy(), quantile=node.expression.copy())
+
+
+def _standard_error(agg: exp.Expression, fraction: float) -> Optional[exp.Expression]:
+    """SQL for the standard error of one sampled aggregate, or None when not bounded."""
+    keep = 1.0 - fraction
+    if isinstance(agg, exp.Sum):
+        x = f"CAST({agg.this.sql('duckdb')} AS DOUBLE)"
+        return parse_one(f"SQRT({keep} * SUM({x} * {x})) / {fraction}", read="duckdb")
+    if isinstance(agg, exp.Count) and not isinstance(agg.this, exp.Distinct):
+        return parse_one(f"SQRT({keep} * {agg.sql('duckdb')}) / {fraction}", read="duckdb")
+    if isinstance(agg, exp.Avg):
+        x = agg.this.sql("duckdb")
+        return parse_one(f"STDDEV_SAMP({x}) / SQRT(COUNT({x})) * SQRT({keep})", read="duckdb")
+    return None
+
+
+def approximate_sql(
+    sql: str,
+    sample_percent: float = DEFAULT_SAMPLE_PERCENT,
+    table: str = FACT_TABLE,
+    seed: int = DEFAULT_SEED
+) -> Optional[ApproximateQuery]:
+    """
+    Rewrites an aggregate query over the fact table to run on a
+    sample_percent Bernoulli sample: SUM and COUNT are scaled up by the
+    sampling fraction, AVG / STDDEV / quantiles are estimated from the sample
+    (exact quantiles become approx_quantile), and COUNT(DISTINCT) becomes
+    approx_count_distinct (a sample cannot estimate distinct counts, so those
+    queries read every row). The sample is REPEATABLE, so the same query
+    gives the same estimate.
+
+    Returns None when the query is not eligible and must run exactly: not a
+    single aggregating SELECT reading the table once, or using aggregates a
+    sample cannot estimate (MIN, MAX, ...).
+    """
+    try:
+        tree = parse_one(sql, read="duckdb")
+    except Exception:
+        return None
+    if not isinstance(tree, exp.Select) or tree.args.get("with") or tree.find(exp.Subquery, exp.Union, exp.Window):
+        return None
+    tables = [t for t in tree.find_all(exp.Table) if t.name.lower() == table]
+    aggregates = list(tree.find_all(exp.AggFunc))
+    if len(tables) != 1 or not aggregates:
+        return None
+    if any(not isinstance(a, SAMPLE_SAFE + SCALED + (exp.PercentileCont, exp.ApproxDistinct)) for a in aggregates):
+        return None
+
+    distinct = any(isinstance(a, exp.ApproxDistinct) or isinstance(a.this, exp.Distinct) for a in aggregates)
+    fraction = 1.0 if distinct else min(sample_percent, 100.0) / 100.0
+    functions: List[str] = []
+
+    def swap(node: exp.Expression) -> exp.Expression:
+        if isinstance(node, exp.Count) and isinstance(node.this, exp.Distinct):
+            functions.append("approx_count_distinct")
+            return exp.ApproxDistinct(this=node.this.expressions[0].copy())
+        if isinstance(node, exp.PercentileCont):
+            functions.append("approx_quantile")
+            return _quantile(node)
+        if fraction < 1.0 and isinstance(node, SCALED):
+            return exp.Div(this=node.copy(), expression=exp.Literal.number(fraction))
+        return node
+
+    # Standard errors of the plain aggregates the query returns, from the original projections
+    bounds: Dict[str, str] = {}
+    extra: List[exp.Expression] = []
+    if fraction < 1.0:
+        for i, projection in enumerate(tree.expressions):
+            agg = projection.this if isinstance(projection, exp.Alias) else projection
+            se = _standard_error(agg, fraction) if projection.alias_or_name else None
+            if se is not None:
+                bounds[projection.alias_or_name] = f"{SE_PREFIX}{i}"
+                extra.append(exp.alias_(se, f"{SE_PREFIX}{i}"))
+    # Swap in approximate aggregates and scale the sampled totals
+    tree = tree.transform(swap, copy=True)
+
+    if fraction < 1.0:
+        target = next(t for t in tree.find_all(exp.Table) if t.name.lower() == table)
+        target.replace(exp.TableSample(
+            this=target.copy(), method=exp.var("BERNOULLI"), percent=exp.Literal.number(fraction * 100),
+            seed=exp.Literal.number(seed), kind="TABLESAMPLE",
+        ))
+    if extra:
+        tree.set("expressions", tree.expressions + extra)
+    return ApproximateQuery(tree.sql(dialect="duckdb"), fraction, bounds, sorted(set(functions)))
+
+
+def approximate_info(query: ApproximateQuery, relative_error: Dict[str, float], table: str = FACT_TABLE) -> Dict[str, Any]:
+    """What the response reports about an approximate result."""
+    hll = {"approx_count_distinct": HLL_RELATIVE_ERROR * Z_95} if "approx_count_distinct" in query.functions else {}
+    return {
+        "sampled_table": table if query.fraction < 1.0 else None,
+        "sample_percent": round(query.fraction * 100, 4),
+        "method": "bernoulli" if query.fraction < 1.0 else None,
+        "confidence": 0.95,
+        "relative_error": relative_error,
+        "approximate_functions": query.functions,
+        "function_error": {k: round(v, 4) for k, v in hll.items()},
+    }
@@ -0,0 +1,84 @@
+import yaml
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+def load_policy(path: str) -> Dict[str, Any]:
+    """Loads a YAML policy file (e.g. sql/sql_policies.yaml, catalog/policies.yaml)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+class IntentCatalog:
+    """
+    Read-only view over catalog/intents.yaml.
+    Maps intent ids to their catalog entry and SQL template.
+    """
+    def __init__(self, catalog_dir: str = "catalog", templates_dir: str = "sql/templates"):
+        self.catalog_dir = Path(catalog_dir)
+        self.templates_dir = Path(templates_dir)
+
+        with open(self.catalog_dir / "intents.yaml", "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+
+        self.version = str(data.get("version", ""))
+        self.intents: Dict[str, Dict[str, Any]] = {
+            entry["intent_id"]: entry for entry in data.get("intents", [])
+        }
+
+    def get(self, intent_id: str) -> Optional[Dict[str, Any]]:
+        return self.intents.get(intent_id)
+
+    def ids(self) -> List[str]:
+        return list(self.intents)
+
+    def template_path(self, intent_id: str) -> Optional[Path]:
+        """
+        Returns the SQL template path for an intent, or None if the intent
+        has no template or the file does not exist yet.
+        """
+        entry = self.get(intent_id)
+        if not entry or not entry.get("sql_template"):
+            return None
+        path = self.templates_dir / entry["sql_template"]
+        return path if path.exists() else None
+
+
+def load_glossary(glossary_path: str = "catalog/glossary.md") -> List[Dict[str, Any]]:
+    """
+    Parses catalog/glossary.md into term entries.
+    Returns:
+        A list of {"term", "name", "table", "column", "unit", "synonyms"} dicts,
+        one per `### Term` heading.
+    """
+    entries: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+
+    with open(glossary_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("### "):
+                term = line[4:].strip()
+                current = {
+                    "term": term,
+                    # "Average Ticket / AOV" -> "average_ticket"
+                    "name": term.split("/")[0].strip().lower().replace(" ", "_"),
+                    "table": None,
+                    "column": None,
+                    "unit": None,
+                    "synonyms": [],
+                }
+                entries.append(current)
+            elif line.startswith("## "):
+                current = None
+            elif current is not None and line.startswith("- **"):
+                label, _, value = line[4:].partition("**:")
+                value = value.strip()
+                if label == "Synonyms":
+                    current["synonyms"] = [s.strip() for s in value.split(",") if s.strip()]
+                elif label in ("Table", "Column", "Unit"):
+                    current[label.lower()] = value.replace("`", "")
+                    if label == "Column":
+                        # Drop annotations such as "net_sales (calculated: ...)"
+                        current["column"] = current["column"].split(" (")[0]
+
+    return entries
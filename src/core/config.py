@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -8,22 +9,110 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     
     # LLM
-    GOOGLE_API_KEY: str
+    # Optional at load time so tooling and tests can import config without a key;
+    # GeminiAdapter raises if it is still missing when a client is built
+    GOOGLE_API_KEY: Optional[str] = None
     LLM_MODEL: str = "gemini-pro"
     TEMPERATURE: float = 0.0
+    # Models per stage, comma-separated, cheapest first (empty = LLM_MODEL). A stage
+    # escalates to its next model when an answer does not validate, needs
+    # disambiguation or (router) is below LLM_MIN_CONFIDENCE or refuses. "local" is the
+    # offline stand-in, e.g. LLM_ROUTER_MODELS="local,gemini-1.5-flash"
+    LLM_ROUTER_MODELS: str = ""
+    LLM_PLANNER_MODELS: str = ""
+    LLM_SQL_MODELS: str = ""
+    LLM_MIN_CONFIDENCE: float = 0.7
     
     # Logging
     LOG_LEVEL: str = "INFO"
     
     # Database
     DUCKDB_PATH: str = "retail_copilot.duckdb"
+    # When true, workers open DUCKDB_PATH read-only (built by scripts/build_duckdb.py)
+    # instead of loading parquet files into an in-memory database
+    DUCKDB_READ_ONLY: bool = False
+    DATA_DIR: str = "data"
+    
+    # Processes for CPU-bound steps (validation, fingerprinting, result shaping); 0 = in-thread
+    CPU_WORKERS: int = 0
+    
+    # Caches
+    PLAN_CACHE_PATH: str = ".cache/plan_cache.sqlite"
+    # In-memory result cache per worker process, and chat history per UI session
+    RESULT_CACHE_MB: int = 256
+    SESSION_BUDGET_MB: int = 32
+    # Cache tier shared by replicas (LLM responses, plans, results), per tenant and role:
+    # sqlite:///.cache/shared.sqlite (one node) or redis://[:password@]host:6379/0
+    # (rediss:// for TLS); empty = off. After a backend error it is skipped for the cool-down
+    SHARED_CACHE_URL: str = ""
+    SHARED_CACHE_TTL_S: int = 86400
+    SHARED_CACHE_MAX_ITEM_MB: int = 16
+    SHARED_CACHE_COOLDOWN_S: float = 30.0
+    
+    # Admission control: LLM calls and queries running at once per replica (shared
+    # fairly by tenant weight), requests allowed to wait, and how long before shedding;
+    # per-tenant caps and daily budgets are in the access policy (tenant_policies)
+    SCHED_ENABLED: bool = True
+    SCHED_LLM_CONCURRENCY: int = 8
+    SCHED_DB_CONCURRENCY: int = 4
+    SCHED_MAX_QUEUE: int = 64
+    SCHED_MAX_WAIT_S: float = 5.0
+    
+    # Estimated input tokens of selected context (intents, glossary) per prompt
+    CONTEXT_TOKEN_BUDGET: int = 600
+    
+    # Model repairs of generated SQL the database rejects, and fixes remembered per bad SQL
+    SQL_REPAIR_ATTEMPTS: int = 1
+    SQL_REPAIR_CACHE_SIZE: int = 1024
+    
+    # Approximate mode (opt-in per request): sample share of fct_sales, and the
+    # EXPLAIN row estimate below which queries still run exactly
+    APPROX_SAMPLE_PERCENT: float = 10.0
+    APPROX_MIN_ROWS: int = 1_000_000
+    
+    # Cache warm-up after each data refresh: logged questions (TRACE_LOG_PATH) and
+    # catalog defaults per tenant (WARMUP_TENANTS, comma-separated; empty = all)
+    TRACE_LOG_PATH: str = ".cache/traces.jsonl"
+    TRACE_LOG_MAX_MB: int = 16
+    WARMUP_ENABLED: bool = True
+    WARMUP_TENANTS: str = ""
+    WARMUP_TOP_N: int = 20
+    WARMUP_TIME_BUDGET_S: float = 30.0
+    WARMUP_CPU_BUDGET_S: float = 20.0
+    
+    # Per-request profiling: every request of PROFILE_TENANTS (comma-separated)
+    # plus a random PROFILE_SAMPLE_RATE of the rest; Chrome traces go to PROFILE_DIR
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_TENANTS: str = ""
+    PROFILE_DIR: str = ".cache/profiles"
+    PROFILE_CPROFILE: bool = True
     
     # Paths
     PROMPTS_DIR: str = "prompts"
     CATALOG_DIR: str = "catalog"
+    SQL_POLICIES_PATH: str = "sql/sql_policies.yaml"
+    ACCESS_POLICIES_PATH: str = "catalog/policies.yaml"
+    # Seconds between checks of the policy files for changes (hot reload)
+    POLICY_RELOAD_S: float = 2.0
+    
+    # HTTP API
+    # When set, the Streamlit UI calls this API instead of running the pipeline in-process
+    COPILOT_API_URL: Optional[str] = None
     
     class Config:
         env_file = ".env"
         case_sensitive = True
 
-settings = Settings()
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Reads the environment / .env once, on first use."""
+    return Settings()
+
+
+def __getattr__(name: str):
+    # Keeps `from src.core.config import settings` working without
+    # parsing the environment at import time
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
@@ -14,6 +16,28 @@ class SecurityContext(BaseModel):
     class Config:
         frozen = True
 
+    def prompt_json(self) -> str:
+        """The context as prompts see it: no user_id, so answers are shared by a tenant's role."""
+        return self.model_dump_json(exclude={"user_id"})
+
+# Caller of the LLM call in progress, for layers below the pipeline that are not
+# handed a SecurityContext (shared LLM-response cache, budget ledger)
+_current_user: ContextVar[Optional[SecurityContext]] = ContextVar("current_user", default=None)
+
+
+@contextmanager
+def user_scope(user_ctx: SecurityContext):
+    """Makes user_ctx the current_user() in this context (set around router / planner / SQL calls)."""
+    token = _current_user.set(user_ctx)
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+
+def current_user() -> Optional[SecurityContext]:
+    return _current_user.get()
+
 def get_mock_context(role: str = "analyst") -> SecurityContext:
     """
     Returns a mock security context for local development.
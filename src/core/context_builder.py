@@ -0,0 +1,281 @@
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from src.core.catalog import IntentCatalog
+from src.core.types import ColumnSchema, Plan, TableSchema, dump_json
+
+TOP_K_INTENTS = 3
+TOP_K_GLOSSARY = 6
+DEFAULT_TOKEN_BUDGET = 600
+# Rough size of a token for English text / JSON (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+# Columns of the bundled data, for when no live schema is available yet
+DEFAULT_SCHEMA: Dict[str, List[str]] = {
+    "fct_sales": [
+        "order_id", "order_date", "product_id", "store_id", "quantity", "gross_sales", "net_sales", "returns",
+        "tenant_id",
+    ],
+    "dim_product": ["product_id", "product_name", "category", "price"],
+    "dim_store": ["store_id", "store_name", "region", "city"],
+}
+
+STOPWORDS = {
+    "a", "an", "and", "by", "for", "from", "in", "is", "me", "of", "on", "our", "per", "show", "the", "to",
+    "was", "what", "were", "with", "give", "how", "did", "do", "last", "this", "over", "calculate",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def compact_json(value: Any) -> str:
+    """JSON without whitespace, with None / empty fields dropped."""
+    return dump_json(_strip_empty(value))
+
+
+def _strip_empty(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_empty(v) for k, v in value.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_strip_empty(v) for v in value]
+    return value
+
+
+def _column_text(column: ColumnSchema) -> str:
+    """'name TYPE' plus what the model needs to write filters: range, values or distinct count."""
+    text = f"{column.name} {column.type}"
+    if column.min is not None and column.max is not None:
+        if column.type.startswith(("DATE", "TIMESTAMP")):
+            low, high = column.min[:10], column.max[:10]
+        else:
+            low, high = (f"{float(v):.6g}" for v in (column.min, column.max))
+        text += f"[{low}..{high}]"
+    elif column.values:
+        text += "{" + "|".join(column.values) + "}"
+    elif column.distinct_count is not None:
+        text += f"~{column.distinct_count}"
+    return text
+
+
+def _words(text: str) -> List[str]:
+    words = []
+    for w in re.findall(r"[a-z0-9]+", text.lower().replace("_", " ")):
+        if w in STOPWORDS:
+            continue
+        # Crude singular so "categories"/"stores" match "category"/"store"
+        if w.endswith("ies") and len(w) > 4:
+            w = w[:-3] + "y"
+        elif w.endswith("s") and not w.endswith("ss") and len(w) > 3:
+            w = w[:-1]
+        words.append(w)
+    return words
+
+
+class ContextBuilder:
+    """
+    Picks the prompt context for one question instead of sending the whole
+    catalog: the top-k intents and glossary entries by word overlap with the
+    question (for the router and planner) and the schema columns a plan
+    needs (for the SQL generator), compactly serialized and cut to a token
+    budget.
+
+    Each build also reports the estimated input tokens used and saved
+    against sending everything ({"tokens", "full_tokens", "tokens_saved"}).
+
+    With a schema_source (e.g. DuckDBAdapter.describe_schema), schema slices
+    come from the live tables with column types, date/numeric ranges and
+    small value sets; the static schema is used while it returns nothing.
+    Its row counts and ranges reach a tenant's SQL prompt, so the source
+    should describe the calling tenant's rows (describe_schema(tenant_id)).
+    """
+    def __init__(
+        self,
+        catalog: Optional[IntentCatalog] = None,
+        glossary: Optional[List[Dict[str, Any]]] = None,
+        schema: Optional[Dict[str, List[str]]] = None,
+        schema_source: Optional[Callable[[], Optional[Dict[str, TableSchema]]]] = None,
+        top_k_intents: int = TOP_K_INTENTS,
+        top_k_glossary: int = TOP_K_GLOSSARY,
+        token_budget: int = DEFAULT_TOKEN_BUDGET
+    ):
+        self.top_k_intents = top_k_intents
+        self.top_k_glossary = top_k_glossary
+        self.token_budget = token_budget
+        self.schema = schema or DEFAULT_SCHEMA
+        self.schema_source = schema_source
+
+        self.intents = [self._intent_entry(i) for i in (catalog.intents.values() if catalog else [])]
+        self.glossary = [self._glossary_entry(g) for g in glossary or []]
+
+        # Word -> [(entry index, weight)], built once so scoring is per question word
+        self._intent_index = self._index(
+            (i, 3.0, [entry["intent_id"]] + entry["measures"]) for i, entry in enumerate(self.intents)
+        )
+        self._intent_index_weak = self._index(
+            (i, 1.0, [entry["description"]] + entry["dimensions"]) for i, entry in enumerate(self.intents)
+        )
+        self._phrases: List[List[Tuple[str, ...]]] = [
+            [tuple(_words(p)) for p in g["phrases"] if _words(p)] for g in self.glossary
+        ]
+        self._glossary_index = self._index((i, 1.0, g["phrases"]) for i, g in enumerate(self.glossary))
+
+        # What the prompts got before: every entry, default json.dumps
+        self._full_intents = estimate_tokens(json.dumps([e["prompt"] for e in self.intents]))
+        self._full_glossary = estimate_tokens(json.dumps([e["prompt"] for e in self.glossary]))
+
+    @staticmethod
+    def _intent_entry(intent: Dict[str, Any]) -> Dict[str, Any]:
+        measures = [m["name"] for m in intent.get("required_measures", [])]
+        dimensions = [d for d in intent.get("granularity", []) + intent.get("optional_dimensions", []) if d != "global"]
+        prompt = {
+            "intent_id": intent["intent_id"],
+            "description": intent.get("description", ""),
+            "measures": measures,
+            "dimensions": dimensions,
+        }
+        return {**prompt, "prompt": prompt}
+
+    @staticmethod
+    def _glossary_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+        phrases = [entry["term"].split("/")[0], *entry["term"].split("/")[1:], entry.get("name", "")]
+        phrases += entry.get("synonyms", [])
+        prompt = {
+            "term": entry.get("name") or entry["term"],
+            "table": entry.get("table"),
+            "column": entry.get("column"),
+            "unit": entry.get("unit"),
+        }
+        return {"phrases": [p for p in phrases if p], "prompt": prompt}
+
+    @staticmethod
+    def _index(items: Iterable[Tuple[int, float, List[str]]]) -> Dict[str, List[Tuple[int, float]]]:
+        index: Dict[str, List[Tuple[int, float]]] = {}
+        for i, weight, texts in items:
+            for word in {w for text in texts for w in _words(text)}:
+                index.setdefault(word, []).append((i, weight))
+        return index
+
+    # -- Scoring -----------------------------------------------------------
+
+    def _score_glossary(self, words: List[str]) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = {}
+        present = set(words)
+        for word in present:
+            for i, weight in self._glossary_index.get(word, ()):
+                scores[i] = scores.get(i, 0.0) + weight
+        for i in scores:
+            # A whole phrase ("net sales") counts more than scattered words
+            phrase = max((len(p) for p in self._phrases[i] if set(p) <= present), default=0)
+            scores[i] += 2.0 * phrase
+        return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def _score_intents(self, words: List[str], glossary_hits: List[Tuple[int, float]]) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = {}
+        for word in set(words):
+            for index in (self._intent_index, self._intent_index_weak):
+                for i, weight in index.get(word, ()):
+                    scores[i] = scores.get(i, 0.0) + weight
+        # Intents whose measures are the glossary terms the question matched
+        for g, score in glossary_hits[:self.top_k_glossary]:
+            term = set(_words(self.glossary[g]["prompt"]["term"]))
+            for i, entry in enumerate(self.intents):
+                if term and term <= set(_words(" ".join([entry["intent_id"]] + entry["measures"]))):
+                    scores[i] = scores.get(i, 0.0) + score
+        return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def _fit(self, sections: Dict[str, List[Dict[str, Any]]]) -> Tuple[Dict[str, List[Dict[str, Any]]], int]:
+        """
+        Adds entries round-robin across sections, best first, while the
+        serialized context stays within the token budget (the first entry of
+        each section is always kept).
+        """
+        kept: Dict[str, List[Dict[str, Any]]] = {name: [] for name in sections}
+        tokens = 0
+        for rank in range(max((len(v) for v in sections.values()), default=0)):
+            for name, entries in sections.items():
+                if rank >= len(entries):
+                    continue
+                cost = estimate_tokens(compact_json(entries[rank])) + 1
+                if rank > 0 and tokens + cost > self.token_budget:
+                    continue
+                kept[name].append(entries[rank])
+                tokens += cost
+        return kept, tokens
+
+    # -- Contexts ----------------------------------------------------------
+
+    def router_context(self, user_query: str) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """glossary_hits for the router prompt ({term, table, column, similarity}) and token stats."""
+        hits = self._score_glossary(_words(user_query))[:self.top_k_glossary]
+        top = hits[0][1] if hits else 1.0
+        entries = []
+        for i, score in hits:
+            prompt = self.glossary[i]["prompt"]
+            entries.append({
+                "term": prompt["term"], "table": prompt["table"], "column": prompt["column"],
+                "similarity": round(score / top, 2),
+            })
+        kept, tokens = self._fit({"glossary_hits": entries})
+        return kept["glossary_hits"], self._stats(tokens, self._full_glossary)
+
+    def planner_context(self, user_query: str) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, int]]:
+        """{"glossary_hits", "intent_catalog"} for the planner prompt and token stats."""
+        words = _words(user_query)
+        glossary_hits = self._score_glossary(words)
+        intents = self._score_intents(words, glossary_hits)[:self.top_k_intents]
+        if not intents:
+            # Nothing matched: let the planner see as much of the catalog as fits
+            intents = [(i, 0.0) for i in range(len(self.intents))]
+        kept, tokens = self._fit({
+            "intent_catalog": [self.intents[i]["prompt"] for i, _ in intents],
+            "glossary_hits": [self.glossary[i]["prompt"] for i, _ in glossary_hits[:self.top_k_glossary]],
+        })
+        return kept, self._stats(tokens, self._full_intents + self._full_glossary)
+
+    def schema_context(self, plan: Plan) -> Tuple[str, Dict[str, int]]:
+        """
+        One line per table the plan uses, "table(col,col,...)", with the join
+        keys, tenant_id, date columns and the columns its measures, dimensions
+        and filters reference. Tables outside the schema are left out.
+
+        From a live schema each column also carries its type and stats, and
+        the line its row count: "fct_sales(order_date TIMESTAMP[2024-01-01..
+        2024-12-30],...) -- 18250 rows".
+        """
+        referenced = set()
+        for item in plan.measures + plan.dimensions + plan.filters:
+            for key in ("column", "field", "name", "formula"):
+                value = getattr(item, key, None)
+                if isinstance(value, str):
+                    referenced.update(re.findall(r"[a-z_][a-z0-9_]*", value.lower()))
+
+        def wanted(column: str) -> bool:
+            return column in referenced or column.endswith("_id") or column.endswith("_date") or column == "tenant_id"
+
+        live = self.schema_source() if self.schema_source is not None else None
+        lines = []
+        if live:
+            for table in dict.fromkeys(plan.tables):
+                if table not in live:
+                    continue
+                columns = live[table].columns
+                picked = [c for c in columns if wanted(c.name)] or columns
+                lines.append(f"{table}({','.join(_column_text(c) for c in picked)}) -- {live[table].row_count} rows")
+            full = estimate_tokens("\n".join(
+                f"{t.name}({','.join(_column_text(c) for c in t.columns)}) -- {t.row_count} rows" for t in live.values()
+            ))
+        else:
+            for table in dict.fromkeys(plan.tables):
+                columns = self.schema.get(table)
+                if columns is None:
+                    continue
+                lines.append(f"{table}({','.join([c for c in columns if wanted(c)] or columns)})")
+            full = estimate_tokens("\n".join(f"- {t} ({', '.join(c)})" for t, c in self.schema.items()))
+        text = "\n".join(lines)
+        return text, self._stats(estimate_tokens(text), full)
+
+    @staticmethod
+    def _stats(tokens: int, full_tokens: int) -> Dict[str, int]:
+        return {"tokens": tokens, "full_tokens": full_tokens, "tokens_saved": max(0, full_tokens - tokens)}
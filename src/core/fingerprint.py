@@ -0,0 +1,35 @@
+import hashlib
+from typing import Tuple
+
+
+def normalize_sql(sql: str, strip_literals: bool = False) -> str:
+    """
+    Canonical form of a query: parsed and re-rendered by sqlglot, so
+    whitespace, keyword case and identifier case do not matter.
+
+    Args:
+        strip_literals: Replace constants with `?` (keeps GROUP BY / ORDER BY
+            ordinals, which change the query's shape).
+    """
+    from sqlglot import parse_one, exp
+
+    tree = parse_one(sql, read="duckdb")
+    if strip_literals:
+        def _placeholder(node):
+            if isinstance(node, exp.Literal) and not isinstance(node.parent, (exp.Group, exp.Ordered)):
+                return exp.Placeholder()
+            return node
+        tree = tree.transform(_placeholder)
+    return tree.sql(dialect="duckdb", normalize=True)
+
+
+def fingerprint_sql(sql: str) -> Tuple[str, str]:
+    """
+    Returns:
+        (exact, structural) fingerprints. `exact` matches queries that return
+        the same result; `structural` matches the same query with different
+        constants (e.g. another tenant or date range).
+    """
+    exact = hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:16]
+    structural = hashlib.sha1(normalize_sql(sql, strip_literals=True).encode()).hexdigest()[:16]
+    return exact, structural
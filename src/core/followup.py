@@ -0,0 +1,217 @@
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+from src.core.plan_cache import RELATIVE_DATE_PATTERNS, apply_time_window, resolve_relative_window
+from src.core.types import Dimension, Filter, Plan, PlanDelta
+
+# Dimensions a follow-up can add or filter on: name -> (table, column, join key, type)
+DIMENSIONS = {
+    "region": ("dim_store", "region", "store_id", "geography"),
+    "store": ("dim_store", "store_name", "store_id", "category"),
+    "category": ("dim_product", "category", "product_id", "category"),
+    "product": ("dim_product", "product_name", "product_id", "category"),
+}
+DIMENSION_SYNONYMS = {"regions": "region", "stores": "store", "categories": "category", "products": "product"}
+
+TIME_GRAINS = ("day", "week", "month", "quarter", "year")
+GRAIN_ADVERBS = {"daily": "day", "weekly": "week", "monthly": "month", "quarterly": "quarter", "yearly": "year"}
+
+# A follow-up refers back to the previous answer...
+MARKERS = {"now", "same", "that", "this", "it", "those", "these", "instead", "also", "too", "again", "then", "but", "and"}
+# ...and, once refinements are taken out, contains nothing else
+FILLER = MARKERS | {
+    "what", "about", "how", "ok", "okay", "please", "can", "you", "show", "me", "give", "let", "lets", "see",
+    "break", "broken", "down", "split", "out", "for", "in", "the", "a", "of", "with", "to", "do", "one",
+    "only", "just", "numbers", "data", "results", "result", "query", "view", "as", "well", "over", "time",
+}
+
+_WORD = r"[A-Za-z0-9][\w\-]*"
+_DIMENSION_WORDS = "|".join(sorted(list(DIMENSIONS) + list(DIMENSION_SYNONYMS), key=len, reverse=True))
+_FILTER = re.compile(
+    rf"\b(?:only|just|for|where|in)\s+(?:the\s+)?({_DIMENSION_WORDS})\s+(?:is\s+|=\s*)?"
+    rf"(?:\"([^\"]+)\"|'([^']+)'|({_WORD}))",
+    re.I,
+)
+_GRAIN = re.compile(rf"\b(?:by|per)\s+({'|'.join(TIME_GRAINS)})s?\b|\b({'|'.join(GRAIN_ADVERBS)})\b", re.I)
+_BREAKDOWN = re.compile(rf"\b(?:by|per|across)\s+(?:each\s+)?({_DIMENSION_WORDS})\b", re.I)
+_YEAR = re.compile(r"\b(?:in|for|during)\s+(20\d\d)\b", re.I)
+_MARKER_PHRASE = re.compile(r"\b(?:what|how)\s+about\b", re.I)
+
+
+def detect_followup(user_query: str, previous: Plan, today: Optional[date] = None) -> Optional[PlanDelta]:
+    """
+    Cheap rule-based check for refinements of the previous plan ("now break
+    that down by region", "same but for Q2", "only category Toys").
+
+    Returns None unless the question refers back to the previous answer and
+    everything in it is a recognized refinement; anything else goes through
+    the full router/planner.
+    """
+    today = today or date.today()
+    text = " " + user_query.replace("’", "'") + " "
+    delta = PlanDelta()
+
+    window = _detect_window(text, previous, today)
+    if window is not None:
+        (start, end), text = window
+        delta.time_window = {"start": start, "end": end}
+
+    # Each handler records its refinement and blanks out the matched words
+    def _filter(m: re.Match) -> str:
+        name = _dimension(m.group(1))
+        table, column, _, _ = DIMENSIONS[name]
+        value = m.group(2) or m.group(3) or m.group(4)
+        delta.add_filters.append(Filter(field=column, table=table, operator="=", value=value, source="user_query"))
+        return " "
+
+    def _grain(m: re.Match) -> str:
+        delta.time_grain = (m.group(1) or GRAIN_ADVERBS[m.group(2).lower()]).lower()
+        return " "
+
+    def _breakdown(m: re.Match) -> str:
+        name = _dimension(m.group(1))
+        table, column, _, kind = DIMENSIONS[name]
+        if all(d.column != column for d in previous.dimensions + delta.add_dimensions):
+            delta.add_dimensions.append(Dimension(name=name, table=table, column=column, type=kind))
+        return " "
+
+    text = _FILTER.sub(_filter, text)
+    text = _GRAIN.sub(_grain, text)
+    text = _BREAKDOWN.sub(_breakdown, text)
+
+    words = {w.lower() for w in re.findall(r"[A-Za-z0-9']+", user_query)}
+    leftover = {w.lower() for w in re.findall(r"[A-Za-z0-9']+", text)}
+    refers_back = bool(words & MARKERS) or bool(_MARKER_PHRASE.search(user_query))
+    if not refers_back or leftover - FILLER:
+        return None
+    if not (delta.add_dimensions or delta.add_filters or delta.time_window or delta.time_grain):
+        return None
+    return delta
+
+
+def apply_delta(plan: Plan, delta: PlanDelta) -> Plan:
+    """Returns the previous plan with the follow-up's refinements applied."""
+    if delta.time_window:
+        plan = apply_time_window(
+            plan, date.fromisoformat(delta.time_window["start"]), date.fromisoformat(delta.time_window["end"])
+        )
+
+    dimensions = list(plan.dimensions)
+    time_window = dict(plan.time_window or {})
+    if delta.time_grain:
+        time_window["grain"] = delta.time_grain
+        dimensions = [
+            d.model_copy(update={"name": delta.time_grain}) if d.type == "time" else d for d in dimensions
+        ]
+    dimensions += delta.add_dimensions
+
+    replaced = {f.field for f in delta.add_filters}
+    filters = [f for f in plan.filters if f.field not in replaced] + delta.add_filters
+
+    tables = list(plan.tables)
+    for item in delta.add_dimensions + delta.add_filters:
+        if item.table and item.table not in tables:
+            tables.append(item.table)
+
+    viz_hint = dict(plan.viz_hint or {})
+    if delta.add_dimensions:
+        has_time = any(d.type == "time" for d in dimensions) or bool(time_window.get("grain"))
+        # A new breakdown becomes the series of a time chart, else the x axis
+        viz_hint["series" if has_time else "x_axis"] = delta.add_dimensions[-1].name
+
+    return plan.model_copy(update={
+        "tables": tables,
+        "dimensions": dimensions,
+        "filters": filters,
+        "time_window": time_window or None,
+        "viz_hint": viz_hint or None,
+        "needs_disambiguation": False,
+        "reasoning": f"Follow-up on intent '{plan.intent_id}': {delta.model_dump(exclude_defaults=True)}",
+    })
+
+
+def template_request(plan: Plan, variables: Set[str]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Maps a plan onto an intent template's (structure, values), when the plan
+    only uses what the template can express (one breakdown dimension, a date
+    range, category / returns filters).
+
+    Args:
+        variables: Variables used by the template (TemplateStore.variables).
+    """
+    window = plan.time_window or {}
+    if not (window.get("start") and window.get("end")) or "start_date" not in variables:
+        return None
+
+    structure: Dict[str, Any] = {}
+    values: Dict[str, Any] = {
+        "start_date": window["start"],
+        "end_date": window["end"],
+        "row_limit": plan.limits.get("rows") or 1000,
+    }
+    if "time_grain" in variables:
+        structure["time_grain"] = window.get("grain") or "month"
+
+    breakdowns = [d for d in plan.dimensions if d.type != "time"]
+    if breakdowns:
+        match = next((n for n, spec in DIMENSIONS.items() if spec[1] == breakdowns[0].column), None)
+        if len(breakdowns) > 1 or match is None or "dimension_column" not in variables:
+            return None
+        table, column, join_key, _ = DIMENSIONS[match]
+        structure.update({
+            "dimension_table": table, "dimension_column": column,
+            "dimension_name": breakdowns[0].name or match, "join_key": join_key,
+        })
+
+    for f in plan.filters:
+        field, op, value = f.field, str(f.operator or "").upper(), f.value
+        if field == "order_date":
+            continue
+        if field == "returns" and op == "=" and str(value) == "0" and "exclude_returns" in variables:
+            structure["exclude_returns"] = True
+        elif field == "category" and op in ("=", "IN") and "category_filter" in variables:
+            if structure.get("dimension_table") != "dim_product":
+                # The template filters on the joined dimension table
+                return None
+            values["category_filter"] = value if isinstance(value, list) else [value]
+        else:
+            return None
+    return structure, values
+
+
+def _dimension(word: str) -> str:
+    word = word.lower()
+    return DIMENSION_SYNONYMS.get(word, word)
+
+
+def _detect_window(text: str, previous: Plan, today: date) -> Optional[Tuple[Tuple[str, str], str]]:
+    m = re.search(r"\bq([1-4])\s+(\d{4})\b", text, re.I)
+    if m:
+        start = date(int(m.group(2)), 3 * (int(m.group(1)) - 1) + 1, 1)
+        end = _next_quarter(start) - timedelta(days=1)
+        return (start.isoformat(), end.isoformat()), text[:m.start()] + " " + text[m.end():]
+
+    for pattern, build in RELATIVE_DATE_PATTERNS:
+        m = pattern.search(text.lower())
+        if not m:
+            continue
+        token = build(m)
+        anchor = today
+        previous_start = (previous.time_window or {}).get("start")
+        if re.fullmatch(r"@q[1-4]", token) and previous_start:
+            # "same but for Q2" means Q2 of the year already being looked at
+            anchor = date(int(str(previous_start)[:4]), 12, 31)
+        resolved = resolve_relative_window(token, anchor) if token.startswith("@") else None
+        if resolved:
+            return tuple(d.isoformat() for d in resolved), text[:m.start()] + " " + text[m.end():]
+
+    m = _YEAR.search(text)
+    if m:
+        year = int(m.group(1))
+        return (date(year, 1, 1).isoformat(), date(year, 12, 31).isoformat()), text[:m.start()] + " " + text[m.end():]
+    return None
+
+
+def _next_quarter(start: date) -> date:
+    month = start.month + 3
+    return date(start.year + (month > 12), (month - 1) % 12 + 1, 1)
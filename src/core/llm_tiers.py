@@ -0,0 +1,240 @@
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, TYPE_CHECKING
+from src.core.context import current_user
+from src.core.context_builder import estimate_tokens
+from src.core.profiler import profile_span
+from src.core.types import Plan, RouterOutput, dump_json
+from src.interfaces.llm import LLMClient
+
+if TYPE_CHECKING:
+    from src.core.scheduler import BudgetLedger
+    from src.core.shared_cache import SharedCache
+
+# USD per 1k (input, output) tokens; models not listed are costed at 0
+MODEL_PRICES = {
+    "local": (0.0, 0.0),
+    "gemini-1.5-flash-8b": (0.0000375, 0.00015),
+    "gemini-1.5-flash": (0.000075, 0.0003),
+    "gemini-1.5-pro": (0.00125, 0.005),
+    "gemini-pro": (0.0005, 0.0015),
+}
+DEFAULT_MIN_CONFIDENCE = 0.7
+
+# Escalation check: the reason a tier's answer is not good enough, or None to keep it
+Check = Callable[[str], Optional[str]]
+
+
+def _json(text: str) -> Any:
+    return json.loads(text.replace("```json", "").replace("```", "").strip())
+
+
+def router_check(min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> Check:
+    """
+    Escalates router answers that do not parse, ask to clarify, or are below
+    min_confidence. Refusals (unsafe, handoff) are never final from a lower
+    tier: a cheap model's false block costs the user their question.
+    """
+    def check(text: str) -> Optional[str]:
+        try:
+            out = RouterOutput(**_json(text))
+        except (ValueError, TypeError):
+            return "schema"
+        if out.route in ("clarify", "unsafe", "handoff"):
+            return out.route
+        if out.confidence is not None and out.confidence < min_confidence:
+            return "low_confidence"
+        return None
+    return check
+
+
+def plan_check(text: str) -> Optional[str]:
+    """Escalates plans that do not validate or need disambiguation."""
+    try:
+        plan = Plan(**_json(text))
+    except (ValueError, TypeError):
+        return "schema"
+    return "needs_disambiguation" if plan.needs_disambiguation else None
+
+
+def sql_check(text: str) -> Optional[str]:
+    """Escalates SQL that does not parse as a single SELECT."""
+    from sqlglot import parse, exp
+
+    try:
+        statements = parse(text.replace("```sql", "").replace("```", "").strip(), read="duckdb")
+    except Exception:
+        return "schema"
+    if len(statements) != 1 or not isinstance(statements[0], (exp.Select, exp.Union)):
+        return "schema"
+    return None
+
+
+STAGE_CHECKS: Dict[str, Check] = {"router": router_check(), "planner": plan_check, "sql": sql_check}
+
+
+class ModelTier:
+    """One model of a tier list, with its price and running totals."""
+    def __init__(self, name: str, client: LLMClient, prices: Optional[tuple] = None):
+        """
+        Args:
+            prices: USD per 1k (input, output) tokens; defaults to MODEL_PRICES.
+        """
+        self.name = name
+        self.client = client
+        self.prices = prices or MODEL_PRICES.get(name, (0.0, 0.0))
+        self.calls = 0
+        self.escalations: Dict[str, int] = {}
+        self.latency_ms = 0.0
+        self.cost_usd = 0.0
+
+    def cost(self, prompt: str, text: str) -> float:
+        return (estimate_tokens(prompt) * self.prices[0] + estimate_tokens(text) * self.prices[1]) / 1000
+
+
+class TieredLLM(LLMClient):
+    """
+    LLM client for one pipeline stage that tries its models cheapest first and
+    escalates to the next only when the check rejects an answer (does not
+    parse, low confidence, needs disambiguation). The last tier's answer is
+    always returned. With a single tier it is a thin pass-through.
+
+    Streaming from a lower tier is buffered (its answer must be checked
+    before anything is yielded); the last tier streams as usual.
+
+    With a shared cache, deterministic (temperature 0) answers are cached
+    across replicas for the caller in user_scope; streams the caller
+    stopped early are not. With a ledger, each call's estimated cost is
+    charged to the tenant in user_scope.
+    """
+    def __init__(
+        self,
+        stage: str,
+        tiers: List[ModelTier],
+        check: Optional[Check] = None,
+        cache: Optional["SharedCache"] = None,
+        ledger: Optional["BudgetLedger"] = None
+    ):
+        """
+        Args:
+            stage: "router", "planner" or "sql" (names spans and stats).
+            check: Escalation check; defaults to the stage's STAGE_CHECKS entry.
+            cache: Shared cache tier for responses (src/core/shared_cache.py).
+            ledger: Daily spend per tenant (src/core/scheduler.py).
+        """
+        if not tiers:
+            raise ValueError(f"No models configured for stage '{stage}'")
+        self.stage = stage
+        self.tiers = tiers
+        self.check = check or STAGE_CHECKS.get(stage) or (lambda text: None)
+        self.cache = cache
+        self.ledger = ledger
+        self._lock = threading.Lock()
+
+    def _cache_key(self, prompt: str, kwargs: Dict[str, Any]) -> Optional[str]:
+        if self.cache is None or kwargs["temperature"] != 0.0:
+            return None
+        return dump_json([self.stage, [t.name for t in self.tiers], prompt, kwargs])
+
+    def _record(self, tier: ModelTier, prompt: str, text: str, start: float, escalation: Optional[str]):
+        cost = tier.cost(prompt, text)
+        with self._lock:
+            tier.calls += 1
+            tier.latency_ms += (time.perf_counter() - start) * 1000
+            tier.cost_usd += cost
+            if escalation:
+                tier.escalations[escalation] = tier.escalations.get(escalation, 0) + 1
+        user_ctx = current_user()
+        if self.ledger is not None and user_ctx is not None:
+            self.ledger.charge(user_ctx.tenant_id, cost)
+
+    def _lower_tiers(self, prompt: str, kwargs: Dict[str, Any]) -> Optional[str]:
+        """Tries every tier but the last; the first accepted answer, or None."""
+        for tier in self.tiers[:-1]:
+            start = time.perf_counter()
+            with profile_span(f"llm.{self.stage}.{tier.name}"):
+                try:
+                    text = tier.client.generate_content(prompt, **kwargs)
+                    escalation = self.check(text)
+                except Exception:
+                    text, escalation = "", "error"
+            self._record(tier, prompt, text, start, escalation)
+            if escalation is None:
+                return text
+        return None
+
+    def generate_content(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.0,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        kwargs = dict(system_instruction=system_instruction, temperature=temperature, response_schema=response_schema)
+        key = self._cache_key(prompt, kwargs)
+        text = self.cache.get_text(key) if key else None
+        if text is not None:
+            return text
+
+        text = self._lower_tiers(prompt, kwargs)
+        if text is None:
+            tier = self.tiers[-1]
+            start = time.perf_counter()
+            with profile_span(f"llm.{self.stage}.{tier.name}"):
+                text = tier.client.generate_content(prompt, **kwargs)
+            self._record(tier, prompt, text, start, None)
+        if key:
+            self.cache.put_text(key, text)
+        return text
+
+    def generate_content_stream(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.0,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> Iterator[str]:
+        kwargs = dict(system_instruction=system_instruction, temperature=temperature, response_schema=response_schema)
+        key = self._cache_key(prompt, kwargs)
+        text = self.cache.get_text(key) if key else None
+        if text is None:
+            text = self._lower_tiers(prompt, kwargs)
+            if text is not None and key:
+                self.cache.put_text(key, text)
+        if text is not None:
+            yield text
+            return
+
+        tier = self.tiers[-1]
+        start = time.perf_counter()
+        chunks: List[str] = []
+        try:
+            with profile_span(f"llm.{self.stage}.{tier.name}"):
+                for chunk in tier.client.generate_content_stream(prompt, **kwargs):
+                    chunks.append(chunk)
+                    yield chunk
+        finally:
+            # Also when the caller stops early (router commit)
+            self._record(tier, prompt, "".join(chunks), start, None)
+        # Only reached when the whole stream was read
+        if key:
+            self.cache.put_text(key, "".join(chunks))
+
+    def stats(self) -> Dict[str, Any]:
+        """Per tier: calls, escalations by reason, total / average latency and estimated cost."""
+        with self._lock:
+            return {
+                "stage": self.stage,
+                "tiers": [
+                    {
+                        "model": t.name,
+                        "calls": t.calls,
+                        "escalations": dict(t.escalations),
+                        "latency_ms_total": round(t.latency_ms, 3),
+                        "latency_ms_avg": round(t.latency_ms / t.calls, 3) if t.calls else None,
+                        "cost_usd": round(t.cost_usd, 6),
+                    }
+                    for t in self.tiers
+                ],
+            }
@@ -0,0 +1,539 @@
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import Dict, Any, Iterator, Optional, Tuple, TYPE_CHECKING
+from src.core.router import Router
+from src.core.planner import Planner
+from src.core.sql_generator import SQLGenerator
+from src.core.validator import Validator
+from src.core.catalog import IntentCatalog
+from src.core.fingerprint import fingerprint_sql
+from src.core.followup import apply_delta, detect_followup, template_request
+from src.core.profiler import ProfileSampler, profile_span
+from src.core.result_cache import ResultCache, result_key
+from src.core.result_shaping import paginate, shape_result
+from src.core.scheduler import AdmissionController, BudgetExceeded, Overloaded
+from src.core.shared_cache import SharedCache
+from src.core.sql_repair import SQLRepairer
+from src.core.templates import TemplateStore, bind_values, inline_values, template_parameters
+from src.core.context import SecurityContext, user_scope
+from src.core.types import CostEstimate, Plan, PlanDelta, RouterOutput, Trace
+from src.interfaces.db import DatabaseClient
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from src.core.warmup import TraceLog, WarmupScheduler
+    from src.core.workers import CPUWorkerPool
+
+
+def approximate_note(approx: Dict[str, Any]) -> str:
+    """One line telling the user how approximate the answer is."""
+    if approx["sampled_table"] is None:
+        return "Distinct counts are approximate."
+    errors = list(approx["relative_error"].values()) + list(approx["function_error"].values())
+    bound = f" (within ±{max(errors):.1%} at {approx['confidence']:.0%} confidence)" if errors else ""
+    return f"Estimated from a {approx['sample_percent']:g}% sample{bound}."
+
+
+class CopilotPipeline:
+    """
+    Router -> Planner -> SQLGenerator -> Validator -> Database, wired once and
+    shared by every request. All request state (security context, trace) is
+    passed in per call, so one instance can serve concurrent requests.
+    """
+    def __init__(
+        self,
+        router: Router,
+        planner: Planner,
+        sql_generator: SQLGenerator,
+        validator: Validator,
+        db: DatabaseClient,
+        catalog: Optional[IntentCatalog] = None,
+        db_ready: Optional[Future] = None,
+        workers: Optional["CPUWorkerPool"] = None,
+        result_cache: Optional[ResultCache] = None,
+        profiler: Optional[ProfileSampler] = None,
+        repairer: Optional[SQLRepairer] = None,
+        approx_min_rows: int = 1_000_000,
+        approx_sample_percent: float = 10.0,
+        trace_log: Optional["TraceLog"] = None,
+        shared_cache: Optional[SharedCache] = None,
+        scheduler: Optional[AdmissionController] = None
+    ):
+        """
+        Args:
+            db_ready: Completes when the database has finished loading (see
+                bootstrap.build_pipeline). Only stages that touch the data wait on it.
+            workers: Process pool for validation, fingerprinting and result
+                shaping; when None these run on the request thread.
+            result_cache: Results by tenant, normalized SQL and data version;
+                hits skip the cost gate and the database.
+            profiler: Picks the requests of ask() that are profiled (per
+                tenant, sampled, or on request) and stores their traces.
+            repairer: Sends generated SQL the database rejects back to the
+                model with its error (see execute_generated).
+            approx_min_rows: In approximate mode, queries whose EXPLAIN
+                estimate is below this many rows still run exactly.
+            approx_sample_percent: Share of fct_sales read in approximate mode.
+            trace_log: Records answered questions and their plans (read by
+                the cache warm-up, src/core/warmup.py).
+            shared_cache: Cache tier shared with the other replicas; results
+                the local result cache misses are looked up there, and LLM
+                calls run in the caller's user_scope.
+            scheduler: Admission control; LLM calls and query execution
+                (not cache hits) wait for a fair-share slot of their tenant,
+                and are refused once the tenant's daily budget is spent.
+        """
+        self.router = router
+        self.planner = planner
+        self.sql_generator = sql_generator
+        self.validator = validator
+        self.db = db
+        self.catalog = catalog
+        self.db_ready = db_ready
+        self.workers = workers
+        self.result_cache = result_cache
+        self.profiler = profiler
+        self.repairer = repairer
+        self.approx_min_rows = approx_min_rows
+        self.approx_sample_percent = approx_sample_percent
+        self.trace_log = trace_log
+        self.shared_cache = shared_cache
+        self.scheduler = scheduler
+        # Set by bootstrap when cache warm-up is enabled
+        self.warmup: Optional["WarmupScheduler"] = None
+        self.templates = TemplateStore(str(catalog.templates_dir) if catalog else "sql/templates")
+        # Rendered template SQL that already passed validation and the cost gate
+        self._checked_templates: Dict[str, Any] = {}
+
+    @property
+    def data_ready(self) -> bool:
+        return self.db_ready is None or self.db_ready.done()
+
+    def wait_for_data(self, timeout: Optional[float] = None):
+        """Blocks until the data warm-up has finished; re-raises its error, if any."""
+        if self.db_ready is not None:
+            self.db_ready.result(timeout=timeout)
+
+    def warm_intent(self, intent_id: str) -> Optional[str]:
+        """Runs while the plan is still streaming: selects the template and warms EXPLAIN."""
+        template = self.catalog.template_path(intent_id) if self.catalog else None
+        self.wait_for_data()
+        self.db.validate_sql("SELECT * FROM fct_sales LIMIT 0")
+        return str(template) if template else None
+
+    def admit(self, resource: str, user_ctx: Optional[SecurityContext], cost: float = 1.0):
+        """A fair-share slot of resource ("llm" or "db") for the caller's tenant, when scheduling is on."""
+        if self.scheduler is None or user_ctx is None:
+            return nullcontext()
+        return self.scheduler.admit(resource, user_ctx, cost)
+
+    def route(self, user_query: str, user_ctx: SecurityContext, timings: Optional[Dict[str, Any]] = None) -> RouterOutput:
+        with user_scope(user_ctx), self.admit("llm", user_ctx):
+            return self.router.route(user_query, user_ctx=user_ctx, timings=timings)
+
+    def plan(self, user_query: str, user_ctx: SecurityContext, timings: Optional[Dict[str, Any]] = None) -> Plan:
+        with user_scope(user_ctx), self.admit("llm", user_ctx):
+            return self.planner.plan(user_query, user_ctx=user_ctx, on_intent=self.warm_intent, timings=timings)
+
+    def generate_sql(
+        self, plan: Plan, timings: Optional[Dict[str, Any]] = None, user_ctx: Optional[SecurityContext] = None
+    ) -> str:
+        """Without user_ctx the model's answer is not shared (no tenant to file it under)."""
+        if user_ctx is None:
+            return self.sql_generator.generate_sql(plan, timings=timings)
+        with user_scope(user_ctx), self.admit("llm", user_ctx):
+            return self.sql_generator.generate_sql(plan, timings=timings)
+
+    def _cached_result(self, key: str, user_ctx: SecurityContext) -> Optional["pd.DataFrame"]:
+        """Local result cache, then the shared tier (copied into the local cache on a hit)."""
+        df = self.result_cache.get(key) if self.result_cache is not None else None
+        if df is None and self.shared_cache is not None:
+            with profile_span("shared_cache.get"):
+                df = self.shared_cache.get_frame(user_ctx, key)
+            if df is not None and self.result_cache is not None:
+                self.result_cache.put(key, df)
+        return df
+
+    def _charge(self, user_ctx: SecurityContext, estimate: Optional[CostEstimate]):
+        """Charges the query's estimated cost to the tenant's daily budget (nothing without an estimate)."""
+        if self.scheduler is not None and estimate is not None:
+            self.scheduler.ledger.charge(user_ctx.tenant_id, estimate.cost_usd)
+
+    def _store_result(self, key: str, user_ctx: SecurityContext, df: "pd.DataFrame"):
+        if self.result_cache is not None:
+            self.result_cache.put(key, df)
+        if self.shared_cache is not None:
+            with profile_span("shared_cache.put"):
+                self.shared_cache.put_frame(user_ctx, key, df)
+
+    @property
+    def tenant_scoped(self) -> bool:
+        return getattr(self.db, "enforces_tenant_scope", False)
+
+    def validate(self, sql: str, user_ctx: SecurityContext) -> bool:
+        if self.workers is not None:
+            return self.workers.validate(
+                sql, tenant_id=user_ctx.tenant_id, tenant_scoped=self.tenant_scoped, role=user_ctx.role
+            )
+        return self.validator.validate(
+            sql, tenant_id=user_ctx.tenant_id, tenant_scoped=self.tenant_scoped, role=user_ctx.role
+        )
+
+    def fingerprint(self, sql: str) -> Tuple[str, str]:
+        if self.workers is not None:
+            return self.workers.fingerprint(sql)
+        return fingerprint_sql(sql)
+
+    def shape(self, df: "pd.DataFrame", plan: Optional[Plan] = None) -> Dict[str, Any]:
+        """
+        Prepares the result for display: chart type from the plan's viz_hint and
+        the intent's viz_type, down-sampled to the point budget.
+        """
+        options: Dict[str, Any] = {}
+        if plan is not None:
+            intent = self.catalog.get(plan.intent_id) if self.catalog else None
+            options = {
+                "viz_hint": plan.viz_hint,
+                "viz_types": (intent or {}).get("viz_type"),
+                "top_n": plan.limits.get("categories"),
+            }
+        if self.workers is not None:
+            return self.workers.shape_result(df, **options)
+        return shape_result(df, **options)
+
+    def execute(self, sql: str, user_ctx: SecurityContext, approximate: bool = False) -> Dict[str, Any]:
+        """
+        Validates the SQL for the caller's tenant, routes it to a rollup when
+        possible, enforces the cost gate and executes it. When the database
+        enforces tenant scope, the query runs on the tenant's relations.
+
+        Args:
+            approximate: Allow a sampled, approximate answer for aggregates
+                over fct_sales when the cost estimate is large (at least
+                approx_min_rows); small or ineligible queries run exactly.
+        Returns:
+            {"sql", "rollup", "cost", "df", "fingerprint", "result_key", "cached", "approximate"}
+            (cost is None for cached results; approximate is the sample and
+            error bounds, or None for exact results)
+        """
+        with profile_span("validate"):
+            self.validate(sql, user_ctx)
+        with profile_span("wait_for_data"):
+            self.wait_for_data()
+
+        exec_sql, rollup = sql, None
+        if hasattr(self.db, "route_to_rollup"):
+            with profile_span("route_to_rollup"):
+                exec_sql, rollup = self.db.route_to_rollup(sql)
+
+        with profile_span("fingerprint"):
+            exact, structural = self.fingerprint(sql)
+        approximate = approximate and hasattr(self.db, "execute_approximate")
+        # Approximate answers never stand in for exact ones
+        mode = f"~{self.approx_sample_percent}" if approximate else ""
+        key = result_key(user_ctx.tenant_id, exact + mode, getattr(self.db, "data_version", 0))
+        result = {"sql": exec_sql, "rollup": rollup, "fingerprint": structural, "result_key": key}
+        df = self._cached_result(key, user_ctx)
+        if df is not None:
+            return {**result, "cost": None, "df": df, "cached": True, "approximate": df.attrs.get("approximate")}
+
+        tenant_id = user_ctx.tenant_id if self.tenant_scoped else None
+        with self.admit("db", user_ctx):
+            with profile_span("check_cost"):
+                estimate = self.validator.check_cost(exec_sql, tenant_id=tenant_id)
+            approx = None
+            # Without an estimate (validator has no database) the size is unknown: run exactly
+            if approximate and estimate is not None and estimate.estimated_rows >= self.approx_min_rows:
+                with profile_span("execute_approximate", rollup=rollup):
+                    df, approx = self.db.execute_approximate(
+                        exec_sql, tenant_id=tenant_id, sample_percent=self.approx_sample_percent
+                    )
+                # Kept with the frame for result cache hits
+                df.attrs["approximate"] = approx
+            else:
+                with profile_span("execute_query", rollup=rollup):
+                    df = self.db.execute_query(exec_sql, tenant_id=tenant_id)
+        self._charge(user_ctx, estimate)
+        self._store_result(key, user_ctx, df)
+        return {**result, "cost": estimate, "df": df, "cached": False, "approximate": approx}
+
+    def execute_generated(
+        self, sql: str, plan: Plan, user_ctx: SecurityContext, approximate: bool = False
+    ) -> Dict[str, Any]:
+        """
+        execute() for model-written SQL. SQL the database cannot parse or bind
+        is repaired once by the model from the error (or straight from the
+        repair cache when the same SQL was fixed before); the result then
+        has "repair" with the original and the fixed SQL.
+        """
+        if self.repairer is None:
+            return self.execute(sql, user_ctx, approximate=approximate)
+
+        def repair(plan: Plan, bad_sql: str, error: str, timings: Optional[Dict[str, Any]] = None) -> str:
+            # Like generate_sql: shared cache, budget and fair share of the caller's tenant
+            with user_scope(user_ctx), self.admit("llm", user_ctx):
+                return self.sql_generator.repair_sql(plan, bad_sql, error, timings=timings)
+
+        return self.repairer.run(
+            sql, plan, lambda s: self.execute(s, user_ctx, approximate=approximate), repair=repair
+        )
+
+    def fetch_result(self, sql: str, user_ctx: SecurityContext, page: int = 0) -> "pd.DataFrame":
+        """
+        Re-fetches one page of an earlier result (e.g. an old chat message being
+        expanded): served from the result cache, or re-executed if it was evicted.
+        """
+        return paginate(self.execute(sql, user_ctx)["df"], page)
+
+    def execute_template(
+        self,
+        intent_id: str,
+        structure: Dict[str, Any],
+        values: Dict[str, Any],
+        user_ctx: SecurityContext
+    ) -> Dict[str, Any]:
+        """
+        Runs an intent's SQL template through the prepared-statement path.
+
+        The template is rendered once per structure (grain, dimension, ...) and
+        validated/cost-checked once per rendering; dates, limits and filters are
+        bound per call. tenant_id always comes from the security context, and
+        the caller's role must be allowed to run the intent. Database errors
+        of a rendered template are raised as ValueError (a request error).
+        Returns:
+            {"sql", "bound_sql", "cost", "df", "fingerprint", "result_key", "cached", "approximate"}
+            where bound_sql has the values inlined (display / re-fetch via execute);
+            templates always run exactly, so approximate is None
+        """
+        self.validator.check_intent(intent_id, user_ctx.tenant_id, user_ctx.role)
+        template = self.catalog.template_path(intent_id) if self.catalog else None
+        if template is None:
+            raise ValueError(f"Policy Violation: No SQL template for intent '{intent_id}'.")
+        if not hasattr(self.db, "execute_prepared"):
+            raise ValueError("Policy Violation: Database does not support prepared templates.")
+
+        values = bind_values({**values, "tenant_id": user_ctx.tenant_id})
+        self.validator.check_row_limit(values.get("row_limit"), user_ctx.tenant_id, user_ctx.role)
+        sql = self.templates.render(template.name, structure, bound=list(values))
+        placeholders = template_parameters(sql)
+        missing = [p for p in placeholders if p not in values]
+        if missing:
+            raise ValueError(f"Policy Violation: Missing template parameters: {missing}")
+        values = {p: values[p] for p in placeholders}
+
+        self.wait_for_data()
+        tenant_id = user_ctx.tenant_id if self.tenant_scoped else None
+        bound_sql = inline_values(sql, values)
+        exact, structural = self.fingerprint(bound_sql)
+        key = result_key(user_ctx.tenant_id, exact, getattr(self.db, "data_version", 0))
+        result = {"sql": sql, "bound_sql": bound_sql, "fingerprint": structural, "result_key": key}
+        df = self._cached_result(key, user_ctx)
+        if df is not None:
+            return {**result, "cost": None, "df": df, "cached": True, "approximate": None}
+
+        with self.admit("db", user_ctx):
+            try:
+                if sql not in self._checked_templates:
+                    # The tenant predicate is a bound parameter, so the text check cannot apply
+                    with profile_span("validate"):
+                        self.validator.validate(sql, tenant_scoped=True)
+                    with profile_span("check_cost"):
+                        self._checked_templates[sql] = self.validator.check_cost(bound_sql, tenant_id=tenant_id)
+
+                with profile_span("execute_prepared"):
+                    df = self.db.execute_prepared(sql, values, tenant_id=tenant_id)
+            except ValueError:
+                raise
+            except Exception as e:
+                # e.g. a template referencing columns the data does not have
+                raise ValueError(f"Template for intent '{intent_id}' failed: {e}") from e
+        self._charge(user_ctx, self._checked_templates[sql])
+        self._store_result(key, user_ctx, df)
+        return {**result, "cost": self._checked_templates[sql], "df": df, "cached": False, "approximate": None}
+
+    def followup(self, user_query: str, previous_plan: Optional[Plan]) -> Optional[Tuple[Plan, PlanDelta]]:
+        """Detects a refinement of the previous turn; returns (refined plan, delta) or None."""
+        if previous_plan is None or previous_plan.needs_disambiguation:
+            return None
+        delta = detect_followup(user_query, previous_plan)
+        if delta is None:
+            return None
+        return apply_delta(previous_plan, delta), delta
+
+    def template_for(self, plan: Plan) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(structure, values) to run the plan through its intent's template, when it fits."""
+        template = self.catalog.template_path(plan.intent_id) if self.catalog else None
+        if template is None or not hasattr(self.db, "execute_prepared"):
+            return None
+        return template_request(plan, self.templates.variables(template.name))
+
+    def ask(
+        self,
+        user_query: str,
+        user_ctx: SecurityContext,
+        previous_plan: Optional[Plan] = None,
+        profile: bool = False,
+        approximate: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Runs the full pipeline, yielding one event per stage as it completes:
+        route, plan, sql, repair (only when the SQL had to be fixed), cost,
+        result, then always answer and trace.
+
+        Args:
+            previous_plan: Plan of the previous turn. Follow-ups that only
+                refine it (breakdown, time window, filter) skip the router and
+                planner, and run through the intent's template when it fits
+                (as do plans served from the plan cache).
+            profile: Profile this request (needs a profiler); the trace event
+                then carries the profile's request_id and per-stage timings.
+            approximate: Accept a sampled answer for large exploratory
+                aggregates (see execute); the result event's "approximate"
+                then has the sample and error bounds.
+        """
+        start = time.perf_counter()
+        route, plan, sql, error = "error", None, None, None
+        router_timings: Dict[str, Any] = {}
+        cost_usd = 0.0
+        followup = None
+        repair = None
+        profiled = self.profiler.start(user_ctx.tenant_id, requested=profile) if self.profiler else None
+
+        def stage(name: str):
+            # Spans never stay open across a yield (the consumer may resume us on another thread)
+            return profiled.span(name) if profiled is not None else nullcontext()
+
+        try:
+            with stage("followup"):
+                followup = self.followup(user_query, previous_plan)
+            if followup is not None:
+                route_out = RouterOutput(route="sql", reason="Refines the previous question")
+            else:
+                with stage("route"):
+                    route_out = self.route(user_query, user_ctx, timings=router_timings)
+            route = route_out.route
+            yield {
+                "event": "route",
+                "data": route_out.model_dump(),
+                "time_to_first_decision_ms": router_timings.get("time_to_first_decision_ms"),
+                "followup": followup is not None,
+                "early_commit": router_timings.get("early_commit", False),
+                "context": router_timings.get("context"),
+            }
+
+            if route_out.route == "sql":
+                plan_timings: Dict[str, Any] = {}
+                if followup is not None:
+                    plan, delta = followup
+                    plan_event = {"delta": delta.model_dump(exclude_defaults=True)}
+                else:
+                    with stage("plan"):
+                        plan = self.plan(user_query, user_ctx, timings=plan_timings)
+                    plan_event = {}
+                yield {
+                    "event": "plan",
+                    "data": plan.model_dump(),
+                    "plan_cache_hit": plan_timings.get("plan_cache_hit", False),
+                    "template": plan_timings.get("prefetch_result"),
+                    "context": plan_timings.get("context"),
+                    **plan_event,
+                }
+
+                if plan.needs_disambiguation:
+                    message, status = f"**Clarification Needed:** {plan.reasoning}", "clarify"
+                else:
+                    self.validator.check_intent(plan.intent_id, user_ctx.tenant_id, user_ctx.role)
+                    # Follow-ups and plan cache hits (questions asked before) run through the
+                    # intent's template when it fits: no SQL model call, and the same result
+                    # key the cache warm-up filled
+                    reused = followup is not None or plan_timings.get("plan_cache_hit", False)
+                    request = self.template_for(plan) if reused else None
+                    if request is not None:
+                        with stage("execute_template"):
+                            result = self.execute_template(plan.intent_id, *request, user_ctx)
+                        result["rollup"] = None
+                        sql = result["bound_sql"]
+                        yield {"event": "sql", "data": {"sql": sql, "template": plan.intent_id}}
+                    else:
+                        sql_timings: Dict[str, Any] = {}
+                        with stage("generate_sql"):
+                            sql = self.generate_sql(plan, timings=sql_timings, user_ctx=user_ctx)
+                        yield {"event": "sql", "data": {"sql": sql}, "context": sql_timings.get("context")}
+                        with stage("execute"):
+                            result = self.execute_generated(sql, plan, user_ctx, approximate=approximate)
+                        repair = result.get("repair")
+                        if repair is not None:
+                            sql = repair["sql"]
+                            yield {"event": "repair", "data": repair}
+                    if result["cost"] is not None:
+                        cost_usd = result["cost"].cost_usd
+                        yield {"event": "cost", "data": result["cost"].model_dump()}
+                    with stage("shape"):
+                        shaped = self.shape(result["df"], plan)
+                    yield {
+                        "event": "result",
+                        "data": {
+                            "sql": result["sql"],
+                            "rollup": result["rollup"],
+                            "fingerprint": result["fingerprint"],
+                            "result_key": result["result_key"],
+                            "cached": result["cached"],
+                            "approximate": result.get("approximate"),
+                            "chart": shaped["chart"],
+                            "table": shaped["table"],
+                            "df": result["df"],
+                        },
+                    }
+                    message, status = "Here is the data based on your request.", "complete"
+                    approx = result.get("approximate")
+                    if approx is not None:
+                        message += " " + approximate_note(approx)
+                    if self.trace_log is not None and followup is None:
+                        # Follow-ups only make sense after their first question
+                        self.trace_log.append(user_query, user_ctx, plan)
+
+            elif route_out.route == "unsafe":
+                message, status = f"🚫 **Request Blocked**: {route_out.reason}", "blocked"
+            elif route_out.route == "clarify":
+                message, status = f"🤔 **Clarification Needed**: {route_out.clarify_question}", "clarify"
+            else:
+                message, status = f"I can't handle this request type yet: {route_out.route}", "unhandled"
+
+        except Overloaded as e:
+            # Shed fast: the user can retry or narrow the question instead of waiting on a full queue
+            error = str(e)
+            message, status = (
+                "⏳ **Busy right now**: too many questions are running. "
+                "Please retry in a few seconds, or narrow the question (fewer breakdowns, a shorter period)."
+            ), "clarify"
+        except BudgetExceeded as e:
+            error = str(e)
+            message, status = f"🚫 **Request Blocked**: {error}", "blocked"
+        except Exception as e:
+            error = str(e)
+            message, status = f"Error: {error}", "error"
+
+        profile_info = None
+        if profiled is not None:
+            self.profiler.finish(profiled)
+            profile_info = {"request_id": profiled.request_id, "stages_ms": profiled.summary()}
+
+        yield {"event": "answer", "data": {"message": message, "status": status}}
+        yield {
+            "event": "trace",
+            "data": Trace(
+                user_query=user_query,
+                route=route,
+                plan=plan,
+                sql=sql,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                time_to_first_decision_ms=router_timings.get("time_to_first_decision_ms"),
+                cost_estimate_usd=cost_usd,
+                followup=followup is not None,
+                early_commit=router_timings.get("early_commit", False),
+                profile=profile_info,
+                repair=repair,
+                error=error
+            ).model_dump(),
+        }
@@ -0,0 +1,305 @@
+import re
+import json
+import sqlite3
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+from src.core.types import Plan
+from src.core.context import SecurityContext
+
+if TYPE_CHECKING:
+    from src.core.shared_cache import SharedCache
+
+# Single letters are kept: they are often names ("store A")
+STOP_WORDS = {
+    "an", "the", "of", "for", "in", "on", "by", "per", "to", "and", "at", "from",
+    "show", "me", "give", "get", "list", "display", "tell", "please", "can", "you",
+    "what", "whats", "is", "are", "was", "were", "my", "our", "us", "we", "how",
+    "much", "many", "did", "do", "does", "with", "across", "each", "all", "which",
+    "over", "during", "broken", "down", "breakdown",
+}
+
+# (pattern, token builder) pairs, applied before glossary mapping.
+# Each token names a window that is resolved against "today" at lookup time.
+RELATIVE_DATE_PATTERNS: List[Tuple[re.Pattern, Any]] = [
+    (re.compile(r"\b(?:last|past|previous|prior)\s+(\d+)\s+(day|week|month)s?\b"),
+     lambda m: f"@last_{m.group(1)}_{m.group(2)}s"),
+    (re.compile(r"\b(?:last|previous|prior)\s+(week|month|quarter|year)\b"),
+     lambda m: f"@last_{m.group(1)}"),
+    (re.compile(r"\b(?:this|current)\s+(week|month|quarter|year)\b"),
+     lambda m: f"@this_{m.group(1)}"),
+    (re.compile(r"\b(year|quarter|month)[\s-]to[\s-]date\b"),
+     lambda m: f"@this_{m.group(1)}"),
+    (re.compile(r"\b([ymq])td\b"),
+     lambda m: "@this_" + {"y": "year", "q": "quarter", "m": "month"}[m.group(1)]),
+    (re.compile(r"\bq([1-4])\s+(\d{4})\b"),
+     lambda m: f"q{m.group(1)}_{m.group(2)}"),
+    (re.compile(r"\bq([1-4])\b"),
+     lambda m: f"@q{m.group(1)}"),
+    (re.compile(r"\byesterday\b"), lambda m: "@yesterday"),
+    (re.compile(r"\btoday\b"), lambda m: "@today"),
+]
+
+
+def _month_start(d: date, months_back: int = 0) -> date:
+    index = d.year * 12 + (d.month - 1) - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _quarter_start(d: date, quarters_back: int = 0) -> date:
+    return _month_start(date(d.year, 3 * ((d.month - 1) // 3) + 1, 1), 3 * quarters_back)
+
+
+def resolve_relative_window(token: str, today: date) -> Optional[Tuple[date, date]]:
+    """
+    Resolves a relative window token (e.g. '@last_month') to an inclusive
+    (start, end) date range as of `today`.
+    """
+    kind = token.lstrip("@")
+    yesterday = today - timedelta(days=1)
+
+    if kind == "today":
+        return today, today
+    if kind == "yesterday":
+        return yesterday, yesterday
+
+    m = re.fullmatch(r"last_(\d+)_(day|week|month)s", kind)
+    if m:
+        n, unit = int(m.group(1)), m.group(2)
+        if unit == "day":
+            return today - timedelta(days=n), yesterday
+        if unit == "week":
+            return today - timedelta(weeks=n), yesterday
+        return _month_start(today, n), _month_start(today) - timedelta(days=1)
+
+    m = re.fullmatch(r"(last|this)_(week|month|quarter|year)", kind)
+    if m:
+        which, unit = m.groups()
+        if unit == "week":
+            start = today - timedelta(days=today.weekday())
+            if which == "last":
+                return start - timedelta(weeks=1), start - timedelta(days=1)
+            return start, today
+        if unit == "month":
+            start = _month_start(today)
+            if which == "last":
+                return _month_start(today, 1), start - timedelta(days=1)
+            return start, today
+        if unit == "quarter":
+            start = _quarter_start(today)
+            if which == "last":
+                return _quarter_start(today, 1), start - timedelta(days=1)
+            return start, today
+        start = date(today.year, 1, 1)
+        if which == "last":
+            return date(today.year - 1, 1, 1), start - timedelta(days=1)
+        return start, today
+
+    m = re.fullmatch(r"q([1-4])", kind)
+    if m:
+        # A bare quarter refers to the current calendar year
+        start = date(today.year, 3 * (int(m.group(1)) - 1) + 1, 1)
+        return start, _month_start(start, -3) - timedelta(days=1)
+
+    return None
+
+
+def apply_time_window(plan: Plan, start: date, end: date) -> Plan:
+    """Sets the plan's time window and rewrites its order_date filters to match."""
+    start, end = start.isoformat(), end.isoformat()
+    time_window = dict(plan.time_window or {})
+    time_window.update({"start": start, "end": end})
+
+    filters = []
+    for f in plan.filters:
+        if f.field == "order_date":
+            op = str(f.operator or "").upper()
+            if op == "BETWEEN":
+                f = f.model_copy(update={"value": [start, end]})
+            elif op in (">", ">="):
+                f = f.model_copy(update={"value": start})
+            elif op in ("<", "<="):
+                f = f.model_copy(update={"value": end})
+        filters.append(f)
+
+    return plan.model_copy(update={"time_window": time_window, "filters": filters})
+
+
+class QueryCanonicalizer:
+    """
+    Reduces a natural-language question to a canonical key so that trivially
+    reworded questions share a cache entry.
+
+    Steps: lower-casing, relative-date normalization, glossary synonym mapping
+    and stop-word removal. Word order is kept ("returns in stores with more
+    than 100 net sales" is not "net sales in stores with more than 100
+    returns"); only the time window tokens move to the end, since "last month"
+    means the same at either end of a question.
+    """
+    def __init__(self, glossary: Optional[List[Dict[str, Any]]] = None):
+        phrases: Dict[str, str] = {}
+        for entry in glossary or []:
+            # Entries without a table (e.g. "Quarter / Q3") are time terms handled above
+            if not entry.get("table"):
+                continue
+            for phrase in [entry["term"].split("/")[0].strip()] + entry.get("synonyms", []):
+                phrases.setdefault(phrase.lower(), entry["name"])
+
+        self._synonyms = phrases
+        self._synonym_re = None
+        if phrases:
+            alternation = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+            self._synonym_re = re.compile(rf"\b({alternation})s?\b")
+
+    def canonicalize(self, query: str) -> Tuple[str, Optional[str]]:
+        """
+        Returns:
+            (canonical_key, relative_window_token). The window token is None
+            when the question has no relative time reference.
+        """
+        text = query.lower().replace("’", "'")
+        text = re.sub(r"'s\b", "", text)
+
+        window = None
+        for pattern, build in RELATIVE_DATE_PATTERNS:
+            def _sub(m, build=build):
+                nonlocal window
+                token = build(m)
+                if token.startswith("@") and window is None:
+                    window = token
+                return f" {token} "
+            text = pattern.sub(_sub, text)
+
+        if self._synonym_re is not None:
+            text = self._synonym_re.sub(lambda m: self._synonyms[m.group(1)], text)
+
+        tokens = []
+        for raw in re.findall(r"@?[a-z0-9_]+", text):
+            if raw in STOP_WORDS:
+                continue
+            if raw.isdigit() and tokens and not tokens[-1].startswith("@"):
+                # Keep numbers attached to their qualifier ("top 5" -> "top_5")
+                tokens[-1] = f"{tokens[-1]}_{raw}"
+                continue
+            if len(raw) > 3 and raw.endswith("s") and not raw.endswith("ss") and "_" not in raw:
+                raw = raw[:-1]
+            tokens.append(raw)
+
+        words = [t for t in tokens if not t.startswith("@")]
+        windows = sorted(t for t in tokens if t.startswith("@"))
+        return " ".join(words + windows), window
+
+
+class PlanCache:
+    """
+    Persistent (SQLite) cache of validated plans keyed by
+    (canonical question, role, catalog version).
+
+    Relative time windows are stored symbolically and re-resolved against
+    today's date on every hit, so "last month" stays correct over time.
+
+    With a shared cache, local misses are looked up there (per tenant and
+    role) and new plans are written to both.
+    """
+    def __init__(
+        self,
+        path: str,
+        catalog_version: str,
+        canonicalizer: Optional[QueryCanonicalizer] = None,
+        shared: Optional["SharedCache"] = None
+    ):
+        self.shared = shared
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.catalog_version = catalog_version
+        self.canonicalizer = canonicalizer or QueryCanonicalizer()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS plan_cache (
+                canonical_key TEXT NOT NULL,
+                role TEXT NOT NULL,
+                catalog_version TEXT NOT NULL,
+                relative_window TEXT,
+                plan_json TEXT NOT NULL,
+                PRIMARY KEY (canonical_key, role, catalog_version)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, user_query: str, user_ctx: SecurityContext, today: Optional[date] = None) -> Optional[Plan]:
+        key, window = self.canonicalizer.canonicalize(user_query)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT plan_json, relative_window FROM plan_cache "
+                "WHERE canonical_key = ? AND role = ? AND catalog_version = ?",
+                (key, user_ctx.role, self.catalog_version),
+            ).fetchone()
+
+        plan = self._parse(row[0], key, user_ctx.role) if row is not None else None
+        if plan is None and self.shared is not None:
+            entry = self.shared.get_json("plan", user_ctx, f"{key}|{self.catalog_version}")
+            if entry is not None:
+                # Not copied locally: this table is shared by every tenant of the role
+                row = (entry["plan"], entry["window"])
+                plan = self._parse(row[0])
+
+        if plan is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return self._resolve_window(plan, row[1], today or date.today())
+
+    def _parse(self, plan_json: str, key: Optional[str] = None, role: Optional[str] = None) -> Optional[Plan]:
+        """
+        The stored plan, or None when it no longer validates (stored under an
+        older Plan schema). Such a local row is deleted so it is re-planned.
+        """
+        try:
+            return Plan.model_validate_json(plan_json)
+        except ValueError:
+            if key is not None:
+                with self._lock:
+                    self._conn.execute(
+                        "DELETE FROM plan_cache WHERE canonical_key = ? AND role = ? AND catalog_version = ?",
+                        (key, role, self.catalog_version),
+                    )
+                    self._conn.commit()
+            return None
+
+    def put(self, user_query: str, user_ctx: SecurityContext, plan: Plan, today: Optional[date] = None) -> Plan:
+        """
+        Stores a plan if it is cacheable (resolved intent, no disambiguation).
+        Returns:
+            The plan with any relative window resolved as of today.
+        """
+        key, window = self.canonicalizer.canonicalize(user_query)
+        plan = self._resolve_window(plan, window, today or date.today())
+        if plan.needs_disambiguation or not plan.intent_id or plan.intent_id == "error":
+            return plan
+
+        plan_json = plan.model_dump_json()
+        self._store(key, user_ctx.role, window, plan_json)
+        if self.shared is not None:
+            self.shared.put_json("plan", user_ctx, f"{key}|{self.catalog_version}", {"plan": plan_json, "window": window})
+        return plan
+
+    def _store(self, key: str, role: str, window: Optional[str], plan_json: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plan_cache VALUES (?, ?, ?, ?, ?)",
+                (key, role, self.catalog_version, window, plan_json),
+            )
+            self._conn.commit()
+
+    def _resolve_window(self, plan: Plan, window: Optional[str], today: date) -> Plan:
+        resolved = resolve_relative_window(window, today) if window else None
+        if resolved is None:
+            return plan
+        return apply_time_window(plan, *resolved)
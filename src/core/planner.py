@@ -1,14 +1,38 @@
 import json
-from typing import Dict, Any, Optional
-from src.core.types import Plan
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, Callable
+from src.core.types import Plan, json_schema
 from src.interfaces.llm import LLMClient
 from src.core.utils import PromptLoader
 from src.core.context import SecurityContext
+from src.core.streaming import IncrementalJSONParser
+from src.core.context_builder import ContextBuilder, compact_json
+from src.core.plan_cache import PlanCache
+from src.core.profiler import profile_span
+
+# Runs downstream warm-up (template selection, EXPLAIN) while a plan streams in;
+# shared by every planner in the process, so none leaves threads behind
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="plan-prefetch")
+
 
 class Planner:
-    def __init__(self, llm_client: LLMClient, prompt_loader: PromptLoader):
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        prompt_loader: PromptLoader,
+        plan_cache: Optional[PlanCache] = None,
+        context_builder: Optional[ContextBuilder] = None
+    ):
+        """
+        Args:
+            context_builder: Selects the intents and glossary entries relevant
+                to each question when the caller does not pass them.
+        """
         self.llm = llm_client
         self.prompt_loader = prompt_loader
+        self.plan_cache = plan_cache
+        self.context_builder = context_builder
         self.prompt_template = self.prompt_loader.load("planner-retail-v2.md")
 
     def plan(
@@ -16,29 +40,76 @@ class Planner:
         user_query: str, 
         user_ctx: SecurityContext, 
         glossary_hits: Optional[list] = None,
-        intent_catalog: Optional[list] = None
+        intent_catalog: Optional[list] = None,
+        on_intent: Optional[Callable[[str], Any]] = None,
+        timings: Optional[Dict[str, Any]] = None
     ) -> Plan:
+        """
+        Plans the query, streaming the LLM response.
+
+        Args:
+            on_intent: Optional callback started in the background as soon as
+                `intent_id` is decoded, so downstream work overlaps generation.
+                Its result is stored in `timings["prefetch_result"]` when provided.
+            timings: Optional dict populated with `time_to_first_decision_ms`
+                and, with a context builder, `context` token stats.
+        """
+        if self.plan_cache:
+            with profile_span("planner.cache"):
+                cached = self.plan_cache.get(user_query, user_ctx)
+            if cached is not None:
+                if timings is not None:
+                    timings["plan_cache_hit"] = True
+                    if on_intent:
+                        timings["prefetch_result"] = on_intent(cached.intent_id)
+                return cached
         
+        if self.context_builder and glossary_hits is None and intent_catalog is None:
+            context, stats = self.context_builder.planner_context(user_query)
+            glossary_hits, intent_catalog = context["glossary_hits"], context["intent_catalog"]
+            if timings is not None:
+                timings["context"] = stats
+
         inputs_section = f"""
 ## Actual Inputs
 - user_query: "{user_query}"
-- user_ctx: {user_ctx.model_dump_json()}
-- glossary_hits: {json.dumps(glossary_hits or [])}
-- intent_catalog: {json.dumps(intent_catalog or [])}
+- user_ctx: {user_ctx.prompt_json()}
+- glossary_hits: {compact_json(glossary_hits or [])}
+- intent_catalog: {compact_json(intent_catalog or [])}
 """
         full_prompt = self.prompt_template + "\n" + inputs_section
 
-        response_text = self.llm.generate_content(
-            prompt=full_prompt,
-            temperature=0.0,
-            response_schema=Plan.model_json_schema()
-        )
+        start = time.perf_counter()
+        parser = IncrementalJSONParser()
+        prefetch: Optional[Future] = None
+        with profile_span("planner.llm"):
+            for chunk in self.llm.generate_content_stream(
+                prompt=full_prompt,
+                temperature=0.0,
+                response_schema=json_schema(Plan)
+            ):
+                decoded = parser.feed(chunk)
+                if decoded.get("intent_id") and prefetch is None:
+                    if timings is not None:
+                        timings["time_to_first_decision_ms"] = (time.perf_counter() - start) * 1000
+                    if on_intent:
+                        prefetch = _prefetch_pool.submit(on_intent, decoded["intent_id"])
+
+        if prefetch is not None:
+            try:
+                result = prefetch.result()
+                if timings is not None:
+                    timings["prefetch_result"] = result
+            except Exception:
+                # Warm-up is best effort; planning must not fail because of it
+                pass
 
         try:
+            response_text = parser.text
             cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
-            data = json.loads(cleaned_text)
-            return Plan(**data)
-        except json.JSONDecodeError:
+            plan = Plan(**json.loads(cleaned_text))
+        except (ValueError, TypeError):
+            # Not JSON, or a plan that does not validate (e.g. a measure without a name)
             # In a real app, we'd have better error handling or retry logic
             return Plan(
                 intent_id="error",
@@ -50,3 +121,6 @@ class Planner:
                 needs_disambiguation=True,
                 clarification_question="Failed to generate a valid plan. Please try again."
             )
+        if self.plan_cache:
+            plan = self.plan_cache.put(user_query, user_ctx, plan)
+        return plan
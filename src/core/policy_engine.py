@@ -0,0 +1,384 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+from src.core.catalog import load_policy
+
+logger = logging.getLogger(__name__)
+
+# Used when no policy file is configured
+DEFAULT_DENIED_OPERATIONS = ("DROP", "DELETE", "UPDATE", "INSERT", "ALTER", "TRUNCATE", "GRANT", "REVOKE")
+DEFAULT_ALLOWED_TABLES = ("fct_sales", "dim_product", "dim_store")
+# Single-quoted string literals ('' escapes a quote); blanked before the keyword scan
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+class PolicyProgram:
+    """
+    sql_policies.yaml (+ optionally catalog/policies.yaml) compiled once into
+    lookups the validator runs per query: one regex for denied operations,
+    hashed sets of denied functions / allowed tables / restricted columns,
+    precompiled rule patterns and node-type handlers for a single AST pass.
+
+    Immutable once built; PolicyEngine swaps in a new one when the files change.
+
+    Supported `validation_rules` are those with a `pattern` (regex over the
+    SQL text) or with an AST check registered in AST_RULES; descriptive rules
+    (`check:` only) are not enforceable on SQL alone and are skipped.
+    """
+    def __init__(self, sql_policy: Optional[Dict[str, Any]] = None, access_policy: Optional[Dict[str, Any]] = None):
+        sql_policy = sql_policy or {}
+        self.cost_controls: Dict[str, Any] = sql_policy.get("cost_controls", {})
+        self.version = hashlib.sha1(
+            json.dumps([sql_policy, access_policy], sort_keys=True, default=str).encode()
+        ).hexdigest()[:12]
+
+        operations = sorted(
+            {op.upper() for op in sql_policy.get("denied_operations", [])} | set(DEFAULT_DENIED_OPERATIONS),
+            key=len, reverse=True
+        )
+        self._denied_ops = re.compile(r"\b(" + "|".join(map(re.escape, operations)) + r")\b")
+        self.denied_functions: FrozenSet[str] = frozenset(f.upper() for f in sql_policy.get("denied_functions", []))
+        self.allowed_tables: FrozenSet[str] = frozenset(
+            t.lower() for t in sql_policy.get("allowed_tables", DEFAULT_ALLOWED_TABLES)
+        )
+        self.restricted_columns: Dict[str, FrozenSet[str]] = {
+            r["table"].lower(): frozenset(c.lower() for c in r.get("columns", []))
+            for r in sql_policy.get("restricted_columns", [])
+        }
+        self._restricted_names = frozenset().union(*self.restricted_columns.values())
+        self.complexity_limits: Dict[str, int] = dict(sql_policy.get("complexity_limits", {}))
+        self.max_limit: Optional[int] = next(
+            (c.get("max_value") for c in sql_policy.get("required_clauses", []) if c.get("clause") == "LIMIT"), None
+        )
+
+        # (name, action, reason, regex or AST check)
+        self.text_rules: List[Tuple[str, str, str, "re.Pattern"]] = []
+        self.ast_rules: List[Tuple[str, str, str, Callable]] = []
+        for rule in sql_policy.get("validation_rules", []):
+            entry = (rule["name"], rule.get("action", "block"), rule.get("reason", ""))
+            if rule["name"] in AST_RULES:
+                self.ast_rules.append((*entry, AST_RULES[rule["name"]]))
+            elif rule.get("pattern"):
+                self.text_rules.append((*entry, re.compile(rule["pattern"], re.I | re.S)))
+
+        self._access = access_policy
+        self._roles: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._tenants: Dict[str, Dict[str, Any]] = {}
+        self._roles_lock = threading.Lock()
+
+    # -- Per tenant / role -------------------------------------------------
+
+    def role_rules(self, tenant_id: Optional[str], role: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        {"allowed_intents": frozenset or None (all), "max_rows": int or None}
+        for a tenant's role, compiled on first use. The tenant's own entry in
+        tenant_policies overrides `default`. None when no access policy is
+        configured or no role is given.
+        """
+        if self._access is None or role is None:
+            return None
+        key = (tenant_id or "default", role)
+        rules = self._roles.get(key)
+        if rules is None:
+            rules = self._compile_role(*key)
+            with self._roles_lock:
+                self._roles[key] = rules
+        return rules
+
+    def _compile_role(self, tenant_id: str, role: str) -> Dict[str, Any]:
+        tenants = self._access.get("tenant_policies", {})
+        default, own = tenants.get("default", {}), tenants.get(tenant_id, {})
+        roles = {**default.get("roles", {}), **own.get("roles", {})}
+        if role not in roles:
+            raise ValueError(f"Policy Violation: Unknown role '{role}'.")
+        spec = roles[role]
+        intents = spec.get("allowed_intents", [])
+        return {
+            "allowed_intents": None if "*" in intents else frozenset(intents),
+            "max_rows": spec.get(
+                "max_rows_per_query", own.get("max_rows_per_query", default.get("max_rows_per_query", self.max_limit))
+            ),
+        }
+
+    def tenant_limits(self, tenant_id: Optional[str]) -> Dict[str, Any]:
+        """
+        {"budget_per_day_usd", "max_concurrent_requests", "weight"} of a tenant
+        (its own entry over `default`); None limits are unlimited.
+        """
+        key = tenant_id or "default"
+        limits = self._tenants.get(key)
+        if limits is None:
+            tenants = (self._access or {}).get("tenant_policies", {})
+            default, own = tenants.get("default", {}), tenants.get(key, {})
+            costs = {**default.get("cost_controls", {}), **own.get("cost_controls", {})}
+            scheduling = {**default.get("scheduling", {}), **own.get("scheduling", {})}
+            limits = {
+                "budget_per_day_usd": costs.get("budget_per_day_usd"),
+                "max_concurrent_requests": scheduling.get("max_concurrent_requests"),
+                "weight": float(scheduling.get("weight", 1.0)),
+            }
+            with self._roles_lock:
+                self._tenants[key] = limits
+        return limits
+
+    def profile(self, tenant_id: Optional[str], role: Optional[str]) -> Dict[str, Any]:
+        """Role rules in the router prompt's policy_profile shape."""
+        rules = self.role_rules(tenant_id, role)
+        if rules is None:
+            return {}
+        intents = rules["allowed_intents"]
+        return {
+            "role": role,
+            "allowed_intents": ["*"] if intents is None else sorted(intents),
+            "max_rows_per_query": rules["max_rows"],
+        }
+
+    def check_intent(self, intent_id: str, tenant_id: Optional[str], role: Optional[str]):
+        """Raises ValueError if the role may not run the intent."""
+        rules = self.role_rules(tenant_id, role)
+        if rules is None or rules["allowed_intents"] is None:
+            return
+        if intent_id not in rules["allowed_intents"]:
+            raise ValueError(f"Policy Violation: Role '{role}' is not allowed to run intent '{intent_id}'.")
+
+    def max_rows(self, tenant_id: Optional[str] = None, role: Optional[str] = None) -> Optional[int]:
+        rules = self.role_rules(tenant_id, role)
+        return rules["max_rows"] if rules is not None else self.max_limit
+
+    # -- Per query ---------------------------------------------------------
+
+    def check_text(self, sql: str) -> List[str]:
+        """Checks that need no parse. Raises on a block; returns warnings."""
+        # Keywords inside values ('Drop shipping', 'Call center') are data, not operations
+        m = self._denied_ops.search(_STRING_LITERAL.sub("''", sql).upper())
+        if m:
+            raise ValueError(f"Security Violation: Forbidden keyword '{m.group(1)}' detected.")
+        warnings = []
+        for name, action, reason, pattern in self.text_rules:
+            if pattern.search(sql):
+                warnings.append(_rule_hit(name, action, reason))
+        return warnings
+
+    def check_tree(self, tree, max_rows: Optional[int] = None) -> List[str]:
+        """
+        Walks the parsed query once, dispatching each node to its handlers
+        (tables, columns, functions, joins, CTEs, unions, subqueries, WHERE
+        predicates, LIMIT, AST rules), then checks the collected counts.
+        Raises on a violation; returns warnings.
+        """
+        from sqlglot import exp
+
+        state = _WalkState(max_rows if max_rows is not None else self.max_limit)
+        for node in tree.find_all(exp.Expression):
+            for handler in _handlers_for(type(node)):
+                handler(self, node, state)
+        if not state.has_limit:
+            raise ValueError("Policy Violation: Query must contain a LIMIT clause.")
+
+        # CTE names are referenced like tables
+        state.tables -= state.cte_names
+        unauthorized = state.tables - self.allowed_tables
+        if unauthorized:
+            raise ValueError(f"Security Violation: Unauthorized tables: {unauthorized}")
+
+        if self._restricted_names:
+            for qualifier, column in state.columns:
+                tables = {state.aliases.get(qualifier, qualifier)} if qualifier else state.tables
+                if any(column in self.restricted_columns.get(t, ()) for t in tables):
+                    raise ValueError(f"Security Violation: Restricted column '{column}' requires special access.")
+
+        for name, value in (
+            ("max_join_count", state.joins),
+            ("max_cte_count", state.ctes),
+            ("max_union_count", state.unions),
+            ("max_subquery_depth", state.subquery_depth),
+            ("max_where_conditions", state.where_conditions),
+        ):
+            limit = self.complexity_limits.get(name)
+            if limit is not None and value > limit:
+                raise ValueError(f"Policy Violation: Query exceeds {name} ({value} > {limit}).")
+
+        for name, action, reason, check in self.ast_rules:
+            if check(state):
+                state.warnings.append(_rule_hit(name, action, reason))
+        return state.warnings
+
+
+class _WalkState:
+    __slots__ = (
+        "max_rows", "has_limit", "tables", "cte_names", "aliases", "columns", "joins", "ctes", "unions",
+        "subquery_depth", "where_conditions", "star_on_table", "warnings",
+    )
+
+    def __init__(self, max_rows: Optional[int]):
+        self.max_rows = max_rows
+        self.has_limit = False
+        self.tables = set()
+        self.cte_names = set()
+        self.aliases: Dict[str, str] = {}
+        self.columns: List[Tuple[str, str]] = []
+        self.joins = self.ctes = self.unions = self.subquery_depth = self.where_conditions = 0
+        self.star_on_table = False
+        self.warnings: List[str] = []
+
+
+def _rule_hit(name: str, action: str, reason: str) -> str:
+    message = f"Rule '{name}' matched" + (f": {reason}" if reason else "")
+    if action == "block":
+        raise ValueError(f"Policy Violation: {message}.")
+    logger.warning(message)
+    return message
+
+
+# -- Node handlers (one AST pass) -----------------------------------------
+
+def _on_table(program: PolicyProgram, node, state: _WalkState):
+    name = node.name.lower()
+    state.tables.add(name)
+    state.aliases[(node.alias or node.name).lower()] = name
+
+
+def _on_column(program: PolicyProgram, node, state: _WalkState):
+    column = node.name.lower()
+    if column in program._restricted_names:
+        state.columns.append((node.table.lower(), column))
+
+
+def _on_function(program: PolicyProgram, node, state: _WalkState):
+    from sqlglot import exp
+
+    name = node.name.upper() if isinstance(node, exp.Anonymous) else node.sql_name()
+    if name in program.denied_functions:
+        raise ValueError(f"Security Violation: Function '{name}' is not allowed.")
+
+
+def _on_join(program: PolicyProgram, node, state: _WalkState):
+    state.joins += 1
+
+
+def _on_cte(program: PolicyProgram, node, state: _WalkState):
+    state.ctes += 1
+    state.cte_names.add(node.alias.lower())
+
+
+def _on_union(program: PolicyProgram, node, state: _WalkState):
+    state.unions += 1
+
+
+def _on_subquery(program: PolicyProgram, node, state: _WalkState):
+    from sqlglot import exp
+
+    depth, parent = 1, node.parent
+    while parent is not None:
+        depth += isinstance(parent, exp.Subquery)
+        parent = parent.parent
+    state.subquery_depth = max(state.subquery_depth, depth)
+
+
+def _on_predicate(program: PolicyProgram, node, state: _WalkState):
+    from sqlglot import exp
+
+    if node.find_ancestor(exp.Where) is not None:
+        state.where_conditions += 1
+
+
+def _on_limit(program: PolicyProgram, node, state: _WalkState):
+    from sqlglot import exp
+
+    state.has_limit = True
+    value = node.expression
+    # Placeholders ($row_limit) are checked when bound
+    if state.max_rows is not None and isinstance(value, exp.Literal) and value.is_int:
+        if int(value.this) > state.max_rows:
+            raise ValueError(f"Policy Violation: LIMIT {value.this} exceeds maximum of {state.max_rows} rows.")
+
+
+def _on_star(program: PolicyProgram, node, state: _WalkState):
+    from sqlglot import exp
+
+    select = node.parent
+    if isinstance(select, exp.Select):
+        source = (select.args.get("from") or exp.From()).this
+        # SELECT * over an explicit subquery is fine; over a table it is not
+        if isinstance(source, exp.Table):
+            state.star_on_table = True
+
+
+# Named validation_rules enforced on the AST instead of their text pattern
+AST_RULES: Dict[str, Callable[[_WalkState], bool]] = {
+    "no_wildcard_select": lambda state: state.star_on_table,
+}
+
+_HANDLERS: Dict[str, Callable] = {
+    "Table": _on_table,
+    "Column": _on_column,
+    "Func": _on_function,
+    "Join": _on_join,
+    "CTE": _on_cte,
+    "Union": _on_union,
+    "Subquery": _on_subquery,
+    "Predicate": _on_predicate,
+    "Limit": _on_limit,
+    "Star": _on_star,
+}
+_DISPATCH: Dict[type, Tuple[Callable, ...]] = {}
+
+
+def _handlers_for(node_type: type) -> Tuple[Callable, ...]:
+    # Resolved once per node class through its MRO (e.g. Sum -> AggFunc -> Func)
+    handlers = _DISPATCH.get(node_type)
+    if handlers is None:
+        handlers = tuple(_HANDLERS[c.__name__] for c in node_type.__mro__ if c.__name__ in _HANDLERS)
+        _DISPATCH[node_type] = handlers
+    return handlers
+
+
+class PolicyEngine:
+    """
+    Holds the compiled PolicyProgram for the policy files and swaps in a
+    recompiled one when a file changes (checked at most every reload_s, by
+    mtime). Readers never block: they get whichever program is current.
+    A file that fails to load or compile keeps the previous program.
+    """
+    def __init__(self, sql_policy_path: str, access_policy_path: Optional[str] = None, reload_s: float = 2.0):
+        self.paths = (sql_policy_path, access_policy_path)
+        self.reload_s = reload_s
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._mtimes = self._stat()
+        self._program = self._compile()
+        self._checked = time.monotonic()
+
+    @property
+    def program(self) -> PolicyProgram:
+        if time.monotonic() - self._checked >= self.reload_s:
+            self.reload()
+        return self._program
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompiles if a policy file changed; returns True when a new program was swapped in."""
+        with self._lock:
+            self._checked = time.monotonic()
+            mtimes = self._stat()
+            if mtimes == self._mtimes and not force:
+                return False
+            try:
+                program = self._compile()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("Policy reload failed, keeping version %s: %s", self._program.version, e)
+                return False
+            self._mtimes, self._program, self.last_error = mtimes, program, None
+            return True
+
+    def _stat(self) -> Tuple[Optional[int], ...]:
+        return tuple(os.stat(p).st_mtime_ns if p and os.path.exists(p) else None for p in self.paths)
+
+    def _compile(self) -> PolicyProgram:
+        sql_path, access_path = self.paths
+        return PolicyProgram(load_policy(sql_path), load_policy(access_path) if access_path else None)
@@ -0,0 +1,243 @@
+import contextvars
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# Profile of the request running on this thread/context, set while one of its spans is open
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar("request_profile", default=None)
+
+CPROFILE_TOP = 40
+REQUEST_ID_PATTERN = re.compile(r"[0-9a-f]{16}")
+
+
+def current_profile() -> Optional["RequestProfile"]:
+    return _current.get()
+
+
+def profile_span(name: str, **args):
+    """
+    Span on the active request profile, if any. Costs one context-var lookup
+    when profiling is off, so it can stay in hot paths (adapters, router).
+    """
+    profile = _current.get()
+    return profile.span(name, **args) if profile is not None else nullcontext()
+
+
+class RequestProfile:
+    """
+    Timeline of one request: nested spans per pipeline stage, DuckDB operator
+    timings of the queries it ran and, optionally, cProfile function stats for
+    the time spent inside spans. Exported as Chrome trace JSON, which
+    chrome://tracing, Perfetto and speedscope all open.
+    """
+    def __init__(
+        self,
+        request_id: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        cprofile: bool = True,
+        explain: bool = True
+    ):
+        """
+        Args:
+            cprofile: Also run cProfile while a span is open (adds overhead to
+                Python code; its stats go into the trace metadata).
+            explain: Collect DuckDB's per-operator timings (EXPLAIN ANALYZE
+                profile) for queries run inside spans.
+        """
+        self.request_id = request_id or uuid.uuid4().hex[:16]
+        self.tenant_id = tenant_id
+        self.explain = explain
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.queries: List[Dict[str, Any]] = []
+        self._depth: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._cprofile = None
+        if cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+
+    def _us(self, t: float) -> float:
+        return round((t - self.started) * 1e6, 1)
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """
+        Records a span and makes this profile current for code inside it.
+        Spans must not be held across a generator's yield (each pipeline
+        stage opens its own).
+        """
+        token = _current.set(self)
+        tid = threading.get_ident()
+        outermost = self._depth.get(tid, 0) == 0
+        self._depth[tid] = self._depth.get(tid, 0) + 1
+        profiling = outermost and self._cprofile is not None and self._enable_cprofile()
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            if profiling:
+                self._cprofile.disable()
+            self._depth[tid] -= 1
+            _current.reset(token)
+            with self._lock:
+                self.spans.append({
+                    "name": name, "ts": self._us(start), "dur": round((end - start) * 1e6, 1), "tid": tid, "args": args,
+                })
+
+    def _enable_cprofile(self) -> bool:
+        try:
+            self._cprofile.enable()
+            return True
+        except ValueError:
+            # Another profiler is active (e.g. a concurrent request on 3.12+)
+            return False
+
+    def add_query(self, sql: str, operators: Dict[str, Any], started: float):
+        """Attaches a DuckDB JSON profile (operator tree with per-operator timings in seconds)."""
+        with self._lock:
+            self.queries.append({"sql": sql, "ts": self._us(started), "tree": operators})
+
+    def cprofile_stats(self, top: int = CPROFILE_TOP) -> List[Dict[str, Any]]:
+        """Functions by cumulative time: [{function, calls, tottime_ms, cumtime_ms}]."""
+        if self._cprofile is None:
+            return []
+        import pstats
+
+        try:
+            stats = pstats.Stats(self._cprofile)
+        except TypeError:
+            # Nothing was recorded
+            return []
+        rows = [
+            {
+                "function": f"{Path(file).name}:{line}({func})",
+                "calls": calls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3),
+            }
+            for (file, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items()
+        ]
+        return sorted(rows, key=lambda r: r["cumtime_ms"], reverse=True)[:top]
+
+    def summary(self) -> Dict[str, float]:
+        """Total milliseconds per span name."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span["name"]] = totals.get(span["name"], 0.0) + span["dur"] / 1000
+        return {name: round(ms, 3) for name, ms in totals.items()}
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Chrome trace event JSON: one "X" event per span on its thread's lane,
+        and the DuckDB operator tree of each query on a lane of its own,
+        laid out nested with each operator's total (own + children) time.
+        """
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"request {self.request_id}"}},
+        ]
+        for span in sorted(self.spans, key=lambda s: s["ts"]):
+            events.append({
+                "name": span["name"], "cat": "pipeline", "ph": "X", "pid": pid, "tid": span["tid"],
+                "ts": span["ts"], "dur": span["dur"], "args": _jsonable(span["args"]),
+            })
+        for i, query in enumerate(self.queries):
+            tid = f"duckdb query {i + 1}"
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tid}})
+            for child in query["tree"].get("children", []):
+                events += _operator_events(child, query["ts"], pid, tid)
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "request_id": self.request_id,
+                "tenant_id": self.tenant_id,
+                "started_at": self.started_at,
+                "stages_ms": self.summary(),
+                "queries": [q["sql"] for q in self.queries],
+                "cprofile": self.cprofile_stats(),
+            },
+        }
+
+    def dump(self, out_dir: str) -> str:
+        """Writes <out_dir>/<request_id>.json and returns its path."""
+        path = Path(out_dir) / f"{self.request_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome_trace(), default=str), encoding="utf-8")
+        return str(path)
+
+
+def _operator_total(node: Dict[str, Any]) -> float:
+    return node.get("timing", 0.0) + sum(_operator_total(c) for c in node.get("children", []))
+
+
+def _operator_events(node: Dict[str, Any], ts: float, pid: int, tid: str) -> List[Dict[str, Any]]:
+    total_us = round(_operator_total(node) * 1e6, 1)
+    events = [{
+        "name": node.get("name", "").strip(), "cat": "duckdb", "ph": "X", "pid": pid, "tid": tid,
+        "ts": ts, "dur": total_us,
+        "args": {
+            "self_ms": round(node.get("timing", 0.0) * 1000, 3),
+            "rows": node.get("cardinality"),
+            "extra_info": (node.get("extra_info") or "").replace("[INFOSEPARATOR]", "|").strip(),
+        },
+    }]
+    child_ts = ts
+    for child in node.get("children", []):
+        events += _operator_events(child, child_ts, pid, tid)
+        child_ts += round(_operator_total(child) * 1e6, 1)
+    return events
+
+
+def _jsonable(args: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v if isinstance(v, (str, int, float, bool, type(None))) else str(v) for k, v in args.items()}
+
+
+class ProfileSampler:
+    """
+    Decides which requests get a RequestProfile: every request of the listed
+    tenants, a random sample_rate of the rest, and any request that asks for
+    one. Finished profiles are written to out_dir.
+    """
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        tenants: Iterable[str] = (),
+        out_dir: str = ".cache/profiles",
+        cprofile: bool = True,
+        seed: Optional[int] = None
+    ):
+        self.sample_rate = sample_rate
+        self.tenants = frozenset(tenants)
+        self.out_dir = out_dir
+        self.cprofile = cprofile
+        self._rng = random.Random(seed)
+
+    @classmethod
+    def from_settings(cls, settings) -> "ProfileSampler":
+        tenants = [t.strip() for t in settings.PROFILE_TENANTS.split(",") if t.strip()]
+        return cls(settings.PROFILE_SAMPLE_RATE, tenants, settings.PROFILE_DIR, cprofile=settings.PROFILE_CPROFILE)
+
+    def start(self, tenant_id: Optional[str], requested: bool = False) -> Optional[RequestProfile]:
+        if requested or tenant_id in self.tenants or (self.sample_rate > 0 and self._rng.random() < self.sample_rate):
+            return RequestProfile(tenant_id=tenant_id, cprofile=self.cprofile)
+        return None
+
+    def finish(self, profile: RequestProfile) -> str:
+        return profile.dump(self.out_dir)
+
+    def load(self, request_id: str) -> Optional[Dict[str, Any]]:
+        path = Path(self.out_dir) / f"{request_id}.json"
+        if not REQUEST_ID_PATTERN.fullmatch(request_id) or not path.is_file():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
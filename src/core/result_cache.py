@@ -0,0 +1,68 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+
+def frame_nbytes(df: "pd.DataFrame") -> int:
+    """In-memory size of a DataFrame, including string contents."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def result_key(tenant_id: str, exact_fingerprint: str, data_version: int) -> str:
+    """
+    Cache key for a result: the same tenant running the same normalized SQL
+    (see fingerprint.fingerprint_sql) with no data loaded since.
+    """
+    raw = f"{tenant_id}|{exact_fingerprint}|{data_version}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+class ResultCache:
+    """
+    In-memory LRU of result DataFrames, bounded by their total size.
+    Entries of older data versions are never hit again and simply age out.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._sizes: dict = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+
+    def get(self, key: str) -> Optional["pd.DataFrame"]:
+        with self._lock:
+            df = self._entries.get(key)
+            if df is not None:
+                self._entries.move_to_end(key)
+            return df
+
+    def put(self, key: str, df: "pd.DataFrame") -> bool:
+        """Stores a result; returns False when it alone is larger than the budget."""
+        size = frame_nbytes(df)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = df
+            self._sizes[key] = size
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+        return True
+
+    def _pop(self, key: str):
+        if key in self._entries:
+            del self._entries[key]
+            self.nbytes -= self._sizes.pop(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,234 @@
+from typing import Any, Dict, List, Optional, Sequence, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+MAX_CHART_POINTS = 500
+# Bars / series beyond these are folded into an "Other" bucket
+TOP_N_CATEGORIES = 20
+MAX_SERIES = 8
+OTHER_LABEL = "Other"
+TABLE_PAGE_SIZE = 100
+
+VIZ_TYPES = ("line", "bar", "table")
+# Coarser grains tried, in order, when a time axis has too many bars
+TIME_GRAINS = [("D", "day"), ("W", "week"), ("M", "month"), ("Q", "quarter"), ("Y", "year")]
+
+
+def lttb_indices(x: "np.ndarray", y: "np.ndarray", n_out: int) -> "np.ndarray":
+    """
+    Largest-Triangle-Three-Buckets down-sampling: picks n_out points (always
+    keeping the first and last) that preserve the visual shape of the series.
+
+    The triangle area for every candidate is linear in the previously selected
+    point a: area ~ |ax*U + ay*V + W|, where U, V, W depend only on the
+    candidate and the next bucket's mean. Those are computed for all points at
+    once; only the argmax per bucket is sequential.
+
+    Args:
+        x: Sorted x values (numeric; datetimes as int64).
+    """
+    import numpy as np
+
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = x.astype("float64")
+    y = y.astype("float64")
+    # n_out - 2 buckets over the interior points; bucket i spans [edges[i], edges[i+1])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    interior = np.arange(1, n - 1)
+    bucket_of = np.zeros(n, dtype=np.int64)
+    bucket_of[interior] = np.searchsorted(edges, interior, side="right") - 1
+
+    counts = np.maximum(np.bincount(bucket_of[interior], minlength=n_out - 2), 1)
+    mean_x = np.bincount(bucket_of[interior], weights=x[interior], minlength=n_out - 2) / counts
+    mean_y = np.bincount(bucket_of[interior], weights=y[interior], minlength=n_out - 2) / counts
+    # Each bucket looks ahead to the next bucket's mean; the last one to the last point
+    next_x = np.append(mean_x[1:], x[-1])[bucket_of]
+    next_y = np.append(mean_y[1:], y[-1])[bucket_of]
+
+    u = y - next_y
+    v = next_x - x
+    w = x * next_y - next_x * y
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    ax, ay = x[0], y[0]
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        best = lo + int(np.argmax(np.abs(ax * u[lo:hi] + ay * v[lo:hi] + w[lo:hi])))
+        selected[i + 1] = best
+        ax, ay = x[best], y[best]
+    return selected
+
+
+def paginate(df: "pd.DataFrame", page: int = 0, page_size: int = TABLE_PAGE_SIZE) -> "pd.DataFrame":
+    """Returns one page of rows (pages are 0-based; out-of-range pages are empty)."""
+    return df.iloc[page * page_size:(page + 1) * page_size]
+
+
+def shape_result(
+    df: "pd.DataFrame",
+    max_points: int = MAX_CHART_POINTS,
+    viz_hint: Optional[Dict[str, Any]] = None,
+    viz_types: Optional[Sequence[str]] = None,
+    top_n: Optional[int] = None,
+    page_size: int = TABLE_PAGE_SIZE
+) -> Dict[str, Any]:
+    """
+    Post-processes a result set for display under a point budget.
+
+    The chart type comes from Plan.viz_hint, then the intent's viz_type list,
+    then the data (time axis -> line, otherwise bar). Axis/series columns come
+    from the hint when they exist in the result.
+
+    - line: y summed per (series, x); series beyond top_n / MAX_SERIES folded
+      into "Other"; each series LTTB down-sampled to its share of max_points
+    - bar: time axes are aggregated to coarser grains until they fit;
+      categories beyond top_n (Plan.limits.categories) folded into "Other"
+    - table: no chart; rows are paginated (see paginate)
+
+    Returns:
+        {"row_count", "columns", "numeric_columns", "chart", "table"} where
+        chart is {"type", "x", "y", "series", "points", "truncated",
+        "reduction", "source_points"} or None; points are [x, y] or, with a
+        series, [x, series, y].
+    """
+    import pandas as pd
+
+    viz_hint = viz_hint or {}
+    columns = [str(c) for c in df.columns]
+    numeric = [str(c) for c in df.select_dtypes(include=["number"]).columns]
+    shaped: Dict[str, Any] = {
+        "row_count": len(df),
+        "columns": columns,
+        "numeric_columns": numeric,
+        "chart": None,
+        "table": {
+            "page_size": page_size,
+            "total_rows": len(df),
+            "total_pages": max(1, -(-len(df) // page_size)),
+        },
+    }
+    if df.empty or len(columns) < 2 or not numeric:
+        return shaped
+
+    times = [c for c in columns if pd.api.types.is_datetime64_any_dtype(df[c])]
+    dims = [c for c in columns if c not in numeric]
+
+    x = viz_hint.get("x_axis") if viz_hint.get("x_axis") in columns else None
+    x = x or next(iter(times), None) or next(iter(dims), columns[0])
+    y = viz_hint.get("y_axis") if viz_hint.get("y_axis") in numeric else None
+    y = y or next((c for c in numeric if c != x), None)
+    if y is None or y == x:
+        return shaped
+    series = viz_hint.get("series") if viz_hint.get("series") in dims else None
+    if series is None and x in times:
+        series = next((c for c in dims if c != x), None)
+    if series == x:
+        series = None
+
+    is_time = x in times
+    viz = _choose_viz(viz_hint.get("type"), viz_types, line_ok=is_time or x in numeric)
+    if viz == "table":
+        return shaped
+
+    keys = [series, x] if series else [x]
+    data = df[keys + [y]].copy()
+    reduction: List[str] = []
+
+    series_limit = top_n or MAX_SERIES
+    if viz == "bar" and is_time:
+        # Grouped bars: every x gets one bar per (folded) series
+        per_x = min(data[series].nunique(), series_limit) if series else 1
+        if data[x].nunique() * per_x > max_points:
+            for freq, grain in TIME_GRAINS:
+                data[x] = df[x].dt.to_period(freq).dt.start_time
+                if data[x].nunique() * per_x <= max_points:
+                    break
+            reduction.append(f"aggregated:{grain}")
+
+    grouped = data.groupby(keys, sort=False, dropna=False)[y].sum(min_count=1).reset_index()
+    source_points = len(grouped)
+
+    if series:
+        if grouped[series].nunique() > series_limit:
+            grouped = _fold_other(grouped, series, y, series_limit, by=[x])
+            reduction.append(f"top_{series_limit}_series")
+    elif viz == "bar" and not is_time:
+        limit = min(top_n or TOP_N_CATEGORIES, max_points)
+        if len(grouped) > limit:
+            grouped = _fold_other(grouped, x, y, limit, by=[])
+            reduction.append(f"top_{limit}")
+
+    truncated = False
+    if viz == "line":
+        grouped = grouped.sort_values(keys, kind="stable")
+        parts = [g for _, g in grouped.groupby(series, sort=False)] if series else [grouped]
+        budget = max(3, max_points // len(parts))
+        if any(len(p) > budget for p in parts):
+            sampled = []
+            for part in parts:
+                xs = part[x].to_numpy()
+                xs = xs.astype("int64") if is_time else xs
+                sampled.append(part.iloc[lttb_indices(xs, part[y].fillna(0).to_numpy(), budget)])
+            grouped = pd.concat(sampled)
+            reduction.append("lttb")
+    elif is_time:
+        grouped = grouped.sort_values(keys, kind="stable")
+    else:
+        # Largest first, with the "Other" bucket last
+        is_other = grouped[x].eq(OTHER_LABEL)
+        grouped = pd.concat([grouped[~is_other].sort_values(y, ascending=False, kind="stable"), grouped[is_other]])
+
+    if len(grouped) > max_points:
+        # Grouped bars (x per series) can still exceed the budget
+        grouped = grouped.iloc[:max_points]
+        truncated = True
+
+    x_values = grouped[x].tolist()
+    if is_time:
+        x_values = [v.isoformat() for v in x_values]
+    y_values = [None if v != v else v for v in grouped[y].tolist()]
+    if series:
+        points = [[a, s, b] for a, s, b in zip(x_values, grouped[series].tolist(), y_values)]
+    else:
+        points = [[a, b] for a, b in zip(x_values, y_values)]
+
+    shaped["chart"] = {
+        "type": viz,
+        "x": x,
+        "y": y,
+        "series": series,
+        "points": points,
+        "truncated": truncated,
+        "reduction": reduction,
+        "source_points": source_points,
+    }
+    return shaped
+
+
+def _choose_viz(hint: Optional[str], viz_types: Optional[Sequence[str]], line_ok: bool) -> str:
+    for candidate in [hint] + list(viz_types or []):
+        if candidate in VIZ_TYPES and (candidate != "line" or line_ok):
+            return candidate
+    return "line" if line_ok else "bar"
+
+
+def _fold_other(grouped: "pd.DataFrame", column: str, y: str, limit: int, by: List[str]) -> "pd.DataFrame":
+    """Keeps the `limit - 1` largest `column` values by total y and sums the rest (per `by`) into "Other"."""
+    import pandas as pd
+
+    totals = grouped.groupby(column, sort=False, dropna=False)[y].sum()
+    is_top = grouped[column].isin(totals.nlargest(limit - 1).index)
+    rest = grouped[~is_top]
+    if by:
+        other = rest.groupby(by, sort=False, dropna=False)[y].sum(min_count=1).reset_index()
+    else:
+        other = pd.DataFrame({y: [rest[y].sum(min_count=1)]})
+    other[column] = OTHER_LABEL
+    top = grouped[is_top].astype({column: object})
+    return pd.concat([top, other[top.columns]], ignore_index=True)
@@ -0,0 +1,272 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from pydantic import BaseModel
+from sqlglot import parse_one, exp
+
+FACT_TABLE = "fct_sales"
+PRODUCT_TABLE = "dim_product"
+STORE_TABLE = "dim_store"
+
+GRAIN_RANK = {"day": 0, "week": 1, "month": 2, "quarter": 3, "year": 4}
+
+
+class RollupSpec(BaseModel):
+    """
+    A pre-aggregated summary of fct_sales at a given time grain
+    (grain x tenant x store x product category).
+    """
+    name: str
+    grain: str
+    dimensions: List[str] = ["order_date", "tenant_id", "store_id", "category"]
+    measures: List[str] = ["gross_sales", "net_sales", "quantity", "returns"]
+    count_column: str = "order_count"
+
+
+# Ordered coarsest first: the rewriter picks the first (smallest) rollup that matches
+ROLLUPS = [
+    RollupSpec(name="rollup_sales_monthly", grain="month"),
+    RollupSpec(name="rollup_sales_daily", grain="day"),
+]
+
+
+def _literal_datetime(node: exp.Expression) -> Optional[datetime]:
+    if isinstance(node, exp.Cast):
+        node = node.this
+    if not isinstance(node, exp.Literal) or not node.is_string:
+        return None
+    try:
+        return datetime.fromisoformat(node.this)
+    except ValueError:
+        return None
+
+
+def _is_bucket_start(value: datetime, grain: str) -> bool:
+    if value.time() != datetime.min.time():
+        return False
+    if grain == "month":
+        return value.day == 1
+    return grain == "day"
+
+
+def _conjuncts(where: Optional[exp.Where]) -> List[exp.Expression]:
+    if where is None:
+        return []
+    out, stack = [], [where.this]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, exp.And):
+            stack.extend([node.this, node.expression])
+        elif isinstance(node, exp.Paren):
+            stack.append(node.this)
+        else:
+            out.append(node)
+    return out
+
+
+class RollupRewriter:
+    """
+    Redirects eligible fct_sales aggregations to the smallest matching rollup.
+
+    A query is rewritten only when the result is provably the same:
+    - single SELECT over fct_sales, optionally joined to dim_product (on product_id)
+      and dim_store (on store_id); no subqueries, CTEs, unions or window functions
+    - fact columns limited to rollup dimensions, SUM(<measure>) and COUNT(*)
+    - order_date used via DATE_TRUNC at or above the rollup grain, or in
+      top-level range predicates aligned to the rollup's buckets
+    """
+    def __init__(
+        self,
+        schema: Dict[str, Set[str]],
+        rollups: Optional[List[RollupSpec]] = None,
+        day_aligned: bool = False,
+        product_dim_complete: bool = False
+    ):
+        """
+        Args:
+            schema: Column names per base table, used to resolve unqualified columns.
+            day_aligned: True if every fct_sales.order_date is at midnight.
+            product_dim_complete: True if every fact row matches exactly one dim_product row.
+        """
+        self.schema = {t: {c.lower() for c in cols} for t, cols in schema.items()}
+        self.rollups = rollups or ROLLUPS
+        self.day_aligned = day_aligned
+        self.product_dim_complete = product_dim_complete
+
+    def rewrite(self, sql: str) -> Optional[Tuple[str, RollupSpec]]:
+        """
+        Returns:
+            (rewritten_sql, rollup) for the smallest eligible rollup, or None.
+        """
+        try:
+            tree = parse_one(sql, read="duckdb")
+        except Exception:
+            return None
+
+        for spec in self.rollups:
+            rewritten = self._rewrite(tree.copy(), spec)
+            if rewritten is not None:
+                return rewritten.sql(dialect="duckdb"), spec
+        return None
+
+    def _rewrite(self, tree: exp.Expression, spec: RollupSpec) -> Optional[exp.Expression]:
+        if not isinstance(tree, exp.Select) or tree.args.get("with"):
+            return None
+        if tree.find(exp.Subquery, exp.Union, exp.Window):
+            return None
+
+        # 1. Tables: fct_sales once, plus optional dims
+        aliases: Dict[str, str] = {}
+        fact_table = None
+        for table in tree.find_all(exp.Table):
+            name = table.name.lower()
+            alias = table.alias_or_name.lower()
+            if name not in self.schema or alias in aliases:
+                return None
+            aliases[alias] = name
+            if name == FACT_TABLE:
+                fact_table = table
+        if fact_table is None or len(set(aliases.values())) != len(aliases):
+            return None
+        if not isinstance(tree.args.get("from"), exp.From) or tree.args["from"].this is not fact_table:
+            return None
+        fact_alias = fact_table.alias_or_name
+
+        # 2. Joins: dim_product is folded into the rollup's category; dim_store is kept
+        joins = tree.args.get("joins") or []
+        product_join = None
+        for join in joins:
+            if join.args.get("using") or join.side not in ("", "LEFT") or join.kind not in ("", "INNER"):
+                return None
+            dim = join.this.name.lower() if isinstance(join.this, exp.Table) else None
+            key = {PRODUCT_TABLE: "product_id", STORE_TABLE: "store_id"}.get(dim)
+            if key is None or not self._is_key_join(join.args.get("on"), key, aliases):
+                return None
+            if dim == PRODUCT_TABLE:
+                if not self.product_dim_complete:
+                    return None
+                product_join = join
+
+        # 3. Aggregates must be SUM(measure) or COUNT(*)
+        has_aggregate = False
+        for agg in tree.find_all(exp.AggFunc):
+            has_aggregate = True
+            if isinstance(agg, exp.Count) and isinstance(agg.this, exp.Star):
+                continue
+            if isinstance(agg, exp.Sum) and isinstance(agg.this, exp.Column):
+                if self._resolve(agg.this, aliases) == FACT_TABLE and agg.this.name.lower() in spec.measures:
+                    continue
+            return None
+        if not (has_aggregate or tree.args.get("group") or tree.args.get("distinct")):
+            # Row-level queries would return one row per rollup bucket instead of per order
+            return None
+        if any(not isinstance(star.parent, exp.Count) for star in tree.find_all(exp.Star)):
+            return None
+
+        # 4. Column references
+        conjuncts = {id(c) for c in _conjuncts(tree.args.get("where"))}
+        category_refs = []
+        for col in tree.find_all(exp.Column):
+            if product_join is not None and col.find_ancestor(exp.Join) is product_join:
+                continue
+            table = self._resolve(col, aliases)
+            name = col.name.lower()
+            if table == PRODUCT_TABLE:
+                if name != "category":
+                    return None
+                category_refs.append(col)
+            elif table == STORE_TABLE:
+                continue
+            elif table == FACT_TABLE:
+                if name in ("tenant_id", "store_id") or name in spec.measures:
+                    # Measures were checked to only appear inside SUM() above
+                    if name in spec.measures and not isinstance(col.parent, exp.Sum):
+                        return None
+                    continue
+                if name == "order_date" and self._date_use_ok(col, spec, conjuncts):
+                    continue
+                return None
+            else:
+                return None
+
+        # 5. Rewrite
+        original_selects = [e.sql(dialect="duckdb") for e in tree.expressions]
+        fact_table.set("this", exp.to_identifier(spec.name))
+        if not fact_table.alias:
+            fact_table.set("alias", exp.TableAlias(this=exp.to_identifier(FACT_TABLE)))
+        if product_join is not None:
+            tree.set("joins", [j for j in joins if j is not product_join])
+        for col in category_refs:
+            col.replace(exp.column("category", table=fact_alias))
+
+        def _count_to_sum(node):
+            if isinstance(node, exp.Count) and isinstance(node.this, exp.Star):
+                total = exp.Sum(this=exp.column(spec.count_column, table=fact_alias))
+                return exp.Cast(
+                    this=exp.Coalesce(this=total, expressions=[exp.Literal.number(0)]),
+                    to=exp.DataType.build("BIGINT")
+                )
+            return node
+
+        tree = tree.transform(_count_to_sum)
+
+        # Result column names must not change: unaliased expressions that were
+        # rewritten (other than bare columns) would be renamed by DuckDB
+        for before, after in zip(original_selects, tree.expressions):
+            if before != after.sql(dialect="duckdb") and not isinstance(after, (exp.Alias, exp.Column)):
+                return None
+        return tree
+
+    def _resolve(self, col: exp.Column, aliases: Dict[str, str]) -> Optional[str]:
+        if col.table:
+            return aliases.get(col.table.lower())
+        matches = [t for t in aliases.values() if col.name.lower() in self.schema.get(t, set())]
+        return matches[0] if len(matches) == 1 else None
+
+    def _is_key_join(self, on: Optional[exp.Expression], key: str, aliases: Dict[str, str]) -> bool:
+        if not isinstance(on, exp.EQ):
+            return False
+        sides = [on.this, on.expression]
+        if not all(isinstance(s, exp.Column) and s.name.lower() == key for s in sides):
+            return False
+        tables = {self._resolve(s, aliases) for s in sides}
+        return FACT_TABLE in tables and len(tables) == 2
+
+    def _date_use_ok(self, col: exp.Column, spec: RollupSpec, conjuncts: Set[int]) -> bool:
+        parent = col.parent
+
+        if isinstance(parent, (exp.TimestampTrunc, exp.DateTrunc)) and parent.this is col:
+            unit = parent.args.get("unit")
+            unit = (unit.name if unit is not None else "").lower()
+            return GRAIN_RANK.get(unit, -1) >= GRAIN_RANK[spec.grain]
+
+        if spec.grain == "day" and self.day_aligned:
+            # Daily buckets hold exactly the original timestamps
+            return True
+
+        if spec.grain == "day" and isinstance(parent, exp.Cast) and parent.to.this == exp.DataType.Type.DATE:
+            return True
+
+        if id(parent) not in conjuncts or parent.this is not col:
+            return False
+
+        # Range predicates must fall on bucket boundaries of the rollup grain
+        if isinstance(parent, exp.Between):
+            low, high = _literal_datetime(parent.args["low"]), _literal_datetime(parent.args["high"])
+            return (
+                low is not None and high is not None
+                and _is_bucket_start(low, spec.grain)
+                and self._inclusive_upper_ok(high, spec.grain)
+            )
+
+        value = _literal_datetime(parent.expression) if isinstance(parent, exp.Binary) else None
+        if value is None:
+            return False
+        if isinstance(parent, (exp.GTE, exp.LT)):
+            return _is_bucket_start(value, spec.grain)
+        if isinstance(parent, (exp.GT, exp.LTE)):
+            return self._inclusive_upper_ok(value, spec.grain)
+        return False
+
+    def _inclusive_upper_ok(self, value: datetime, grain: str) -> bool:
+        # `<= d` (or `> d`) only splits cleanly at day boundaries when timestamps are midnight-aligned
+        return self.day_aligned and _is_bucket_start(value + timedelta(days=1), grain)
@@ -1,13 +1,38 @@
 import json
-from typing import Dict, Any, Optional
-from src.core.types import RouterOutput
+import time
+from typing import Dict, Any, Optional, Callable
+from src.core.types import RouterOutput, json_schema
 from src.interfaces.llm import LLMClient
 from src.core.utils import PromptLoader
 from src.core.context import SecurityContext
+from src.core.context_builder import ContextBuilder, compact_json
+from src.core.policy_engine import PolicyEngine
+from src.core.profiler import profile_span
+from src.core.streaming import IncrementalJSONParser
+
+# Routes whose downstream stages never surface `reason`/`clarify_question` to the
+# user, so the router can commit on `route` alone and stop consuming the stream.
+# Their RouterOutput.reason is then usually empty; traces flag it as early_commit.
+EARLY_COMMIT_ROUTES = {"sql", "qa"}
 
 class Router:
-    def __init__(self, llm_client: LLMClient, prompt_loader: PromptLoader):
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        prompt_loader: PromptLoader,
+        policy_engine: Optional[PolicyEngine] = None,
+        context_builder: Optional[ContextBuilder] = None
+    ):
+        """
+        Args:
+            policy_engine: Compiled access policy; when set, the caller's role
+                rules (allowed intents, row cap) are the default policy_profile.
+            context_builder: Selects the glossary entries relevant to each
+                question when the caller does not pass glossary_hits.
+        """
         self.llm = llm_client
+        self.policy_engine = policy_engine
+        self.context_builder = context_builder
         self.prompt_loader = prompt_loader
         self.prompt_template = self.prompt_loader.load("router-retail-v1.md")
 
@@ -16,31 +41,76 @@ class Router:
         user_query: str, 
         user_ctx: SecurityContext, 
         glossary_hits: Optional[list] = None,
-        policy_profile: Optional[Dict[str, Any]] = None
+        policy_profile: Optional[Dict[str, Any]] = None,
+        on_route: Optional[Callable[[str], None]] = None,
+        timings: Optional[Dict[str, float]] = None
     ) -> RouterOutput:
-        
-        # Construct the full prompt with inputs
-        # In a real system, we'd use Jinja2, but f-string is fine for PoC
-        inputs_section = f"""
+        """
+        Routes the query, streaming the LLM response and committing as soon
+        as the `route` field is decoded.
+
+        Args:
+            on_route: Optional callback invoked with the route the moment it is decoded.
+            timings: Optional dict populated with `time_to_first_decision_ms`,
+                `early_commit` (the stream was cut after `route`, so `reason`
+                was not read) and, with a context builder, `context` token stats.
+        """
+        with profile_span("router.prompt"):
+            if policy_profile is None and self.policy_engine is not None:
+                policy_profile = self.policy_engine.program.profile(user_ctx.tenant_id, user_ctx.role)
+            if glossary_hits is None and self.context_builder is not None:
+                glossary_hits, stats = self.context_builder.router_context(user_query)
+                if timings is not None:
+                    timings["context"] = stats
+
+            # Construct the full prompt with inputs
+            # In a real system, we'd use Jinja2, but f-string is fine for PoC
+            inputs_section = f"""
 ## Actual Inputs
 - user_query: "{user_query}"
-- user_ctx: {user_ctx.model_dump_json()}
-- glossary_hits: {json.dumps(glossary_hits or [])}
-- policy_profile: {json.dumps(policy_profile or {})}
+- user_ctx: {user_ctx.prompt_json()}
+- glossary_hits: {compact_json(glossary_hits or [])}
+- policy_profile: {compact_json(policy_profile or {})}
 """
-        full_prompt = self.prompt_template + "\n" + inputs_section
+            full_prompt = self.prompt_template + "\n" + inputs_section
+
+        # Call LLM (streaming)
+        start = time.perf_counter()
+        parser = IncrementalJSONParser()
+        with profile_span("router.llm"):
+            stream = self.llm.generate_content_stream(
+                prompt=full_prompt,
+                temperature=0.0,
+                response_schema=json_schema(RouterOutput)
+            )
+            try:
+                for chunk in stream:
+                    decoded = parser.feed(chunk)
+                    if "route" in decoded:
+                        if timings is not None:
+                            timings["time_to_first_decision_ms"] = (time.perf_counter() - start) * 1000
+                        if on_route:
+                            on_route(decoded["route"])
+                    if parser.fields.get("route") in EARLY_COMMIT_ROUTES:
+                        if timings is not None:
+                            timings["early_commit"] = True
+                        break
+            finally:
+                if hasattr(stream, "close"):
+                    stream.close()
 
-        # Call LLM
-        response_text = self.llm.generate_content(
-            prompt=full_prompt,
-            temperature=0.0,
-            response_schema=RouterOutput.model_json_schema()
-        )
+        data = dict(parser.fields)
+        if "route" in data:
+            data.setdefault("reason", "")
+            try:
+                return RouterOutput(**data)
+            except ValueError:
+                pass
 
         # Parse response (Gemini API can return JSON directly, but we'll parse just in case)
         try:
             # Clean up markdown code blocks if present
-            cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
+            cleaned_text = parser.text.replace("```json", "").replace("```", "").strip()
             data = json.loads(cleaned_text)
             return RouterOutput(**data)
         except json.JSONDecodeError:
@@ -0,0 +1,269 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, TYPE_CHECKING
+from src.core.context import SecurityContext
+
+if TYPE_CHECKING:
+    from src.core.policy_engine import PolicyEngine
+
+# tenant_id -> {"budget_per_day_usd", "max_concurrent_requests", "weight"} (PolicyProgram.tenant_limits)
+Limits = Callable[[str], Dict[str, Any]]
+WAIT_SAMPLES = 1024
+
+
+class Overloaded(RuntimeError):
+    """The scheduler shed a request: its queue is full or the wait ran out."""
+    def __init__(self, resource: str, reason: str, retry_after_s: float = 1.0):
+        super().__init__(f"{resource} is busy ({reason})")
+        self.resource = resource
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class BudgetExceeded(ValueError):
+    pass
+
+
+class _Waiter:
+    __slots__ = ("tenant_id", "tag", "seq", "granted", "finish", "prev_finish")
+
+    def __init__(self, tenant_id: str, tag: float, seq: int, finish: float, prev_finish: Optional[float]):
+        """
+        Args:
+            finish: The tenant's finish tag after this request.
+            prev_finish: The tenant's finish tag before it (None = none yet).
+        """
+        self.tenant_id = tenant_id
+        self.tag = tag
+        self.seq = seq
+        self.finish = finish
+        self.prev_finish = prev_finish
+        self.granted = False
+
+
+class FairScheduler:
+    """
+    Concurrency slots of one shared resource (the LLM quota, DuckDB), handed
+    out by start-time weighted fair queuing: each request is tagged
+    max(virtual time, tenant's last finish tag) + cost / weight, and free
+    slots go to the smallest tag whose tenant is under its own concurrency
+    cap. A tenant with a backlog of heavy questions therefore only delays its
+    own requests; a light tenant's next request goes ahead of them, and an
+    idle tenant cannot bank credit.
+
+    Requests are shed (Overloaded) when the queue is full, or when they
+    waited max_wait_s without getting a slot.
+    """
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        max_queue: int = 64,
+        max_wait_s: float = 5.0,
+        limits: Optional[Limits] = None
+    ):
+        """
+        Args:
+            name: "llm" or "db" (error messages and stats).
+            capacity: Requests running at once, across tenants.
+            max_queue: Requests waiting at once; more are shed immediately.
+            limits: Per-tenant weight and max_concurrent_requests (None = capacity).
+        """
+        if capacity < 1:
+            raise ValueError(f"Scheduler '{name}' needs a capacity of at least 1")
+        self.name = name
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.limits = limits or (lambda tenant_id: {})
+        self._cond = threading.Condition()
+        self._waiting: List[_Waiter] = []
+        self._running: Dict[str, int] = {}
+        self._finish: Dict[str, float] = {}
+        self._vtime = 0.0
+        self._seq = 0
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._admitted = 0
+        self._shed = {"queue_full": 0, "timeout": 0}
+
+    def _cap(self, tenant_id: str) -> int:
+        cap = self.limits(tenant_id).get("max_concurrent_requests")
+        return min(int(cap), self.capacity) if cap else self.capacity
+
+    def _dispatch(self):
+        """Grants free slots to the smallest eligible tags (caller holds the lock)."""
+        granted = False
+        while self._waiting and sum(self._running.values()) < self.capacity:
+            eligible = [w for w in self._waiting if self._running.get(w.tenant_id, 0) < self._cap(w.tenant_id)]
+            if not eligible:
+                break
+            waiter = min(eligible, key=lambda w: (w.tag, w.seq))
+            self._waiting.remove(waiter)
+            waiter.granted = granted = True
+            self._running[waiter.tenant_id] = self._running.get(waiter.tenant_id, 0) + 1
+            self._vtime = max(self._vtime, waiter.tag)
+        if granted:
+            self._cond.notify_all()
+
+    def acquire(self, tenant_id: str, cost: float = 1.0):
+        start = time.perf_counter()
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                self._shed["queue_full"] += 1
+                raise Overloaded(self.name, "queue full", retry_after_s=self.max_wait_s)
+            weight = float(self.limits(tenant_id).get("weight") or 1.0)
+            prev_finish = self._finish.get(tenant_id)
+            tag = max(self._vtime, prev_finish or 0.0)
+            self._finish[tenant_id] = tag + cost / weight
+            self._seq += 1
+            waiter = _Waiter(tenant_id, tag, self._seq, self._finish[tenant_id], prev_finish)
+            self._waiting.append(waiter)
+            self._dispatch()
+
+            deadline = start + self.max_wait_s
+            while not waiter.granted:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._waiting.remove(waiter)
+                    # Never served, so it must not count against the tenant's next tag;
+                    # later requests of the tenant were tagged after it, keep theirs
+                    if self._finish.get(tenant_id) == waiter.finish:
+                        if waiter.prev_finish is None:
+                            del self._finish[tenant_id]
+                        else:
+                            self._finish[tenant_id] = waiter.prev_finish
+                    self._shed["timeout"] += 1
+                    raise Overloaded(self.name, "wait timed out", retry_after_s=self.max_wait_s)
+                self._cond.wait(remaining)
+            self._admitted += 1
+            self._waits.append((time.perf_counter() - start) * 1000)
+
+    def release(self, tenant_id: str):
+        with self._cond:
+            self._running[tenant_id] -= 1
+            if not self._running[tenant_id]:
+                del self._running[tenant_id]
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, tenant_id: str, cost: float = 1.0) -> Iterator[None]:
+        """Holds one of the resource's slots for tenant_id (waits its fair turn)."""
+        self.acquire(tenant_id, cost)
+        try:
+            yield
+        finally:
+            self.release(tenant_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth (total / per tenant), running, admitted, shed and wait times (ms) of recent requests."""
+        with self._cond:
+            queued: Dict[str, int] = {}
+            for w in self._waiting:
+                queued[w.tenant_id] = queued.get(w.tenant_id, 0) + 1
+            waits = sorted(self._waits)
+            return {
+                "capacity": self.capacity,
+                "running": sum(self._running.values()),
+                "running_by_tenant": dict(self._running),
+                "queue_depth": len(self._waiting),
+                "queue_by_tenant": queued,
+                "admitted": self._admitted,
+                "shed": dict(self._shed),
+                "wait_ms_avg": round(sum(waits) / len(waits), 3) if waits else None,
+                "wait_ms_p95": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else None,
+                "wait_ms_max": round(waits[-1], 3) if waits else None,
+            }
+
+
+class BudgetLedger:
+    """
+    Estimated spend (LLM tokens and query cost, USD) per tenant per UTC day,
+    against the tenant's budget_per_day_usd. Kept in memory, so each replica
+    enforces the budget on its own share of the traffic.
+    """
+    def __init__(self, limits: Optional[Limits] = None):
+        self.limits = limits or (lambda tenant_id: {})
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self._spent: Dict[str, float] = {}
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def _roll(self):
+        today = self._today()
+        if today != self._day:
+            self._day, self._spent = today, {}
+
+    def spent(self, tenant_id: str) -> float:
+        with self._lock:
+            self._roll()
+            return self._spent.get(tenant_id, 0.0)
+
+    def check(self, tenant_id: str):
+        """Raises BudgetExceeded once the tenant has spent its daily budget."""
+        budget = self.limits(tenant_id).get("budget_per_day_usd")
+        if budget is not None and self.spent(tenant_id) >= float(budget):
+            raise BudgetExceeded(
+                f"Policy Violation: Daily budget of ${float(budget):.2f} for tenant '{tenant_id}' is exhausted."
+            )
+
+    def charge(self, tenant_id: Optional[str], cost_usd: float):
+        if not tenant_id or not cost_usd:
+            return
+        with self._lock:
+            self._roll()
+            self._spent[tenant_id] = self._spent.get(tenant_id, 0.0) + cost_usd
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            self._roll()
+            spent = dict(self._spent)
+        return {
+            "day": self._day,
+            "tenants": {
+                t: {"spent_usd": round(usd, 6), "budget_per_day_usd": self.limits(t).get("budget_per_day_usd")}
+                for t, usd in spent.items()
+            },
+        }
+
+
+class AdmissionController:
+    """
+    Admission in front of the shared LLM quota and DuckDB: checks the
+    tenant's daily budget, then waits for a fair-share slot on the resource.
+    Limits come from the tenant_policies of the access policy (budget under
+    cost_controls, max_concurrent_requests and weight under scheduling).
+    """
+    def __init__(
+        self,
+        policy_engine: Optional["PolicyEngine"] = None,
+        llm_capacity: int = 8,
+        db_capacity: int = 4,
+        max_queue: int = 64,
+        max_wait_s: float = 5.0
+    ):
+        def limits(tenant_id: str) -> Dict[str, Any]:
+            return policy_engine.program.tenant_limits(tenant_id) if policy_engine is not None else {}
+
+        self.ledger = BudgetLedger(limits)
+        self.llm = FairScheduler("llm", llm_capacity, max_queue=max_queue, max_wait_s=max_wait_s, limits=limits)
+        self.db = FairScheduler("db", db_capacity, max_queue=max_queue, max_wait_s=max_wait_s, limits=limits)
+
+    @contextmanager
+    def admit(self, resource: str, user_ctx: SecurityContext, cost: float = 1.0) -> Iterator[None]:
+        """
+        Args:
+            resource: "llm" or "db".
+            cost: Relative size of the request in fair-queuing terms.
+        """
+        self.ledger.check(user_ctx.tenant_id)
+        with getattr(self, resource).slot(user_ctx.tenant_id, cost):
+            yield
+
+    def stats(self) -> Dict[str, Any]:
+        return {"llm": self.llm.stats(), "db": self.db.stats(), "budgets": self.ledger.usage()}
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, TYPE_CHECKING
+from urllib.parse import quote, unquote, urlparse
+from src.core.context import SecurityContext, current_user
+from src.core.types import dump_json
+from src.interfaces.cache import CacheBackend
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("llm", "plan", "result")
+DEFAULT_TTL_S = 24 * 3600
+DEFAULT_MAX_ITEM_BYTES = 16 * 2**20
+# After a backend failure, lookups skip it (count as misses) this long
+DEFAULT_COOLDOWN_S = 30.0
+# Kept in the Arrow schema metadata of cached frames
+ATTRS_KEY = b"copilot.attrs"
+
+def open_backend(url: str) -> CacheBackend:
+    """
+    Backend for a SHARED_CACHE_URL: sqlite:///path/to/file.sqlite (single
+    node) or redis://[user:password@]host:port/db (any Redis-protocol
+    server; rediss:// for TLS).
+    """
+    parsed = urlparse(url)
+    if url.startswith("sqlite:///"):
+        from src.adapters.sqlite_cache import SQLiteCacheBackend
+        # sqlite:///relative/path, sqlite:////absolute/path
+        return SQLiteCacheBackend(url[len("sqlite:///"):])
+    if parsed.scheme in ("redis", "rediss"):
+        from src.adapters.resp_cache import RedisCacheBackend
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisCacheBackend(
+            parsed.hostname or "localhost",
+            parsed.port or 6379,
+            db=db,
+            password=unquote(parsed.password) if parsed.password else None,
+            username=unquote(parsed.username) if parsed.username else None,
+            tls=parsed.scheme == "rediss",
+        )
+    raise ValueError(f"Unsupported SHARED_CACHE_URL scheme: '{parsed.scheme}'")
+
+
+def frame_to_bytes(df: "pd.DataFrame") -> bytes:
+    """Arrow IPC stream (zstd-compressed) of a result frame, with its attrs."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if df.attrs:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), ATTRS_KEY: dump_json(df.attrs)})
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression="zstd" if pa.Codec.is_available("zstd") else None)
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def frame_from_bytes(data: bytes) -> "pd.DataFrame":
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(data).read_all()
+    df = table.to_pandas()
+    attrs = (table.schema.metadata or {}).get(ATTRS_KEY)
+    if attrs:
+        df.attrs.update(json.loads(attrs))
+    return df
+
+
+class SharedCache:
+    """
+    Cache tier shared by every replica: LLM responses, plans and query
+    results, on a pluggable backend (SQLite file or Redis-protocol server).
+
+    Every key is namespaced by the caller's tenant_id and role, and there is
+    no way to read an entry without a SecurityContext, so one tenant's
+    entries are never served to another (or to another role of the same
+    tenant), even when the rest of the key is identical. Values are compact:
+    zlib-compressed JSON, and results as zstd Arrow IPC.
+
+    Backend failures are logged and counted, and behave as misses: the cache
+    never fails a request. After a failure the backend is skipped for
+    cooldown_s, so an unreachable server does not add a connect timeout to
+    every lookup. Results are keyed by data_version (result_key), so
+    replicas sharing results must serve the same data (the DUCKDB_PATH file
+    built by scripts/build_duckdb.py).
+    """
+    def __init__(
+        self,
+        backend: CacheBackend,
+        namespace: str = "copilot",
+        ttl_s: Optional[int] = DEFAULT_TTL_S,
+        max_item_bytes: int = DEFAULT_MAX_ITEM_BYTES,
+        cooldown_s: float = DEFAULT_COOLDOWN_S
+    ):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl_s = ttl_s
+        self.max_item_bytes = max_item_bytes
+        self.cooldown_s = cooldown_s
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            tier: {
+                "hits": 0, "misses": 0, "writes": 0, "skipped": 0, "errors": 0, "bypassed": 0,
+                "bytes_read": 0, "bytes_written": 0,
+            }
+            for tier in TIERS
+        }
+
+    def key(self, tier: str, user_ctx: SecurityContext, key: str) -> str:
+        """namespace:tier:tenant:role:digest (tenant and role escaped, so they cannot forge a prefix)."""
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return f"{self.namespace}:{tier}:{quote(user_ctx.tenant_id, safe='')}:{quote(user_ctx.role, safe='')}:{digest}"
+
+    def _count(self, tier: str, stat: str, n: int = 1):
+        with self._lock:
+            self._stats[tier][stat] += n
+
+    def _available(self, tier: str) -> bool:
+        """False (and counted as bypassed) while cooling down after a backend failure."""
+        if time.monotonic() < self._down_until:
+            self._count(tier, "bypassed")
+            return False
+        return True
+
+    def _failed(self, tier: str, action: str, error: Exception):
+        self._count(tier, "errors")
+        self._down_until = time.monotonic() + self.cooldown_s
+        logger.warning("Shared cache %s failed, skipping it for %.0fs: %s", action, self.cooldown_s, error)
+
+    # -- Raw bytes ---------------------------------------------------------
+
+    def get_bytes(self, tier: str, user_ctx: Optional[SecurityContext], key: str) -> Optional[bytes]:
+        if user_ctx is None or not self._available(tier):
+            return None
+        try:
+            data = self.backend.get(self.key(tier, user_ctx, key))
+        except Exception as e:
+            self._failed(tier, "read", e)
+            return None
+        if data is None:
+            self._count(tier, "misses")
+            return None
+        self._count(tier, "hits")
+        self._count(tier, "bytes_read", len(data))
+        return data
+
+    def put_bytes(self, tier: str, user_ctx: Optional[SecurityContext], key: str, data: bytes) -> bool:
+        if user_ctx is None:
+            return False
+        if len(data) > self.max_item_bytes:
+            self._count(tier, "skipped")
+            return False
+        if not self._available(tier):
+            return False
+        try:
+            self.backend.set(self.key(tier, user_ctx, key), data, self.ttl_s)
+        except Exception as e:
+            self._failed(tier, "write", e)
+            return False
+        self._count(tier, "writes")
+        self._count(tier, "bytes_written", len(data))
+        return True
+
+    # -- Typed values ------------------------------------------------------
+
+    def get_json(self, tier: str, user_ctx: Optional[SecurityContext], key: str) -> Any:
+        data = self.get_bytes(tier, user_ctx, key)
+        return json.loads(zlib.decompress(data)) if data is not None else None
+
+    def put_json(self, tier: str, user_ctx: Optional[SecurityContext], key: str, value: Any) -> bool:
+        return self.put_bytes(tier, user_ctx, key, zlib.compress(dump_json(value).encode(), 1))
+
+    def get_text(self, key: str) -> Optional[str]:
+        """LLM response for key, filed under current_user() (None without one)."""
+        value = self.get_json("llm", current_user(), key)
+        return value if isinstance(value, str) else None
+
+    def put_text(self, key: str, text: str) -> bool:
+        return self.put_json("llm", current_user(), key, text)
+
+    def get_frame(self, user_ctx: SecurityContext, key: str) -> Optional["pd.DataFrame"]:
+        data = self.get_bytes("result", user_ctx, key)
+        if data is None:
+            return None
+        try:
+            return frame_from_bytes(data)
+        except Exception as e:
+            self._count("result", "errors")
+            logger.warning("Unreadable shared cache result: %s", e)
+            return None
+
+    def put_frame(self, user_ctx: SecurityContext, key: str, df: "pd.DataFrame") -> bool:
+        try:
+            data = frame_to_bytes(df)
+        except Exception as e:
+            # e.g. mixed-type object columns Arrow cannot encode
+            self._count("result", "skipped")
+            logger.debug("Result not shared: %s", e)
+            return False
+        return self.put_bytes("result", user_ctx, key, data)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Per tier: hits, misses, hit_rate, writes, skipped (too large / not
+        encodable), errors, bypassed (during a cool-down) and bytes.
+        """
+        with self._lock:
+            stats = {tier: dict(s) for tier, s in self._stats.items()}
+        for s in stats.values():
+            lookups = s["hits"] + s["misses"]
+            s["hit_rate"] = round(s["hits"] / lookups, 4) if lookups else None
+        return stats
+
+    def close(self):
+        self.backend.close()
@@ -1,33 +1,43 @@
-import json
 from typing import Dict, Any, Optional
+from src.core.context_builder import DEFAULT_SCHEMA, ContextBuilder, compact_json
 from src.core.types import Plan
 from src.interfaces.llm import LLMClient
 
 class SQLGenerator:
-    def __init__(self, llm_client: LLMClient):
+    def __init__(self, llm_client: LLMClient, context_builder: Optional[ContextBuilder] = None):
+        """
+        Args:
+            context_builder: Provides the schema slice (tables, columns and their stats) each plan needs.
+        """
         self.llm = llm_client
+        self.context_builder = context_builder
 
-    def generate_sql(self, plan: Plan, schema_info: str = "") -> str:
+    def generate_sql(self, plan: Plan, schema_info: str = "", timings: Optional[Dict[str, Any]] = None) -> str:
         """
         Generates executable SQL from a Plan object.
+
+        Args:
+            timings: Optional dict populated with `context` token stats of the schema slice.
         """
-        # Default schema info if not provided (in a real app, this might come from a catalog service)
+        if not schema_info and self.context_builder is not None:
+            schema_info, stats = self.context_builder.schema_context(plan)
+            if timings is not None:
+                timings["context"] = stats
+
+        # Nothing from the builder: list every bundled table
         if not schema_info:
-            schema_info = """
-            - fct_sales (order_id, order_date, product_id, store_id, net_sales, quantity)
-            - dim_product (product_id, product_name, category)
-            - dim_store (store_id, store_name, region)
-            """
+            schema_info = "\n".join(f"- {table} ({', '.join(columns)})" for table, columns in DEFAULT_SCHEMA.items())
 
         sql_prompt = f"""
         You are a BigQuery SQL Expert. Convert this Plan into executable DuckDB SQL.
         Schema: 
         {schema_info}
         
-        Plan: {plan.model_dump_json()}
+        Plan: {compact_json(plan.model_dump())}
         
         Rules:
         - Use JOINs correctly.
+        - Use only the columns listed in the schema; filter values must lie within the listed ranges/values.
         - Return ONLY the SQL, no markdown.
         - LIMIT is mandatory.
         """
@@ -40,3 +50,40 @@ class SQLGenerator:
         # Clean up markdown if present
         sql = response.replace("```sql", "").replace("```", "").strip()
         return sql
+
+    def repair_sql(self, plan: Plan, sql: str, error: str, timings: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Asks the model to fix SQL the database rejected, given its error message
+        and the plan's schema slice.
+        """
+        schema_info = ""
+        if self.context_builder is not None:
+            schema_info, stats = self.context_builder.schema_context(plan)
+            if timings is not None:
+                timings["context"] = stats
+        if not schema_info:
+            schema_info = "\n".join(f"- {table} ({', '.join(columns)})" for table, columns in DEFAULT_SCHEMA.items())
+
+        repair_prompt = f"""
+        This DuckDB SQL failed. Fix it.
+        Schema:
+        {schema_info}
+
+        SQL:
+        {sql}
+
+        Error:
+        {error}
+
+        Rules:
+        - Keep the query's intent; change only what the error requires.
+        - Use only the columns listed in the schema.
+        - Return ONLY the SQL, no markdown.
+        - LIMIT is mandatory.
+        """
+
+        response = self.llm.generate_content(
+            prompt=repair_prompt,
+            temperature=0.0
+        )
+        return response.replace("```sql", "").replace("```", "").strip()
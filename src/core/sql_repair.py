@@ -0,0 +1,178 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from src.core.fingerprint import fingerprint_sql
+from src.core.types import Plan
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 1
+DEFAULT_CACHE_SIZE = 1024
+# Validator / cost gate rejections: the model is not asked to work around them
+POLICY_ERRORS = ("Security Violation", "Policy Violation")
+
+
+def repair_key(sql: str) -> str:
+    """Exact fingerprint of the SQL, or a hash of its text when it does not parse."""
+    try:
+        return fingerprint_sql(sql)[0]
+    except Exception:
+        return hashlib.sha1(" ".join(sql.split()).encode()).hexdigest()[:16]
+
+
+class SQLRepairer:
+    """
+    Bounded self-correction for model-written SQL. When the database cannot
+    parse or bind a query, its error and the plan's schema slice go back to
+    the model, at most max_attempts times. Fixes that ran are remembered by
+    the bad SQL's exact fingerprint, so the same mistake is fixed locally,
+    without an LLM call, the next time.
+
+    Only database errors are repaired (the database must confirm the SQL is
+    at fault via sql_error); policy and security rejections are re-raised.
+    Repaired SQL goes through the normal validation and cost gate again.
+    """
+    def __init__(
+        self,
+        sql_generator,
+        db,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        cache_size: int = DEFAULT_CACHE_SIZE
+    ):
+        """
+        Args:
+            sql_generator: Provides repair_sql(plan, sql, error).
+            db: Provides sql_error(sql); without it nothing is repaired.
+        """
+        self.sql_generator = sql_generator
+        self.db = db
+        self.max_attempts = max_attempts
+        self.cache_size = cache_size
+        self._fixes: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"repaired": 0, "cache_hits": 0, "unrepaired": 0, "llm_calls": 0}
+        self._added_ms = 0.0
+
+    def diagnose(self, sql: str, error: Exception) -> Optional[str]:
+        """The database's error for this SQL when repairing it could help, else None."""
+        if str(error).startswith(POLICY_ERRORS) or not hasattr(self.db, "sql_error"):
+            return None
+        return self.db.sql_error(sql)
+
+    def known_fix(self, sql: str) -> Optional[str]:
+        if not self._fixes:
+            # Nothing learned yet: skip the parse
+            return None
+        key = repair_key(sql)
+        with self._lock:
+            fixed = self._fixes.get(key)
+            if fixed is not None:
+                self._fixes.move_to_end(key)
+            return fixed
+
+    def remember(self, sql: str, fixed: str):
+        key = repair_key(sql)
+        with self._lock:
+            self._fixes[key] = fixed
+            self._fixes.move_to_end(key)
+            while len(self._fixes) > self.cache_size:
+                self._fixes.popitem(last=False)
+
+    def forget(self, sql: str):
+        with self._lock:
+            self._fixes.pop(repair_key(sql), None)
+
+    def run(
+        self,
+        sql: str,
+        plan: Plan,
+        execute: Callable[[str], Dict[str, Any]],
+        timings: Optional[Dict[str, Any]] = None,
+        repair: Optional[Callable[..., str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Runs execute(sql), repairing the SQL when the database rejects it.
+
+        Args:
+            repair: Called as repair(plan, sql, error, timings=...) for each
+                model repair; defaults to sql_generator.repair_sql (the
+                pipeline passes one that runs in the caller's scope and slot).
+
+        Returns:
+            execute()'s result; when the SQL was repaired it also has "repair":
+            {"original_sql", "sql", "error", "attempts", "cached", "added_ms"}.
+        """
+        fixed = self.known_fix(sql)
+        if fixed is not None:
+            try:
+                result = execute(fixed)
+            except Exception:
+                # The fix no longer works (e.g. the schema changed): start over
+                self.forget(sql)
+            else:
+                self._record("cache_hits")
+                result["repair"] = {
+                    "original_sql": sql, "sql": fixed, "error": None, "attempts": 0, "cached": True, "added_ms": 0.0,
+                }
+                return result
+
+        try:
+            return execute(sql)
+        except Exception as e:
+            original = e
+            error = self.diagnose(sql, e)
+            if error is None or self.max_attempts < 1:
+                raise
+
+        repair = repair or self.sql_generator.repair_sql
+        start = time.perf_counter()
+        current, first_error = sql, error
+        for attempt in range(1, self.max_attempts + 1):
+            self._record("llm_calls")
+            current = repair(plan, current, error, timings=timings)
+            try:
+                result = execute(current)
+            except Exception as e:
+                error = self.diagnose(current, e)
+                if error is None:
+                    break
+                continue
+
+            added_ms = (time.perf_counter() - start) * 1000
+            self.remember(sql, current)
+            self._record("repaired", added_ms)
+            logger.info("Repaired SQL after %d attempt(s) in %.0f ms: %s", attempt, added_ms, first_error.splitlines()[0])
+            result["repair"] = {
+                "original_sql": sql, "sql": current, "error": first_error, "attempts": attempt, "cached": False,
+                "added_ms": round(added_ms, 3),
+            }
+            return result
+
+        self._record("unrepaired", (time.perf_counter() - start) * 1000)
+        raise original
+
+    def _record(self, outcome: str, added_ms: float = 0.0):
+        with self._lock:
+            self._counts[outcome] += 1
+            self._added_ms += added_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counts since start-up, the share of failing SQL the model repaired
+        (repair_rate; cache hits not included) and the latency those repair
+        attempts added, in total and on average.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+            added_ms = self._added_ms
+        attempted = counts["repaired"] + counts["unrepaired"]
+        return {
+            **counts,
+            "cached_fixes": len(self._fixes),
+            "repair_rate": round(counts["repaired"] / attempted, 4) if attempted else None,
+            "added_ms_total": round(added_ms, 3),
+            "added_ms_avg": round(added_ms / attempted, 3) if attempted else None,
+        }
@@ -0,0 +1,116 @@
+import json
+from typing import Any, Dict, Optional
+
+
+class IncrementalJSONParser:
+    """
+    Incrementally parses a streamed JSON object and surfaces its top-level
+    fields as soon as each value is complete.
+
+    Used by the Router and Planner to act on early fields (e.g. `route`,
+    `intent_id`) before the LLM has finished generating the full response.
+    Leading text such as markdown fences is skipped until the first '{'.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._mode = "key"
+        self._key: Optional[str] = None
+        self._token_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        """All text fed so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """
+        Consumes a chunk of streamed text.
+        Returns:
+            The top-level fields completed by this chunk, in stream order.
+        """
+        self._text += chunk
+        completed: Dict[str, Any] = {}
+        text = self._text
+
+        while self._pos < len(text) and not self.done:
+            i = self._pos
+            c = text[i]
+            self._pos += 1
+
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+                    if self._depth == 1 and self._token_start is not None:
+                        self._finish_token(i + 1, completed)
+                continue
+
+            if c == '"':
+                self._in_str = True
+                if self._depth == 1 and self._token_start is None:
+                    self._token_start = i
+            elif c in "{[":
+                if self._depth == 1 and self._token_start is None:
+                    self._token_start = i
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 1:
+                    # Closing the top-level object
+                    self._finish_scalar(i, completed)
+                    self._depth = 0
+                    self.done = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 1 and self._token_start is not None:
+                        self._finish_token(i + 1, completed)
+            elif self._depth == 1:
+                if c == ":":
+                    self._mode = "value"
+                elif c == ",":
+                    self._finish_scalar(i, completed)
+                    self._mode = "key"
+                elif c.isspace():
+                    self._finish_scalar(i, completed)
+                elif self._token_start is None and self._mode == "value":
+                    # Start of a number / true / false / null literal
+                    self._token_start = i
+
+        return completed
+
+    def _finish_scalar(self, end: int, completed: Dict[str, Any]) -> None:
+        if self._token_start is not None and self._mode == "value":
+            self._finish_token(end, completed)
+
+    def _finish_token(self, end: int, completed: Dict[str, Any]) -> None:
+        raw = self._text[self._token_start:end]
+        self._token_start = None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+
+        if self._mode == "key":
+            self._key = value
+            return
+
+        if self._key is not None:
+            self.fields[self._key] = value
+            completed[self._key] = value
+        self._key = None
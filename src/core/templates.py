@@ -0,0 +1,146 @@
+import math
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+# Values bound per call; everything else in a template changes the query's shape
+BIND_PARAMS = ("start_date", "end_date", "tenant_id", "row_limit", "category_filter")
+LIST_PARAMS = ("category_filter",)
+
+TIME_GRAINS = {"day", "week", "month", "quarter", "year"}
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+MAX_ROW_LIMIT = 10_000
+
+_IF_BLOCK = re.compile(r"\{%\s*if\s+(\w+)\s*%\}(.*?)\{%\s*endif\s*%\}", re.S)
+_VARIABLE = re.compile(r"'?\{\{\s*(\w+)\s*\}\}'?")
+
+
+def render_template(
+    text: str,
+    structure: Optional[Dict[str, Any]] = None,
+    bound: Sequence[str] = ()
+) -> str:
+    """
+    Renders a sql/templates/*.sql file into parameterized SQL.
+
+    Structural variables (time_grain, dimension_*, join_key, dataset, flags)
+    are substituted; bind parameters (BIND_PARAMS) become `$name` placeholders,
+    so one rendered statement serves every date range, tenant and limit.
+    Supports `{{var}}` and non-nested `{% if var %}...{% endif %}`. Without a
+    `dataset`, `{{dataset}}.` prefixes are dropped (unqualified local tables).
+
+    Args:
+        bound: Bind parameters that will be supplied; `{% if %}` blocks on
+            optional ones (e.g. category_filter) are kept only when listed.
+
+    Raises:
+        ValueError: A structural value is not a plain identifier / known grain.
+    """
+    structure = dict(structure or {})
+
+    def _if(m: re.Match) -> str:
+        name = m.group(1)
+        return m.group(2) if structure.get(name) or name in bound else ""
+
+    text = _IF_BLOCK.sub(_if, text)
+    if not structure.get("dataset"):
+        text = re.sub(r"\{\{\s*dataset\s*\}\}\.", "", text)
+
+    def _var(m: re.Match) -> str:
+        name = m.group(1)
+        if name in LIST_PARAMS:
+            return f"SELECT UNNEST(${name})"
+        if name in BIND_PARAMS:
+            return f"${name}"
+        value = structure.get(name)
+        if name == "time_grain":
+            if value not in TIME_GRAINS:
+                raise ValueError(f"Policy Violation: Unsupported time grain '{value}'.")
+            return f"'{value}'"
+        if not isinstance(value, str) or not IDENTIFIER.fullmatch(value):
+            raise ValueError(f"Security Violation: Template value for '{name}' must be an identifier.")
+        return value
+
+    text = _VARIABLE.sub(_var, text)
+    lines = [line.rstrip() for line in text.splitlines() if line.strip() and not line.strip().startswith("--")]
+    return "\n".join(lines).rstrip(";")
+
+
+def bind_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Coerces bind parameters to their SQL types (dates, bounded int limit,
+    list of strings), so they never need re-checking as SQL text.
+
+    Raises:
+        ValueError: Unknown parameter or a value of the wrong shape.
+    """
+    bound: Dict[str, Any] = {}
+    for name, value in values.items():
+        if name not in BIND_PARAMS:
+            raise ValueError(f"Policy Violation: Unknown template parameter '{name}'.")
+        if name in ("start_date", "end_date"):
+            if isinstance(value, datetime):
+                value = value.date()
+            bound[name] = value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+        elif name == "row_limit":
+            limit = int(value)
+            if not 0 < limit <= MAX_ROW_LIMIT:
+                raise ValueError(f"Policy Violation: row_limit must be between 1 and {MAX_ROW_LIMIT}.")
+            bound[name] = limit
+        elif name in LIST_PARAMS:
+            bound[name] = [str(v) for v in value]
+        else:
+            bound[name] = str(value)
+    return bound
+
+
+def sql_literal(value: Any) -> str:
+    """Renders a typed Python value as a DuckDB literal."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"Policy Violation: Non-finite parameter value {value}.")
+        return repr(value)
+    if isinstance(value, datetime):
+        return f"TIMESTAMP '{value.isoformat(sep=' ')}'"
+    if isinstance(value, date):
+        return f"DATE '{value.isoformat()}'"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(sql_literal(v) for v in value) + "]"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def inline_values(sql: str, values: Dict[str, Any]) -> str:
+    """Replaces `$name` placeholders with literals (for EXPLAIN / dry runs)."""
+    return re.sub(r"\$(\w+)", lambda m: sql_literal(values[m.group(1)]), sql)
+
+
+def template_parameters(sql: str) -> List[str]:
+    """Names of the `$name` placeholders in rendered SQL, in order of first use."""
+    return list(dict.fromkeys(re.findall(r"\$(\w+)", sql)))
+
+
+class TemplateStore:
+    """Loads and renders templates, caching each (template, structure) rendering."""
+    def __init__(self, templates_dir: str = "sql/templates"):
+        self.templates_dir = Path(templates_dir)
+        self._rendered: Dict[Any, str] = {}
+
+    def variables(self, template: str) -> Set[str]:
+        """Names a template uses, as `{{var}}` or `{% if var %}`."""
+        text = (self.templates_dir / template).read_text(encoding="utf-8")
+        return {m.group(1) for m in _VARIABLE.finditer(text)} | {m.group(1) for m in _IF_BLOCK.finditer(text)}
+
+    def render(self, template: str, structure: Optional[Dict[str, Any]] = None, bound: Sequence[str] = ()) -> str:
+        key = (template, tuple(sorted((structure or {}).items())), tuple(sorted(bound)))
+        sql = self._rendered.get(key)
+        if sql is None:
+            text = (self.templates_dir / template).read_text(encoding="utf-8")
+            sql = self._rendered[key] = render_template(text, structure, bound)
+        return sql
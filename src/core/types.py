@@ -1,5 +1,12 @@
-from typing import List, Optional, Dict, Any, Literal
-from pydantic import BaseModel, Field
+import json
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Literal, Type
+from pydantic import BaseModel, ConfigDict, Field
+
+try:
+    import orjson
+except ImportError:  # optional; json is used without it
+    orjson = None
 
 class Intent(BaseModel):
     id: str
@@ -7,28 +14,165 @@ class Intent(BaseModel):
     measures: List[str]
     dimensions: List[str]
 
+class Measure(BaseModel):
+    # Keys the prompts do not define are kept, not rejected
+    model_config = ConfigDict(extra="allow")
+    name: str
+    table: Optional[str] = None
+    column: Optional[str] = None
+    unit: Optional[str] = None
+    aggregation: Optional[str] = None
+    formula: Optional[str] = None
+
+class Dimension(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    name: Optional[str] = None
+    table: Optional[str] = None
+    column: Optional[str] = None
+    type: Optional[str] = None
+
+class Filter(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    field: str
+    table: Optional[str] = None
+    operator: Optional[str] = None
+    value: Any = None
+    source: Optional[str] = None
+
 class Plan(BaseModel):
     intent_id: str
     tables: List[str]
-    measures: List[Dict[str, Any]]
-    dimensions: List[Dict[str, Any]]
-    filters: List[Dict[str, Any]]
+    measures: List[Measure]
+    dimensions: List[Dimension]
+    filters: List[Filter]
+    time_window: Optional[Dict[str, Any]] = None
     limits: Dict[str, int]
     viz_hint: Optional[Dict[str, Any]] = None
     needs_disambiguation: bool = False
     clarification_question: Optional[str] = None
     reasoning: Optional[str] = None
 
+class PlanDelta(BaseModel):
+    """Refinement of the previous turn's Plan detected in a follow-up question."""
+    add_dimensions: List[Dimension] = Field(default_factory=list)
+    add_filters: List[Filter] = Field(default_factory=list)
+    time_window: Optional[Dict[str, Any]] = None
+    time_grain: Optional[str] = None
+
 class RouterOutput(BaseModel):
     route: Literal["qa", "sql", "unsafe", "handoff", "clarify"]
     reason: str
     clarify_question: Optional[str] = None
+    # 0..1; a tiered router escalates below LLM_MIN_CONFIDENCE (src/core/llm_tiers.py)
+    confidence: Optional[float] = None
+
+class Trace:
+    """
+    Debug record of one ask. Built once per request from values the pipeline
+    already validated and dumped straight into the trace event, so it is a
+    plain __slots__ class rather than a model.
+    """
+    __slots__ = (
+        "user_query", "route", "plan", "sql", "latency_ms", "time_to_first_decision_ms", "cost_estimate_usd",
+        "followup", "early_commit", "profile", "repair", "error",
+    )
+
+    def __init__(
+        self,
+        user_query: str,
+        route: str,
+        latency_ms: float,
+        cost_estimate_usd: float,
+        plan: Optional[Plan] = None,
+        sql: Optional[str] = None,
+        time_to_first_decision_ms: Optional[float] = None,
+        followup: bool = False,
+        early_commit: bool = False,
+        profile: Optional[Dict[str, Any]] = None,
+        repair: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ):
+        """
+        Args:
+            early_commit: The router committed on `route` alone (sql / qa), so
+                its reason was never read and the route event's reason is empty.
+            profile: {"request_id", "stages_ms"} when the request was profiled (src/core/profiler.py).
+            repair: {"original_sql", "sql", "error", "attempts", "cached", "added_ms"} when the SQL was repaired.
+        """
+        self.user_query = user_query
+        self.route = route
+        self.plan = plan
+        self.sql = sql
+        self.latency_ms = latency_ms
+        self.time_to_first_decision_ms = time_to_first_decision_ms
+        self.cost_estimate_usd = cost_estimate_usd
+        self.followup = followup
+        self.early_commit = early_commit
+        self.profile = profile
+        self.repair = repair
+        self.error = error
+
+    def model_dump(self) -> Dict[str, Any]:
+        out = {name: getattr(self, name) for name in self.__slots__}
+        out["plan"] = self.plan.model_dump() if self.plan is not None else None
+        return out
+
+class IngestReport(BaseModel):
+    table: str
+    mode: Literal["append", "merge"]
+    rows_ingested: int
+    rows_replaced: int
+    partitions: int
+    bytes_ingested: int
+    elapsed_ms: float
+    data_version: int
+
+class CostEstimate(BaseModel):
+    bytes_scanned: int
+    estimated_rows: int
+    tables: Dict[str, List[str]] = Field(default_factory=dict)
+    max_join_fanout: float = 1.0
+    cost_score: float = 0.0
+    cost_usd: float = 0.0
+    decision: Literal["allow", "warn", "block"] = "allow"
+    warnings: List[str] = Field(default_factory=list)
+
+class ColumnSchema(BaseModel):
+    name: str
+    type: str
+    distinct_count: Optional[int] = None
+    # Range of date and numeric columns, as text
+    min: Optional[str] = None
+    max: Optional[str] = None
+    # Every value of a low-cardinality text column (shared tables only)
+    values: List[str] = Field(default_factory=list)
+
+class TableSchema(BaseModel):
+    name: str
+    row_count: int
+    columns: List[ColumnSchema]
+    # Parquet file the stats were read from, when they did not need a scan
+    source: Optional[str] = None
+    data_version: int = 0
+
+
+@lru_cache(maxsize=None)
+def json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    The model's JSON schema, generated once per model (pydantic rebuilds it on
+    every model_json_schema() call). Shared: do not mutate it.
+    """
+    return model.model_json_schema()
+
 
-class Trace(BaseModel):
-    user_query: str
-    route: str
-    plan: Optional[Plan] = None
-    sql: Optional[str] = None
-    latency_ms: float
-    cost_estimate_usd: float
-    error: Optional[str] = None
+def dump_json(value: Any) -> str:
+    """
+    Compact JSON of plain values (model_dump() output, event dicts). Uses
+    orjson when installed; anything JSON cannot encode, datetimes included,
+    is str()'d either way.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            value, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        ).decode()
+    return json.dumps(value, default=str, separators=(",", ":"), ensure_ascii=False)
@@ -1,58 +1,143 @@
-import re
-from typing import List, Optional
+from typing import Optional
+from src.core.policy_engine import PolicyEngine, PolicyProgram
+from src.core.types import CostEstimate
+from src.interfaces.db import DatabaseClient
+
+# (CostEstimate field, cost_controls key suffix, label): each is gated by
+# optional alert_on_<suffix> / block_on_<suffix> thresholds
+COST_LIMITS = (
+    ("bytes_scanned", "bytes", "scan in bytes"),
+    ("estimated_rows", "rows", "intermediate rows"),
+    ("max_join_fanout", "join_fanout", "join fan-out"),
+    ("cost_score", "cost_score", "cost score"),
+)
+
 
 class Validator:
-    def __init__(self, policy_config: Optional[dict] = None):
-        self.policy = policy_config or {}
-        self.allowed_tables = {"fct_sales", "dim_product", "dim_store"}
+    def __init__(
+        self,
+        policy_config: Optional[dict] = None,
+        db: Optional[DatabaseClient] = None,
+        policy_engine: Optional[PolicyEngine] = None
+    ):
+        """
+        Args:
+            policy_config: sql_policies.yaml contents, compiled once.
+            policy_engine: Compiled sql + access policies, hot-swapped when the
+                files change; takes precedence over policy_config.
+        """
+        self.db = db
+        self.policy_engine = policy_engine
+        self._program = None if policy_engine else PolicyProgram(policy_config)
+
+    @property
+    def program(self) -> PolicyProgram:
+        return self.policy_engine.program if self.policy_engine else self._program
 
-    def validate(self, sql: str, tenant_id: Optional[str] = None) -> bool:
+    def validate(
+        self,
+        sql: str,
+        tenant_id: Optional[str] = None,
+        tenant_scoped: bool = False,
+        role: Optional[str] = None
+    ) -> bool:
         """
-        Validates SQL against safety rules.
+        Validates SQL against safety rules and the compiled policy.
         Returns True if safe, raises ValueError if unsafe.
+
+        Args:
+            tenant_scoped: The query will run on tenant-scoped relations
+                (DatabaseClient.enforces_tenant_scope), so the tenant_id predicate
+                check is skipped; instead tables must be referenced unqualified,
+                so they resolve to the scoped relations.
+            role: Caller's role; its max_rows_per_query caps LIMIT.
         """
-        sql_upper = sql.upper()
+        program = self.program
 
-        # 1. Block DDL/DML
-        forbidden_keywords = ["DROP", "DELETE", "UPDATE", "INSERT", "ALTER", "TRUNCATE", "GRANT", "REVOKE"]
-        for kw in forbidden_keywords:
-            if kw in sql_upper:
-                raise ValueError(f"Security Violation: Forbidden keyword '{kw}' detected.")
+        # 1. Block DDL/DML, text rules
+        program.check_text(sql)
 
         # 2. Enforce SELECT only
-        if not sql_upper.strip().startswith("SELECT") and not sql_upper.strip().startswith("WITH"):
+        sql_upper = sql.upper().strip()
+        if not sql_upper.startswith("SELECT") and not sql_upper.startswith("WITH"):
              raise ValueError("Security Violation: Query must start with SELECT or WITH.")
 
-        # 3. Enforce LIMIT (Simple check)
-        if "LIMIT" not in sql_upper:
-             raise ValueError("Policy Violation: Query must contain a LIMIT clause.")
-
-        # 4. Enforce table allowlist
         from sqlglot import parse_one, exp
-        
+
         try:
             parsed = parse_one(sql)
-            tables = {str(t.name).lower() for t in parsed.find_all(exp.Table)}
-            unauthorized = tables - {t.lower() for t in self.allowed_tables}
-            if unauthorized:
-                raise ValueError(f"Security Violation: Unauthorized tables: {unauthorized}")
-                
-            # 5. Enforce Tenant Isolation
-            # Check if any WHERE clause contains tenant_id equality check
-            if tenant_id:
-                has_tenant_filter = False
-                for where in parsed.find_all(exp.Where):
-                    # Naive string check on the where clause expression for PoC
-                    if f"tenant_id = '{tenant_id}'" in where.sql().lower():
-                        has_tenant_filter = True
-                        break
-                        
-                if not has_tenant_filter:
-                     # Fallback to regex if AST check is too complex for this snippet
-                     if f"tenant_id = '{tenant_id}'" not in sql.lower():
-                        raise ValueError("Security Violation: Missing tenant_id filter")
-
         except Exception as e:
             raise ValueError(f"SQL parsing error: {e}")
-        
+
+        # 3-4. LIMIT, table allowlist, functions, columns, complexity (one AST pass)
+        program.check_tree(parsed, max_rows=program.max_rows(tenant_id, role))
+
+        # 5. Enforce Tenant Isolation
+        if tenant_scoped:
+            qualified = sorted(t.sql() for t in parsed.find_all(exp.Table) if t.args.get("db") or t.args.get("catalog"))
+            if qualified:
+                raise ValueError(f"Security Violation: Qualified table names bypass tenant scope: {qualified}")
+        # Check if any WHERE clause contains tenant_id equality check
+        elif tenant_id:
+            has_tenant_filter = False
+            for where in parsed.find_all(exp.Where):
+                # Naive string check on the where clause expression for PoC
+                if f"tenant_id = '{tenant_id}'" in where.sql().lower():
+                    has_tenant_filter = True
+                    break
+
+            if not has_tenant_filter:
+                 # Fallback to regex if AST check is too complex for this snippet
+                 if f"tenant_id = '{tenant_id}'" not in sql.lower():
+                    raise ValueError("Security Violation: Missing tenant_id filter")
+
         return True
+
+    def check_intent(self, intent_id: str, tenant_id: Optional[str] = None, role: Optional[str] = None):
+        """Raises ValueError if the role's allowed_intents (catalog/policies.yaml) exclude the intent."""
+        self.program.check_intent(intent_id, tenant_id, role)
+
+    def check_row_limit(self, rows: Optional[int], tenant_id: Optional[str] = None, role: Optional[str] = None):
+        """Caps a bound row limit (template $row_limit) at the role's max_rows_per_query."""
+        max_rows = self.program.max_rows(tenant_id, role)
+        if rows is not None and max_rows is not None and int(rows) > max_rows:
+            raise ValueError(f"Policy Violation: LIMIT {rows} exceeds maximum of {max_rows} rows.")
+
+    def dry_run(self, sql: str, tenant_id: Optional[str] = None) -> int:
+        """
+        Returns the estimated bytes scanned by the query, without executing it.
+        """
+        if self.db is None:
+            raise ValueError("Policy Violation: Dry run requested but no database is configured.")
+        return self.db.estimate_cost(sql, tenant_id=tenant_id).bytes_scanned
+
+    def check_cost(self, sql: str, tenant_id: Optional[str] = None) -> Optional[CostEstimate]:
+        """
+        Enforces `cost_controls` from sql_policies.yaml before execution:
+        bytes scanned, peak rows, join fan-out and cost score against their
+        alert / block thresholds. Returns the estimate (with decision "allow" or "warn"), or None if no
+        dry run is configured and none is required. Raises ValueError if blocked.
+        """
+        controls = self.program.cost_controls
+        if self.db is None:
+            if controls.get("dry_run_required"):
+                raise ValueError("Policy Violation: Dry run required but no database is configured.")
+            return None
+
+        estimate = self.db.estimate_cost(sql, tenant_id=tenant_id)
+        for field, suffix, unit in COST_LIMITS:
+            value = getattr(estimate, field)
+            block_on = controls.get(f"block_on_{suffix}")
+            if block_on is None and suffix == "bytes":
+                block_on = controls.get("max_bytes_billed")
+            alert_on = controls.get(f"alert_on_{suffix}")
+
+            if block_on is not None and value > block_on:
+                estimate.decision = "block"
+                raise ValueError(
+                    f"Policy Violation: Estimated {unit} of {value} exceeds limit of {block_on}."
+                )
+            if alert_on is not None and value > alert_on:
+                estimate.decision = "warn"
+                estimate.warnings.append(f"Estimated {unit} of {value} exceeds alert threshold of {alert_on}.")
+        return estimate
@@ -0,0 +1,362 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+from src.core.context import SecurityContext
+from src.core.followup import DIMENSIONS, template_request
+from src.core.plan_cache import QueryCanonicalizer, apply_time_window, resolve_relative_window
+from src.core.types import Plan, dump_json
+
+if TYPE_CHECKING:
+    from src.core.pipeline import CopilotPipeline
+
+logger = logging.getLogger(__name__)
+
+# Windows analysts ask about most; resolved against today like "last month" in a question
+DEFAULT_WINDOWS = ("@this_month", "@last_month", "@last_quarter", "@this_year")
+DEFAULT_GRAIN = "month"
+WARMUP_USER = "warmup"
+# Most recent trace records one warm-up plan reads
+TRACE_RECORDS = 10_000
+TAIL_BLOCK = 64 * 1024
+
+
+class TraceLog:
+    """
+    Append-only JSONL of answered questions ({ts, tenant_id, role,
+    user_query, plan}), the warm-up's record of what people actually ask.
+    Past max_bytes the file is rotated to "<path>.1" (the previous one is
+    dropped), so at most two files' worth is kept.
+    """
+    def __init__(self, path: str, max_bytes: int = 16 * 2**20):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def append(self, user_query: str, user_ctx: SecurityContext, plan: Plan):
+        line = dump_json({
+            "ts": time.time(),
+            "tenant_id": user_ctx.tenant_id,
+            "role": user_ctx.role,
+            "user_query": user_query,
+            "plan": plan.model_dump(),
+        })
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                size = f.tell()
+            if size > self.max_bytes:
+                os.replace(self.path, f"{self.path}.1")
+
+    def read(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        The last `limit` records of the current file (all when None), read
+        from the end; unreadable lines are skipped.
+        """
+        if not self.path.is_file():
+            return []
+        records = []
+        for line in self._tail(limit):
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+    def _tail(self, limit: Optional[int]) -> List[str]:
+        with open(self.path, "rb") as f:
+            if not limit:
+                return f.read().decode("utf-8", errors="replace").splitlines()
+            end = f.seek(0, os.SEEK_END)
+            data = b""
+            # One extra line: the first block usually starts mid-line
+            while end > 0 and data.count(b"\n") <= limit:
+                start = max(0, end - TAIL_BLOCK)
+                f.seek(start)
+                data = f.read(end - start) + data
+                end = start
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        if end > 0:
+            lines = lines[1:]
+        return lines[-limit:]
+
+
+class WarmupItem:
+    """One template query to precompute for a tenant."""
+    def __init__(
+        self,
+        tenant_id: str,
+        role: str,
+        intent_id: str,
+        structure: Dict[str, Any],
+        values: Dict[str, Any],
+        hits: int = 0,
+        question: Optional[Tuple[str, Plan]] = None
+    ):
+        """
+        Args:
+            hits: How often it was asked (0 for catalog defaults).
+            question: (user_query, plan) of the most recent ask, for the plan cache.
+        """
+        self.tenant_id = tenant_id
+        self.role = role
+        self.intent_id = intent_id
+        self.structure = structure
+        self.values = values
+        self.hits = hits
+        self.question = question
+
+    @property
+    def key(self) -> str:
+        return json.dumps([self.tenant_id, self.intent_id, self.structure, self.values], sort_keys=True, default=str)
+
+
+class WarmupScheduler:
+    """
+    Precomputes the answers each tenant is most likely to ask for first: the
+    most frequent (intent, breakdown, time window) combinations in the trace
+    log, then the catalog's defaults (each templated intent by each of its
+    dimensions over DEFAULT_WINDOWS). For every item the intent's template is
+    rendered, validated and executed through the pipeline, which fills the
+    result cache and prepared statements and warms DuckDB's buffers; logged
+    questions also go back into the plan cache (no LLM call).
+
+    Runs after every data refresh (data_version change) and stops when its
+    wall-clock or CPU budget is spent; readiness() reports how far it got.
+    """
+    def __init__(
+        self,
+        pipeline: "CopilotPipeline",
+        tenants: Iterable[str] = (),
+        trace_log: Optional[TraceLog] = None,
+        top_n: int = 20,
+        time_budget_s: float = 30.0,
+        cpu_budget_s: Optional[float] = None,
+        role: str = "analyst"
+    ):
+        """
+        Args:
+            tenants: Tenants to warm; when empty, those in the trace log, else
+                every tenant_id in fct_sales.
+            top_n: Logged combinations warmed per tenant.
+            cpu_budget_s: Process CPU seconds one run may use (includes
+                DuckDB's threads and concurrent requests); None for no limit.
+            role: Role the catalog defaults run as (row limits, allowed intents).
+        """
+        self.pipeline = pipeline
+        self.tenants = list(tenants)
+        self.trace_log = trace_log
+        self.top_n = top_n
+        self.time_budget_s = time_budget_s
+        self.cpu_budget_s = cpu_budget_s
+        self.role = role
+        plan_cache = getattr(pipeline.planner, "plan_cache", None)
+        self.canonicalizer = plan_cache.canonicalizer if plan_cache is not None else QueryCanonicalizer()
+        self.last_report: Optional[Dict[str, Any]] = None
+        # Data version of the last run, finished or not (run_if_stale does not retry a
+        # partial run); ready only when that run got through its whole plan
+        self._warmed_version: Optional[int] = None
+        self._complete = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- What to warm ------------------------------------------------------
+
+    def _resolve(self, user_query: str, plan: Plan, today: date) -> Plan:
+        """Re-anchors relative windows ("last month") to today, as a new ask would."""
+        _, token = self.canonicalizer.canonicalize(user_query)
+        window = resolve_relative_window(token, today) if token else None
+        return apply_time_window(plan, *window) if window else plan
+
+    def _request(self, plan: Plan) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        template = self.pipeline.catalog.template_path(plan.intent_id) if self.pipeline.catalog else None
+        if template is None:
+            return None
+        return template_request(plan, self.pipeline.templates.variables(template.name))
+
+    def from_traces(self, today: date) -> Dict[str, List[WarmupItem]]:
+        """Top logged combinations per tenant, most frequent first."""
+        counts: Dict[str, Counter] = {}
+        items: Dict[str, WarmupItem] = {}
+        for record in self.trace_log.read(limit=TRACE_RECORDS) if self.trace_log else []:
+            try:
+                plan = self._resolve(record["user_query"], Plan(**record["plan"]), today)
+            except (KeyError, TypeError, ValueError):
+                continue
+            request = self._request(plan)
+            if request is None:
+                continue
+            item = WarmupItem(
+                record["tenant_id"], record.get("role") or self.role, plan.intent_id, *request,
+                question=(record["user_query"], Plan(**record["plan"])),
+            )
+            counts.setdefault(item.tenant_id, Counter())[item.key] += 1
+            # Later records win, so the question kept is the latest phrasing
+            items[item.key] = item
+
+        top: Dict[str, List[WarmupItem]] = {}
+        for tenant, counter in counts.items():
+            for key, hits in counter.most_common(self.top_n):
+                items[key].hits = hits
+                top.setdefault(tenant, []).append(items[key])
+        return top
+
+    def defaults(self, today: date) -> List[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """(intent_id, structure, values) for each templated catalog intent x dimension x window."""
+        catalog = self.pipeline.catalog
+        out = []
+        for intent_id, intent in (catalog.intents.items() if catalog else []):
+            dimensions = [None] + [
+                d for d in intent.get("granularity", []) + intent.get("optional_dimensions", []) if d in DIMENSIONS
+            ]
+            for token in DEFAULT_WINDOWS if intent.get("time_window", True) else ():
+                start, end = resolve_relative_window(token, today)
+                for dimension in dict.fromkeys(dimensions):
+                    breakdown = []
+                    if dimension:
+                        table, column, _, _ = DIMENSIONS[dimension]
+                        breakdown = [{"name": dimension, "table": table, "column": column}]
+                    plan = Plan(
+                        intent_id=intent_id, tables=[], measures=[], dimensions=breakdown, filters=[],
+                        time_window={"grain": DEFAULT_GRAIN, "start": start.isoformat(), "end": end.isoformat()},
+                        limits={"rows": 1000},
+                    )
+                    request = self._request(plan)
+                    if request is not None:
+                        out.append((intent_id, *request))
+        return out
+
+    def _tenants(self, logged: Iterable[str]) -> List[str]:
+        if self.tenants:
+            return self.tenants
+        tenants = list(dict.fromkeys(logged))
+        if not tenants:
+            self.pipeline.wait_for_data()
+            df = self.pipeline.db.execute_query("SELECT DISTINCT tenant_id FROM fct_sales ORDER BY 1 LIMIT 1000")
+            tenants = [str(t) for t in df["tenant_id"]]
+        return tenants
+
+    def plan(self, today: Optional[date] = None) -> List[WarmupItem]:
+        """
+        The items of one run, in order: each tenant's logged favourites
+        (round-robin across tenants, so one busy tenant cannot use the whole
+        budget), then the catalog defaults for every tenant.
+        """
+        today = today or date.today()
+        logged = self.from_traces(today)
+        tenants = self._tenants(logged)
+
+        ordered: List[WarmupItem] = []
+        queues = [logged.get(t, []) for t in tenants]
+        for rank in range(max((len(q) for q in queues), default=0)):
+            ordered += [q[rank] for q in queues if rank < len(q)]
+        for intent_id, structure, values in self.defaults(today):
+            ordered += [WarmupItem(t, self.role, intent_id, structure, values) for t in tenants]
+
+        seen, unique = set(), []
+        for item in ordered:
+            if item.key not in seen:
+                seen.add(item.key)
+                unique.append(item)
+        return unique
+
+    # -- Running -----------------------------------------------------------
+
+    def run(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        One warm-up pass within the budgets.
+
+        Returns:
+            {"data_version", "planned", "warmed", "cached", "failed",
+             "plans_cached", "elapsed_s", "cpu_s", "budget_exhausted"}
+        """
+        with self._lock:
+            self.pipeline.wait_for_data()
+            version = getattr(self.pipeline.db, "data_version", 0)
+            start, cpu_start = time.perf_counter(), time.process_time()
+            items = self.plan(today)
+            plan_cache = getattr(self.pipeline.planner, "plan_cache", None)
+            report = {
+                "data_version": version, "planned": len(items), "warmed": 0, "cached": 0, "failed": 0,
+                "plans_cached": 0, "budget_exhausted": False,
+            }
+            self.last_report = report
+
+            stopped = False
+            for item in items:
+                if self._stop.is_set():
+                    stopped = True
+                    break
+                if time.perf_counter() - start > self.time_budget_s or (
+                    self.cpu_budget_s is not None and time.process_time() - cpu_start > self.cpu_budget_s
+                ):
+                    report["budget_exhausted"] = True
+                    break
+                ctx = SecurityContext(tenant_id=item.tenant_id, user_id=WARMUP_USER, role=item.role)
+                try:
+                    result = self.pipeline.execute_template(item.intent_id, item.structure, item.values, ctx)
+                except Exception as e:
+                    report["failed"] += 1
+                    logger.debug("Warm-up of %s for %s failed: %s", item.intent_id, item.tenant_id, e)
+                    continue
+                report["warmed"] += 1
+                report["cached"] += bool(result["cached"])
+                if plan_cache is not None and item.question is not None:
+                    plan_cache.put(item.question[0], ctx, item.question[1])
+                    report["plans_cached"] += 1
+
+            report["elapsed_s"] = round(time.perf_counter() - start, 3)
+            report["cpu_s"] = round(time.process_time() - cpu_start, 3)
+            self._warmed_version = version
+            self._complete = not (stopped or report["budget_exhausted"])
+            logger.info("Warm-up: %s", report)
+            return report
+
+    def run_if_stale(self) -> Optional[Dict[str, Any]]:
+        """Runs when the data changed since the last run (or never ran)."""
+        if self._warmed_version == getattr(self.pipeline.db, "data_version", 0):
+            return None
+        return self.run()
+
+    def start(self, poll_s: float = 60.0):
+        """Warms now (in the background) and again after every data refresh."""
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.run_if_stale()
+                except Exception:
+                    logger.exception("Warm-up failed")
+                self._stop.wait(poll_s)
+
+        self._thread = threading.Thread(target=loop, name="cache-warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        {"ready", "complete", "data_version", "warmed_version", "planned",
+        "warmed", "progress"}: ready once a run on the current data got
+        through its whole plan; complete is false after a run that ran out
+        of budget (or was stopped).
+        """
+        report = self.last_report or {}
+        version = getattr(self.pipeline.db, "data_version", 0)
+        planned, warmed = report.get("planned", 0), report.get("warmed", 0)
+        return {
+            "ready": self._complete and self._warmed_version == version,
+            "complete": self._complete,
+            "data_version": version,
+            "warmed_version": self._warmed_version,
+            "planned": planned,
+            "warmed": warmed,
+            "progress": round(warmed / planned, 3) if planned else None,
+        }
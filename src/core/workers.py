@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple, Union, TYPE_CHECKING
+from src.core.fingerprint import fingerprint_sql
+from src.core.policy_engine import PolicyEngine
+from src.core.result_shaping import shape_result
+from src.core.validator import Validator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Imported once in the fork server, so every worker starts with them loaded
+PRELOAD_MODULES = [
+    "sqlglot", "pandas", "pyarrow", "src.core.policy_engine", "src.core.validator", "src.core.result_shaping"
+]
+
+# Below this size pickling the DataFrame is cheaper than an Arrow round trip
+# (see scripts/bench_workers.py)
+IPC_MIN_ROWS = 10_000
+
+# Per-process state, set by _init_worker
+_validator: Optional[Validator] = None
+
+
+def to_ipc(df: "pd.DataFrame") -> bytes:
+    """Serializes a DataFrame as an Arrow IPC stream (much cheaper than pickle for wide results)."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def from_ipc(payload: bytes) -> "pd.DataFrame":
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+def _init_worker(policy_config: Optional[dict], policy_paths: Optional[Tuple[str, Optional[str]]]):
+    global _validator
+    from sqlglot import parse_one
+    # Each worker watches the policy files itself, so hot-swaps reach the pool too
+    _validator = Validator(policy_config, policy_engine=PolicyEngine(*policy_paths) if policy_paths else None)
+    # Warm sqlglot's tokenizer/dialect tables so the first real request is not slower
+    parse_one("SELECT 1 FROM fct_sales WHERE tenant_id = 't' LIMIT 1", read="duckdb")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _validate(sql: str, tenant_id: Optional[str], tenant_scoped: bool, role: Optional[str]) -> bool:
+    return _validator.validate(sql, tenant_id=tenant_id, tenant_scoped=tenant_scoped, role=role)
+
+
+def _shape(payload: Union[bytes, "pd.DataFrame"], options: Dict[str, Any]) -> Dict[str, Any]:
+    df = from_ipc(payload) if isinstance(payload, bytes) else payload
+    return shape_result(df, **options)
+
+
+class CPUWorkerPool:
+    """
+    Process pool for CPU-bound request steps (sqlglot validation, SQL
+    fingerprinting, result shaping), so they run in parallel across cores
+    instead of queueing on the GIL.
+
+    Workers are started up front from a fork server that has already imported
+    sqlglot/pandas/pyarrow, and each holds its own Validator for the policy.
+    Large DataFrames cross the process boundary as Arrow IPC bytes.
+    """
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        policy_config: Optional[dict] = None,
+        policy_paths: Optional[Tuple[str, Optional[str]]] = None
+    ):
+        """
+        Args:
+            policy_paths: (sql_policies.yaml, policies.yaml) for a PolicyEngine
+                per worker; takes precedence over policy_config.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        methods = multiprocessing.get_all_start_methods()
+        # Never fork a process that already runs DuckDB / thread pools
+        if "forkserver" in methods:
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload(PRELOAD_MODULES)
+        else:
+            ctx = multiprocessing.get_context("spawn")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(policy_config, policy_paths)
+        )
+        self._prestart()
+
+    def _prestart(self):
+        # ProcessPoolExecutor starts one worker per submit while none is idle;
+        # fill the pool now so the first requests don't pay process start-up
+        for f in [self._executor.submit(_ping) for _ in range(self.max_workers)]:
+            f.result()
+
+    def validate(
+        self,
+        sql: str,
+        tenant_id: Optional[str] = None,
+        tenant_scoped: bool = False,
+        role: Optional[str] = None
+    ) -> bool:
+        """Validator.validate in a worker; raises the same ValueError."""
+        return self._executor.submit(_validate, sql, tenant_id, tenant_scoped, role).result()
+
+    def fingerprint(self, sql: str) -> Tuple[str, str]:
+        return self._executor.submit(fingerprint_sql, sql).result()
+
+    def shape_result(self, df: "pd.DataFrame", **options) -> Dict[str, Any]:
+        """result_shaping.shape_result in a worker (same options)."""
+        payload = to_ipc(df) if len(df) >= IPC_MIN_ROWS else df
+        return self._executor.submit(_shape, payload, options).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
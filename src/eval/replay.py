@@ -0,0 +1,108 @@
+import itertools
+import math
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Relative request rate per hour of day (business-hours peak, overnight trough);
+# normalized so the day averages the requested rate
+DIURNAL_PROFILE = [
+    0.15, 0.1, 0.08, 0.08, 0.1, 0.2, 0.45, 0.9, 1.5, 1.8, 1.9, 1.7,
+    1.4, 1.6, 1.8, 1.7, 1.5, 1.2, 0.9, 0.7, 0.5, 0.4, 0.3, 0.2,
+]
+
+
+def arrival_times(
+    duration_s: float,
+    mean_qps: float,
+    day_s: Optional[float] = None,
+    start_hour: float = 8.0,
+    seed: int = 0
+) -> Iterator[float]:
+    """
+    Request offsets (seconds from start) of a non-homogeneous Poisson process:
+    exponential gaps, with the rate following DIURNAL_PROFILE (by thinning).
+
+    Args:
+        day_s: Replay seconds per simulated day, e.g. 600 compresses a day of
+            traffic into ten minutes. None keeps a constant rate.
+        start_hour: Hour of the simulated day the replay starts at.
+    """
+    rng = random.Random(seed)
+    mean = sum(DIURNAL_PROFILE) / len(DIURNAL_PROFILE)
+    profile = [p / mean for p in DIURNAL_PROFILE]
+    peak = mean_qps * (max(profile) if day_s else 1.0)
+
+    t = 0.0
+    while True:
+        t += rng.expovariate(peak)
+        if t >= duration_s:
+            return
+        if day_s:
+            hour = (start_hour + 24 * t / day_s) % 24
+            # Linear interpolation between hourly points keeps the rate smooth
+            lo = int(hour)
+            frac = hour - lo
+            rate = mean_qps * (profile[lo] * (1 - frac) + profile[(lo + 1) % 24] * frac)
+            if rng.random() * peak > rate:
+                continue
+        yield t
+
+
+def replay_schedule(
+    cases: Iterable[Dict[str, Any]],
+    duration_s: float,
+    mean_qps: float,
+    pool_size: int = 2000,
+    zipf_s: float = 1.1,
+    day_s: Optional[float] = None,
+    seed: int = 0
+) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """
+    Yields (offset_s, case) pairs reproducing production-like traffic:
+    diurnal Poisson arrivals, and questions drawn with Zipf popularity so
+    popular questions repeat (what makes plan/result cache hit rates
+    meaningful). The question pool is a reservoir sample of pool_size cases,
+    so the corpus is streamed once and never held in memory.
+
+    Args:
+        zipf_s: Popularity skew; 0 draws uniformly, ~1 matches typical query logs.
+    """
+    rng = random.Random(seed)
+    pool: List[Dict[str, Any]] = []
+    for i, case in enumerate(cases):
+        if i < pool_size:
+            pool.append(case)
+        else:
+            j = rng.randrange(i + 1)
+            if j < pool_size:
+                pool[j] = case
+    if not pool:
+        return
+    # Popularity ranks are shuffled so the corpus order does not decide what is hot
+    ranks = list(range(1, len(pool) + 1))
+    rng.shuffle(ranks)
+    weights = list(itertools.accumulate(1.0 / math.pow(r, zipf_s) for r in ranks))
+
+    for t in arrival_times(duration_s, mean_qps, day_s=day_s, seed=seed):
+        yield t, rng.choices(pool, cum_weights=weights)[0]
+
+
+def summarize_schedule(schedule: Iterable[Tuple[float, Dict[str, Any]]], bucket_s: float = 60.0) -> Dict[str, Any]:
+    """Request count, distinct questions, repeat ratio and per-bucket arrival rates of a schedule."""
+    buckets: Dict[int, int] = {}
+    seen = set()
+    total = 0
+    for t, case in schedule:
+        buckets[int(t // bucket_s)] = buckets.get(int(t // bucket_s), 0) + 1
+        seen.add(case["test_id"])
+        total += 1
+    rates = [buckets.get(i, 0) / bucket_s for i in range(max(buckets) + 1)] if buckets else []
+    return {
+        "requests": total,
+        "distinct": len(seen),
+        # Upper bound on any exact-match cache hit rate for this schedule
+        "repeat_ratio": 1 - len(seen) / total if total else 0.0,
+        "qps_min": min(rates, default=0.0),
+        "qps_max": max(rates, default=0.0),
+        "qps_per_bucket": rates,
+    }
@@ -0,0 +1,20 @@
+from typing import Protocol, Optional
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the value stored under key, or None when missing or expired.
+        """
+        ...
+
+    def set(self, key: str, value: bytes, ttl_s: Optional[int] = None) -> None:
+        """
+        Stores value under key, replacing any previous one.
+
+        Args:
+            ttl_s: Seconds until the entry expires; None keeps it until evicted.
+        """
+        ...
+
+    def close(self) -> None:
+        ...
@@ -1,13 +1,21 @@
-from typing import Protocol, Any
-import pandas as pd
+from typing import Protocol, Any, Optional, TYPE_CHECKING
+from src.core.types import CostEstimate
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class DatabaseClient(Protocol):
-    def execute_query(self, sql: str) -> pd.DataFrame:
+    # True if execute_query/estimate_cost with a tenant_id can only read that
+    # tenant's rows, whatever the SQL says
+    enforces_tenant_scope: bool = False
+
+    def execute_query(self, sql: str, tenant_id: Optional[str] = None) -> "pd.DataFrame":
         """
         Executes a SQL query and returns the result as a DataFrame.
         
         Args:
             sql: The SQL query to execute.
+            tenant_id: Run against the tenant's scoped relations, if supported.
             
         Returns:
             A pandas DataFrame containing the results.
@@ -19,3 +27,9 @@ class DatabaseClient(Protocol):
         Validates if the SQL is syntactically correct for this dialect.
         """
         ...
+
+    def estimate_cost(self, sql: str, tenant_id: Optional[str] = None) -> CostEstimate:
+        """
+        Dry-runs the SQL and estimates its cost without executing it.
+        """
+        ...
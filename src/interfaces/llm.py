@@ -1,4 +1,4 @@
-from typing import Protocol, List, Dict, Any, Optional
+from typing import Protocol, List, Dict, Any, Optional, Iterator
 
 class LLMClient(Protocol):
     def generate_content(
@@ -21,3 +21,29 @@ class LLMClient(Protocol):
             The generated text response.
         """
         ...
+
+    def generate_content_stream(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.0,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> Iterator[str]:
+        """
+        Streams content from the LLM as text chunks.
+
+        Clients without native streaming inherit this default, which yields
+        the full `generate_content` response as a single chunk.
+
+        Args:
+            Same as `generate_content`.
+
+        Returns:
+            An iterator of text chunks. Callers may stop iterating early.
+        """
+        yield self.generate_content(
+            prompt,
+            system_instruction=system_instruction,
+            temperature=temperature,
+            response_schema=response_schema
+        )
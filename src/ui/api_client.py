@@ -0,0 +1,57 @@
+import json
+import pandas as pd
+import requests
+from typing import Dict, Any, Iterator, Optional
+from src.core.context import SecurityContext
+from src.core.types import Plan
+
+class ApiClient:
+    """
+    Thin HTTP client for the copilot API. Yields the same events as
+    `CopilotPipeline.ask`, so the UI does not care where the pipeline runs.
+    """
+    def __init__(self, base_url: str, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _headers(self, user_ctx: SecurityContext) -> Dict[str, str]:
+        return {
+            "X-Tenant-Id": user_ctx.tenant_id,
+            "X-User-Id": user_ctx.user_id,
+            "X-Role": user_ctx.role,
+            "X-Region": user_ctx.region or "US",
+        }
+
+    def ask(self, user_query: str, user_ctx: SecurityContext, previous_plan: Optional[Plan] = None) -> Iterator[Dict[str, Any]]:
+        with requests.post(
+            f"{self.base_url}/ask",
+            json={
+                "query": user_query,
+                "stream": True,
+                "previous_plan": previous_plan.model_dump() if previous_plan else None,
+            },
+            headers=self._headers(user_ctx),
+            stream=True,
+            timeout=self.timeout,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                data = event.get("data")
+                if event.get("event") == "result":
+                    data["df"] = pd.DataFrame(data.pop("rows"), columns=data.pop("columns"))
+                yield event
+
+    def fetch_result(self, sql: str, user_ctx: SecurityContext, page: int = 0) -> pd.DataFrame:
+        """Same as `CopilotPipeline.fetch_result`; the server answers from its result cache when it can."""
+        response = requests.post(
+            f"{self.base_url}/execute",
+            json={"sql": sql, "page": page},
+            headers=self._headers(user_ctx),
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        data = response.json()
+        return pd.DataFrame(data["rows"], columns=data["columns"])
@@ -6,151 +6,187 @@ if str(root) not in sys.path:
 
 import streamlit as st
 import pandas as pd
-import time
-import os
-from src.core.router import Router
-from src.core.planner import Planner
-from src.core.validator import Validator
-from src.core.utils import PromptLoader
-from src.adapters.gemini import GeminiAdapter
-from src.adapters.duckdb_adapter import DuckDBAdapter
-from src.core.sql_generator import SQLGenerator
 
 from src.core.config import settings
 from src.core.context import get_mock_context
+from src.core.result_shaping import paginate
+from src.core.types import Plan
+from src.ui.session_store import SessionStore
 
 # Page Config
 st.set_page_config(page_title=settings.APP_NAME, layout="wide")
 
 # Sidebar - Configuration
 st.sidebar.title("Configuration")
-api_key = st.sidebar.text_input("Gemini API Key", type="password", value=settings.GOOGLE_API_KEY or "")
+if settings.COPILOT_API_URL:
+    st.sidebar.markdown(f"**API**: `{settings.COPILOT_API_URL}`")
+    api_key = None
+else:
+    api_key = st.sidebar.text_input("Gemini API Key", type="password", value=settings.GOOGLE_API_KEY or "")
 
-if not api_key:
-    st.error("Please provide a Gemini API Key in the sidebar or .env file.")
-    st.stop()
+    if not api_key:
+        st.error("Please provide a Gemini API Key in the sidebar or .env file.")
+        st.stop()
 
 # Mock Context (Simulating Middleware)
 user_ctx = get_mock_context(role="admin")
 st.sidebar.markdown(f"**User Context**:\n- Tenant: `{user_ctx.tenant_id}`\n- Role: `{user_ctx.role}`")
 
 # Initialize Components (Singleton-ish)
+# The UI is a thin client: it either calls the HTTP API or runs the same
+# pipeline in-process, and only renders the events it yields.
+# Imports are local so the page renders before the pipeline's dependencies load;
+# parquet loading then continues in the background while the user types.
 @st.cache_resource
-def get_components(key):
-    llm = GeminiAdapter(api_key=key)
-    loader = PromptLoader("prompts")
-    router = Router(llm, loader)
-    planner = Planner(llm, loader)
-    validator = Validator()
-    sql_generator = SQLGenerator(llm)
-    db = DuckDBAdapter()
-    
-    # Load data
-    db.load_parquet("fct_sales", "data/fct_sales.parquet")
-    db.load_parquet("dim_product", "data/dim_product.parquet")
-    db.load_parquet("dim_store", "data/dim_store.parquet")
-    
-    return router, planner, validator, db, sql_generator
-
-router, planner, validator, db, sql_generator = get_components(api_key)
+def get_client(key):
+    if settings.COPILOT_API_URL:
+        from src.ui.api_client import ApiClient
+        return ApiClient(settings.COPILOT_API_URL)
+    from src.bootstrap import build_pipeline
+    return build_pipeline(api_key=key)
+
+client = get_client(api_key)
+
+STAGE_LABELS = {
+    "route": "Generating Plan...",
+    "plan": "Generating SQL...",
+    "sql": "Validating SQL...",
+    "cost": "Executing Query...",
+}
+STATUS_LABELS = {
+    "complete": ("Complete", "complete"),
+    "clarify": ("Needs Clarification", "complete"),
+    "blocked": ("Blocked", "error"),
+    "unhandled": ("Unhandled", "complete"),
+    "error": ("Error", "error"),
+}
+
+
+def render_result(df, chart, table):
+    """Renders the first table page and the pipeline's chart spec (see core/result_shaping.py)."""
+    total = (table or {}).get("total_rows", len(df))
+    st.dataframe(df)
+    if total > len(df):
+        st.caption(f"Showing {len(df)} of {total} rows")
+    if not chart:
+        return
+    columns = [chart["x"], chart["series"], chart["y"]] if chart["series"] else [chart["x"], chart["y"]]
+    points = pd.DataFrame(chart["points"], columns=columns)
+    if chart["series"]:
+        points = points.pivot_table(index=chart["x"], columns=chart["series"], values=chart["y"], sort=False)
+    else:
+        points = points.set_index(chart["x"])
+    if chart["type"] == "line":
+        st.line_chart(points)
+    else:
+        st.bar_chart(points)
+    if chart["reduction"]:
+        st.caption(f"Chart reduced from {chart['source_points']} points: {', '.join(chart['reduction'])}")
+
 
 # Main UI
 st.title("🛒 Retail Analytics Copilot")
 st.markdown("### Ask questions about Sales, Products, and Stores.")
 
 # Chat Interface
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+# History keeps result handles and previews under a memory budget; every rerun
+# re-renders it, so full results and traces are only drawn when toggled open
+if "store" not in st.session_state:
+    st.session_state.store = SessionStore(settings.SESSION_BUDGET_MB * 2**20)
+store = st.session_state.store
+
+
+def fetch_result(result):
+    return paginate(client.fetch_result(result["sql"], user_ctx))
+
 
-for message in st.session_state.messages:
+for message in store.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
-        if "trace" in message:
-            with st.expander("🔍 Architect Trace (Debug)"):
-                st.json(message["trace"])
-        if "data" in message:
-            st.dataframe(message["data"])
+        if "trace" in message and st.toggle("🔍 Architect Trace (Debug)", key=f"trace_{message['id']}"):
+            st.json(message["trace"])
+        result = message.get("result")
+        if result is None:
+            continue
+        if st.toggle(
+            f"Show result ({result['row_count']} rows)",
+            value=store.is_loaded(message),
+            key=f"result_{message['id']}"
+        ):
+            render_result(store.load(message, fetch_result), result.get("chart"), result.get("table"))
+        elif message.get("preview") is not None:
+            st.dataframe(message["preview"])
 
 if prompt := st.chat_input("Ex: Show top 5 products by sales in Q3"):
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    store.append("user", prompt)
     with st.chat_message("user"):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        message_placeholder = st.empty()
-        full_response = ""
         trace_data = {"steps": []}
+        df = None
+        chart = None
+        table = None
+        result_key = None
+        answer = {"message": "", "status": "error"}
 
         try:
-            # 1. Router
             with st.status("Thinking...", expanded=True) as status:
                 st.write("Routing query...")
-                route_out = router.route(prompt, user_ctx=user_ctx)
-                trace_data["router"] = route_out.model_dump()
-                
-                if route_out.route == "sql":
-                    st.write("Generating Plan...")
-                    plan_out = planner.plan(prompt, user_ctx=user_ctx)
-                    trace_data["plan"] = plan_out.model_dump()
-                    
-                    if plan_out.needs_disambiguation:
-                        full_response = f"**Clarification Needed:** {plan_out.reasoning}"
-                        status.update(label="Needs Clarification", state="complete")
-                    else:
-                        st.write("Generating SQL...")
-                        # Simple Template Filling (Mocking the SQL Emitter for speed)
-                        # In a real app, we'd use the sql-emitter prompt.
-                        # Here we do a quick heuristic generation for the demo to work without 4 LLM calls.
-                        # We'll just ask the LLM to write the SQL directly based on the plan for this PoC.
-                        
-                        st.write("Generating SQL...")
-                        sql = sql_generator.generate_sql(plan_out)
-                        trace_data["sql_generated"] = sql
-                        
-                        st.write("Validating SQL...")
-                        validator.validate(sql, tenant_id=user_ctx.tenant_id)
-                        
-                        st.write("Executing Query...")
-                        df = db.execute_query(sql)
-                        trace_data["rows_returned"] = len(df)
-                        
-                        full_response = f"Here is the data based on your request."
-                        status.update(label="Complete", state="complete")
-                        
-                        st.markdown(full_response)
-                        st.dataframe(df)
-                        
-                        # Simple Viz
-                        if not df.empty and len(df.columns) >= 2:
-                            numeric_cols = df.select_dtypes(include=['number']).columns
-                            if len(numeric_cols) > 0:
-                                st.bar_chart(df.set_index(df.columns[0])[numeric_cols[0]])
-
-                        st.session_state.messages.append({
-                            "role": "assistant", 
-                            "content": full_response,
-                            "trace": trace_data,
-                            "data": df
-                        })
-
-                elif route_out.route == "unsafe":
-                    full_response = f"🚫 **Request Blocked**: {route_out.reason}"
-                    status.update(label="Blocked", state="error")
-                    st.markdown(full_response)
-                    st.session_state.messages.append({"role": "assistant", "content": full_response, "trace": trace_data})
-
-                elif route_out.route == "clarify":
-                    full_response = f"🤔 **Clarification Needed**: {route_out.clarify_question}"
-                    status.update(label="Clarification", state="complete")
-                    st.markdown(full_response)
-                    st.session_state.messages.append({"role": "assistant", "content": full_response, "trace": trace_data})
-                
-                else:
-                    full_response = f"I can't handle this request type yet: {route_out.route}"
-                    status.update(label="Unhandled", state="complete")
-                    st.markdown(full_response)
-                    st.session_state.messages.append({"role": "assistant", "content": full_response, "trace": trace_data})
+                previous = store.previous_plan()
+                for event in client.ask(prompt, user_ctx, previous_plan=Plan(**previous) if previous else None):
+                    kind, data = event["event"], event.get("data")
+                    trace_data["steps"].append(kind)
+                    if kind in STAGE_LABELS:
+                        st.write(STAGE_LABELS[kind])
+                    if kind == "route":
+                        trace_data["router"] = data
+                        trace_data["time_to_first_decision_ms"] = event.get("time_to_first_decision_ms")
+                    elif kind == "plan":
+                        trace_data["plan"] = data
+                        trace_data["plan_cache_hit"] = event.get("plan_cache_hit", False)
+                        trace_data["plan_delta"] = event.get("delta")
+                        trace_data["template"] = event.get("template")
+                    elif kind == "sql":
+                        trace_data["sql_generated"] = data["sql"]
+                    elif kind == "repair":
+                        # Later re-fetches must run the SQL that worked
+                        trace_data["sql_generated"] = data["sql"]
+                        trace_data["sql_repair"] = data
+                    elif kind == "cost":
+                        trace_data["cost_estimate"] = data
+                        for warning in data.get("warnings", []):
+                            st.warning(warning)
+                    elif kind == "result":
+                        df = data["df"]
+                        chart = data.get("chart")
+                        table = data.get("table")
+                        result_key = data.get("result_key")
+                        trace_data["rollup"] = data.get("rollup")
+                        trace_data["fingerprint"] = data.get("fingerprint")
+                        trace_data["rows_returned"] = (table or {}).get("total_rows", len(df))
+                    elif kind == "answer":
+                        answer = data
+                    elif kind == "trace":
+                        trace_data["cost_estimate_usd"] = data["cost_estimate_usd"]
+                        trace_data["latency_ms"] = data["latency_ms"]
+
+                label, state = STATUS_LABELS.get(answer["status"], ("Complete", "complete"))
+                status.update(label=label, state=state)
+
+            if answer["status"] == "error":
+                st.error(answer["message"])
+            else:
+                st.markdown(answer["message"])
+
+            result = None
+            if df is not None:
+                # Only the first page is kept in the session, not the full result
+                df = paginate(df)
+                render_result(df, chart, table)
+                result = {"sql": trace_data.get("sql_generated"), "result_key": result_key, "chart": chart, "table": table}
+            store.append("assistant", answer["message"], trace=trace_data, df=df, result=result)
 
         except Exception as e:
             st.error(f"Error: {str(e)}")
-            st.session_state.messages.append({"role": "assistant", "content": f"Error: {str(e)}"})
+            store.append("assistant", f"Error: {str(e)}")
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, TYPE_CHECKING
+from src.core.result_cache import frame_nbytes
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_MAX_BYTES = 32 * 2**20
+PREVIEW_ROWS = 10
+MAX_MESSAGES = 200
+
+
+class SessionStore:
+    """
+    Chat history of one UI session, bounded in memory.
+
+    Assistant results are kept as handles: the SQL to re-fetch them, the
+    result-cache key, row count, chart spec and a small preview. The loaded
+    result page is held only for the most recently viewed messages while the
+    session stays under max_bytes; older ones are dropped and re-fetched
+    (normally from the result cache) when expanded again.
+    """
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        preview_rows: int = PREVIEW_ROWS,
+        max_messages: int = MAX_MESSAGES
+    ):
+        self.max_bytes = max_bytes
+        self.preview_rows = preview_rows
+        self.max_messages = max_messages
+        self.messages: List[Dict[str, Any]] = []
+        # message id -> loaded result page, least recently viewed first
+        self._loaded: "OrderedDict[int, pd.DataFrame]" = OrderedDict()
+        self._loaded_bytes: Dict[int, int] = {}
+        self._preview_bytes: Dict[int, int] = {}
+        self._next_id = 0
+
+    def append(
+        self,
+        role: str,
+        content: str,
+        trace: Optional[Dict[str, Any]] = None,
+        df: Optional["pd.DataFrame"] = None,
+        result: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Adds a message. `df` is the result page shown with it and `result` its
+        handle ({"sql", "result_key", "chart", "table"}).
+        """
+        message: Dict[str, Any] = {"id": self._next_id, "role": role, "content": content}
+        self._next_id += 1
+        if trace is not None:
+            message["trace"] = trace
+        if df is not None:
+            table = (result or {}).get("table") or {}
+            message["result"] = {
+                **(result or {}),
+                "row_count": table.get("total_rows", len(df)),
+                "columns": [str(c) for c in df.columns],
+            }
+            message["preview"] = df.head(self.preview_rows)
+            self._preview_bytes[message["id"]] = frame_nbytes(message["preview"])
+            self._loaded[message["id"]] = df
+            self._loaded_bytes[message["id"]] = frame_nbytes(df)
+        self.messages.append(message)
+        self._trim(keep=message["id"])
+        return message
+
+    def previous_plan(self) -> Optional[Dict[str, Any]]:
+        """Plan of the latest answered question, for follow-ups."""
+        for message in reversed(self.messages):
+            plan = (message.get("trace") or {}).get("plan")
+            if plan:
+                return plan
+        return None
+
+    def is_loaded(self, message: Dict[str, Any]) -> bool:
+        return message["id"] in self._loaded
+
+    def load(self, message: Dict[str, Any], fetch: Callable[[Dict[str, Any]], "pd.DataFrame"]) -> "pd.DataFrame":
+        """Returns the message's result page, calling fetch(handle) if it was evicted."""
+        df = self._loaded.get(message["id"])
+        if df is None:
+            df = fetch(message["result"])
+            self._loaded[message["id"]] = df
+            self._loaded_bytes[message["id"]] = frame_nbytes(df)
+        self._loaded.move_to_end(message["id"])
+        self._trim(keep=message["id"])
+        return df
+
+    @property
+    def nbytes(self) -> int:
+        """Previews plus loaded pages (the rest of a message is a few hundred bytes)."""
+        return sum(self._loaded_bytes.values()) + sum(self._preview_bytes.values())
+
+    def _trim(self, keep: int):
+        while len(self.messages) > self.max_messages:
+            dropped = self.messages.pop(0)
+            self._unload(dropped["id"])
+            self._preview_bytes.pop(dropped["id"], None)
+        # Loaded pages go first, least recently viewed first; the one being shown stays
+        for message_id in list(self._loaded):
+            if self.nbytes <= self.max_bytes:
+                return
+            if message_id != keep:
+                self._unload(message_id)
+        # Then the previews of the oldest messages
+        for message in self.messages:
+            if self.nbytes <= self.max_bytes:
+                return
+            if message["id"] != keep and message.get("preview") is not None:
+                message["preview"] = None
+                self._preview_bytes.pop(message["id"], None)
+
+    def _unload(self, message_id: int):
+        self._loaded.pop(message_id, None)
+        self._loaded_bytes.pop(message_id, None)
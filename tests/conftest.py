@@ -173,3 +173,12 @@ def intent_requires_time():
 @pytest.fixture
 def max_bytes():
     return 1000000
+
+@pytest.fixture
+def duckdb_adapter():
+    from src.adapters.duckdb_adapter import DuckDBAdapter
+    db = DuckDBAdapter()
+    db.load_parquet("fct_sales", "data/fct_sales.parquet")
+    db.load_parquet("dim_product", "data/dim_product.parquet")
+    db.load_parquet("dim_store", "data/dim_store.parquet")
+    return db
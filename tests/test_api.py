@@ -0,0 +1,144 @@
+"""
+Tests for the headless HTTP API (FastAPI TestClient, in-process pipeline)
+"""
+
+import json
+import pytest
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from src.api.server import create_app
+from src.core.catalog import IntentCatalog
+from src.core.pipeline import CopilotPipeline
+from src.core.planner import Planner
+from src.core.policy_engine import PolicyEngine
+from src.core.router import Router
+from src.core.scheduler import AdmissionController
+from src.core.validator import Validator
+
+HEADERS = {"X-Tenant-Id": "tenant_123", "X-User-Id": "u1", "X-Role": "admin"}
+
+SALES_SQL = (
+    "SELECT store_id, SUM(net_sales) AS net_sales FROM fct_sales "
+    "WHERE tenant_id = 'tenant_123' AND order_date >= '2024-01-01' GROUP BY 1 LIMIT 100"
+)
+
+
+@pytest.fixture
+def client(mock_llm, prompt_loader, duckdb_adapter):
+    generator = MagicMock()
+    generator.generate_sql.return_value = SALES_SQL
+
+    def factory():
+        return CopilotPipeline(
+            router=Router(mock_llm, prompt_loader),
+            planner=Planner(mock_llm, prompt_loader),
+            sql_generator=generator,
+            validator=Validator(db=duckdb_adapter),
+            db=duckdb_adapter,
+            catalog=IntentCatalog(),
+        )
+
+    with TestClient(create_app(factory)) as c:
+        yield c
+
+
+def test_missing_security_headers_rejected(client):
+    assert client.post("/route", json={"query": "Show net sales"}).status_code == 401
+
+
+def test_route_and_plan(client):
+    routed = client.post("/route", json={"query": "Show net sales"}, headers=HEADERS)
+    assert routed.status_code == 200
+    assert routed.json()["route"] == "sql"
+
+    plan = client.post("/plan", json={"query": "Show net sales"}, headers=HEADERS).json()
+    assert plan["intent_id"] == "net_sales"
+
+    sql = client.post("/sql", json={"plan": plan}, headers=HEADERS).json()
+    assert sql["sql"] == SALES_SQL
+
+
+def test_policy_and_budget_errors_are_client_errors(client):
+    pipeline = client.app.state.pipeline
+    pipeline.router.route = MagicMock(side_effect=ValueError("Policy Violation: Unknown role 'guest'."))
+    rejected = client.post("/route", json={"query": "Show net sales"}, headers=HEADERS)
+    assert rejected.status_code == 400 and "Unknown role" in rejected.json()["detail"]
+
+    policy = MagicMock()
+    policy.program.tenant_limits.return_value = {"budget_per_day_usd": 0.0, "max_concurrent_requests": None, "weight": 1.0}
+    pipeline.scheduler = AdmissionController(policy)
+    for path, body in [("/route", {"query": "Show net sales"}), ("/plan", {"query": "Show net sales"})]:
+        spent = client.post(path, json=body, headers=HEADERS)
+        assert spent.status_code == 429 and "Daily budget" in spent.json()["detail"]
+
+
+def test_execute_enforces_tenant(client):
+    ok = client.post("/execute", json={"sql": SALES_SQL}, headers=HEADERS)
+    assert ok.status_code == 200
+    assert ok.json()["columns"] == ["store_id", "net_sales"]
+    assert ok.json()["row_count"] > 0
+
+    # The query runs on the caller's tenant-scoped relations, whatever its predicates say
+    other_tenant = {**HEADERS, "X-Tenant-Id": "tenant_999"}
+    resp = client.post("/execute", json={"sql": SALES_SQL.replace("'tenant_123'", "'tenant_999' OR 1=1")}, headers=other_tenant)
+    assert resp.status_code == 200
+    assert resp.json()["row_count"] == 0
+
+    bypass = SALES_SQL.replace("FROM fct_sales", "FROM main.fct_sales")
+    assert client.post("/execute", json={"sql": bypass}, headers=HEADERS).status_code == 400
+
+
+def test_execute_paginates_rows(client):
+    body = client.post("/execute", json={"sql": SALES_SQL, "page_size": 2}, headers=HEADERS).json()
+    assert len(body["rows"]) == min(2, body["row_count"])
+    assert body["total_pages"] == -(-body["row_count"] // 2)
+
+    last = client.post("/execute", json={"sql": SALES_SQL, "page_size": 2, "page": body["total_pages"] - 1}, headers=HEADERS).json()
+    assert 1 <= len(last["rows"]) <= 2
+    assert client.post("/execute", json={"sql": SALES_SQL, "page_size": 0}, headers=HEADERS).status_code == 422
+
+
+def test_execute_template(client):
+    params = {"start_date": "2024-01-01", "end_date": "2024-06-30", "row_limit": 100}
+    resp = client.post("/templates/net_sales", json={"structure": {"time_grain": "quarter"}, "params": params}, headers=HEADERS)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["row_count"] == 2 and body["approximate"] is None and body["cost"] is not None
+
+    missing = client.post("/templates/inventory_turnover", json={"params": params}, headers=HEADERS)
+    assert missing.status_code == 400 and "No SQL template" in missing.json()["detail"]
+
+
+def test_execute_template_checks_intent_and_reports_errors(client, duckdb_adapter):
+    client.app.state.pipeline.validator = Validator(
+        db=duckdb_adapter, policy_engine=PolicyEngine("sql/sql_policies.yaml", "catalog/policies.yaml")
+    )
+    params = {"start_date": "2024-01-01", "end_date": "2024-06-30", "row_limit": 100}
+    viewer = {**HEADERS, "X-Role": "viewer"}
+    denied = client.post("/templates/margin_by_category", json={"params": params}, headers=viewer)
+    assert denied.status_code == 400 and "not allowed to run intent" in denied.json()["detail"]
+
+    # Admins may run it, but the template does not bind against this data: a request error, not a 500
+    broken = client.post("/templates/margin_by_category", json={"params": params}, headers=HEADERS)
+    assert broken.status_code == 400 and "failed" in broken.json()["detail"]
+
+
+def test_ask_streams_stage_events(client):
+    resp = client.post("/ask", json={"query": "Show net sales", "stream": True}, headers=HEADERS)
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    events = [json.loads(line) for line in resp.text.splitlines() if line]
+    names = [e["event"] for e in events]
+    assert names[:3] == ["route", "plan", "sql"]
+    assert names[-2:] == ["answer", "trace"]
+    assert events[-2]["data"]["status"] == "complete"
+
+    result = next(e for e in events if e["event"] == "result")
+    assert result["data"]["row_count"] == len(result["data"]["rows"])
+
+
+def test_ask_blocked_route(client):
+    body = client.post("/ask", json={"query": "DELETE all sales"}, headers=HEADERS).json()
+    assert "plan" not in body
+    assert body["answer"]["data"]["status"] == "blocked"
+    assert body["trace"]["data"]["route"] == "unsafe"
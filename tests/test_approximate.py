@@ -0,0 +1,66 @@
+"""
+Tests for approximate (sampled) execution and its error bounds
+"""
+
+from unittest.mock import MagicMock
+from src.core.approximate import approximate_sql
+from src.core.context import SecurityContext
+from src.core.pipeline import CopilotPipeline
+from src.core.result_cache import ResultCache
+from src.core.scheduler import AdmissionController
+from src.core.validator import Validator
+
+SQL = (
+    "SELECT p.category, SUM(s.net_sales) AS net_sales, COUNT(*) AS orders FROM fct_sales s "
+    "JOIN dim_product p ON p.product_id = s.product_id GROUP BY 1 ORDER BY 1 LIMIT 100"
+)
+CTX = SecurityContext(tenant_id="tenant_123", user_id="u1", role="admin")
+
+
+def test_rewrite_samples_fact_table_and_scales_totals():
+    query = approximate_sql(SQL, sample_percent=5)
+    assert "fct_sales AS s TABLESAMPLE BERNOULLI (5.0 PERCENT) REPEATABLE (42)" in query.sql
+    assert "SUM(s.net_sales) / 0.05 AS net_sales" in query.sql and "COUNT(*) / 0.05 AS orders" in query.sql
+    assert set(query.bounds) == {"net_sales", "orders"}
+
+    # Distinct counts cannot come from a sample: full scan with HLL instead
+    distinct = approximate_sql("SELECT COUNT(DISTINCT product_id) AS products FROM fct_sales LIMIT 1")
+    assert distinct.fraction == 1.0 and "APPROX_COUNT_DISTINCT(product_id)" in distinct.sql
+    assert "APPROX_QUANTILE(net_sales, 0.5)" in approximate_sql("SELECT MEDIAN(net_sales) FROM fct_sales LIMIT 1").sql
+
+    # Not estimable from a sample, or not an aggregate
+    assert approximate_sql("SELECT MAX(net_sales) FROM fct_sales LIMIT 1") is None
+    assert approximate_sql("SELECT order_id FROM fct_sales LIMIT 10") is None
+
+
+def test_pipeline_returns_estimates_within_bounds(duckdb_adapter):
+    pipeline = CopilotPipeline(
+        MagicMock(), MagicMock(), MagicMock(), Validator(db=duckdb_adapter), duckdb_adapter,
+        result_cache=ResultCache(), approx_min_rows=0, approx_sample_percent=20,
+    )
+    exact = pipeline.execute(SQL, CTX)
+    approx = pipeline.execute(SQL, CTX, approximate=True)
+    info = approx["approximate"]
+    assert exact["approximate"] is None and info["sample_percent"] == 20 and info["confidence"] == 0.95
+    assert list(approx["df"].columns) == ["category", "net_sales", "orders"]
+    # Every estimate lies within its reported 95% bound of the exact value
+    merged = exact["df"].merge(approx["df"], on="category", suffixes=("", "_approx"))
+    for column in ("net_sales", "orders"):
+        error = ((merged[f"{column}_approx"] - merged[column]).abs() / merged[column]).max()
+        assert 0 < error <= info["relative_error"][column]
+
+    # Cached separately from exact results
+    again = pipeline.execute(SQL, CTX, approximate=True)
+    assert again["cached"] and again["approximate"] == info
+    assert exact["result_key"] != approx["result_key"]
+
+    # Small queries (by the EXPLAIN estimate) stay exact
+    pipeline.approx_min_rows = 10**9
+    pipeline.result_cache = None
+    assert pipeline.execute(SQL.replace("LIMIT 100", "LIMIT 99"), CTX, approximate=True)["approximate"] is None
+
+    # Without a cost estimate (validator has no database) the query runs exactly, and nothing is charged
+    pipeline.validator, pipeline.scheduler, pipeline.approx_min_rows = Validator(), AdmissionController(), 0
+    result = pipeline.execute(SQL, CTX, approximate=True)
+    assert result["cost"] is None and result["approximate"] is None
+    assert pipeline.scheduler.ledger.spent(CTX.tenant_id) == 0
@@ -0,0 +1,72 @@
+"""
+Tests for per-question prompt context selection and token budgets
+"""
+
+import json
+from src.core.catalog import IntentCatalog, load_glossary
+from src.core.context_builder import ContextBuilder, compact_json
+from src.core.context import SecurityContext
+from src.core.planner import Planner
+from src.core.types import Plan
+
+
+def builder(**kwargs) -> ContextBuilder:
+    return ContextBuilder(IntentCatalog(), load_glossary(), **kwargs)
+
+
+def test_planner_context_selects_relevant_entries():
+    context, stats = builder().planner_context("What is our gross margin by category?")
+    assert context["intent_catalog"][0]["intent_id"] == "margin_by_category"
+    terms = [g["term"] for g in context["glossary_hits"]]
+    assert terms[:2] == ["gross_margin", "margin_by_category"] and "category" in terms
+    assert "inventory_turnover" not in terms
+    assert stats["tokens"] < stats["full_tokens"] and stats["tokens_saved"] == stats["full_tokens"] - stats["tokens"]
+
+    hits, _ = builder().router_context("show refunds by store")
+    assert hits[0] == {"term": "returns", "table": "fct_sales", "column": "returns", "similarity": 1.0}
+
+
+def test_budget_caps_context():
+    small, stats = builder(token_budget=40).planner_context("Show net sales by store and category")
+    full, _ = builder(token_budget=10_000).planner_context("Show net sales by store and category")
+    # The best entry of each section is always kept
+    assert small["intent_catalog"][0]["intent_id"] == "net_sales" and small["glossary_hits"]
+    assert len(small["glossary_hits"]) < len(full["glossary_hits"])
+    # Over budget only by those mandatory entries
+    assert stats["tokens"] <= 40 or (len(small["intent_catalog"]), len(small["glossary_hits"])) == (1, 1)
+
+    assert compact_json({"a": None, "b": [], "c": [1, 2]}) == '{"c":[1,2]}'
+
+
+def test_schema_context_keeps_plan_columns():
+    plan = Plan(
+        intent_id="net_sales", tables=["fct_sales", "dim_store", "fct_costs"],
+        measures=[{"name": "net_sales", "column": "net_sales"}],
+        dimensions=[{"name": "region", "table": "dim_store", "column": "region"}],
+        filters=[], limits={"rows": 100},
+    )
+    text, stats = builder().schema_context(plan)
+    assert text.splitlines() == [
+        "fct_sales(order_id,order_date,product_id,store_id,net_sales,tenant_id)",
+        "dim_store(store_id,region)",
+    ]
+    assert stats["tokens_saved"] > 0
+
+
+def test_planner_uses_builder(mock_llm, prompt_loader):
+    prompts = []
+    generate = mock_llm.generate_content
+
+    def capture(prompt, **kwargs):
+        prompts.append(prompt)
+        return generate(prompt, **kwargs)
+
+    mock_llm.generate_content = capture
+    planner = Planner(mock_llm, prompt_loader, context_builder=builder())
+    timings = {}
+    planner.plan("Show net sales by store", SecurityContext(tenant_id="t1", user_id="u1", role="admin"), timings=timings)
+
+    line = next(l for l in prompts[0].splitlines() if l.startswith("- intent_catalog: "))
+    intents = json.loads(line[len("- intent_catalog: "):])
+    assert intents[0]["intent_id"] == "net_sales" and len(intents) <= 3
+    assert timings["context"]["tokens_saved"] > 0
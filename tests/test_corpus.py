@@ -0,0 +1,55 @@
+"""
+Tests for the generated eval / load-test corpus and the replay schedule
+"""
+
+import itertools
+import json
+from src.core.catalog import IntentCatalog
+from src.eval.corpus import ambiguous_terms, expand_corpus, iter_cases, write_shards
+from src.eval.replay import arrival_times, replay_schedule, summarize_schedule
+
+
+def test_corpus_covers_catalog_with_labels():
+    cases = list(expand_corpus())
+    assert len(cases) > 5000
+    assert len({c["test_id"] for c in cases}) == len(cases)
+    assert {c["intent_id"] for c in cases if c["intent_id"]} == set(IntentCatalog().ids())
+    assert {c["expected_output"]["route"] for c in cases} == {"sql", "unsafe", "clarify", "handoff"}
+
+    # Roles outside the intent's policy expect a block
+    viewer = [c for c in cases if c["intent_id"] == "margin_by_category" and c["input"]["user_ctx"]["role"] == "viewer"]
+    assert viewer and all(c["expected_output"]["route"] == "unsafe" for c in viewer)
+
+    # Ambiguous glossary terms only appear in clarify cases
+    assert ambiguous_terms("catalog/glossary.md") == ["margin"]
+    assert all(c["tags"]["measure"] != "margin" for c in cases if c["intent_id"])
+    assert any(c["input"]["user_query"] == "Show margin last month" for c in cases if c["expected_output"]["route"] == "clarify")
+
+    assert list(expand_corpus(seed=3, sample=0.1)) == list(expand_corpus(seed=3, sample=0.1))
+
+
+def test_shards_stream_back_in_order(tmp_path):
+    cases = list(itertools.islice(expand_corpus(), 250))
+    manifest = write_shards(iter(cases), str(tmp_path), shard_size=100)
+    assert manifest["cases"] == 250
+    assert manifest["shards"] == ["corpus-00000.jsonl", "corpus-00001.jsonl", "corpus-00002.jsonl"]
+    assert json.loads((tmp_path / "manifest.json").read_text())["routes"] == manifest["routes"]
+    assert list(iter_cases(str(tmp_path))) == cases
+
+    # The hand-written golden set reads through the same loader
+    assert len(list(iter_cases("eval/golden_set"))) == 3
+
+
+def test_replay_schedule_is_skewed_and_diurnal():
+    flat = list(arrival_times(2000, mean_qps=2.0, seed=1))
+    assert 3600 < len(flat) < 4400
+
+    # A compressed day starting at midnight: the overnight trough is quieter than mid-morning
+    day = list(arrival_times(240, mean_qps=10.0, day_s=240, start_hour=0, seed=1))
+    night = sum(1 for t in day if t < 40)
+    morning = sum(1 for t in day if 90 <= t < 130)
+    assert morning > 4 * night
+
+    summary = summarize_schedule(replay_schedule(expand_corpus(), 600, 5.0, pool_size=500, seed=2))
+    assert summary["distinct"] <= 500
+    assert summary["repeat_ratio"] > 0.5
@@ -0,0 +1,88 @@
+"""
+Unit tests for the EXPLAIN-based cost estimator and pre-execution budget gate
+"""
+
+import pytest
+from src.core.catalog import load_policy
+from src.core.validator import Validator
+
+SALES_BY_CATEGORY = """
+SELECT p.category, SUM(s.net_sales) AS net_sales
+FROM fct_sales s JOIN dim_product p ON p.product_id = s.product_id
+WHERE s.tenant_id = 'tenant_123' AND s.order_date >= '2024-06-01'
+GROUP BY 1 LIMIT 10
+"""
+
+
+def test_estimate_reads_plan(duckdb_adapter):
+    estimate = duckdb_adapter.estimate_cost(SALES_BY_CATEGORY)
+
+    assert set(estimate.tables) == {"fct_sales", "dim_product"}
+    assert {"net_sales", "product_id", "tenant_id", "order_date"} <= set(estimate.tables["fct_sales"])
+    assert "store_id" not in estimate.tables["fct_sales"]
+    assert estimate.estimated_rows > 0
+    assert estimate.bytes_scanned > 0
+    assert estimate.cost_usd > 0
+
+
+def test_estimate_detects_join_fanout(duckdb_adapter):
+    fanout = duckdb_adapter.estimate_cost(
+        "SELECT COUNT(*) FROM fct_sales a JOIN fct_sales b ON a.store_id = b.store_id LIMIT 1"
+    )
+    keyed = duckdb_adapter.estimate_cost(SALES_BY_CATEGORY)
+
+    assert fanout.max_join_fanout > 100
+    assert keyed.max_join_fanout == pytest.approx(1.0)
+    assert fanout.cost_score > keyed.cost_score
+
+
+def test_estimate_counts_cross_and_range_joins_at_worst_case(duckdb_adapter):
+    cross = duckdb_adapter.estimate_cost("SELECT COUNT(*) FROM fct_sales a CROSS JOIN fct_sales b LIMIT 1")
+    rows = duckdb_adapter.execute_query("SELECT COUNT(*) AS n FROM fct_sales")["n"][0]
+    assert cross.estimated_rows == rows * rows and cross.max_join_fanout == rows
+
+    ranged = duckdb_adapter.estimate_cost(
+        "SELECT COUNT(*) FROM fct_sales s JOIN dim_product p ON s.net_sales > p.price LIMIT 1"
+    )
+    assert ranged.max_join_fanout > 1 and ranged.estimated_rows > rows
+
+
+def test_rollup_scans_fewer_bytes(duckdb_adapter):
+    duckdb_adapter.build_rollups()
+    rewritten, _ = duckdb_adapter.route_to_rollup(SALES_BY_CATEGORY)
+
+    assert duckdb_adapter.estimate_cost(rewritten).bytes_scanned < duckdb_adapter.estimate_cost(SALES_BY_CATEGORY).bytes_scanned
+
+
+def test_budget_gate_warns_and_blocks(duckdb_adapter):
+    bytes_scanned = duckdb_adapter.estimate_cost(SALES_BY_CATEGORY).bytes_scanned
+
+    allow = Validator({"cost_controls": {"block_on_bytes": bytes_scanned * 10}}, db=duckdb_adapter)
+    assert allow.check_cost(SALES_BY_CATEGORY).decision == "allow"
+    assert allow.dry_run(SALES_BY_CATEGORY) == bytes_scanned
+
+    warn = Validator({"cost_controls": {"alert_on_bytes": bytes_scanned - 1}}, db=duckdb_adapter)
+    estimate = warn.check_cost(SALES_BY_CATEGORY)
+    assert estimate.decision == "warn" and estimate.warnings
+
+    block = Validator({"cost_controls": {"block_on_bytes": bytes_scanned - 1}}, db=duckdb_adapter)
+    with pytest.raises(ValueError, match="Policy Violation"):
+        block.check_cost(SALES_BY_CATEGORY)
+
+
+def test_budget_gate_blocks_exploding_joins(duckdb_adapter):
+    validator = Validator(load_policy("sql/sql_policies.yaml"), db=duckdb_adapter)
+    assert validator.check_cost(SALES_BY_CATEGORY).decision == "allow"
+    with pytest.raises(ValueError, match="intermediate rows of 333062500 exceeds"):
+        validator.check_cost("SELECT COUNT(*) FROM fct_sales a CROSS JOIN fct_sales b LIMIT 1")
+
+    self_join = "SELECT COUNT(*) FROM fct_sales a JOIN fct_sales b ON a.store_id = b.store_id LIMIT 1"
+    with pytest.raises(ValueError, match="join fan-out of 1825.0 exceeds"):
+        validator.check_cost(self_join)
+    warn = Validator({"cost_controls": {"alert_on_join_fanout": 100}}, db=duckdb_adapter).check_cost(self_join)
+    assert warn.decision == "warn" and "join fan-out" in warn.warnings[0]
+
+
+def test_dry_run_required_without_db():
+    with pytest.raises(ValueError, match="Dry run required"):
+        Validator({"cost_controls": {"dry_run_required": True}}).check_cost("SELECT 1 LIMIT 1")
@@ -0,0 +1,81 @@
+"""
+Tests for follow-up detection and plan deltas
+"""
+
+from datetime import date
+from unittest.mock import MagicMock
+from src.core.catalog import IntentCatalog
+from src.core.context import SecurityContext
+from src.core.followup import apply_delta, detect_followup, template_request
+from src.core.pipeline import CopilotPipeline
+from src.core.templates import TemplateStore
+from src.core.types import Plan
+from src.core.validator import Validator
+
+TODAY = date(2025, 3, 15)
+PREVIOUS = Plan(
+    intent_id="net_sales",
+    tables=["fct_sales"],
+    measures=[{"name": "net_sales", "table": "fct_sales", "column": "net_sales", "unit": "USD", "aggregation": "SUM"}],
+    dimensions=[{"name": "month", "table": "fct_sales", "column": "order_date", "type": "time"}],
+    filters=[{"field": "order_date", "operator": "BETWEEN", "value": ["2024-07-01", "2024-09-30"], "source": "user_query"}],
+    time_window={"grain": "month", "start": "2024-07-01", "end": "2024-09-30"},
+    limits={"rows": 100},
+)
+
+
+def test_detects_refinements():
+    delta = detect_followup("Now break that down by region", PREVIOUS, TODAY)
+    assert [d.column for d in delta.add_dimensions] == ["region"]
+
+    # A bare quarter stays in the year already being looked at
+    assert detect_followup("same but for Q2", PREVIOUS, TODAY).time_window == {"start": "2024-04-01", "end": "2024-06-30"}
+    assert detect_followup("what about last month?", PREVIOUS, TODAY).time_window == {"start": "2025-02-01", "end": "2025-02-28"}
+    assert detect_followup("and weekly", PREVIOUS, TODAY).time_grain == "week"
+
+    delta = detect_followup("Same, but only category 'Home Goods'", PREVIOUS, TODAY)
+    assert delta.add_filters[0].field == "category" and delta.add_filters[0].value == "Home Goods"
+
+
+def test_new_questions_are_not_followups():
+    # No reference to the previous answer
+    assert detect_followup("Show net sales by region", PREVIOUS, TODAY) is None
+    # Something the delta cannot express
+    assert detect_followup("now show margin by region", PREVIOUS, TODAY) is None
+    assert detect_followup("that again", PREVIOUS, TODAY) is None
+
+
+def test_apply_delta_and_template_mapping():
+    plan = apply_delta(PREVIOUS, detect_followup("same for q1 2023 by store", PREVIOUS, TODAY))
+    assert plan.time_window == {"grain": "month", "start": "2023-01-01", "end": "2023-03-31"}
+    assert plan.filters[0].value == ["2023-01-01", "2023-03-31"]
+    assert "dim_store" in plan.tables
+    assert plan.viz_hint == {"series": "store"}
+
+    structure, values = template_request(plan, TemplateStore().variables("time_series_sales.sql"))
+    assert structure["dimension_column"] == "store_name" and structure["time_grain"] == "month"
+    assert values == {"start_date": "2023-01-01", "end_date": "2023-03-31", "row_limit": 100}
+
+    # Filters the template cannot express fall back to SQL generation
+    filtered = apply_delta(PREVIOUS, detect_followup("now only region West", PREVIOUS, TODAY))
+    assert template_request(filtered, TemplateStore().variables("time_series_sales.sql")) is None
+
+
+def test_followup_skips_router_and_planner(duckdb_adapter):
+    llm_stages = MagicMock()
+    pipeline = CopilotPipeline(
+        router=llm_stages, planner=llm_stages, sql_generator=llm_stages,
+        validator=Validator(db=duckdb_adapter), db=duckdb_adapter, catalog=IntentCatalog(),
+    )
+    ctx = SecurityContext(tenant_id="tenant_123", user_id="u1", role="admin")
+    previous = PREVIOUS.model_copy(update={"time_window": {"grain": "month", "start": "2024-01-01", "end": "2024-06-30"}})
+
+    events = {e["event"]: e for e in pipeline.ask("now break that down by region", ctx, previous_plan=previous)}
+    assert events["route"]["followup"]
+    assert events["plan"]["delta"]["add_dimensions"][0]["column"] == "region"
+    assert events["sql"]["data"]["template"] == "net_sales"
+    assert "'tenant_123'" in events["sql"]["data"]["sql"]
+    assert list(events["result"]["data"]["df"].columns)[:2] == ["dt", "region"]
+    assert events["answer"]["data"]["status"] == "complete"
+    assert events["trace"]["data"]["followup"]
+    assert not llm_stages.method_calls
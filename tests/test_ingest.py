@@ -0,0 +1,61 @@
+"""
+Unit tests for incremental ingest
+Tests append/merge by (day, tenant) partition, data versioning, and rollup refresh
+"""
+
+import pytest
+import pandas as pd
+
+
+@pytest.fixture
+def new_day(duckdb_adapter, tmp_path):
+    """Writes two days of sales: a restatement of 2024-12-30 and a new 2024-12-31."""
+    path = tmp_path / "fct_sales_2024-12-31.parquet"
+    duckdb_adapter.conn.execute(f"""
+        COPY (
+            SELECT order_id || '_v2' AS order_id, order_date + INTERVAL 1 DAY AS order_date, product_id,
+                   store_id, quantity, gross_sales, net_sales, returns, tenant_id
+            FROM fct_sales WHERE order_date >= '2024-12-29'
+        ) TO '{path}' (FORMAT PARQUET)
+    """)
+    return str(path)
+
+
+def test_merge_replaces_partitions(duckdb_adapter, new_day):
+    before = duckdb_adapter.execute_query("SELECT COUNT(*) AS n FROM fct_sales")["n"][0]
+    version = duckdb_adapter.data_version
+
+    report = duckdb_adapter.ingest_parquet("fct_sales", new_day, mode="merge")
+
+    after = duckdb_adapter.execute_query("SELECT COUNT(*) AS n FROM fct_sales")["n"][0]
+    assert report.rows_ingested == 100
+    assert report.rows_replaced == 50  # existing 2024-12-30 partition
+    assert report.partitions == 2
+    assert report.bytes_ingested > 0
+    assert report.elapsed_ms > 0
+    assert after == before - 50 + 100
+    assert duckdb_adapter.data_version == report.data_version == version + 1
+
+
+def test_append_keeps_existing_rows(duckdb_adapter, new_day):
+    before = duckdb_adapter.execute_query("SELECT COUNT(*) AS n FROM fct_sales")["n"][0]
+
+    report = duckdb_adapter.ingest_parquet("fct_sales", new_day, mode="append")
+
+    after = duckdb_adapter.execute_query("SELECT COUNT(*) AS n FROM fct_sales")["n"][0]
+    assert report.rows_replaced == 0
+    assert after == before + 100
+
+
+def test_ingest_refreshes_rollups(duckdb_adapter, new_day):
+    duckdb_adapter.build_rollups()
+    duckdb_adapter.ingest_parquet("fct_sales", new_day)
+
+    sql = """SELECT DATE_TRUNC('month', order_date) AS m, SUM(net_sales) AS n, COUNT(*) AS c
+             FROM fct_sales WHERE tenant_id = 'tenant_123' GROUP BY 1 ORDER BY 1 LIMIT 100"""
+    rewritten, rollup = duckdb_adapter.route_to_rollup(sql)
+
+    assert rollup is not None
+    pd.testing.assert_frame_equal(
+        duckdb_adapter.execute_query(sql), duckdb_adapter.execute_query(rewritten), rtol=1e-9
+    )
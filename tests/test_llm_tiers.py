@@ -0,0 +1,62 @@
+"""
+Tests for per-stage model tiers: cheap-first answers, escalation and per-tier stats
+"""
+
+from src.adapters.local_llm import LocalLLM
+from src.core.context import SecurityContext
+from src.core.llm_tiers import ModelTier, TieredLLM
+from src.core.planner import Planner
+from src.core.router import Router
+
+CTX = SecurityContext(tenant_id="t1", user_id="u1", role="analyst")
+
+
+class CountingLLM:
+    """Wraps a client and counts its calls."""
+    def __init__(self, inner):
+        self.inner = inner
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        return self.inner.generate_content(prompt, **kwargs)
+
+    def generate_content_stream(self, prompt, **kwargs):
+        yield self.generate_content(prompt, **kwargs)
+
+
+def test_router_escalates_only_unsure_answers(mock_llm, prompt_loader):
+    strong = CountingLLM(mock_llm)
+    llm = TieredLLM("router", [ModelTier("local", LocalLLM()), ModelTier("gemini-1.5-pro", strong)])
+    router = Router(llm, prompt_loader)
+
+    out = router.route("Show weekly net sales by region for Q3", CTX)
+    assert (out.route, strong.calls) == ("sql", 0)
+    assert out.confidence >= 0.7
+
+    # Nothing the local model recognizes: it asks to clarify, so the strong model decides
+    out = router.route("Tell me something interesting", CTX)
+    assert (out.route, strong.calls) == ("sql", 1)
+
+    # Keyword refusals from the cheap tier are confirmed by the strong one
+    out = router.route("Why did sales drop by region last month?", CTX)
+    assert (out.route, strong.calls) == ("sql", 2)
+    # Whole words only: "Cheshire" is not "hire"
+    assert LocalLLM.route("Net sales in Cheshire by month")["route"] == "sql"
+
+    local, pro = llm.stats()["tiers"]
+    assert (local["calls"], local["escalations"]) == (3, {"clarify": 1, "unsafe": 1})
+    assert pro["calls"] == 2 and pro["cost_usd"] > 0 and local["cost_usd"] == 0
+
+
+def test_planner_escalates_on_disambiguation_and_bad_json(mock_llm, prompt_loader):
+    class Broken:
+        def generate_content(self, prompt, **kwargs):
+            return '{"intent_id": "net_sales", "measures": '
+
+    llm = TieredLLM("planner", [
+        ModelTier("broken", Broken()), ModelTier("local", LocalLLM()), ModelTier("gemini-1.5-pro", mock_llm),
+    ])
+    plan = Planner(llm, prompt_loader).plan("Show net sales by category", CTX)
+    assert plan.intent_id == "net_sales" and not plan.needs_disambiguation
+    assert [t["escalations"] for t in llm.stats()["tiers"]] == [{"schema": 1}, {"needs_disambiguation": 1}, {}]
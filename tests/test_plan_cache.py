@@ -0,0 +1,105 @@
+"""
+Unit tests for the plan cache
+Tests query canonicalization, relative-date re-resolution, and cache keying
+"""
+
+import pytest
+from datetime import date
+from src.core.catalog import load_glossary
+from src.core.context import SecurityContext
+from src.core.plan_cache import PlanCache, QueryCanonicalizer, resolve_relative_window
+from src.core.planner import Planner
+from src.core.types import Plan
+
+
+@pytest.fixture
+def canonicalizer():
+    return QueryCanonicalizer(load_glossary("catalog/glossary.md"))
+
+
+@pytest.fixture
+def plan_cache(canonicalizer):
+    return PlanCache(":memory:", catalog_version="1.0", canonicalizer=canonicalizer)
+
+
+def test_reworded_questions_share_key(canonicalizer):
+    key1, window1 = canonicalizer.canonicalize("net sales by region last month")
+    key2, window2 = canonicalizer.canonicalize("Last month's net sales per region")
+    key3, _ = canonicalizer.canonicalize("revenue by territory last month")
+
+    assert key1 == key2 == key3
+    assert window1 == window2 == "@last_month"
+
+
+def test_distinct_windows_do_not_collide(canonicalizer):
+    assert canonicalizer.canonicalize("net sales for Q2")[0] != canonicalizer.canonicalize("net sales for Q3")[0]
+    assert canonicalizer.canonicalize("top 5 stores")[0] != canonicalizer.canonicalize("top 10 stores")[0]
+
+
+def test_different_questions_do_not_share_key(canonicalizer):
+    # Same words, different meaning
+    assert canonicalizer.canonicalize("net sales in stores with more than 100 returns")[0] != \
+        canonicalizer.canonicalize("returns in stores with more than 100 net sales")[0]
+    # Single-letter names are not stop words
+    assert canonicalizer.canonicalize("net sales for store A")[0] != canonicalizer.canonicalize("net sales for store")[0]
+
+
+def test_resolve_relative_window():
+    today = date(2024, 5, 15)
+    assert resolve_relative_window("@last_month", today) == (date(2024, 4, 1), date(2024, 4, 30))
+    assert resolve_relative_window("@last_quarter", today) == (date(2024, 1, 1), date(2024, 3, 31))
+    assert resolve_relative_window("@last_7_days", today) == (date(2024, 5, 8), date(2024, 5, 14))
+    assert resolve_relative_window("@q3", today) == (date(2024, 7, 1), date(2024, 9, 30))
+
+
+def test_cache_hit_re_resolves_window(plan_cache, user_ctx):
+    plan = Plan(
+        intent_id="net_sales", tables=["fct_sales"], measures=[], dimensions=[],
+        filters=[{"field": "order_date", "operator": "BETWEEN", "value": ["x", "y"], "source": "user_query"}],
+        time_window={"grain": "day", "start": "x", "end": "y"}, limits={"rows": 100}
+    )
+    plan_cache.put("net sales by region last month", user_ctx, plan, today=date(2024, 5, 15))
+
+    hit = plan_cache.get("last month's net sales per region", user_ctx, today=date(2024, 8, 2))
+
+    assert hit is not None
+    assert hit.filters[0].value == ["2024-07-01", "2024-07-31"]
+    assert hit.time_window == {"grain": "day", "start": "2024-07-01", "end": "2024-07-31"}
+
+
+def test_cache_keyed_by_role(plan_cache, user_ctx):
+    plan = Plan(intent_id="net_sales", tables=[], measures=[], dimensions=[], filters=[], limits={"rows": 1})
+    plan_cache.put("net sales", user_ctx, plan)
+
+    viewer = SecurityContext(tenant_id="t1", user_id="u2", role="viewer")
+    assert plan_cache.get("net sales", viewer) is None
+    assert plan_cache.get("net sales", user_ctx) is not None
+
+
+def test_stale_plan_schema_is_a_miss(plan_cache, user_ctx):
+    plan = Plan(intent_id="net_sales", tables=[], measures=[], dimensions=[], filters=[], limits={"rows": 1})
+    plan_cache.put("net sales", user_ctx, plan)
+    # Stored before Measure.name was required
+    plan_cache._conn.execute(
+        "UPDATE plan_cache SET plan_json = ?",
+        (plan.model_dump_json().replace('"measures":[]', '"measures":[{"column":"net_sales"}]'),),
+    )
+
+    assert plan_cache.get("net sales", user_ctx) is None
+    assert plan_cache._conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0] == 0
+    plan_cache.put("net sales", user_ctx, plan)
+    assert plan_cache.get("net sales", user_ctx) == plan
+
+
+def test_planner_uses_cache(mock_llm, prompt_loader, plan_cache, user_ctx):
+    calls = []
+    original = mock_llm.generate_content
+    mock_llm.generate_content = lambda *a, **k: calls.append(1) or original(*a, **k)
+    planner = Planner(mock_llm, prompt_loader, plan_cache=plan_cache)
+
+    first = planner.plan("Show net sales by category", user_ctx=user_ctx)
+    second = planner.plan("net sales per category", user_ctx=user_ctx)
+
+    assert first == second
+    assert len(calls) == 1
+    assert plan_cache.hits == 1
@@ -6,7 +6,9 @@ Tests JSON schema validation, slot coverage, and glossary grounding
 import pytest
 import jsonschema
 from typing import Dict, Any
+from unittest.mock import MagicMock
 from src.core.context import SecurityContext
+from src.core.planner import Planner
 
 
 # Planner output schema (mirrors prompts/planner-retail-v2.md)
@@ -167,6 +169,18 @@ def test_planner_disambiguation_trigger(planner):
         "Intent should be null when disambiguation needed"
 
 
+def test_planner_invalid_plan_falls_back_to_clarify(prompt_loader):
+    """
+    A plan that parses but does not validate (a measure without a name) asks to clarify
+    """
+    llm = MagicMock()
+    llm.generate_content_stream.return_value = iter(['{"intent_id": "net_sales", "measures": [{"column": "net_sales"}]}'])
+    plan = Planner(llm, prompt_loader).plan(
+        "Show net sales", user_ctx=SecurityContext(tenant_id="tenant_123", user_id="u1", role="analyst")
+    )
+    assert plan.needs_disambiguation and plan.intent_id == "error"
+
+
 def test_planner_determinism(planner, golden_queries):
     """
     Test that planner produces deterministic outputs
@@ -0,0 +1,86 @@
+"""
+Tests for the compiled policy program (sql_policies.yaml + policies.yaml) and its hot reload
+"""
+
+import os
+import pytest
+import yaml
+from src.core.catalog import load_policy
+from src.core.policy_engine import PolicyEngine
+from src.core.validator import Validator
+
+SQL = "SELECT s.store_id, SUM(s.net_sales) FROM fct_sales s WHERE s.tenant_id = 't1' GROUP BY 1 LIMIT 100"
+
+
+@pytest.fixture
+def validator():
+    return Validator(policy_engine=PolicyEngine("sql/sql_policies.yaml", "catalog/policies.yaml"))
+
+
+def test_policy_blocks_functions_columns_and_wildcards(validator):
+    assert validator.validate(SQL, tenant_id="t1", role="analyst")
+
+    with pytest.raises(ValueError, match="Function 'REGEXP_EXTRACT'"):
+        validator.validate(SQL.replace("s.store_id", "REGEXP_EXTRACT(s.sku, 'a')"), tenant_id="t1")
+    with pytest.raises(ValueError, match="Restricted column 'customer_email'"):
+        validator.validate(SQL.replace("s.store_id", "s.customer_email"), tenant_id="t1")
+    with pytest.raises(ValueError, match="no_wildcard_select"):
+        validator.validate("SELECT * FROM fct_sales WHERE tenant_id = 't1' LIMIT 10", tenant_id="t1")
+    # ...unless the wildcard is over an explicit subquery
+    assert validator.validate(
+        "SELECT * FROM (SELECT store_id FROM fct_sales WHERE tenant_id = 't1') LIMIT 10", tenant_id="t1"
+    )
+    # Word boundaries: a column named like a keyword is not a DML statement
+    assert validator.validate(SQL.replace("s.store_id", "s.updated_at"), tenant_id="t1")
+    # ...and keywords inside string literals are values
+    assert validator.validate(SQL.replace("'t1'", "'t1' AND s.channel IN ('Drop shipping', 'Call center')"), tenant_id="t1")
+    with pytest.raises(ValueError, match="Forbidden keyword 'EXECUTE'"):
+        validator.validate("EXECUTE stmt", tenant_id="t1")
+
+
+def test_policy_enforces_complexity_and_role_limits(validator):
+    joins = " ".join(f"JOIN dim_store d{i} ON d{i}.store_id = s.store_id" for i in range(6))
+    with pytest.raises(ValueError, match="max_join_count"):
+        validator.validate(SQL.replace("WHERE", f"{joins} WHERE"), tenant_id="t1")
+
+    conditions = " AND ".join(f"s.units > {i}" for i in range(10))
+    with pytest.raises(ValueError, match="max_where_conditions"):
+        validator.validate(SQL.replace("GROUP BY", f"AND {conditions} GROUP BY"), tenant_id="t1")
+
+    big = SQL.replace("LIMIT 100", "LIMIT 5000")
+    assert validator.validate(big, tenant_id="t1", role="analyst")
+    with pytest.raises(ValueError, match="exceeds maximum of 1000 rows"):
+        validator.validate(big, tenant_id="t1", role="viewer")
+    with pytest.raises(ValueError, match="exceeds maximum of 10000 rows"):
+        validator.validate(SQL.replace("LIMIT 100", "LIMIT 20000"), tenant_id="t1")
+
+    validator.check_intent("margin_by_category", "t1", "admin")
+    with pytest.raises(ValueError, match="Role 'viewer' is not allowed"):
+        validator.check_intent("margin_by_category", "t1", "viewer")
+    with pytest.raises(ValueError, match="Unknown role"):
+        validator.check_intent("net_sales", "t1", "intern")
+    assert validator.program.profile("t1", "viewer")["allowed_intents"] == ["avg_ticket", "net_sales"]
+
+
+def test_engine_hot_swaps_on_change(tmp_path):
+    sql_path, access_path = tmp_path / "sql_policies.yaml", tmp_path / "policies.yaml"
+    sql_path.write_text(yaml.safe_dump({"denied_functions": []}))
+    access_path.write_text(yaml.safe_dump(load_policy("catalog/policies.yaml")))
+    engine = PolicyEngine(str(sql_path), str(access_path), reload_s=0)
+    validator = Validator(policy_engine=engine)
+    query = SQL.replace("s.store_id", "REGEXP_EXTRACT(s.sku, 'a')")
+    assert validator.validate(query, tenant_id="t1")
+    version = engine.program.version
+
+    sql_path.write_text(yaml.safe_dump({"denied_functions": ["REGEXP_EXTRACT"]}))
+    os.utime(sql_path, ns=(1, os.stat(sql_path).st_mtime_ns + 10**9))
+    with pytest.raises(ValueError, match="not allowed"):
+        validator.validate(query, tenant_id="t1")
+    assert engine.program.version != version
+
+    # A broken file keeps the last good program
+    sql_path.write_text("denied_functions: [")
+    os.utime(sql_path, ns=(1, os.stat(sql_path).st_mtime_ns + 2 * 10**9))
+    with pytest.raises(ValueError, match="not allowed"):
+        validator.validate(query, tenant_id="t1")
+    assert engine.last_error
@@ -0,0 +1,76 @@
+"""
+Tests for per-request profiling (stage spans, DuckDB operator timings, Chrome trace export)
+"""
+
+import json
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from src.api.server import create_app
+from src.core.pipeline import CopilotPipeline
+from src.core.planner import Planner
+from src.core.profiler import ProfileSampler, RequestProfile, profile_span
+from src.core.router import Router
+from src.core.validator import Validator
+
+SALES_SQL = (
+    "SELECT store_id, SUM(net_sales) AS net_sales FROM fct_sales "
+    "WHERE tenant_id = 'tenant_123' AND order_date >= '2024-01-01' GROUP BY 1 LIMIT 100"
+)
+
+
+def test_sampler_picks_tenants_and_rate():
+    sampler = ProfileSampler(sample_rate=0.0, tenants=["tenant_slow"], cprofile=False)
+    assert sampler.start("tenant_slow") is not None
+    assert sampler.start("tenant_123") is None
+    assert sampler.start("tenant_123", requested=True) is not None
+    assert ProfileSampler(sample_rate=1.0).start("tenant_123") is not None
+
+    # Outside a profiled span the hook is a no-op
+    with profile_span("noop") as args:
+        assert args is None
+    profile = RequestProfile(cprofile=False)
+    with profile.span("outer"):
+        with profile_span("inner", rows=3):
+            pass
+    assert [s["name"] for s in profile.spans] == ["inner", "outer"]
+    assert profile.spans[0]["args"] == {"rows": 3}
+
+
+def test_ask_writes_chrome_trace(mock_llm, prompt_loader, duckdb_adapter, tmp_path):
+    generator = MagicMock()
+    generator.generate_sql.return_value = SALES_SQL
+    pipeline = CopilotPipeline(
+        router=Router(mock_llm, prompt_loader),
+        planner=Planner(mock_llm, prompt_loader),
+        sql_generator=generator,
+        validator=Validator(db=duckdb_adapter),
+        db=duckdb_adapter,
+        profiler=ProfileSampler(out_dir=str(tmp_path)),
+    )
+    headers = {"X-Tenant-Id": "tenant_123", "X-User-Id": "u1", "X-Role": "admin"}
+
+    with TestClient(create_app(lambda: pipeline)) as client:
+        body = client.post("/ask", json={"query": "Show net sales", "profile": True}, headers=headers).json()
+        profile = body["trace"]["data"]["profile"]
+        assert {"route", "plan", "execute", "validate", "execute_query", "duckdb.execute", "duckdb.fetch_df"} <= set(
+            profile["stages_ms"]
+        )
+
+        trace = client.get(f"/profiles/{profile['request_id']}", headers=headers).json()
+        # Other tenants cannot read it
+        other = {**headers, "X-Tenant-Id": "tenant_456"}
+        assert client.get(f"/profiles/{profile['request_id']}", headers=other).status_code == 404
+
+        # Only PROFILE_ROLES may ask for a profile
+        analyst = {**headers, "X-Role": "analyst"}
+        body = client.post("/ask", json={"query": "Show net sales", "profile": True}, headers=analyst).json()
+        assert body["trace"]["data"]["profile"] is None
+
+    spans = {e["name"] for e in trace["traceEvents"] if e.get("cat") == "pipeline"}
+    assert {"router.prompt", "router.llm", "planner.llm"} <= spans
+    operators = [e for e in trace["traceEvents"] if e.get("cat") == "duckdb"]
+    assert any(e["name"].startswith("SEQ_SCAN") for e in operators)
+    assert all(e["dur"] >= 0 for e in operators)
+    assert trace["otherData"]["queries"] == [SALES_SQL]
+    assert trace["otherData"]["cprofile"]
+    json.dumps(trace)
@@ -0,0 +1,129 @@
+"""
+Tests for admission control: fair sharing of LLM / DB slots between tenants, load shedding, daily budgets
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+import pytest
+from src.core.context import SecurityContext, user_scope
+from src.core.llm_tiers import ModelTier, TieredLLM
+from src.core.pipeline import CopilotPipeline
+from src.core.policy_engine import PolicyEngine
+from src.core.scheduler import AdmissionController, FairScheduler, Overloaded
+from src.core.types import RouterOutput
+
+
+def wait_for(condition, timeout_s=2.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def queue(scheduler, tenants, order):
+    """Starts one waiting request per tenant, in this order; returns their threads."""
+    def ask(tenant_id):
+        with scheduler.slot(tenant_id):
+            order.append(tenant_id)
+
+    threads = []
+    for tenant_id in tenants:
+        depth = scheduler.stats()["queue_depth"]
+        threads.append(threading.Thread(target=ask, args=(tenant_id,)))
+        threads[-1].start()
+        wait_for(lambda: scheduler.stats()["queue_depth"] == depth + 1)
+    return threads
+
+
+def test_light_tenant_goes_ahead_of_heavy_backlog():
+    scheduler = FairScheduler("llm", capacity=1, max_wait_s=2.0)
+    order = []
+    scheduler.acquire("heavy")
+    # A batch of heavy questions queues first, then one light question
+    threads = queue(scheduler, ["heavy", "heavy", "heavy", "light"], order)
+    assert scheduler.stats()["queue_by_tenant"] == {"heavy": 3, "light": 1}
+
+    scheduler.release("heavy")
+    for t in threads:
+        t.join()
+    assert order == ["light", "heavy", "heavy", "heavy"]
+    stats = scheduler.stats()
+    assert stats["admitted"] == 5 and stats["queue_depth"] == 0
+    assert stats["wait_ms_max"] >= stats["wait_ms_p95"] > 0
+
+
+def test_full_queue_sheds_at_once():
+    scheduler = FairScheduler("llm", capacity=1, max_queue=2, max_wait_s=2.0)
+    scheduler.acquire("heavy")
+    threads = queue(scheduler, ["heavy", "heavy"], [])
+
+    with pytest.raises(Overloaded, match="queue full"):
+        scheduler.acquire("light")
+    assert scheduler.stats()["shed"] == {"queue_full": 1, "timeout": 0}
+
+    scheduler.release("heavy")
+    for t in threads:
+        t.join()
+
+
+def test_tenant_limits_come_from_access_policy():
+    limits = PolicyEngine("sql/sql_policies.yaml", "catalog/policies.yaml").program.tenant_limits("tenant_123")
+    assert limits == {"budget_per_day_usd": 100.0, "max_concurrent_requests": 2, "weight": 1.0}
+
+
+def test_tenant_cap_leaves_free_slots_to_other_tenants():
+    limits = {"max_concurrent_requests": 2}
+    scheduler = FairScheduler("db", capacity=3, max_wait_s=0.05, limits=lambda tenant_id: limits)
+    scheduler.acquire("heavy")
+    scheduler.acquire("heavy")
+    with pytest.raises(Overloaded, match="timed out"):
+        scheduler.acquire("heavy")
+    scheduler.acquire("light")
+    stats = scheduler.stats()
+    assert stats["running_by_tenant"] == {"heavy": 2, "light": 1} and stats["shed"]["timeout"] == 1
+
+
+def test_timed_out_waiter_does_not_push_back_its_tenant():
+    scheduler = FairScheduler("llm", capacity=1, max_wait_s=0.02)
+    scheduler.acquire("busy")
+    for _ in range(3):
+        with pytest.raises(Overloaded, match="timed out"):
+            scheduler.acquire("light")
+
+    # Requests that were never served leave no debt: light still goes first
+    scheduler.max_wait_s = 2.0
+    order = []
+    threads = queue(scheduler, ["busy", "light"], order)
+    scheduler.release("busy")
+    for t in threads:
+        t.join()
+    assert order == ["light", "busy"]
+
+
+def test_exhausted_daily_budget_blocks_the_tenant():
+    policy = MagicMock()
+    policy.program.tenant_limits.return_value = {"budget_per_day_usd": 0.01, "max_concurrent_requests": None, "weight": 1.0}
+    controller = AdmissionController(policy, llm_capacity=2, db_capacity=1)
+    router = MagicMock()
+    router.route.return_value = RouterOutput(route="handoff", reason="Outside analytics scope")
+    pipeline = CopilotPipeline(router, MagicMock(), MagicMock(), MagicMock(), MagicMock(), scheduler=controller)
+
+    # LLM calls are charged to the tenant in scope, at the model's price
+    model = MagicMock()
+    model.generate_content.return_value = "SELECT 1 LIMIT 1"
+    llm = TieredLLM("sql", [ModelTier("gemini-1.5-pro", model)], ledger=controller.ledger)
+    spender = SecurityContext(tenant_id="t1", user_id="u1", role="analyst")
+    with user_scope(spender):
+        while controller.ledger.spent("t1") < 0.01:
+            llm.generate_content("net sales by region " * 200)
+
+    events = {e["event"]: e["data"] for e in pipeline.ask("net sales by region", spender)}
+    assert events["answer"]["status"] == "blocked" and "Daily budget" in events["answer"]["message"]
+    assert router.route.call_count == 0
+
+    # Other tenants are unaffected
+    other = spender.model_copy(update={"tenant_id": "t2"})
+    events = {e["event"]: e["data"] for e in pipeline.ask("net sales by region", other)}
+    assert events["answer"]["status"] == "unhandled" and router.route.call_count == 1
+    assert controller.stats()["budgets"]["tenants"]["t1"]["spent_usd"] >= 0.01
@@ -0,0 +1,97 @@
+"""
+Tests for the live schema catalog and the schema slice it gives the SQL generator
+"""
+
+import duckdb
+from src.core.context_builder import ContextBuilder
+from src.core.sql_generator import SQLGenerator
+from src.core.types import Plan
+
+PLAN = Plan(
+    intent_id="net_sales", tables=["fct_sales", "dim_product"],
+    measures=[{"name": "net_sales", "column": "net_sales"}],
+    dimensions=[{"name": "category", "table": "dim_product", "column": "category"}],
+    filters=[], limits={"rows": 100},
+)
+
+
+def test_describe_schema_reads_types_and_stats(duckdb_adapter):
+    duckdb_adapter.build_rollups()
+    schema = duckdb_adapter.describe_schema()
+    assert sorted(schema) == ["dim_product", "dim_store", "fct_sales"]
+
+    sales = schema["fct_sales"]
+    columns = {c.name: c for c in sales.columns}
+    assert sales.row_count == 18250 and sales.source == "data/fct_sales.parquet"
+    assert {"tenant_id", "gross_sales", "returns"} <= set(columns)
+    assert (columns["order_date"].type, columns["order_date"].min[:10], columns["order_date"].max[:10]) == (
+        "TIMESTAMP", "2024-01-01", "2024-12-30"
+    )
+    # No tenant values or tenant counts in a shared prompt
+    assert columns["tenant_id"].distinct_count is None and not columns["tenant_id"].values
+    assert not columns["store_id"].values
+
+    category = next(c for c in schema["dim_product"].columns if c.name == "category")
+    assert category.values == ["Clothing", "Electronics", "Home", "Sports", "Toys"]
+
+    # Footer stats match a full scan
+    low, high = duckdb_adapter.conn.execute("SELECT MIN(quantity), MAX(quantity) FROM fct_sales").fetchone()
+    assert (columns["quantity"].min, columns["quantity"].max) == (str(low), str(high))
+
+
+def test_schema_cache_follows_data_version(duckdb_adapter, tmp_path):
+    first = duckdb_adapter.describe_schema()
+    assert duckdb_adapter.describe_schema() is first
+
+    path = str(tmp_path / "late.parquet")
+    duckdb.execute(
+        "COPY (SELECT 'O999999' AS order_id, TIMESTAMP '2025-02-01' AS order_date, 'P000' AS product_id, "
+        "'S00' AS store_id, 1::BIGINT AS quantity, 10.0 AS gross_sales, 9.0 AS net_sales, 0::BIGINT AS returns, "
+        f"'tenant_123' AS tenant_id) TO '{path}' (FORMAT PARQUET)"
+    )
+    duckdb_adapter.ingest_parquet("fct_sales", path, mode="append")
+
+    sales = duckdb_adapter.describe_schema()["fct_sales"]
+    order_date = next(c for c in sales.columns if c.name == "order_date")
+    # The table no longer matches its file, so the stats come from a scan
+    assert sales.source is None and sales.row_count == 18251 and order_date.max.startswith("2025-02-01")
+
+
+def test_sql_prompt_gets_live_schema_slice(mock_llm, duckdb_adapter):
+    prompts = []
+    mock_llm.generate_content = lambda prompt, **kwargs: prompts.append(prompt) or "SELECT 1 LIMIT 1"
+    builder = ContextBuilder(schema_source=duckdb_adapter.describe_schema)
+    timings = {}
+    SQLGenerator(mock_llm, context_builder=builder).generate_sql(PLAN, timings=timings)
+
+    assert (
+        "fct_sales(order_id VARCHAR~18176,order_date TIMESTAMP[2024-01-01..2024-12-30],product_id VARCHAR~50,"
+        "store_id VARCHAR~10,net_sales DOUBLE[9.17645..1756.81],tenant_id VARCHAR) -- 18250 rows"
+    ) in prompts[0]
+    assert "dim_product(product_id VARCHAR~50,category VARCHAR{Clothing|Electronics|Home|Sports|Toys}) -- 50 rows" in prompts[0]
+    assert timings["context"]["tokens_saved"] > 0
+
+    # Before any table exists the static schema is used
+    text, _ = ContextBuilder(schema_source=lambda: None).schema_context(PLAN)
+    assert text.splitlines()[0] == "fct_sales(order_id,order_date,product_id,store_id,net_sales,tenant_id)"
+
+
+def test_tenant_schema_only_counts_the_tenants_rows(duckdb_adapter, tmp_path):
+    path = str(tmp_path / "other.parquet")
+    duckdb.execute(
+        "COPY (SELECT 'O999999' AS order_id, TIMESTAMP '2025-02-01' AS order_date, 'P000' AS product_id, "
+        "'S00' AS store_id, 1::BIGINT AS quantity, 10.0 AS gross_sales, 9.0 AS net_sales, 0::BIGINT AS returns, "
+        f"'tenant_999' AS tenant_id) TO '{path}' (FORMAT PARQUET)"
+    )
+    duckdb_adapter.ingest_parquet("fct_sales", path, mode="append")
+    assert duckdb_adapter.describe_schema()["fct_sales"].row_count == 18251
+
+    mine = duckdb_adapter.describe_schema(tenant_id="tenant_123")
+    order_date = next(c for c in mine["fct_sales"].columns if c.name == "order_date")
+    assert mine["fct_sales"].row_count == 18250 and order_date.max.startswith("2024-12-30")
+    other = duckdb_adapter.describe_schema(tenant_id="tenant_999")
+    net_sales = next(c for c in other["fct_sales"].columns if c.name == "net_sales")
+    assert other["fct_sales"].row_count == 1 and (net_sales.min, net_sales.max) == ("9.0", "9.0")
+    # Shared dimension tables are not scoped; cached per tenant and data version
+    assert other["dim_product"] is mine["dim_product"]
+    assert duckdb_adapter.describe_schema(tenant_id="tenant_999") is other
@@ -0,0 +1,89 @@
+"""
+Tests for the result cache and the bounded chat-history store
+"""
+
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock
+from src.core.context import SecurityContext
+from src.core.pipeline import CopilotPipeline
+from src.core.result_cache import ResultCache, frame_nbytes
+from src.core.validator import Validator
+from src.ui.session_store import SessionStore
+
+SQL = (
+    "SELECT store_id, SUM(net_sales) AS net_sales FROM fct_sales "
+    "WHERE tenant_id = 'tenant_123' AND order_date >= '2024-01-01' GROUP BY 1 LIMIT 100"
+)
+
+
+def frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({"n": range(rows), "label": [f"row_{i}" for i in range(rows)]})
+
+
+def test_result_cache_evicts_least_recently_used():
+    a, b, c = frame(100), frame(100), frame(100)
+    cache = ResultCache(max_bytes=2 * frame_nbytes(a))
+    cache.put("a", a)
+    cache.put("b", b)
+    assert cache.get("a") is a
+    cache.put("c", c)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.nbytes <= cache.max_bytes
+    assert not cache.put("huge", frame(10_000))
+
+
+@pytest.fixture
+def pipeline(duckdb_adapter):
+    return CopilotPipeline(
+        router=MagicMock(), planner=MagicMock(), sql_generator=MagicMock(),
+        validator=Validator(db=duckdb_adapter), db=duckdb_adapter,
+        result_cache=ResultCache(),
+    )
+
+
+def test_pipeline_serves_repeated_queries_from_cache(pipeline, duckdb_adapter):
+    ctx = SecurityContext(tenant_id="tenant_123", user_id="u1", role="admin")
+    first = pipeline.execute(SQL, ctx)
+    assert not first["cached"] and first["cost"] is not None
+
+    again = pipeline.execute(SQL.replace("SELECT", "select"), ctx)
+    assert again["cached"] and again["result_key"] == first["result_key"]
+    assert again["df"] is first["df"]
+
+    # Another tenant never shares the entry
+    other = SecurityContext(tenant_id="tenant_999", user_id="u2", role="admin")
+    assert pipeline.execute(SQL.replace("tenant_123", "tenant_999"), other)["result_key"] != first["result_key"]
+
+    # New data invalidates it
+    duckdb_adapter.data_version += 1
+    assert not pipeline.execute(SQL, ctx)["cached"]
+    assert len(pipeline.fetch_result(SQL, ctx)) == len(first["df"])
+
+
+def test_session_store_keeps_handles_under_budget():
+    page = frame(100)
+    store = SessionStore(max_bytes=2 * frame_nbytes(page) + 10 * frame_nbytes(page.head(5)), preview_rows=5)
+    store.append("user", "q1")
+    first = store.append("assistant", "a1", df=page, result={"sql": "SELECT 1", "table": {"total_rows": 5000}})
+    assert first["result"]["row_count"] == 5000
+    assert len(first["preview"]) == 5
+
+    for i in range(3):
+        store.append("assistant", f"a{i + 2}", df=frame(100), result={"sql": "SELECT 1"})
+    assert store.nbytes <= store.max_bytes
+    assert not store.is_loaded(first)
+
+    fetch = MagicMock(return_value=page)
+    assert store.load(first, fetch) is page
+    fetch.assert_called_once_with(first["result"])
+    assert store.is_loaded(first) and store.nbytes <= store.max_bytes
+    store.load(first, fetch)
+    assert fetch.call_count == 1
+
+
+def test_session_store_drops_oldest_messages():
+    store = SessionStore(max_messages=3)
+    for i in range(5):
+        store.append("user", f"q{i}")
+    assert [m["content"] for m in store.messages] == ["q2", "q3", "q4"]
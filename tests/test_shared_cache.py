@@ -0,0 +1,120 @@
+"""
+Tests for the shared cache tier: replicas sharing results / plans / LLM answers, tenant partitioning
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from src.adapters.resp_cache import LocalRedisServer, RedisCacheBackend
+from src.adapters.sqlite_cache import SQLiteCacheBackend
+from src.core.context import SecurityContext, user_scope
+from src.core.llm_tiers import ModelTier, TieredLLM
+from src.core.pipeline import CopilotPipeline
+from src.core.plan_cache import PlanCache
+from src.core.planner import Planner
+from src.core.result_cache import ResultCache
+from src.core.shared_cache import SharedCache, open_backend
+from src.core.types import Plan
+from src.core.validator import Validator
+
+SQL = (
+    "SELECT p.category, SUM(s.net_sales) AS net_sales FROM fct_sales s "
+    "JOIN dim_product p ON p.product_id = s.product_id GROUP BY 1 ORDER BY 1 LIMIT 100"
+)
+ADMIN = SecurityContext(tenant_id="tenant_123", user_id="u1", role="admin")
+ANALYST = SecurityContext(tenant_id="t1", user_id="u1", role="analyst")
+
+
+def replica(db, shared):
+    return CopilotPipeline(
+        MagicMock(), MagicMock(), MagicMock(), Validator(db=db), db, result_cache=ResultCache(), shared_cache=shared,
+    )
+
+
+def test_replicas_share_results_per_tenant_and_role(duckdb_adapter, tmp_path):
+    shared = SharedCache(SQLiteCacheBackend(str(tmp_path / "shared.sqlite")))
+    a, b = replica(duckdb_adapter, shared), replica(duckdb_adapter, shared)
+
+    first = a.execute(SQL, ADMIN)
+    second = b.execute(SQL, ADMIN)
+    assert not first["cached"] and second["cached"]
+    assert second["df"].equals(first["df"])
+
+    # Same SQL, another tenant or another role: never served from this tenant's entry
+    other_tenant = ADMIN.model_copy(update={"tenant_id": "tenant_999"})
+    other_role = ADMIN.model_copy(update={"role": "superadmin"})
+    assert shared.get_frame(other_tenant, first["result_key"]) is None
+    assert shared.get_frame(other_role, first["result_key"]) is None
+    # Tenant ids cannot forge another tenant's key prefix
+    forged = ADMIN.model_copy(update={"tenant_id": "tenant_123:admin"})
+    assert shared.key("result", forged, "k").split(":")[2] == "tenant_123%3Aadmin"
+
+    stats = shared.stats()["result"]
+    assert (stats["hits"], stats["writes"]) == (1, 1) and stats["bytes_written"] > 0
+
+
+@pytest.fixture
+def redis_server():
+    server = LocalRedisServer(password="s3cret").start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def replicas(redis_server):
+    """Two replicas' caches on the same server, opened by URL and directly."""
+    shared = SharedCache(open_backend(f"redis://:s3cret@{redis_server.host}:{redis_server.port}/0"))
+    other = SharedCache(RedisCacheBackend(redis_server.host, redis_server.port, password="s3cret"))
+    return shared, other
+
+
+def test_redis_backend_shares_plans_per_tenant(replicas):
+    shared, other = replicas
+    plan = Plan(
+        intent_id="net_sales", tables=["fct_sales"], measures=[{"name": "net_sales"}], dimensions=[], filters=[],
+        limits={"rows": 100},
+    )
+    PlanCache(":memory:", catalog_version="v1", shared=shared).put("net sales by store", ANALYST, plan)
+    replica_cache = PlanCache(":memory:", catalog_version="v1", shared=other)
+
+    assert replica_cache.get("net sales by store", ANALYST) == plan
+    assert replica_cache.get("net sales by store", ANALYST.model_copy(update={"tenant_id": "t2"})) is None
+    assert other.stats()["plan"]["hit_rate"] == 0.5
+
+
+def test_redis_backend_shares_llm_answers_of_caller_in_scope(replicas):
+    shared, other = replicas
+    model = MagicMock()
+    model.generate_content.return_value = "SELECT 1 LIMIT 1"
+    llm = TieredLLM("sql", [ModelTier("gemini-1.5-pro", model)], cache=shared)
+    replica_llm = TieredLLM("sql", [ModelTier("gemini-1.5-pro", model)], cache=other)
+    with user_scope(ANALYST):
+        llm.generate_content("prompt")
+        assert replica_llm.generate_content("prompt") == "SELECT 1 LIMIT 1"
+    assert model.generate_content.call_count == 1
+    assert other.stats()["llm"]["hit_rate"] == 1.0
+
+    # No caller in scope: nothing is read or written
+    replica_llm.generate_content("prompt")
+    assert model.generate_content.call_count == 2
+
+
+def test_planner_answer_shared_by_colleagues(replicas, mock_llm, prompt_loader):
+    shared, other = replicas
+    # Prompts carry no user_id: colleagues in the same tenant and role share the planner's answer
+    model = MagicMock(wraps=mock_llm)
+    planner = Planner(TieredLLM("planner", [ModelTier("gemini-1.5-pro", model)], cache=shared), prompt_loader)
+    replica_planner = Planner(TieredLLM("planner", [ModelTier("gemini-1.5-pro", model)], cache=other), prompt_loader)
+    colleague = ANALYST.model_copy(update={"user_id": "u2"})
+    with user_scope(ANALYST):
+        planner.plan("Show net sales by category", ANALYST)
+    with user_scope(colleague):
+        assert replica_planner.plan("Show net sales by category", colleague).intent_id == "net_sales"
+    assert model.generate_content_stream.call_count == 1
+
+
+def test_wrong_password_skips_backend_for_cooldown(redis_server):
+    denied = SharedCache(RedisCacheBackend(redis_server.host, redis_server.port, password="wrong"))
+    # A miss, then the backend is skipped for the cool-down instead of retried per call
+    assert denied.get_json("plan", ANALYST, "k") is None
+    assert denied.put_json("plan", ANALYST, "k", 1) is False
+    assert (denied.stats()["plan"]["errors"], denied.stats()["plan"]["bypassed"]) == (1, 1)
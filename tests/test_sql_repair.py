@@ -0,0 +1,77 @@
+"""
+Tests for the bounded SQL repair loop and its fix cache
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from src.core.context import SecurityContext, current_user
+from src.core.pipeline import CopilotPipeline
+from src.core.planner import Planner
+from src.core.router import Router
+from src.core.scheduler import AdmissionController
+from src.core.sql_generator import SQLGenerator
+from src.core.sql_repair import SQLRepairer
+from src.core.validator import Validator
+
+BAD_SQL = "SELECT store_id, SUM(revenue) AS net_sales FROM fct_sales GROUP BY 1 LIMIT 100"
+FIXED_SQL = "SELECT store_id, SUM(net_sales) AS net_sales FROM fct_sales GROUP BY 1 LIMIT 100"
+CTX = SecurityContext(tenant_id="tenant_123", user_id="u1", role="admin")
+
+
+@pytest.fixture
+def pipeline(mock_llm, prompt_loader, duckdb_adapter):
+    generator = SQLGenerator(mock_llm)
+    generator.generate_sql = MagicMock(return_value=BAD_SQL)
+    repair_prompts, repair_users = [], []
+
+    def fake_llm(prompt, **kwargs):
+        repair_prompts.append(prompt)
+        repair_users.append(current_user())
+        return "```sql\n" + FIXED_SQL + "\n```"
+
+    generator.llm = MagicMock()
+    generator.llm.generate_content.side_effect = fake_llm
+    pipeline = CopilotPipeline(
+        router=Router(mock_llm, prompt_loader),
+        planner=Planner(mock_llm, prompt_loader),
+        sql_generator=generator,
+        validator=Validator(db=duckdb_adapter),
+        db=duckdb_adapter,
+        repairer=SQLRepairer(generator, duckdb_adapter),
+        scheduler=AdmissionController(),
+    )
+    pipeline.repair_prompts = repair_prompts
+    pipeline.repair_users = repair_users
+    return pipeline
+
+
+def test_binder_error_is_repaired_then_cached(pipeline):
+    events = {e["event"]: e["data"] for e in pipeline.ask("Show net sales by store", CTX)}
+    assert events["answer"]["status"] == "complete"
+    assert events["repair"]["sql"] == FIXED_SQL and not events["repair"]["cached"]
+    assert events["trace"]["sql"] == FIXED_SQL and events["trace"]["repair"]["attempts"] == 1
+    # The model saw DuckDB's binder error with its candidate columns
+    assert 'Referenced column "revenue" not found' in pipeline.repair_prompts[0]
+    # The repair call ran as the caller, in an LLM slot (route, plan, sql, repair)
+    assert pipeline.repair_users == [CTX] and pipeline.scheduler.llm.stats()["admitted"] == 4
+
+    events = {e["event"]: e["data"] for e in pipeline.ask("Show net sales by store", CTX)}
+    assert events["repair"]["cached"] and len(pipeline.repair_prompts) == 1
+
+    stats = pipeline.repairer.stats()
+    assert (stats["repaired"], stats["cache_hits"], stats["llm_calls"], stats["repair_rate"]) == (1, 1, 1, 1.0)
+    assert stats["added_ms_total"] > 0
+
+
+def test_repair_is_bounded_and_skips_policy_errors(pipeline):
+    pipeline.sql_generator.llm.generate_content.side_effect = lambda prompt, **kwargs: BAD_SQL
+    events = {e["event"]: e["data"] for e in pipeline.ask("Show net sales by store", CTX)}
+    assert events["answer"]["status"] == "error" and "revenue" in events["trace"]["error"]
+    assert pipeline.sql_generator.llm.generate_content.call_count == 1
+    assert pipeline.repairer.stats()["unrepaired"] == 1
+
+    # Validator rejections never reach the model
+    pipeline.sql_generator.generate_sql.return_value = "DELETE FROM fct_sales"
+    events = {e["event"]: e["data"] for e in pipeline.ask("Show net sales by store", CTX)}
+    assert "Security Violation" in events["answer"]["message"]
+    assert pipeline.sql_generator.llm.generate_content.call_count == 1
@@ -0,0 +1,49 @@
+"""
+Import-time budget and lazy start-up of the entry points
+"""
+
+import subprocess
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+from unittest.mock import MagicMock
+import pytest
+from src.core.pipeline import CopilotPipeline
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ["google.generativeai", "duckdb", "sqlglot", "pandas"]
+
+
+@pytest.mark.parametrize("module", ["src.core.pipeline", "src.bootstrap", "src.api.server", "src.core.config"])
+def test_entry_points_do_not_import_heavy_modules(module):
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    env = {"PATH": "", "PYTHONPATH": str(ROOT)}  # no GOOGLE_API_KEY
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_settings_are_loaded_on_first_use(monkeypatch):
+    from src.core import config
+    monkeypatch.setenv("LLM_MODEL", "gemini-test")
+    config.get_settings.cache_clear()
+    try:
+        assert config.settings.LLM_MODEL == "gemini-test"
+        assert config.settings is config.get_settings()
+    finally:
+        config.get_settings.cache_clear()
+
+
+def test_execute_waits_for_background_data(duckdb_adapter, user_ctx):
+    validator = MagicMock()
+    validator.check_cost.return_value = None
+    failed, loaded = Future(), Future()
+    failed.set_exception(RuntimeError("parquet missing"))
+    loaded.set_result(duckdb_adapter)
+
+    pipeline = CopilotPipeline(None, None, None, validator, duckdb_adapter, db_ready=failed)
+    with pytest.raises(RuntimeError, match="parquet missing"):
+        pipeline.execute("SELECT 1 LIMIT 1", user_ctx)
+
+    pipeline = CopilotPipeline(None, None, None, validator, duckdb_adapter, db_ready=loaded)
+    assert pipeline.data_ready
+    assert len(pipeline.execute("SELECT 1 LIMIT 1", user_ctx)["df"]) == 1
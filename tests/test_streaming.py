@@ -0,0 +1,75 @@
+"""
+Unit tests for streamed LLM responses
+Tests incremental JSON field parsing, router early commit, and planner prefetch
+"""
+
+import json
+import pytest
+from src.core.streaming import IncrementalJSONParser
+from src.core.router import Router
+from src.core.planner import Planner
+from src.core.context import SecurityContext
+
+
+class ChunkedLLM:
+    """Streams a fixed JSON response a few characters at a time and records consumption."""
+    def __init__(self, payload, chunk_size=4):
+        self.text = "```json\n" + json.dumps(payload) + "\n```"
+        self.chunk_size = chunk_size
+        self.chunks_consumed = 0
+
+    def generate_content(self, prompt, system_instruction=None, temperature=0.0, response_schema=None):
+        return self.text
+
+    def generate_content_stream(self, prompt, system_instruction=None, temperature=0.0, response_schema=None):
+        for i in range(0, len(self.text), self.chunk_size):
+            self.chunks_consumed += 1
+            yield self.text[i:i + self.chunk_size]
+
+
+def test_parser_surfaces_fields_incrementally():
+    parser = IncrementalJSONParser()
+    text = '{"route": "sql", "limits": {"rows": 10}, "n": 1.5, "ok": true, "q": "a \\"b\\", c"}'
+
+    seen = []
+    for i in range(0, len(text), 3):
+        seen.extend(parser.feed(text[i:i + 3]).keys())
+
+    assert seen == ["route", "limits", "n", "ok", "q"]
+    assert parser.fields == json.loads(text)
+    assert parser.done
+
+
+def test_router_commits_on_route(prompt_loader, user_ctx):
+    llm = ChunkedLLM({"route": "sql", "reason": "metric+time-window+viz " * 20, "clarify_question": None})
+    router = Router(llm, prompt_loader)
+
+    decisions = []
+    timings = {}
+    out = router.route("Show sales", user_ctx=user_ctx, on_route=decisions.append, timings=timings)
+
+    assert out.route == "sql"
+    assert decisions == ["sql"]
+    assert timings["time_to_first_decision_ms"] >= 0
+    # The reason was never read; traces say so
+    assert timings["early_commit"] and out.reason == ""
+    assert llm.chunks_consumed < len(llm.text) / llm.chunk_size, "Router should stop reading after route"
+
+
+def test_router_reads_full_response_for_clarify(prompt_loader, user_ctx):
+    llm = ChunkedLLM({"route": "clarify", "reason": "ambiguous", "clarify_question": "Margin % or $?"})
+    out = Router(llm, prompt_loader).route("What's our margin?", user_ctx=user_ctx)
+
+    assert out.route == "clarify"
+    assert out.clarify_question == "Margin % or $?"
+
+
+def test_planner_starts_prefetch_on_intent(mock_llm, prompt_loader, user_ctx):
+    planner = Planner(mock_llm, prompt_loader)
+    timings = {}
+
+    plan = planner.plan("Show net sales", user_ctx=user_ctx, on_intent=lambda i: f"warmed:{i}", timings=timings)
+
+    assert plan.intent_id == "net_sales"
+    assert timings["prefetch_result"] == "warmed:net_sales"
+    assert "time_to_first_decision_ms" in timings
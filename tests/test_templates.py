@@ -0,0 +1,78 @@
+"""
+Tests for template rendering and the prepared-statement execution path
+"""
+
+from datetime import date
+import pytest
+from src.core.catalog import IntentCatalog
+from src.core.context import SecurityContext
+from src.core.pipeline import CopilotPipeline
+from src.core.templates import TemplateStore, bind_values, inline_values, render_template, sql_literal
+from src.core.validator import Validator
+
+BY_REGION = {
+    "time_grain": "month", "dimension_table": "dim_store", "dimension_column": "region",
+    "dimension_name": "region", "join_key": "store_id",
+}
+VALUES = {"start_date": "2024-01-01", "end_date": "2024-06-30", "row_limit": 100}
+
+
+def test_render_binds_values_and_substitutes_structure():
+    sql = TemplateStore().render("time_series_sales.sql", BY_REGION, bound=["start_date", "end_date", "tenant_id", "row_limit"])
+    assert "DATE_TRUNC('month', s.order_date)" in sql
+    assert "JOIN dim_store d ON d.store_id = s.store_id" in sql
+    assert "s.tenant_id = $tenant_id" in sql
+    assert "BETWEEN $start_date AND $end_date" in sql
+    assert sql.endswith("LIMIT $row_limit")
+    # Optional blocks on unbound parameters and flags are dropped
+    assert "category_filter" not in sql and "returns = 0" not in sql
+
+
+def test_render_rejects_unsafe_structure():
+    with pytest.raises(ValueError, match="time grain"):
+        render_template("DATE_TRUNC({{time_grain}}, x)", {"time_grain": "1; DROP TABLE x"})
+    with pytest.raises(ValueError, match="identifier"):
+        render_template("SELECT {{dimension_column}}", {"dimension_column": "a, secret"})
+
+
+def test_bind_values_coerces_types():
+    bound = bind_values({**VALUES, "category_filter": ("Toys",)})
+    assert bound["start_date"] == date(2024, 1, 1)
+    assert bound["row_limit"] == 100
+    assert bound["category_filter"] == ["Toys"]
+    with pytest.raises(ValueError, match="row_limit"):
+        bind_values({"row_limit": 10**9})
+    with pytest.raises(ValueError, match="Unknown template parameter"):
+        bind_values({"dataset": "x"})
+
+    assert sql_literal("O'Brien") == "'O''Brien'"
+    assert sql_literal([date(2024, 1, 1), 2]) == "[DATE '2024-01-01', 2]"
+
+
+def test_prepared_matches_string_rendered(duckdb_adapter):
+    values = bind_values({**VALUES, "tenant_id": "tenant_123"})
+    sql = TemplateStore().render("time_series_sales.sql", BY_REGION, bound=list(values))
+
+    expected = duckdb_adapter.execute_query(inline_values(sql, values))
+    first = duckdb_adapter.execute_prepared(sql, values)
+    second = duckdb_adapter.execute_prepared(sql, {**values, "row_limit": 3})
+    assert first.equals(expected)
+    assert second.equals(expected.head(3))
+    assert len(duckdb_adapter._prepared_statements(duckdb_adapter._cursor())) == 1
+
+
+def test_execute_template_binds_tenant_from_context(duckdb_adapter):
+    pipeline = CopilotPipeline(None, None, None, Validator(db=duckdb_adapter), duckdb_adapter, catalog=IntentCatalog())
+    ctx = SecurityContext(tenant_id="tenant_123", user_id="u1", role="admin")
+
+    result = pipeline.execute_template("net_sales", {"time_grain": "quarter"}, {**VALUES, "tenant_id": "other"}, ctx)
+    assert len(result["df"]) == 2
+    assert result["cost"] is not None
+
+    other = ctx.model_copy(update={"tenant_id": "tenant_999"})
+    assert pipeline.execute_template("net_sales", {"time_grain": "quarter"}, VALUES, other)["df"].empty
+
+    with pytest.raises(ValueError, match="Missing template parameters"):
+        pipeline.execute_template("net_sales", {"time_grain": "quarter"}, {"row_limit": 5}, ctx)
+    with pytest.raises(ValueError, match="No SQL template"):
+        pipeline.execute_template("inventory_turnover", {}, VALUES, ctx)
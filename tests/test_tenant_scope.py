@@ -0,0 +1,61 @@
+"""
+Tests for tenant isolation through tenant-scoped relations in DuckDB
+"""
+
+import pytest
+from src.core.validator import Validator
+
+COUNT_SQL = "SELECT COUNT(*) AS n FROM fct_sales LIMIT 1"
+
+
+@pytest.fixture
+def two_tenant_db(duckdb_adapter):
+    duckdb_adapter.conn.execute(
+        "INSERT INTO fct_sales SELECT * REPLACE ('tenant_456' AS tenant_id) FROM fct_sales LIMIT 100"
+    )
+    duckdb_adapter.build_rollups()
+    return duckdb_adapter
+
+
+def test_queries_only_see_own_tenant(two_tenant_db):
+    total = two_tenant_db.execute_query(COUNT_SQL)["n"][0]
+    other = two_tenant_db.execute_query(COUNT_SQL, tenant_id="tenant_456")["n"][0]
+    assert other == 100
+    assert two_tenant_db.execute_query(COUNT_SQL, tenant_id="tenant_123")["n"][0] == total - 100
+
+    # A predicate for another tenant cannot widen the scope
+    leak = "SELECT COUNT(*) AS n FROM fct_sales WHERE tenant_id = 'tenant_123' OR 1=1 LIMIT 1"
+    assert two_tenant_db.execute_query(leak, tenant_id="tenant_456")["n"][0] == 100
+    assert two_tenant_db.execute_query(COUNT_SQL, tenant_id="tenant_789")["n"][0] == 0
+
+
+def test_rollups_are_scoped(two_tenant_db):
+    sql = "SELECT SUM(net_sales) AS s FROM fct_sales GROUP BY DATE_TRUNC('month', order_date) LIMIT 100"
+    rewritten, rollup = two_tenant_db.route_to_rollup(sql)
+    assert rollup is not None
+
+    for tenant in ("tenant_123", "tenant_456"):
+        base = two_tenant_db.execute_query(sql, tenant_id=tenant)["s"].sum()
+        assert two_tenant_db.execute_query(rewritten, tenant_id=tenant)["s"].sum() == pytest.approx(base)
+
+
+def test_tenant_cursor_is_cached_and_rebuilt_on_catalog_change(two_tenant_db):
+    cursor = two_tenant_db._tenant_cursor("tenant_456")
+    assert two_tenant_db._tenant_cursor("tenant_456") is cursor
+
+    two_tenant_db.load_parquet("fct_sales", "data/fct_sales.parquet")
+    assert two_tenant_db.execute_query(COUNT_SQL, tenant_id="tenant_456")["n"][0] == 0
+
+
+def test_invalid_tenant_id_rejected(duckdb_adapter):
+    with pytest.raises(ValueError, match="Invalid tenant_id"):
+        duckdb_adapter.execute_query(COUNT_SQL, tenant_id="x' OR '1'='1")
+
+
+def test_scoped_validation_skips_predicate_but_rejects_qualified_tables():
+    validator = Validator()
+    assert validator.validate(COUNT_SQL, tenant_id="tenant_123", tenant_scoped=True)
+    with pytest.raises(ValueError, match="Missing tenant_id filter"):
+        validator.validate(COUNT_SQL, tenant_id="tenant_123")
+    with pytest.raises(ValueError, match="Qualified table names"):
+        validator.validate("SELECT * FROM memory.main.fct_sales LIMIT 1", tenant_id="t1", tenant_scoped=True)
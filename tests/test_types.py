@@ -0,0 +1,34 @@
+"""
+Tests for the core types: typed plan slots, cached schemas, slotted trace, JSON fast path
+"""
+
+import json
+from src.core.types import Dimension, Filter, Measure, Plan, RouterOutput, Trace, dump_json, json_schema
+
+
+def test_plan_slots_are_typed_and_keep_extra_keys():
+    plan = Plan(
+        intent_id="aov", tables=["fct_sales"],
+        measures=[{"name": "aov", "formula": "SUM(net_sales) / COUNT(DISTINCT order_id)", "unit": "USD", "note": "x"}],
+        dimensions=[{"name": "month", "table": "fct_sales", "column": "order_date", "type": "time"}],
+        filters=[{"field": "order_date", "operator": "BETWEEN", "value": ["2024-01-01", "2024-03-31"]}],
+        limits={"rows": 100},
+    )
+    assert isinstance(plan.measures[0], Measure) and isinstance(plan.dimensions[0], Dimension)
+    assert isinstance(plan.filters[0], Filter) and plan.filters[0].value == ["2024-01-01", "2024-03-31"]
+    # Keys the prompt does not define survive a round trip (plan cache, traces)
+    assert Plan.model_validate_json(plan.model_dump_json()) == plan
+    assert plan.model_dump()["measures"][0]["note"] == "x"
+
+
+def test_schemas_cached_and_trace_dumps_without_validation():
+    assert json_schema(Plan) is json_schema(Plan)
+    assert json_schema(RouterOutput) == RouterOutput.model_json_schema()
+    assert {"Measure", "Dimension", "Filter"} <= set(json_schema(Plan)["$defs"])
+
+    plan = Plan(intent_id="net_sales", tables=[], measures=[], dimensions=[], filters=[], limits={"rows": 1})
+    trace = Trace(user_query="q", route="sql", plan=plan, latency_ms=1.5, cost_estimate_usd=0.0)
+    assert not hasattr(trace, "__dict__")
+    data = trace.model_dump()
+    assert data["plan"]["intent_id"] == "net_sales" and data["repair"] is None
+    assert json.loads(dump_json(data)) == data
@@ -0,0 +1,97 @@
+"""
+Tests for result-size-aware chart shaping (LTTB, top-N + Other, time coarsening, pagination)
+"""
+
+import numpy as np
+import pandas as pd
+from src.core.result_shaping import OTHER_LABEL, lttb_indices, paginate, shape_result
+
+
+def reference_lttb(x, y, n_out):
+    # Straightforward per-bucket loop, for comparison with the vectorized version
+    n = len(x)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 1 < n_out - 2:
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        areas = [abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        selected.append(a)
+    return selected + [n - 1]
+
+
+def test_lttb_matches_reference():
+    rng = np.random.default_rng(7)
+    x = np.arange(5_000, dtype=float)
+    y = np.cumsum(rng.normal(size=5_000))
+    picked = lttb_indices(x, y, 200)
+    assert picked.tolist() == reference_lttb(x, y, 200)
+    assert len(picked) == 200 and picked[0] == 0 and picked[-1] == 4_999
+    # Spikes survive down-sampling
+    y[2_345] = 1_000
+    assert 2_345 in lttb_indices(x, y, 200)
+
+
+def test_long_line_is_downsampled_per_series():
+    days = pd.date_range("2020-01-01", periods=2_000, freq="D")
+    df = pd.DataFrame({
+        "order_date": np.tile(days, 2),
+        "region": ["East"] * 2_000 + ["West"] * 2_000,
+        "net_sales": np.arange(4_000, dtype=float),
+    })
+    chart = shape_result(df, max_points=500)["chart"]
+    assert chart["type"] == "line"
+    assert chart["series"] == "region"
+    assert chart["reduction"] == ["lttb"]
+    assert chart["source_points"] == 4_000
+    assert len(chart["points"]) == 500
+    east = [p for p in chart["points"] if p[1] == "East"]
+    assert east[0][0] == "2020-01-01T00:00:00" and len(east) == 250
+
+
+def test_bar_folds_long_tail_into_other():
+    df = pd.DataFrame({"sku": [f"sku_{i}" for i in range(50)], "net_sales": np.arange(50, 0, -1, dtype=float)})
+    chart = shape_result(df)["chart"]
+    assert chart["type"] == "bar"
+    assert len(chart["points"]) == 20
+    assert chart["points"][0] == ["sku_0", 50.0]
+    assert chart["points"][-1] == [OTHER_LABEL, float(sum(range(1, 32)))]
+
+    # Plan.limits.categories overrides the default
+    assert len(shape_result(df, top_n=5)["chart"]["points"]) == 5
+
+
+def test_bar_on_time_axis_coarsens_grain():
+    df = pd.DataFrame({"order_date": pd.date_range("2023-01-01", periods=730, freq="D"), "units": 1})
+    chart = shape_result(df, viz_hint={"type": "bar"}, max_points=50)["chart"]
+    assert chart["type"] == "bar"
+    assert chart["reduction"] == ["aggregated:month"]
+    assert len(chart["points"]) == 24
+    assert chart["points"][0] == ["2023-01-01T00:00:00", 31]
+
+
+def test_viz_hint_and_intent_types():
+    df = pd.DataFrame({"category": ["Toys", "Home"], "net_sales": [1.0, 2.0]})
+    assert shape_result(df, viz_hint={"type": "table"})["chart"] is None
+    assert shape_result(df, viz_types=["table", "bar"])["chart"] is None
+    # A line over categories falls back to bars
+    assert shape_result(df, viz_hint={"type": "line"})["chart"]["type"] == "bar"
+
+    hinted = shape_result(
+        pd.DataFrame({"store_id": ["s1"], "units": [3], "net_sales": [9.0]}),
+        viz_hint={"x_axis": "store_id", "y_axis": "net_sales"},
+    )["chart"]
+    assert (hinted["x"], hinted["y"]) == ("store_id", "net_sales")
+
+
+def test_table_is_paginated():
+    df = pd.DataFrame({"n": range(250)})
+    table = shape_result(df)["table"]
+    assert table == {"page_size": 100, "total_rows": 250, "total_pages": 3}
+    assert paginate(df, 2)["n"].tolist() == list(range(200, 250))
+    assert paginate(df, 3).empty
@@ -0,0 +1,101 @@
+"""
+Tests for the per-tenant answer warm-up (trace log, catalog defaults, budgets, readiness)
+"""
+
+from datetime import date
+from src.core.catalog import IntentCatalog
+from src.core.context import SecurityContext
+from src.core.pipeline import CopilotPipeline
+from src.core.plan_cache import PlanCache
+from src.core.planner import Planner
+from src.core.router import Router
+from src.core.result_cache import ResultCache
+from src.core.types import Plan
+from src.core.validator import Validator
+from src.core.warmup import TraceLog, WarmupScheduler
+
+TODAY = date(2024, 7, 15)
+
+
+def region_plan(start: str, end: str) -> Plan:
+    return Plan(
+        intent_id="net_sales", tables=["fct_sales", "dim_store"],
+        measures=[{"name": "net_sales", "column": "net_sales"}],
+        dimensions=[{"name": "region", "table": "dim_store", "column": "region"}],
+        filters=[], time_window={"grain": "month", "start": start, "end": end}, limits={"rows": 1000},
+    )
+
+
+def build(mock_llm, prompt_loader, duckdb_adapter, tmp_path, **kwargs):
+    pipeline = CopilotPipeline(
+        router=Router(mock_llm, prompt_loader),
+        planner=Planner(mock_llm, prompt_loader, plan_cache=PlanCache(":memory:", catalog_version="v1")),
+        sql_generator=None,
+        validator=Validator(db=duckdb_adapter),
+        db=duckdb_adapter,
+        catalog=IntentCatalog(),
+        result_cache=ResultCache(),
+    )
+    log = TraceLog(str(tmp_path / "traces.jsonl"))
+    return pipeline, log, WarmupScheduler(pipeline, trace_log=log, **kwargs)
+
+
+def test_plan_orders_logged_favourites_then_defaults(mock_llm, prompt_loader, duckdb_adapter, tmp_path):
+    pipeline, log, scheduler = build(mock_llm, prompt_loader, duckdb_adapter, tmp_path, tenants=["tenant_123", "t2"])
+    ctx = SecurityContext(tenant_id="tenant_123", user_id="u1", role="analyst")
+    # Logged in May: "last month" then meant April, and is re-anchored to today
+    for _ in range(3):
+        log.append("Show net sales by region last month", ctx, region_plan("2024-04-01", "2024-04-30"))
+    log.append("Net sales by region in Q1 2024", ctx, region_plan("2024-01-01", "2024-03-31"))
+
+    items = scheduler.plan(today=TODAY)
+    first = items[0]
+    assert (first.tenant_id, first.hits, first.structure["dimension_column"]) == ("tenant_123", 3, "region")
+    assert (first.values["start_date"], first.values["end_date"]) == ("2024-06-01", "2024-06-30")
+    assert (items[1].hits, items[1].values["start_date"]) == (1, "2024-01-01")
+    # Catalog defaults follow, for every tenant
+    assert {i.tenant_id for i in items[2:]} == {"tenant_123", "t2"} and all(i.hits == 0 for i in items[2:])
+    assert len({i.key for i in items}) == len(items)
+
+
+def test_run_fills_caches_within_budget(mock_llm, prompt_loader, duckdb_adapter, tmp_path):
+    pipeline, log, scheduler = build(mock_llm, prompt_loader, duckdb_adapter, tmp_path, role="admin")
+    ctx = SecurityContext(tenant_id="tenant_123", user_id="u1", role="analyst")
+    log.append("Show net sales by region last month", ctx, region_plan("2024-06-01", "2024-06-30"))
+    assert not scheduler.readiness()["ready"]
+
+    report = scheduler.run(today=TODAY)
+    assert report["warmed"] > 0 and report["plans_cached"] == 1 and not report["budget_exhausted"]
+    assert scheduler.readiness()["ready"] and scheduler.run_if_stale() is None
+
+    # The first real ask of the day is served from the caches: cached plan, warmed result, no SQL model
+    scheduler.run()
+    events = {e["event"]: e["data"] for e in pipeline.ask("Show net sales by region last month", ctx)}
+    assert events["answer"]["status"] == "complete"
+    assert events["sql"]["template"] == "net_sales" and events["result"]["cached"]
+
+    # A data refresh makes it stale again; a spent budget stops early
+    duckdb_adapter.data_version += 1
+    assert not scheduler.readiness()["ready"]
+    scheduler.time_budget_s = 0
+    report = scheduler.run_if_stale()
+    assert report["budget_exhausted"] and report["warmed"] == 0
+    # A partial run is not reported ready, and is not retried until the data changes
+    readiness = scheduler.readiness()
+    assert not readiness["ready"] and not readiness["complete"] and scheduler.run_if_stale() is None
+
+
+def test_trace_log_reads_tail_and_rotates(tmp_path):
+    log = TraceLog(str(tmp_path / "traces.jsonl"), max_bytes=4096)
+    ctx = SecurityContext(tenant_id="tenant_123", user_id="u1", role="analyst")
+    plan = region_plan("2024-06-01", "2024-06-30")
+    for n in range(3):
+        log.append(f"question {n}", ctx, plan)
+    assert [r["user_query"] for r in log.read(limit=2)] == ["question 1", "question 2"]
+    assert len(log.read()) == 3
+
+    for n in range(3, 40):
+        log.append(f"question {n}", ctx, plan)
+    # Rotated past max_bytes: older records are dropped, the latest kept
+    kept = TraceLog(str(tmp_path / "traces.jsonl.1")).read() + log.read()
+    assert 0 < len(kept) < 40 and kept[-1]["user_query"] == "question 39"
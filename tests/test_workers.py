@@ -0,0 +1,63 @@
+"""
+Tests for SQL fingerprinting, result shaping and the CPU worker pool
+"""
+
+import pandas as pd
+import pytest
+from src.core.fingerprint import fingerprint_sql
+from src.core.result_shaping import shape_result
+from src.core.workers import CPUWorkerPool, to_ipc, from_ipc
+
+SQL = "SELECT store_id, SUM(net_sales) FROM fct_sales WHERE tenant_id = 't1' GROUP BY 1 LIMIT 10"
+
+
+def test_fingerprint_ignores_formatting_and_constants():
+    exact, structural = fingerprint_sql(SQL)
+    reformatted = "select store_id,\n  sum(net_sales)\nfrom FCT_SALES where tenant_id='t1' group by 1 limit 10"
+    assert fingerprint_sql(reformatted) == (exact, structural)
+
+    other_tenant = fingerprint_sql(SQL.replace("'t1'", "'t2'"))
+    assert other_tenant[0] != exact
+    assert other_tenant[1] == structural
+
+    # GROUP BY ordinals change the query's shape
+    assert fingerprint_sql(SQL.replace("GROUP BY 1", "GROUP BY 2"))[1] != structural
+
+
+def test_shape_result_builds_chart_spec():
+    df = pd.DataFrame({"category": ["Toys", "Home", "Toys"], "net_sales": [1.0, 5.0, 2.0]})
+    shaped = shape_result(df)
+    assert shaped["numeric_columns"] == ["net_sales"]
+    assert shaped["chart"]["type"] == "bar"
+    assert shaped["chart"]["points"] == [["Home", 5.0], ["Toys", 3.0]]
+
+    ts = pd.DataFrame({"month": pd.to_datetime(["2024-02-01", "2024-01-01"]), "units": [2, 1]})
+    chart = shape_result(ts, max_points=1)["chart"]
+    assert chart["type"] == "line"
+    assert chart["points"] == [["2024-01-01T00:00:00", 1]]
+    assert chart["truncated"]
+
+    assert shape_result(pd.DataFrame({"category": ["Toys"]}))["chart"] is None
+
+
+def test_arrow_ipc_round_trip():
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", None], "c": pd.to_datetime(["2024-01-01", "2024-01-02"])})
+    pd.testing.assert_frame_equal(from_ipc(to_ipc(df)), df)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = CPUWorkerPool(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_matches_in_thread_results(pool):
+    assert pool.validate(SQL, tenant_id="t1")
+    with pytest.raises(ValueError, match="Missing tenant_id filter"):
+        pool.validate(SQL, tenant_id="t2")
+
+    assert pool.fingerprint(SQL) == fingerprint_sql(SQL)
+
+    df = pd.DataFrame({"category": ["Toys", "Home"] * 10_000, "net_sales": [1.0, 2.0] * 10_000})
+    assert pool.shape_result(df) == shape_result(df)